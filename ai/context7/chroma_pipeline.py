@@ -12,6 +12,8 @@ import os
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+from ai.utils.tracing import current_span, traced
+
 _CHROMA_AVAILABLE = False
 try:
     import chromadb
@@ -172,6 +174,7 @@ def fetch_top_k_chroma(
         return []
 
 
+@traced("context.retrieve")
 def fetch_top_k(
     query: str,
     k: int = 5,
@@ -185,13 +188,18 @@ def fetch_top_k(
     backward compatibility with rag_pipeline.fetch_top_k.
     """
     chroma_dir = persist_dir or CHROMA_DIR
+    span = current_span()
+    span.set_attribute("retrieval.k", k)
 
     # Try Chroma first
     if _CHROMA_AVAILABLE and chroma_dir.exists():
         results = fetch_top_k_chroma(query, k=k, persist_dir=chroma_dir)
         if results:
+            span.set_attributes({"retrieval.backend": "chroma", "retrieval.results": len(results)})
             return results
 
     # Fallback: keyword-based search
     from ai.context7.rag_pipeline import fetch_top_k as keyword_fetch
-    return keyword_fetch(query, k=k, index_path=index_path)
+    results = keyword_fetch(query, k=k, index_path=index_path)
+    span.set_attributes({"retrieval.backend": "keyword", "retrieval.results": len(results)})
+    return results
@@ -2,6 +2,8 @@
 import json
 from typing import List
 
+from ai.utils.tracing import traced
+
 def load_index(path='ai/context7/index.json'):
     """
     Load the RAG index from JSON file.
@@ -15,6 +17,7 @@ def load_index(path='ai/context7/index.json'):
         # This can happen when jobs run in separate GitHub Actions runners
         return []
 
+@traced("context.keyword_search")
 def fetch_top_k(query: str, k=5, index_path='ai/context7/index.json'):
     docs = load_index(index_path)
     # naive scoring by substring matches (placeholder — replace with vector search)
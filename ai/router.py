@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from ai.plugins.project_scan import analyze_project
 from ai.plugins.cost_checker import check_budget
 from ai.plugins.mode_map import mode_map
+from ai.utils.tracing import start_span
 
 @dataclass
 class RouterDecision:
@@ -39,6 +40,18 @@ def _touches_sensitive_paths(changed_paths):
     return False
 
 def decide_mode(repo_path='.', user_force_mode=None):
+    with start_span("router.decide_mode") as span:
+        decision = _decide_mode(repo_path, user_force_mode)
+        span.set_attributes({
+            "router.mode": decision.mode,
+            "router.reason": decision.reason,
+            "router.enabled_agents": list(decision.enabled_agents),
+            "router.autofix_allowed": decision.autofix_allowed,
+        })
+        return decision
+
+
+def _decide_mode(repo_path, user_force_mode):
     # 1) user override
     if user_force_mode:
         return RouterDecision(
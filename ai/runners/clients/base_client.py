@@ -3,25 +3,63 @@
 Base Client for AI API integrations.
 Defines common interface and utilities for all AI clients.
 """
+import json
 import time
 import os
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
 from ai.utils.models import AIResponse
+from ai.runners.clients.circuit_breaker import (
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_RECOVERY_SECONDS,
+    get_circuit_breaker,
+)
+from ai.runners.clients.latency import get_latency_tracker
+from ai.runners.clients.rate_limiter import (
+    backoff_delay,
+    get_rate_limiter,
+    headers_from,
+    retry_after_from,
+)
+from ai.runners.clients.retry_policy import RetryPolicy
+from ai.utils.metrics import instrument_request
+from ai.utils.timing import timed
+from ai.utils.tracing import SPAN_KIND_CLIENT, current_span, traced
+
+if TYPE_CHECKING:
+    from ai.runners.clients.fault_injection import FaultConfig
+
+# Provider batch jobs: poll interval grows from 30s to at most 10min, give up after 24h
+DEFAULT_BATCH_POLL_SECONDS = 30.0
+MAX_BATCH_POLL_SECONDS = 600.0
+DEFAULT_BATCH_TIMEOUT_SECONDS = 24 * 3600.0
 
 
 @dataclass
 class ClientConfig:
     """Configuration for AI clients."""
-    timeout: int = 60  # seconds
+    timeout: int = 60  # seconds, per request
     max_retries: int = 3
     retry_delay: float = 1.0  # seconds, exponential backoff
+    # Total seconds for one send_prompt call including retries and waits (None = unbounded)
+    retry_deadline: Optional[float] = None
+    # Overrides max_retries / retry_delay / retry_deadline when set
+    retry_policy: Optional[RetryPolicy] = None
     max_tokens: int = 4000
     temperature: float = 0.7
     top_p: float = 1.0
+    # Per-provider quotas shared by every client of that provider (None = unlimited)
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    # Consecutive connection failures before the provider's circuit opens (None = off)
+    circuit_failure_threshold: Optional[int] = DEFAULT_FAILURE_THRESHOLD
+    circuit_recovery_seconds: float = DEFAULT_RECOVERY_SECONDS
+    # Debugging: keep the provider payload in AIResponse.metadata['raw_response']
+    capture_raw_response: bool = False
+    raw_response_max_bytes: int = 16_384
 
 
 class AIClientError(Exception):
@@ -36,7 +74,21 @@ class APIKeyMissingError(AIClientError):
 
 class RateLimitError(AIClientError):
     """API rate limit exceeded."""
-    pass
+
+    def __init__(
+        self,
+        message: str,
+        retry_after: Optional[float] = None,
+        headers: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.headers = headers or {}
+
+    @classmethod
+    def from_exception(cls, message: str, exc: BaseException) -> "RateLimitError":
+        """Wrap an SDK rate-limit error, keeping its retry-after and quota headers."""
+        return cls(message, retry_after=retry_after_from(exc), headers=headers_from(exc))
 
 
 class TokenLimitError(AIClientError):
@@ -49,6 +101,32 @@ class APIConnectionError(AIClientError):
     pass
 
 
+class CircuitOpenError(APIConnectionError):
+    """Provider's circuit breaker is open; the request was not sent."""
+    pass
+
+
+class BatchError(AIClientError):
+    """Provider batch job is unsupported, failed or did not finish in time."""
+    pass
+
+
+def usage_count(usage: Any, name: str) -> int:
+    """Integer usage field from an SDK usage object (0 if absent or not an int)."""
+    value = getattr(usage, name, None)
+    return value if isinstance(value, int) else 0
+
+
+def capture_raw_response(raw_response: Any, max_bytes: int) -> str:
+    """JSON text of a raw provider payload, truncated to ``max_bytes`` (UTF-8)."""
+    text = json.dumps(raw_response, default=repr, ensure_ascii=False)
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    kept = encoded[:max_bytes].decode("utf-8", "ignore")
+    return f"{kept}...[truncated {len(encoded) - max_bytes} bytes]"
+
+
 class AIClient(ABC):
     """
     Abstract base class for AI API clients.
@@ -58,6 +136,11 @@ class AIClient(ABC):
     # Subclasses must define these cost constants (per 1M tokens)
     COST_PER_1M_INPUT: float = 0.0
     COST_PER_1M_OUTPUT: float = 0.0
+    # Prompt-cache pricing relative to COST_PER_1M_INPUT
+    CACHE_READ_MULTIPLIER: float = 1.0
+    CACHE_WRITE_MULTIPLIER: float = 1.0
+    # Price of batch API requests relative to interactive ones
+    BATCH_MULTIPLIER: float = 1.0
 
     def __init__(
         self,
@@ -79,6 +162,8 @@ class AIClient(ABC):
 
         self.model = model or self._get_default_model()
         self.config = config or ClientConfig()
+        # custom_ids of batches submitted by this client, by batch id
+        self._batch_ids: Dict[str, List[str]] = {}
         self._initialize_client()
 
     @abstractmethod
@@ -111,6 +196,9 @@ class AIClient(ABC):
         """
         pass
 
+    @timed("model")
+    @traced("ai.send_prompt", kind=SPAN_KIND_CLIENT)
+    @instrument_request
     def send_prompt(
         self,
         prompt: str,
@@ -121,67 +209,267 @@ class AIClient(ABC):
         """
         Send prompt to AI and get response with retry logic.
 
+        Retries follow ``config.retry_policy`` (default: built from
+        max_retries / retry_delay / retry_deadline). The response's
+        metadata['retry'] records attempts, retries and seconds waited.
+
         Args:
             prompt: The prompt to send
             max_tokens: Maximum tokens to generate
             temperature: Temperature for sampling
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters (timeout: per-request seconds)
 
         Returns:
             AIResponse object
 
         Raises:
-            AIClientError: If request fails after all retries
+            AIClientError: If request fails after all retries or the deadline
         """
         max_tokens = max_tokens or self.config.max_tokens
         temperature = temperature or self.config.temperature
+        span = current_span()
+        span.set_attributes({
+            "gen_ai.system": self.get_agent_name(),
+            "gen_ai.request.model": self.model,
+            "gen_ai.request.max_tokens": max_tokens,
+        })
+
+        limiter = get_rate_limiter(
+            self.get_agent_name(),
+            self.config.requests_per_minute,
+            self.config.tokens_per_minute,
+        )
+        request_tokens = self.estimate_tokens(prompt) + max_tokens
+        breaker = get_circuit_breaker(
+            self.get_agent_name(),
+            self.config.circuit_failure_threshold,
+            self.config.circuit_recovery_seconds,
+        )
 
-        last_error = None
-        for attempt in range(self.config.max_retries):
+        timeout = kwargs.pop('timeout', self.config.timeout)
+        policy = self.config.retry_policy or RetryPolicy.from_config(self.config)
+        retry = policy.start()
+
+        last_error: Optional[Exception] = None
+        while True:
+            # Fail fast while the provider is tripped instead of sleeping through retries
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(
+                    f"{self.get_agent_name()} circuit is open "
+                    f"(retry in {breaker.retry_in:.0f}s): {last_error or 'provider unavailable'}"
+                )
+            retry.attempts += 1
             try:
+                if limiter is not None:
+                    limiter.acquire(request_tokens)
+
                 # Send request
+                sent_at = time.monotonic()
                 raw_response = self._send_request(
                     prompt=prompt,
                     max_tokens=max_tokens,
                     temperature=temperature,
+                    timeout=retry.attempt_timeout(timeout),
                     **kwargs
                 )
 
                 # Parse response
                 ai_response = self._parse_response(raw_response)
+                get_latency_tracker().record(
+                    self.get_agent_name(), self.model, time.monotonic() - sent_at
+                )
+                if limiter is not None:
+                    limiter.record_success()
+                if breaker is not None:
+                    breaker.record_success()
+                ai_response.metadata['retry'] = retry.as_metadata()
+                span.set_attributes({
+                    "gen_ai.response.model": ai_response.model,
+                    "gen_ai.usage.input_tokens": ai_response.input_tokens,
+                    "gen_ai.usage.output_tokens": ai_response.output_tokens,
+                    "ai.cost_usd": ai_response.cost_usd,
+                    "ai.attempts": retry.attempts,
+                })
                 return ai_response
 
             except RateLimitError as e:
                 last_error = e
-                if attempt < self.config.max_retries - 1:
-                    delay = self.config.retry_delay * (2 ** attempt)
-                    print(f"⚠️ Rate limit hit, retrying in {delay}s (attempt {attempt + 1}/{self.config.max_retries})")
-                    time.sleep(delay)
-                    continue
-                raise
+                if breaker is not None:
+                    breaker.release()
+                if limiter is not None:
+                    limiter.record_rate_limited(e.retry_after, e.headers)
+                reason = "Rate limit hit"
 
-            except APIConnectionError as e:
+            except (APIConnectionError, TimeoutError, ConnectionError) as e:
                 last_error = e
-                if attempt < self.config.max_retries - 1:
-                    delay = self.config.retry_delay * (2 ** attempt)
-                    print(f"⚠️ Connection error, retrying in {delay}s (attempt {attempt + 1}/{self.config.max_retries})")
-                    time.sleep(delay)
-                    continue
-                raise
+                if breaker is not None:
+                    breaker.record_failure()
+                reason = "Connection error"
 
             except Exception as e:
-                # Don't retry on other errors
-                raise AIClientError(f"Unexpected error: {e}")
+                last_error = e
+                if breaker is not None:
+                    breaker.release()
+                reason = type(e).__name__
+
+            delay = retry.next_delay(last_error)
+            if delay is None:
+                if isinstance(last_error, AIClientError):
+                    raise last_error
+                raise AIClientError(f"Unexpected error: {last_error}") from last_error
+            print(
+                f"⚠️ {reason}, retrying in {delay:.2f}s "
+                f"(attempt {retry.attempts}/{policy.max_attempts})"
+            )
+            span.add_event("retry", {"reason": reason, "attempt": retry.attempts, "delay_seconds": delay})
+            time.sleep(delay)
+            retry.record_wait(delay)
+
+    # ------------------------------------------------------------------
+    # Provider batch API (asynchronous, discounted; for non-urgent work)
+    # ------------------------------------------------------------------
+
+    def _submit_batch(
+        self,
+        prompts: Dict[str, str],
+        max_tokens: int,
+        temperature: float,
+    ) -> str:
+        """
+        Submit prompts (by custom_id) as one provider batch job.
+        Subclasses with a batch API override this and the two methods below.
+
+        Returns:
+            Provider batch id
+        """
+        raise BatchError(f"{self.__class__.__name__} does not support batch requests")
+
+    def _batch_finished(self, batch_id: str) -> bool:
+        """Whether the provider has finished processing the batch."""
+        raise BatchError(f"{self.__class__.__name__} does not support batch requests")
+
+    def _batch_results(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Results of a finished batch by custom_id: a raw response dict for
+        succeeded requests, an error message string for failed ones.
+        """
+        raise BatchError(f"{self.__class__.__name__} does not support batch requests")
+
+    def supports_batch(self) -> bool:
+        """Whether this client implements the provider batch API."""
+        return type(self)._submit_batch is not AIClient._submit_batch
+
+    def submit_batch(
+        self,
+        prompts: Dict[str, str],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """
+        Queue many prompts into one provider batch job.
 
-        raise AIClientError(f"Failed after {self.config.max_retries} retries: {last_error}")
+        Args:
+            prompts: Prompt per custom_id (e.g. "pr-123"); ids map results back
+            max_tokens: Maximum tokens to generate per prompt
+            temperature: Temperature for sampling
+
+        Returns:
+            Batch id to pass to ``wait_for_batch``
+
+        Raises:
+            BatchError: If the client has no batch API or prompts is empty
+        """
+        if not self.supports_batch():
+            raise BatchError(f"{self.__class__.__name__} does not support batch requests")
+        if not prompts:
+            raise BatchError("Cannot submit an empty batch")
+        batch_id = self._submit_batch(
+            prompts,
+            max_tokens or self.config.max_tokens,
+            temperature or self.config.temperature,
+        )
+        self._batch_ids[batch_id] = list(prompts)
+        return batch_id
+
+    def wait_for_batch(
+        self,
+        batch_id: str,
+        poll_interval: float = DEFAULT_BATCH_POLL_SECONDS,
+        max_poll_interval: float = MAX_BATCH_POLL_SECONDS,
+        timeout: float = DEFAULT_BATCH_TIMEOUT_SECONDS,
+    ) -> Dict[str, AIResponse]:
+        """
+        Poll until the batch finishes, then return its responses by custom_id.
+
+        Polling backs off exponentially (with jitter) from ``poll_interval``
+        up to ``max_poll_interval``; connection errors while polling are
+        retried. Requests that failed inside the batch are returned as
+        AIResponse objects with ``success=False``.
+
+        Raises:
+            BatchError: If the batch has not finished within ``timeout``
+        """
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            try:
+                if self._batch_finished(batch_id):
+                    break
+            except APIConnectionError as e:
+                print(f"⚠️ Batch {batch_id} status check failed, retrying: {e}")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise BatchError(f"Batch {batch_id} did not finish within {timeout:.0f}s")
+            time.sleep(min(backoff_delay(poll_interval, min(attempt, 16)), max_poll_interval, remaining))
+            attempt += 1
+
+        results: Dict[str, AIResponse] = {}
+        for custom_id, raw_response in self._batch_results(batch_id).items():
+            if isinstance(raw_response, str):
+                response = self._failed_response(raw_response)
+            else:
+                response = self._parse_response(raw_response, batch=True)
+            response.metadata['batch_id'] = batch_id
+            results[custom_id] = response
+        for custom_id in self._batch_ids.pop(batch_id, []):
+            if custom_id not in results:
+                results[custom_id] = self._failed_response("No result returned for batch request")
+                results[custom_id].metadata['batch_id'] = batch_id
+        return results
+
+    def run_batch(
+        self,
+        prompts: Dict[str, str],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **wait_kwargs: Any,
+    ) -> Dict[str, AIResponse]:
+        """Submit a batch and wait for its responses (see ``wait_for_batch``)."""
+        batch_id = self.submit_batch(prompts, max_tokens=max_tokens, temperature=temperature)
+        return self.wait_for_batch(batch_id, **wait_kwargs)
+
+    def _failed_response(self, error_message: str) -> AIResponse:
+        """AIResponse for a request that produced no output (nothing billed)."""
+        return AIResponse(
+            agent=self.get_agent_name(),
+            content="",
+            model=self.model,
+            input_tokens=0,
+            output_tokens=0,
+            total_tokens=0,
+            cost_usd=0.0,
+            success=False,
+            error_message=error_message,
+        )
 
-    def _parse_response(self, raw_response: Dict[str, Any]) -> AIResponse:
+    def _parse_response(self, raw_response: Dict[str, Any], batch: bool = False) -> AIResponse:
         """
         Parse raw API response into AIResponse object.
         Subclasses can override for custom parsing.
 
         Args:
             raw_response: Raw response from API
+            batch: Response came from the batch API (discounted pricing)
 
         Returns:
             AIResponse object
@@ -190,8 +478,14 @@ class AIClient(ABC):
         input_tokens = self._extract_input_tokens(raw_response)
         output_tokens = self._extract_output_tokens(raw_response)
         total_tokens = input_tokens + output_tokens
+        cache_read_tokens, cache_write_tokens = self._extract_cache_tokens(raw_response)
+
+        cost = self.calculate_cost(input_tokens, output_tokens, cache_read_tokens, cache_write_tokens, batch=batch)
 
-        cost = self.calculate_cost(input_tokens, output_tokens)
+        # The raw payload (SDK objects included) is dropped unless debugging
+        metadata: Dict[str, Any] = {}
+        if self.config.capture_raw_response:
+            metadata['raw_response'] = capture_raw_response(raw_response, self.config.raw_response_max_bytes)
 
         return AIResponse(
             agent=self.get_agent_name(),
@@ -204,7 +498,9 @@ class AIClient(ABC):
             timestamp=datetime.now(),
             success=True,
             error_message=None,
-            metadata={'raw_response': raw_response}
+            cache_read_tokens=cache_read_tokens,
+            cache_write_tokens=cache_write_tokens,
+            metadata=metadata
         )
 
     @abstractmethod
@@ -222,20 +518,44 @@ class AIClient(ABC):
         """Extract output token count from raw response."""
         pass
 
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+    def _extract_cache_tokens(self, raw_response: Dict[str, Any]) -> Tuple[int, int]:
+        """
+        Extract (cache read, cache write) input token counts from raw response.
+        Clients report them as usage['cache_read_tokens'] / usage['cache_write_tokens'].
+        """
+        usage = raw_response.get('usage') or {}
+        return int(usage.get('cache_read_tokens') or 0), int(usage.get('cache_write_tokens') or 0)
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+        batch: bool = False,
+    ) -> float:
         """
         Calculate cost in USD based on token usage.
 
         Args:
-            input_tokens: Number of input tokens
+            input_tokens: Number of input tokens (including cached ones)
             output_tokens: Number of output tokens
+            cache_read_tokens: Input tokens served from the prompt cache
+            cache_write_tokens: Input tokens written to the prompt cache
+            batch: Tokens were processed by the batch API (BATCH_MULTIPLIER)
 
         Returns:
             Cost in USD
         """
-        input_cost = (input_tokens / 1_000_000) * self.COST_PER_1M_INPUT
+        uncached_tokens = max(0, input_tokens - cache_read_tokens - cache_write_tokens)
+        input_cost = (
+            uncached_tokens
+            + cache_read_tokens * self.CACHE_READ_MULTIPLIER
+            + cache_write_tokens * self.CACHE_WRITE_MULTIPLIER
+        ) / 1_000_000 * self.COST_PER_1M_INPUT
         output_cost = (output_tokens / 1_000_000) * self.COST_PER_1M_OUTPUT
-        return round(input_cost + output_cost, 6)
+        multiplier = self.BATCH_MULTIPLIER if batch else 1.0
+        return round((input_cost + output_cost) * multiplier, 6)
 
     @abstractmethod
     def get_agent_name(self) -> str:
@@ -286,19 +606,20 @@ class AIClient(ABC):
         """
         return 8000  # Conservative default
 
-    def get_cost_estimate(self, prompt: str, max_output_tokens: int) -> float:
+    def get_cost_estimate(self, prompt: str, max_output_tokens: int, batch: bool = False) -> float:
         """
         Estimate cost for a request.
 
         Args:
             prompt: The prompt text
             max_output_tokens: Maximum tokens to generate
+            batch: Estimate batch API pricing
 
         Returns:
             Estimated cost in USD
         """
         input_tokens = self.estimate_tokens(prompt)
-        return self.calculate_cost(input_tokens, max_output_tokens)
+        return self.calculate_cost(input_tokens, max_output_tokens, batch=batch)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(model={self.model})"
@@ -308,14 +629,33 @@ class MockAIClient(AIClient):
     """
     Mock AI client for testing.
     Returns predefined responses without making actual API calls.
+    With ``faults`` set, requests take simulated time and fail at set
+    rates (see fault_injection.FaultConfig) for offline load testing.
     """
 
     COST_PER_1M_INPUT = 0.0
     COST_PER_1M_OUTPUT = 0.0
+    BATCH_MULTIPLIER = 0.5
 
-    def __init__(self, response_text: str = "Mock response", **kwargs):
+    def __init__(
+        self,
+        response_text: str = "Mock response",
+        batch_polls: int = 0,
+        faults: Optional["FaultConfig"] = None,
+        **kwargs
+    ):
+        """
+        Args:
+            response_text: Content of every response
+            batch_polls: Status checks a fake batch stays in progress for
+            faults: Latency, usage and failure model for interactive requests
+        """
         self.response_text = response_text
         self.call_count = 0
+        self.batch_polls = batch_polls
+        self.faults = faults
+        # Fake batch endpoint: batch id -> {'prompts': {...}, 'polls_left': int}
+        self.batches: Dict[str, Dict[str, Any]] = {}
         super().__init__(api_key="mock_key", **kwargs)
 
     def _get_api_key(self) -> str:
@@ -329,14 +669,40 @@ class MockAIClient(AIClient):
 
     def _send_request(self, prompt: str, **kwargs) -> Dict[str, Any]:
         self.call_count += 1
+        output_tokens = self.estimate_tokens(self.response_text)
+        if self.faults is not None:
+            output_tokens = self.faults.simulate(output_tokens, kwargs.get('max_tokens'), kwargs.get('timeout'))
+        return self._mock_response(prompt, output_tokens)
+
+    def _mock_response(self, prompt: str, output_tokens: int) -> Dict[str, Any]:
         return {
             'content': self.response_text,
             'usage': {
                 'input_tokens': self.estimate_tokens(prompt),
-                'output_tokens': self.estimate_tokens(self.response_text),
+                'output_tokens': output_tokens,
             }
         }
 
+    def _submit_batch(self, prompts: Dict[str, str], max_tokens: int, temperature: float) -> str:
+        batch_id = f"mock_batch_{len(self.batches) + 1}"
+        self.batches[batch_id] = {'prompts': dict(prompts), 'polls_left': self.batch_polls}
+        return batch_id
+
+    def _batch_finished(self, batch_id: str) -> bool:
+        batch = self.batches[batch_id]
+        if batch['polls_left'] > 0:
+            batch['polls_left'] -= 1
+            return False
+        return True
+
+    def _batch_results(self, batch_id: str) -> Dict[str, Any]:
+        # Batch results are not subject to injected faults
+        self.call_count += len(self.batches[batch_id]['prompts'])
+        return {
+            custom_id: self._mock_response(prompt, self.estimate_tokens(self.response_text))
+            for custom_id, prompt in self.batches[batch_id]['prompts'].items()
+        }
+
     def _extract_content(self, raw_response: Dict[str, Any]) -> str:
         return raw_response['content']
 
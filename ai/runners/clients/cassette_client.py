@@ -0,0 +1,156 @@
+# ai/runners/clients/cassette_client.py
+"""
+Record/replay for AI provider traffic (see ai/utils/cassette.py).
+
+``CassetteClient`` sits at the ``_send_request`` seam: everything above it
+(retries, rate limiting, circuit breaking, cost, metrics, tracing) runs
+for real in both modes. Responses are stored normalized (content and
+usage), and the provider's model and pricing go in the cassette header,
+so replay needs neither the provider SDK nor an API key.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+from ai.runners.clients.base_client import (
+    AIClient,
+    AIClientError,
+    APIConnectionError,
+    CircuitOpenError,
+    ClientConfig,
+    RateLimitError,
+    TokenLimitError,
+)
+from ai.utils.cassette import Cassette, CassetteError, prompt_digest
+
+PRICING_FIELDS = (
+    "COST_PER_1M_INPUT",
+    "COST_PER_1M_OUTPUT",
+    "CACHE_READ_MULTIPLIER",
+    "CACHE_WRITE_MULTIPLIER",
+    "BATCH_MULTIPLIER",
+)
+_ERRORS = {
+    cls.__name__: cls
+    for cls in (AIClientError, APIConnectionError, CircuitOpenError, RateLimitError, TokenLimitError)
+}
+
+
+def _error_record(error: Exception) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"type": type(error).__name__, "message": str(error)}
+    if isinstance(error, RateLimitError):
+        record["retry_after"] = error.retry_after
+        record["headers"] = {k: str(v) for k, v in error.headers.items()}
+    return record
+
+
+def _raise_recorded(record: Dict[str, Any]) -> None:
+    cls = _ERRORS.get(record["type"], AIClientError)
+    if cls is RateLimitError:
+        raise RateLimitError(record["message"], retry_after=record.get("retry_after"), headers=record.get("headers"))
+    raise cls(record["message"])
+
+
+class CassetteClient(AIClient):
+    """
+    AIClient that records an inner client's provider calls, or replays them.
+
+    Use ``CassetteClient(cassette, inner)`` to record and
+    ``CassetteClient.replay(cassette, agent)`` to replay.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        inner: Optional[AIClient] = None,
+        agent: Optional[str] = None,
+        config: Optional[ClientConfig] = None,
+    ):
+        self.cassette = cassette
+        self.inner = inner
+        if cassette.recording:
+            if inner is None:
+                raise ValueError("Recording needs the real client to wrap")
+            self.agent = inner.get_agent_name()
+            cassette.scrubber.add(inner.api_key)
+            cassette.clients[self.agent] = {
+                "model": inner.model,
+                "pricing": {name: getattr(inner, name) for name in PRICING_FIELDS},
+            }
+        else:
+            self.agent = agent or (inner.get_agent_name() if inner is not None else None)
+            if self.agent not in cassette.clients:
+                raise CassetteError(f"Cassette {cassette.path} has no recordings for agent {self.agent!r}")
+        info = cassette.clients[self.agent]
+        for name, value in info["pricing"].items():
+            setattr(self, name, value)
+        super().__init__(api_key="cassette", model=info["model"], config=config or (inner.config if inner else None))
+
+    @classmethod
+    def replay(cls, cassette: Cassette, agent: str, config: Optional[ClientConfig] = None) -> "CassetteClient":
+        return cls(cassette, agent=agent, config=config)
+
+    def __repr__(self) -> str:
+        return f"CassetteClient({self.cassette.mode}, {self.agent}, model={self.model})"
+
+    def _get_api_key(self) -> str:
+        return "cassette"
+
+    def _get_default_model(self) -> str:
+        return self.cassette.clients[self.agent]["model"]
+
+    def _initialize_client(self):
+        self.client = None
+
+    def get_agent_name(self) -> str:
+        return self.agent
+
+    def _request(self, prompt: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # Match on what determines the answer; the timeout shrinks with retries
+        request = {k: v for k, v in kwargs.items() if k != "timeout"}
+        request["prompt_sha256"] = prompt_digest(self.cassette.scrubber.scrub_text(str(prompt)))
+        return request
+
+    def _send_request(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        request = self._request(prompt, kwargs)
+        target = f"{self.agent}/{self.model}"
+        if not self.cassette.recording:
+            interaction = self.cassette.play("ai", target, "send_request", request)
+            if "error" in interaction:
+                _raise_recorded(interaction["error"])
+            return interaction["response"]
+
+        started = time.monotonic()
+        try:
+            raw = self.inner._send_request(prompt, **kwargs)
+        except AIClientError as e:
+            self.cassette.record("ai", target, "send_request", request, time.monotonic() - started, error=_error_record(e))
+            raise
+        cache_read, cache_write = self.inner._extract_cache_tokens(raw)
+        response = {
+            "content": self.inner._extract_content(raw),
+            "usage": {
+                "input_tokens": self.inner._extract_input_tokens(raw),
+                "output_tokens": self.inner._extract_output_tokens(raw),
+                "cache_read_tokens": cache_read,
+                "cache_write_tokens": cache_write,
+            },
+        }
+        self.cassette.record("ai", target, "send_request", request, time.monotonic() - started, response)
+        return response
+
+    def _extract_content(self, raw_response: Dict[str, Any]) -> str:
+        return raw_response["content"]
+
+    def _extract_input_tokens(self, raw_response: Dict[str, Any]) -> int:
+        return raw_response["usage"]["input_tokens"]
+
+    def _extract_output_tokens(self, raw_response: Dict[str, Any]) -> int:
+        return raw_response["usage"]["output_tokens"]
+
+    def estimate_tokens(self, text: str) -> int:
+        return self.inner.estimate_tokens(text) if self.inner is not None else super().estimate_tokens(text)
+
+    def get_model_token_limit(self) -> int:
+        return self.inner.get_model_token_limit() if self.inner is not None else super().get_model_token_limit()
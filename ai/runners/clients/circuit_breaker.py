@@ -0,0 +1,128 @@
+# ai/runners/clients/circuit_breaker.py
+"""
+Per-provider circuit breaker.
+
+CLOSED     requests flow; consecutive connection failures are counted
+OPEN       requests fail fast (no retries, no sleeps) until the recovery
+           timeout passes
+HALF_OPEN  one probe request is let through; success closes the circuit,
+           failure opens it again
+
+Breakers are shared per provider across all clients and threads in the
+process, so once one worker trips Claude every other worker fails over
+immediately instead of spending its own retries discovering the outage.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_SECONDS = 30.0
+
+
+class CircuitBreaker:
+    """Three-state breaker for one provider."""
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        recovery_seconds: float = DEFAULT_RECOVERY_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until an open circuit admits a probe (0 if not open)."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.recovery_seconds - time.monotonic())
+
+    def _maybe_half_open(self, now: float) -> None:
+        if self._state == OPEN and now - self._opened_at >= self.recovery_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent now.
+
+        In HALF_OPEN only one caller at a time gets True (the probe); it must
+        report back via ``record_success``, ``record_failure`` or ``release``.
+        """
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a provider-side failure (connection error, overload, timeout)."""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release(self) -> None:
+        """Finish a request whose outcome says nothing about provider health."""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(
+    provider: str,
+    failure_threshold: Optional[int] = DEFAULT_FAILURE_THRESHOLD,
+    recovery_seconds: float = DEFAULT_RECOVERY_SECONDS,
+) -> Optional[CircuitBreaker]:
+    """
+    Shared breaker for a provider, created on first use.
+
+    Returns None when ``failure_threshold`` is None (breaker disabled).
+    """
+    if failure_threshold is None:
+        return None
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(failure_threshold, recovery_seconds)
+            _BREAKERS[provider] = breaker
+        return breaker
+
+
+def reset_circuit_breakers() -> None:
+    """Forget all shared breakers (tests, config reloads)."""
+    with _BREAKERS_LOCK:
+        _BREAKERS.clear()
@@ -17,7 +17,9 @@ from ai.runners.clients.base_client import (
     RateLimitError,
     APIConnectionError,
     TokenLimitError,
+    usage_count,
 )
+from ai.utils.models import CacheablePrompt
 
 
 class ClaudeClient(AIClient):
@@ -30,11 +32,16 @@ class ClaudeClient(AIClient):
     Pricing (as of 2026-01):
     - Input: $3 per 1M tokens
     - Output: $15 per 1M tokens
+    - Prompt cache: reads 0.1x input, writes 1.25x input (5-minute TTL)
+    - Message Batches API: 50% off input and output
     """
 
     # Cost constants (USD per 1M tokens)
     COST_PER_1M_INPUT = 3.0
     COST_PER_1M_OUTPUT = 15.0
+    CACHE_READ_MULTIPLIER = 0.1
+    CACHE_WRITE_MULTIPLIER = 1.25
+    BATCH_MULTIPLIER = 0.5
 
     def __init__(
         self,
@@ -85,26 +92,16 @@ class ClaudeClient(AIClient):
                 model=self.model,
                 max_tokens=kwargs.get('max_tokens', self.config.max_tokens),
                 temperature=kwargs.get('temperature', self.config.temperature),
+                timeout=kwargs.get('timeout', self.config.timeout),
                 messages=[
-                    {"role": "user", "content": prompt}
+                    {"role": "user", "content": self._message_content(prompt)}
                 ]
             )
 
-            # Convert to dict for consistent handling
-            return {
-                'id': response.id,
-                'model': response.model,
-                'role': response.role,
-                'content': response.content,
-                'stop_reason': response.stop_reason,
-                'usage': {
-                    'input_tokens': response.usage.input_tokens,
-                    'output_tokens': response.usage.output_tokens,
-                }
-            }
+            return self._message_to_dict(response)
 
         except AnthropicRateLimitError as e:
-            raise RateLimitError(f"Claude API rate limit exceeded: {e}")
+            raise RateLimitError.from_exception(f"Claude API rate limit exceeded: {e}", e)
 
         except APIError as e:
             if "overloaded" in str(e).lower():
@@ -117,6 +114,88 @@ class ClaudeClient(AIClient):
         except Exception as e:
             raise APIConnectionError(f"Unexpected error calling Claude API: {e}")
 
+    def _submit_batch(self, prompts: Dict[str, str], max_tokens: int, temperature: float) -> str:
+        """Submit prompts to the Message Batches API."""
+        requests = [
+            {
+                "custom_id": custom_id,
+                "params": {
+                    "model": self.model,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                    "messages": [{"role": "user", "content": self._message_content(prompt)}],
+                },
+            }
+            for custom_id, prompt in prompts.items()
+        ]
+        try:
+            return self.client.messages.batches.create(requests=requests).id
+        except AnthropicRateLimitError as e:
+            raise RateLimitError.from_exception(f"Claude API rate limit exceeded: {e}", e)
+        except Exception as e:
+            raise APIConnectionError(f"Claude batch submission failed: {e}")
+
+    def _batch_finished(self, batch_id: str) -> bool:
+        try:
+            return self.client.messages.batches.retrieve(batch_id).processing_status == "ended"
+        except Exception as e:
+            raise APIConnectionError(f"Claude batch status check failed: {e}")
+
+    def _batch_results(self, batch_id: str) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        try:
+            for entry in self.client.messages.batches.results(batch_id):
+                result = entry.result
+                if result.type == "succeeded":
+                    results[entry.custom_id] = self._message_to_dict(result.message)
+                else:
+                    error = getattr(result, 'error', None)
+                    results[entry.custom_id] = f"Batch request {result.type}: {error}" if error else f"Batch request {result.type}"
+        except Exception as e:
+            raise APIConnectionError(f"Claude batch results unavailable: {e}")
+        return results
+
+    @staticmethod
+    def _message_to_dict(response: Any) -> Dict[str, Any]:
+        """Convert an SDK Message to the raw response dict."""
+        # Input tokens reported by the API exclude cached ones; fold them back in
+        cache_read = usage_count(response.usage, 'cache_read_input_tokens')
+        cache_write = usage_count(response.usage, 'cache_creation_input_tokens')
+
+        return {
+            'id': response.id,
+            'model': response.model,
+            'role': response.role,
+            'content': response.content,
+            'stop_reason': response.stop_reason,
+            'usage': {
+                'input_tokens': response.usage.input_tokens + cache_read + cache_write,
+                'output_tokens': response.usage.output_tokens,
+                'cache_read_tokens': cache_read,
+                'cache_write_tokens': cache_write,
+            }
+        }
+
+    @staticmethod
+    def _message_content(prompt: str) -> Any:
+        """
+        Message content for a prompt.
+
+        A CacheablePrompt is sent as two text blocks with a cache breakpoint
+        after the static prefix, so repeat calls read the prefix from the
+        prompt cache. Plain strings are sent unchanged.
+        """
+        if not isinstance(prompt, CacheablePrompt) or not prompt.prefix:
+            return str(prompt)
+        blocks = [{
+            "type": "text",
+            "text": prompt.prefix,
+            "cache_control": {"type": "ephemeral"},
+        }]
+        if prompt.suffix:
+            blocks.append({"type": "text", "text": prompt.suffix})
+        return blocks
+
     def _extract_content(self, raw_response: Dict[str, Any]) -> str:
         """
         Extract text content from Claude response.
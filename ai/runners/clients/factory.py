@@ -0,0 +1,42 @@
+# ai/runners/clients/factory.py
+"""
+Client factory.
+
+Maps agent names to their client classes. Imports are lazy so that a
+missing optional SDK only fails the agent that needs it.
+"""
+from __future__ import annotations
+
+import importlib
+from typing import Any, Dict, Tuple
+
+from ai.runners.clients.base_client import AIClient
+
+# agent -> (module path, class name)
+CLIENT_CLASSES: Dict[str, Tuple[str, str]] = {
+    'claude': ('ai.runners.clients.claude_client', 'ClaudeClient'),
+    'gemini': ('ai.runners.clients.gemini_client', 'GeminiClient'),
+    'perplexity': ('ai.runners.clients.perplexity_client', 'PerplexityClient'),
+    'gpt': ('ai.runners.clients.gpt_client', 'GPTClient'),
+    'mock': ('ai.runners.clients.base_client', 'MockAIClient'),
+}
+
+
+def get_client_class(agent: str) -> type:
+    """
+    Resolve the client class for an agent.
+
+    Raises:
+        ValueError: If the agent is unknown
+        ImportError: If the agent's SDK is not installed
+    """
+    if agent not in CLIENT_CLASSES:
+        raise ValueError(f"Unknown agent: {agent} (expected one of {', '.join(CLIENT_CLASSES)})")
+    module_path, class_name = CLIENT_CLASSES[agent]
+    module = importlib.import_module(module_path)
+    return getattr(module, class_name)
+
+
+def create_client(agent: str, **kwargs: Any) -> AIClient:
+    """Instantiate the client for an agent (kwargs are passed to the constructor)."""
+    return get_client_class(agent)(**kwargs)
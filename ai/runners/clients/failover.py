@@ -0,0 +1,136 @@
+# ai/runners/clients/failover.py
+"""
+Provider failover.
+
+``FailoverClient`` wraps a primary client and the fallback agents declared
+for it in ai_team.yml (``fallback_agents``). A request goes to the first
+candidate whose circuit breaker is not open; if the primary fails with a
+connection-level error (overload, timeout, tripped circuit) the next
+candidate is tried. Fallback clients are created lazily, so an unused
+fallback never needs its SDK or API key.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+
+from ai.runners.clients.base_client import (
+    AIClient,
+    APIConnectionError,
+    CircuitOpenError,
+    ClientConfig,
+)
+from ai.runners.clients.circuit_breaker import OPEN, get_circuit_breaker
+from ai.utils.models import AIResponse
+from ai.utils.team_config import fallback_agents
+from ai.utils.timing import timed
+from ai.utils.tracing import current_span, traced
+
+
+class FailoverClient:
+    """
+    AIClient-compatible wrapper that reroutes around tripped providers.
+
+    Attributes not defined here (model, config, get_cost_estimate, ...) are
+    delegated to the primary client.
+    """
+
+    def __init__(
+        self,
+        primary: AIClient,
+        fallbacks: List[str],
+        client_factory: Optional[Callable[..., AIClient]] = None,
+        config: Optional[ClientConfig] = None,
+    ):
+        if client_factory is None:
+            from ai.runners.clients.factory import create_client
+            client_factory = create_client
+        self.primary = primary
+        self.fallbacks = list(fallbacks)
+        self._factory = client_factory
+        self._config = config
+        self._clients: Dict[str, Optional[AIClient]] = {primary.get_agent_name(): primary}
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "primary":
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    def __repr__(self) -> str:
+        return f"FailoverClient({self.primary!r} -> {', '.join(self.fallbacks)})"
+
+    def _client_for(self, agent: str) -> Optional[AIClient]:
+        if agent not in self._clients:
+            try:
+                kwargs = {"config": self._config} if self._config is not None else {}
+                self._clients[agent] = self._factory(agent, **kwargs)
+            except Exception as e:
+                print(f"⚠️ Failover to {agent} unavailable: {e}")
+                self._clients[agent] = None
+        return self._clients[agent]
+
+    @timed("model")
+    @traced("ai.failover")
+    def send_prompt(self, prompt: str, **kwargs: Any) -> AIResponse:
+        """
+        Send to the first healthy candidate.
+
+        Raises:
+            APIConnectionError: If every candidate is tripped or failed
+            AIClientError: Non-connection errors from a candidate are raised
+                as-is (they would fail on any provider)
+        """
+        primary_agent = self.primary.get_agent_name()
+        last_error: Optional[Exception] = None
+
+        for agent in [primary_agent] + self.fallbacks:
+            client = self._client_for(agent)
+            if client is None:
+                continue
+            breaker = get_circuit_breaker(
+                agent,
+                client.config.circuit_failure_threshold,
+                client.config.circuit_recovery_seconds,
+            )
+            if breaker is not None and breaker.state == OPEN:
+                last_error = last_error or CircuitOpenError(f"{agent} circuit is open")
+                continue
+            try:
+                response = client.send_prompt(prompt, **kwargs)
+            except APIConnectionError as e:
+                last_error = e
+                print(f"⚠️ {agent} unavailable: {e}")
+                continue
+            if agent != primary_agent:
+                response.metadata['failover_from'] = primary_agent
+                current_span().set_attribute("ai.failover_from", primary_agent)
+            return response
+
+        raise APIConnectionError(f"All providers unavailable ({primary_agent} -> {', '.join(self.fallbacks)}): {last_error}")
+
+
+def with_failover(
+    client: AIClient,
+    agent: Optional[str] = None,
+    config: Optional[ClientConfig] = None,
+) -> Any:
+    """
+    Wrap ``client`` with the failover policy from ai_team.yml.
+
+    Returns the client unchanged when no fallback agents are declared.
+    """
+    fallbacks = fallback_agents(agent or client.get_agent_name())
+    if not fallbacks:
+        return client
+    return FailoverClient(client, fallbacks, config=config)
+
+
+AGENT_LABELS = {"claude": "Claude", "gemini": "Gemini", "perplexity": "Perplexity", "gpt": "GPT"}
+
+
+def responder_label(response: AIResponse) -> str:
+    """Footer attribution for a response: the agent that answered, noting any failover."""
+    label = f"{AGENT_LABELS.get(response.agent, response.agent)} ({response.model})"
+    primary = response.metadata.get("failover_from")
+    if primary:
+        label += f", failover from {AGENT_LABELS.get(primary, primary)}"
+    return label
@@ -0,0 +1,205 @@
+# ai/runners/clients/fault_injection.py
+"""
+Simulated provider behaviour for MockAIClient.
+
+A ``FaultConfig`` makes mock requests take realistic time (sampled time to
+first token plus output tokens at a fixed generation speed), report
+sampled completion lengths, and fail at set rates with the same errors
+the real clients raise: rate limits (with retry-after), connection
+errors and timeouts. That lets retries, rate limiting, circuit breaking,
+hedging and pipeline concurrency be load-tested offline.
+
+    client = MockAIClient(faults=FaultConfig(
+        latency=Distribution.lognormal(median=1.5, sigma=0.5),
+        tokens_per_second=80,
+        output_tokens=Distribution.parse("lognormal:median=600,sigma=0.4"),
+        rate_limit_rate=0.05,
+        connection_error_rate=0.01,
+        seed=7,
+    ))
+"""
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from ai.runners.clients.base_client import APIConnectionError, RateLimitError
+
+# Parameter names of each distribution, in positional order for parse()
+DISTRIBUTIONS: Dict[str, tuple] = {
+    "fixed": ("value",),
+    "uniform": ("low", "high"),
+    "normal": ("mean", "stdev"),
+    "lognormal": ("median", "sigma"),
+    "exponential": ("mean",),
+}
+# z-score of the 99th percentile of a standard normal
+_Z99 = 2.326
+
+
+@dataclass
+class Distribution:
+    """A non-negative random variable (seconds or token counts)."""
+    kind: str
+    params: Dict[str, float]
+
+    def __post_init__(self):
+        if self.kind not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution {self.kind!r} (expected one of {', '.join(DISTRIBUTIONS)})")
+        expected = set(DISTRIBUTIONS[self.kind])
+        if set(self.params) != expected:
+            raise ValueError(f"{self.kind} distribution takes {', '.join(DISTRIBUTIONS[self.kind])}")
+
+    @classmethod
+    def fixed(cls, value: float) -> "Distribution":
+        return cls("fixed", {"value": value})
+
+    @classmethod
+    def uniform(cls, low: float, high: float) -> "Distribution":
+        return cls("uniform", {"low": low, "high": high})
+
+    @classmethod
+    def normal(cls, mean: float, stdev: float) -> "Distribution":
+        return cls("normal", {"mean": mean, "stdev": stdev})
+
+    @classmethod
+    def lognormal(cls, median: float, sigma: float) -> "Distribution":
+        return cls("lognormal", {"median": median, "sigma": sigma})
+
+    @classmethod
+    def lognormal_from_percentiles(cls, p50: float, p99: float) -> "Distribution":
+        """Lognormal with the given median and 99th percentile (a long-tailed latency)."""
+        if not 0 < p50 <= p99:
+            raise ValueError("need 0 < p50 <= p99")
+        return cls.lognormal(p50, math.log(p99 / p50) / _Z99)
+
+    @classmethod
+    def exponential(cls, mean: float) -> "Distribution":
+        return cls("exponential", {"mean": mean})
+
+    @classmethod
+    def parse(cls, spec: str) -> "Distribution":
+        """
+        Parse ``kind:name=value,...`` (or positional ``kind:v1,v2``); a bare
+        number is a fixed value. E.g. ``lognormal:median=2,sigma=0.5``.
+        """
+        spec = spec.strip()
+        kind, _, args = spec.partition(":")
+        if not args:
+            try:
+                return cls.fixed(float(kind))
+            except ValueError:
+                raise ValueError(f"Invalid distribution spec: {spec!r}") from None
+        names = DISTRIBUTIONS.get(kind)
+        if names is None:
+            raise ValueError(f"Unknown distribution {kind!r} in {spec!r}")
+        params: Dict[str, float] = {}
+        for i, part in enumerate(args.split(",")):
+            name, sep, value = part.partition("=")
+            if not sep:
+                name, value = (names[i] if i < len(names) else "?"), part
+            try:
+                params[name.strip()] = float(value)
+            except ValueError:
+                raise ValueError(f"Invalid distribution spec: {spec!r}") from None
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            value = p["value"]
+        elif self.kind == "uniform":
+            value = rng.uniform(p["low"], p["high"])
+        elif self.kind == "normal":
+            value = rng.gauss(p["mean"], p["stdev"])
+        elif self.kind == "lognormal":
+            value = p["median"] * math.exp(rng.gauss(0.0, p["sigma"]))
+        else:
+            value = rng.expovariate(1.0 / p["mean"]) if p["mean"] > 0 else 0.0
+        return max(0.0, value)
+
+    def __str__(self) -> str:
+        return f"{self.kind}:" + ",".join(f"{k}={v:g}" for k, v in self.params.items())
+
+
+@dataclass
+class FaultConfig:
+    """
+    Latency, usage and failure model for MockAIClient requests.
+
+    Rates are per request attempt, so retried attempts can fail again.
+    ``injected`` counts the faults raised so far by kind.
+    """
+    latency: Optional[Distribution] = None  # time to first token, seconds
+    tokens_per_second: Optional[float] = None  # output generation speed (None = instant)
+    output_tokens: Optional[Distribution] = None  # completion length (None = from response text)
+    rate_limit_rate: float = 0.0
+    connection_error_rate: float = 0.0
+    retry_after: Optional[float] = None  # advertised on injected rate limits
+    seed: Optional[int] = None
+    injected: Dict[str, int] = field(default_factory=dict, init=False)
+
+    def __post_init__(self):
+        for name in ("rate_limit_rate", "connection_error_rate"):
+            if not 0.0 <= getattr(self, name) <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+        if self.tokens_per_second is not None and self.tokens_per_second <= 0:
+            raise ValueError("tokens_per_second must be positive")
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def _count(self, kind: str) -> None:
+        with self._lock:
+            self.injected[kind] = self.injected.get(kind, 0) + 1
+
+    def simulate(self, output_tokens: int, max_tokens: Optional[int] = None, timeout: Optional[float] = None) -> int:
+        """
+        Play out one request attempt: sleep for its simulated duration or
+        raise the injected fault.
+
+        Args:
+            output_tokens: Completion length when no distribution is set
+            max_tokens: Cap on the sampled completion length
+            timeout: Per-request timeout; slower attempts raise after it
+
+        Returns:
+            Output tokens to report in usage
+
+        Raises:
+            RateLimitError: Injected rate limit (immediately, like a 429)
+            APIConnectionError: Injected connection error or timeout
+        """
+        with self._lock:
+            rate_limited = self._rng.random() < self.rate_limit_rate
+            disconnected = self._rng.random() < self.connection_error_rate
+            first_token = self.latency.sample(self._rng) if self.latency else 0.0
+            if self.output_tokens is not None:
+                output_tokens = max(1, round(self.output_tokens.sample(self._rng)))
+
+        if rate_limited:
+            self._count("rate_limit")
+            headers = {"retry-after": str(self.retry_after)} if self.retry_after is not None else {}
+            raise RateLimitError("Mock rate limit exceeded", retry_after=self.retry_after, headers=headers)
+
+        if max_tokens:
+            output_tokens = min(output_tokens, max_tokens)
+        duration = first_token
+        if self.tokens_per_second:
+            duration += output_tokens / self.tokens_per_second
+        if timeout is not None and duration > timeout:
+            time.sleep(timeout)
+            self._count("timeout")
+            raise APIConnectionError(f"Mock request timed out after {timeout:.1f}s")
+
+        if disconnected:
+            # The connection drops before the first byte arrives
+            time.sleep(first_token)
+            self._count("connection")
+            raise APIConnectionError("Mock connection reset by peer")
+
+        time.sleep(duration)
+        return output_tokens
@@ -67,6 +67,7 @@ class GeminiClient(AIClient):
             response = self.client.generate_content(
                 prompt,
                 generation_config=generation_config,
+                request_options={"timeout": kwargs.get('timeout', self.config.timeout)},
             )
 
             input_tokens = self.estimate_tokens(prompt)
@@ -90,7 +91,7 @@ class GeminiClient(AIClient):
             }
 
         except ResourceExhausted as e:
-            raise RateLimitError(f"Gemini API rate limit exceeded: {e}")
+            raise RateLimitError.from_exception(f"Gemini API rate limit exceeded: {e}", e)
         except ServiceUnavailable as e:
             raise APIConnectionError(f"Gemini API unavailable: {e}")
         except Exception as e:
@@ -3,6 +3,7 @@
 GPT API Client using OpenAI SDK.
 Implements AIClient interface for GPT models.
 """
+import json
 import os
 from typing import Optional, Dict, Any
 
@@ -19,6 +20,7 @@ from ai.runners.clients.base_client import (
     ClientConfig,
     RateLimitError,
     APIConnectionError,
+    usage_count,
 )
 
 
@@ -32,10 +34,17 @@ class GPTClient(AIClient):
     Pricing (as of 2026):
     - gpt-4o: $2.50 per 1M input tokens, $10 per 1M output tokens
     - gpt-4o-mini: $0.15 per 1M input, $0.60 per 1M output
+    - Cached input (automatic for repeated prompt prefixes): 0.5x input
+    - Batch API: 50% off input and output
     """
 
     COST_PER_1M_INPUT = 2.50
     COST_PER_1M_OUTPUT = 10.0
+    CACHE_READ_MULTIPLIER = 0.5
+    BATCH_MULTIPLIER = 0.5
+
+    # Terminal batch statuses
+    BATCH_DONE_STATUSES = ("completed", "failed", "expired", "cancelled")
 
     def _get_api_key(self) -> Optional[str]:
         return os.getenv('OPENAI_API_KEY') or os.getenv('GPT_API_KEY')
@@ -53,9 +62,10 @@ class GPTClient(AIClient):
 
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[{"role": "user", "content": str(prompt)}],
                 max_tokens=max_tokens,
                 temperature=temperature,
+                timeout=kwargs.get('timeout', self.config.timeout),
             )
 
             choice = response.choices[0]
@@ -63,23 +73,100 @@ class GPTClient(AIClient):
 
             input_tokens = response.usage.prompt_tokens if response.usage else self.estimate_tokens(prompt)
             output_tokens = response.usage.completion_tokens if response.usage else self.estimate_tokens(content)
+            # OpenAI caches repeated prompt prefixes automatically; builders put
+            # the static template first so it is the shared prefix
+            details = getattr(response.usage, 'prompt_tokens_details', None) if response.usage else None
+            cached_tokens = usage_count(details, 'cached_tokens')
 
             return {
                 'content': content,
                 'usage': {
                     'input_tokens': input_tokens,
                     'output_tokens': output_tokens,
+                    'cache_read_tokens': cached_tokens,
                 },
                 'finish_reason': choice.finish_reason or 'stop',
             }
 
         except OpenAIRateLimitError as e:
-            raise RateLimitError(f"OpenAI API rate limit exceeded: {e}")
+            raise RateLimitError.from_exception(f"OpenAI API rate limit exceeded: {e}", e)
         except OpenAIConnectionError as e:
             raise APIConnectionError(f"OpenAI API connection error: {e}")
         except Exception as e:
             raise APIConnectionError(f"Unexpected error calling OpenAI API: {e}")
 
+    def _submit_batch(self, prompts: Dict[str, str], max_tokens: int, temperature: float) -> str:
+        """Upload prompts as a JSONL file and create a chat-completions batch."""
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": [{"role": "user", "content": str(prompt)}],
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                },
+            })
+            for custom_id, prompt in prompts.items()
+        ]
+        try:
+            input_file = self.client.files.create(
+                file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch",
+            )
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+            )
+            return batch.id
+        except OpenAIRateLimitError as e:
+            raise RateLimitError.from_exception(f"OpenAI API rate limit exceeded: {e}", e)
+        except Exception as e:
+            raise APIConnectionError(f"OpenAI batch submission failed: {e}")
+
+    def _batch_finished(self, batch_id: str) -> bool:
+        try:
+            return self.client.batches.retrieve(batch_id).status in self.BATCH_DONE_STATUSES
+        except Exception as e:
+            raise APIConnectionError(f"OpenAI batch status check failed: {e}")
+
+    def _batch_results(self, batch_id: str) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        try:
+            batch = self.client.batches.retrieve(batch_id)
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                for line in self.client.files.content(file_id).text.splitlines():
+                    if line.strip():
+                        item = json.loads(line)
+                        results[item["custom_id"]] = self._batch_item_to_dict(item)
+        except Exception as e:
+            raise APIConnectionError(f"OpenAI batch results unavailable: {e}")
+        return results
+
+    @staticmethod
+    def _batch_item_to_dict(item: Dict[str, Any]) -> Any:
+        """Raw response dict for one batch output line, or its error message."""
+        response = item.get("response") or {}
+        body = response.get("body") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            return f"Batch request failed: {item.get('error') or body.get('error') or response.get('status_code')}"
+        choice = body["choices"][0]
+        usage = body.get("usage") or {}
+        return {
+            'content': choice["message"].get("content") or '',
+            'usage': {
+                'input_tokens': usage.get("prompt_tokens", 0),
+                'output_tokens': usage.get("completion_tokens", 0),
+                'cache_read_tokens': (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+            },
+            'finish_reason': choice.get("finish_reason") or 'stop',
+        }
+
     def _extract_content(self, raw_response: Dict[str, Any]) -> str:
         return raw_response.get('content', '')
 
@@ -0,0 +1,246 @@
+# ai/runners/clients/hedging.py
+"""
+Hedged requests.
+
+``HedgedClient`` sends the request to the primary client and, if no
+response has arrived by the p90 latency tracked for that provider/model
+(or, until this process has enough samples, the p90 from recent audit
+events for the provider), fires a second identical request (to the same client or an alternate
+model). Whichever finishes first wins; the loser is abandoned.
+
+Provider SDK calls are blocking and cannot be aborted mid-flight, so an
+abandoned request still completes in the background. The hedge's estimated
+cost is reserved before it is fired, and the abandoned request's cost is
+committed against that reservation as ``<agent>_hedge`` when it lands, so
+it is recorded even once spend has reached the monthly budget. New hedges
+stop being fired once this month's hedge spend reaches the cap.
+"""
+from __future__ import annotations
+
+import functools
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ai.runners.clients.base_client import AIClient
+from ai.runners.clients.latency import (
+    DEFAULT_HISTORY_DAYS,
+    LatencyTracker,
+    audit_latency_quantile,
+    get_latency_tracker,
+)
+from ai.utils.budget_service import BUDGET_FILE
+from ai.utils.cost_ledger import BudgetExceededError
+from ai.utils.cost_monitor import (
+    commit_reservation,
+    get_budget_status,
+    release_reservation,
+    reserve_budget,
+)
+from ai.utils.models import AIResponse
+from ai.utils.timing import timed
+from ai.utils.tracing import current_span, propagate_context, traced
+
+HEDGE_QUANTILE = 0.90
+# Used until enough latencies were tracked or audited for the provider
+DEFAULT_HEDGE_DELAY = 30.0
+MIN_HEDGE_DELAY = 1.0
+DEFAULT_MONTHLY_HEDGE_CAP_USD = 5.0
+HEDGE_SUFFIX = "_hedge"
+
+
+def hedge_spent(path: Path = BUDGET_FILE) -> float:
+    """This month's spend on abandoned hedge requests."""
+    agents = get_budget_status(path)["agents"]
+    return sum(cost for agent, cost in agents.items() if agent.endswith(HEDGE_SUFFIX))
+
+
+class HedgedClient:
+    """
+    AIClient-compatible wrapper that races a second request on slow calls.
+
+    Attributes not defined here (model, config, get_cost_estimate, ...) are
+    delegated to the primary client.
+    """
+
+    def __init__(
+        self,
+        primary: AIClient,
+        hedge: Optional[AIClient] = None,
+        quantile: float = HEDGE_QUANTILE,
+        default_delay: float = DEFAULT_HEDGE_DELAY,
+        min_delay: float = MIN_HEDGE_DELAY,
+        monthly_cap_usd: float = DEFAULT_MONTHLY_HEDGE_CAP_USD,
+        budget_path: Path = BUDGET_FILE,
+        tracker: Optional[LatencyTracker] = None,
+        charge: bool = True,
+        history_days: int = DEFAULT_HISTORY_DAYS,
+    ):
+        """
+        Args:
+            primary: Client that receives every request
+            hedge: Client for the hedge request (default: the primary)
+            quantile: Latency quantile after which to hedge
+            default_delay: Hedge delay before enough latencies are tracked
+            min_delay: Lower bound on the hedge delay
+            monthly_cap_usd: Stop hedging once hedge spend reaches this
+            budget_path: budget.json whose ledger tracks hedge spend
+            tracker: Latency tracker (default: the shared one)
+            charge: Reserve and record the cost of abandoned requests;
+                False disables cost recording (dry runs)
+            history_days: Days of audit events used for the hedge delay
+                while the tracker has too few samples (0 disables)
+        """
+        self.primary = primary
+        self.hedge = hedge or primary
+        self.quantile = quantile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.monthly_cap_usd = monthly_cap_usd
+        self.budget_path = budget_path
+        self.tracker = tracker or get_latency_tracker()
+        self.charge = charge
+        self.history_days = history_days
+        self._audited: Optional[float] = None
+        self._audited_loaded = False
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "primary":
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    def __repr__(self) -> str:
+        return f"HedgedClient({self.primary!r}, hedge={self.hedge!r})"
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before firing the hedge."""
+        observed = self.tracker.quantile(self.primary.get_agent_name(), self.primary.model, self.quantile)
+        if observed is None:
+            observed = self._audited_delay()
+        if observed is None:
+            return self.default_delay
+        return max(self.min_delay, observed)
+
+    def _audited_delay(self) -> Optional[float]:
+        # Read once per client: the rollups only change as calls complete
+        if not self._audited_loaded and self.history_days > 0:
+            try:
+                self._audited = audit_latency_quantile(
+                    self.primary.get_agent_name(), self.quantile, days=self.history_days,
+                )
+            except Exception as e:
+                print(f"⚠️ Could not read audited latency, using default hedge delay: {e}")
+            self._audited_loaded = True
+        return self._audited
+
+    def _reserve_hedge(self, prompt: str, max_tokens: Optional[int]) -> Optional[str]:
+        """Reserve the hedge's estimated cost; None if no hedge may be fired."""
+        try:
+            if hedge_spent(self.budget_path) >= self.monthly_cap_usd:
+                return None
+            estimate = self.hedge.get_cost_estimate(prompt, max_tokens or self.hedge.config.max_tokens)
+            return reserve_budget(
+                f"{self.hedge.get_agent_name()}{HEDGE_SUFFIX}", estimate, path=self.budget_path,
+            )
+        except BudgetExceededError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Hedge budget check failed, not hedging: {e}")
+            return None
+
+    def _release(self, reservation: Optional[str]) -> None:
+        if reservation is None:
+            return
+        try:
+            release_reservation(reservation, path=self.budget_path)
+        except Exception as e:
+            print(f"⚠️ Failed to release hedge reservation: {e}")
+
+    def _charge_abandoned(self, reservation: Optional[str], future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            self._release(reservation)
+            return
+        if reservation is None:
+            return
+        response = future.result()
+        try:
+            # Committed, not recorded: the request was paid for even if the budget is now spent
+            commit_reservation(
+                f"{response.agent}{HEDGE_SUFFIX}", reservation, response.cost_usd, path=self.budget_path,
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to record hedge cost: {e}")
+
+    @timed("model")
+    @traced("ai.hedge")
+    def send_prompt(self, prompt: str, **kwargs: Any) -> AIResponse:
+        """
+        Send with hedging.
+
+        The response metadata records whether a hedge was fired and which
+        request won.
+
+        Raises:
+            AIClientError: If every request that was sent failed
+        """
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+        try:
+            primary = pool.submit(propagate_context(self.primary.send_prompt), prompt, **kwargs)
+            done, _ = wait([primary], timeout=self.hedge_delay())
+            reservation = None
+            if not done and self.charge:
+                reservation = self._reserve_hedge(prompt, kwargs.get("max_tokens"))
+            if done or (self.charge and reservation is None):
+                response = primary.result()
+                response.metadata['hedged'] = False
+                current_span().set_attribute("ai.hedged", False)
+                return response
+
+            hedge = pool.submit(propagate_context(self.hedge.send_prompt), prompt, **kwargs)
+            pending: Dict[Future, str] = {primary: "primary", hedge: "hedge"}
+            errors: List[BaseException] = []
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    role = pending.pop(future)
+                    if future.exception() is not None:
+                        errors.append(future.exception())
+                        continue
+                    for loser in pending:
+                        loser.add_done_callback(functools.partial(self._charge_abandoned, reservation))
+                    if not pending:
+                        self._release(reservation)  # The other request failed
+                    response = future.result()
+                    response.metadata['hedged'] = True
+                    response.metadata['hedge_winner'] = role
+                    current_span().set_attributes({"ai.hedged": True, "ai.hedge_winner": role})
+                    return response
+            self._release(reservation)
+            raise errors[0]
+        finally:
+            # Do not wait for the abandoned request
+            pool.shutdown(wait=False)
+
+
+def with_hedging(
+    client: Any,
+    hedge_agent: Optional[str] = None,
+    dry_run: bool = False,
+    **kwargs: Any,
+) -> HedgedClient:
+    """
+    Wrap ``client`` for hedged requests.
+
+    Args:
+        client: Primary client
+        hedge_agent: Agent for the hedge request (default: same client)
+        dry_run: Do not record hedge costs
+        **kwargs: Passed to HedgedClient
+    """
+    hedge = None
+    if hedge_agent:
+        from ai.runners.clients.factory import create_client
+        hedge = create_client(hedge_agent)
+    if dry_run:
+        kwargs['charge'] = False
+    return HedgedClient(client, hedge=hedge, **kwargs)
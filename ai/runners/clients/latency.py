@@ -0,0 +1,96 @@
+# ai/runners/clients/latency.py
+"""
+Rolling request latency per (provider, model).
+
+Every successful ``send_prompt`` records how long the provider took to
+answer. Hedging uses the tracked quantiles to decide when a request is
+slow enough to be worth a second, racing request.
+
+One-shot runners make one or two calls per process, so their tracker
+never warms up; ``audit_latency_quantile`` reads the latency sketches
+persisted in the audit log's day rollups instead.
+"""
+from __future__ import annotations
+
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, Optional, Tuple
+
+from ai.utils import audit_logger
+from ai.utils.quantile_sketch import QuantileSketch
+
+DEFAULT_WINDOW = 200
+# Quantiles from fewer samples than this are too noisy to act on
+MIN_SAMPLES = 10
+# Days of audit rollups consulted by audit_latency_quantile
+DEFAULT_HISTORY_DAYS = 7
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies for each (agent, model)."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, min_samples: int = MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, model: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get((agent, model))
+            if samples is None:
+                samples = self._samples[(agent, model)] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def count(self, agent: str, model: str) -> int:
+        with self._lock:
+            return len(self._samples.get((agent, model), ()))
+
+    def quantile(self, agent: str, model: str, q: float) -> Optional[float]:
+        """
+        Latency quantile (nearest-rank) in seconds, or None until
+        ``min_samples`` latencies were recorded.
+        """
+        with self._lock:
+            samples = sorted(self._samples.get((agent, model), ()))
+        if len(samples) < self.min_samples:
+            return None
+        rank = min(len(samples) - 1, max(0, int(round(q * len(samples))) - 1))
+        return samples[rank]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+def audit_latency_quantile(
+    agent: str,
+    q: float,
+    days: int = DEFAULT_HISTORY_DAYS,
+    min_samples: int = MIN_SAMPLES,
+) -> Optional[float]:
+    """
+    Latency quantile for an agent over the last ``days`` UTC days of audit
+    events, or None with fewer than ``min_samples`` recorded latencies.
+
+    Day rollups keep latency per agent, not per model.
+    """
+    today = datetime.now(timezone.utc).date()
+    sketch = QuantileSketch()
+    for offset in range(days):
+        day = (today - timedelta(days=offset)).isoformat()
+        accumulator = audit_logger.day_rollup(day).agents.get(agent)
+        if accumulator is not None:
+            sketch.merge(accumulator.latency)
+    if sketch.count < min_samples:
+        return None
+    return sketch.quantile(q)
+
+
+_TRACKER = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Process-wide latency tracker shared by all clients."""
+    return _TRACKER
@@ -61,6 +61,7 @@ class PerplexityClient(AIClient):
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=max_tokens,
                 temperature=temperature,
+                timeout=kwargs.get('timeout', self.config.timeout),
             )
 
             choice = response.choices[0]
@@ -79,7 +80,7 @@ class PerplexityClient(AIClient):
             }
 
         except OpenAIRateLimitError as e:
-            raise RateLimitError(f"Perplexity API rate limit exceeded: {e}")
+            raise RateLimitError.from_exception(f"Perplexity API rate limit exceeded: {e}", e)
         except OpenAIConnectionError as e:
             raise APIConnectionError(f"Perplexity API connection error: {e}")
         except Exception as e:
@@ -0,0 +1,288 @@
+# ai/runners/clients/rate_limiter.py
+"""
+Per-provider rate limiting.
+
+Each provider gets one shared ``RateLimiter`` (two token buckets: requests
+per minute and tokens per minute) used by every thread and asyncio task in
+the process, so concurrent workers pace themselves against the quota
+instead of discovering it through 429s.
+
+On a rate-limit error the limiter honours the provider's retry-after /
+reset headers and halves its effective rate (AIMD); each success restores
+a slice of the rate. Retry delays are jittered so workers that failed
+together do not retry together.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+# AIMD tuning: halve on a 429, recover 5% of the quota per success
+DECREASE_FACTOR = 0.5
+INCREASE_STEP = 0.05
+MIN_SCALE = 0.1
+# Retry delays get up to +50% random jitter on top of the exponential base
+JITTER_RATIO = 0.5
+
+# Header names (lower-case) that carry remaining quota / reset times
+_REMAINING_HEADERS = {
+    "requests": ("x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining"),
+    "tokens": ("x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining"),
+}
+_RESET_HEADERS = {
+    "requests": ("x-ratelimit-reset-requests", "anthropic-ratelimit-requests-reset"),
+    "tokens": ("x-ratelimit-reset-tokens", "anthropic-ratelimit-tokens-reset"),
+}
+
+_DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_RE = re.compile(r"(?:\d+(?:\.\d+)?(?:ms|h|m|s))+")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def _parse_duration(value: Any) -> Optional[float]:
+    """
+    Parse a retry/reset header value into seconds from now.
+
+    Accepts plain seconds ("1.5"), OpenAI-style durations ("6m0s", "20ms"),
+    RFC 3339 timestamps (Anthropic) and HTTP dates (Retry-After).
+    """
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        pass
+
+    if _DURATION_RE.fullmatch(text):
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in _DURATION_PART_RE.findall(text))
+
+    try:
+        if text[:4].isdigit():
+            moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        else:
+            moment = parsedate_to_datetime(text)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _lower_headers(headers: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    if not headers:
+        return {}
+    try:
+        return {str(k).lower(): v for k, v in headers.items()}
+    except AttributeError:
+        return {}
+
+
+def headers_from(exc: BaseException) -> Dict[str, Any]:
+    """Response headers attached to an SDK exception (lower-cased), if any."""
+    headers = getattr(exc, "headers", None)
+    if headers is None:
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None)
+    return _lower_headers(headers)
+
+
+def retry_after_from(exc: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from the exception or its headers."""
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is not None:
+        return _parse_duration(retry_after)
+    headers = headers_from(exc)
+    for name in ("retry-after-ms", "retry-after"):
+        if name in headers:
+            seconds = _parse_duration(headers[name])
+            if seconds is not None and name == "retry-after-ms":
+                seconds /= 1000.0
+            return seconds
+    return None
+
+
+def backoff_delay(
+    base: float,
+    attempt: int,
+    retry_after: Optional[float] = None,
+    rng: Optional[random.Random] = None,
+) -> float:
+    """
+    Jittered exponential backoff.
+
+    Returns ``base * 2**attempt`` plus up to ``JITTER_RATIO`` of that as
+    random jitter, and never less than the provider's retry-after.
+    """
+    delay = base * (2 ** attempt)
+    delay += (rng or random).uniform(0, delay * JITTER_RATIO)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``rate_per_min``.
+
+    ``reserve`` debits immediately (the balance may go negative) and returns
+    how long the caller must wait, so waiters are served in arrival order
+    without polling.
+    """
+
+    def __init__(self, rate_per_min: float, capacity: Optional[float] = None):
+        self.rate_per_min = float(rate_per_min)
+        self.capacity = float(capacity if capacity is not None else rate_per_min)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float, scale: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        rate = self.rate_per_min * scale / 60.0
+        self._tokens = min(self.capacity, self._tokens + elapsed * rate)
+
+    def reserve(self, amount: float, scale: float = 1.0) -> float:
+        """Debit ``amount`` and return the seconds to wait before using it."""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now, scale)
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / (self.rate_per_min * scale / 60.0)
+
+    def drain(self) -> None:
+        """Empty the bucket (the provider reported no remaining quota)."""
+        with self._lock:
+            self._refill(time.monotonic(), 1.0)
+            self._tokens = min(self._tokens, 0.0)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic(), 1.0)
+            return self._tokens
+
+
+class RateLimiter:
+    """Requests/min and tokens/min limits for one provider."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._lock = threading.Lock()
+        self._scale = 1.0
+        self._blocked_until = 0.0
+
+    @property
+    def scale(self) -> float:
+        """Fraction of the configured quota currently in use (AIMD state)."""
+        return self._scale
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Claim one request plus ``tokens``; return the seconds to wait first."""
+        with self._lock:
+            scale = self._scale
+            blocked = max(0.0, self._blocked_until - time.monotonic())
+        wait = blocked
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1, scale))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.reserve(tokens, scale))
+        return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block the calling thread until the request may be sent."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        """Async variant of ``acquire`` (does not block the event loop)."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_success(self) -> None:
+        """Additive increase after a successful request."""
+        with self._lock:
+            self._scale = min(1.0, self._scale + INCREASE_STEP)
+
+    def record_rate_limited(
+        self,
+        retry_after: Optional[float] = None,
+        headers: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        """
+        Multiplicative decrease after a 429, and pause everyone until the
+        provider's retry-after / reset time.
+        """
+        pause = retry_after or 0.0
+        headers = _lower_headers(headers)
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            remaining = next((headers[h] for h in _REMAINING_HEADERS[kind] if h in headers), None)
+            if remaining is None:
+                continue
+            try:
+                exhausted = float(remaining) <= 0
+            except (TypeError, ValueError):
+                continue
+            if not exhausted:
+                continue
+            if bucket is not None:
+                bucket.drain()
+            reset = next((headers[h] for h in _RESET_HEADERS[kind] if h in headers), None)
+            pause = max(pause, _parse_duration(reset) or 0.0)
+
+        with self._lock:
+            self._scale = max(MIN_SCALE, self._scale * DECREASE_FACTOR)
+            if pause:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(
+    provider: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> Optional[RateLimiter]:
+    """
+    Shared limiter for a provider, created on first use.
+
+    Returns None when no limits are configured. Later calls reuse the first
+    limiter's quotas.
+    """
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(provider)
+        if limiter is None:
+            if not requests_per_minute and not tokens_per_minute:
+                return None
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            _LIMITERS[provider] = limiter
+        return limiter
+
+
+def reset_rate_limiters() -> None:
+    """Forget all shared limiters (tests, config reloads)."""
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
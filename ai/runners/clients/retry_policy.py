@@ -0,0 +1,159 @@
+# ai/runners/clients/retry_policy.py
+"""
+Retry policy for AI client requests.
+
+A ``RetryPolicy`` decides, per failed attempt, whether to retry and how
+long to wait. Each exception class gets a ``RetryStrategy`` (looked up by
+the most specific class in the exception's MRO): whether it is retryable,
+how many attempts it may use, its backoff base and whether the provider's
+retry-after is honoured.
+
+An optional total deadline bounds the whole call (attempts plus waits):
+no retry is scheduled whose wait would end past the deadline, and each
+attempt's request timeout is capped at the time remaining.
+"""
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Type
+
+from ai.runners.clients.rate_limiter import backoff_delay
+
+DEFAULT_MAX_DELAY = 60.0
+
+
+@dataclass(frozen=True)
+class RetryStrategy:
+    """How to handle one class of errors."""
+    retry: bool = True
+    # None: use the policy's max_attempts / base_delay
+    max_attempts: Optional[int] = None
+    base_delay: Optional[float] = None
+    honor_retry_after: bool = True
+
+
+NO_RETRY = RetryStrategy(retry=False)
+
+
+def default_strategies() -> Dict[Type[BaseException], RetryStrategy]:
+    """Strategies used when a policy does not define its own."""
+    from ai.runners.clients.base_client import (
+        AIClientError,
+        APIConnectionError,
+        CircuitOpenError,
+        RateLimitError,
+    )
+    return {
+        RateLimitError: RetryStrategy(),
+        APIConnectionError: RetryStrategy(),
+        # The breaker decides when to probe again; retrying here only sleeps
+        CircuitOpenError: NO_RETRY,
+        # Key, token-limit and parse errors fail the same way on every attempt
+        AIClientError: NO_RETRY,
+        # Transport errors raised outside the SDK error mapping
+        TimeoutError: RetryStrategy(),
+        ConnectionError: RetryStrategy(),
+    }
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry decisions for one call.
+
+    Exceptions without a matching strategy are not retried.
+    """
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = DEFAULT_MAX_DELAY
+    # Total seconds for the call including waits (None = unbounded)
+    deadline: Optional[float] = None
+    strategies: Dict[Type[BaseException], RetryStrategy] = field(default_factory=default_strategies)
+    rng: Optional[random.Random] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_config(cls, config) -> "RetryPolicy":
+        """Policy from a ClientConfig (max_retries, retry_delay, retry_deadline)."""
+        return cls(
+            max_attempts=config.max_retries,
+            base_delay=config.retry_delay,
+            deadline=config.retry_deadline,
+        )
+
+    def strategy_for(self, error: BaseException) -> RetryStrategy:
+        """Strategy of the most specific class of ``error`` that has one."""
+        for klass in type(error).__mro__:
+            if klass in self.strategies:
+                return self.strategies[klass]
+        return NO_RETRY
+
+    def start(self) -> "RetryState":
+        """Begin tracking one call."""
+        return RetryState(self)
+
+
+class RetryState:
+    """Attempts, waits and deadline of one call under a RetryPolicy."""
+
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self.started = time.monotonic()
+        self.attempts = 0
+        self.retries = 0
+        self.waited = 0.0
+
+    @property
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None without a deadline)."""
+        if self.policy.deadline is None:
+            return None
+        return max(0.0, self.policy.deadline - (time.monotonic() - self.started))
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining
+        return remaining is not None and remaining <= 0
+
+    def attempt_timeout(self, timeout: float) -> float:
+        """Request timeout for the next attempt, capped by the deadline."""
+        remaining = self.remaining
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def next_delay(self, error: BaseException) -> Optional[float]:
+        """
+        Seconds to wait before retrying after ``error`` (the attempt that
+        raised it must already be counted), or None to give up.
+        """
+        strategy = self.policy.strategy_for(error)
+        if not strategy.retry:
+            return None
+        max_attempts = strategy.max_attempts or self.policy.max_attempts
+        if self.attempts >= max_attempts:
+            return None
+
+        base = strategy.base_delay if strategy.base_delay is not None else self.policy.base_delay
+        retry_after = getattr(error, "retry_after", None) if strategy.honor_retry_after else None
+        delay = backoff_delay(base, self.attempts - 1, None, self.policy.rng)
+        delay = min(delay, self.policy.max_delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        remaining = self.remaining
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+    def record_wait(self, delay: float) -> None:
+        self.retries += 1
+        self.waited += delay
+
+    def as_metadata(self) -> Dict[str, float]:
+        """Retry counters for AIResponse.metadata."""
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "retry_wait_seconds": round(self.waited, 4),
+            "elapsed_seconds": round(time.monotonic() - self.started, 4),
+        }
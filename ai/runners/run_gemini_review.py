@@ -15,11 +15,34 @@ from ai.utils.pr_collector import PRCollector
 from ai.utils.prompt_loader import build_gemini_uiux_prompt
 from ai.runners.clients.gemini_client import GeminiClient
 from ai.runners.clients.base_client import AIClientError, APIKeyMissingError
+from ai.runners.clients.failover import responder_label, with_failover
+from ai.runners.clients.hedging import with_hedging
 from ai.utils.audit_logger import log_ai_event
+from ai.utils.metrics import export_textfile_at_exit
+from ai.utils.timing import start_stage_timer
+from ai.utils.tracing import traced
 from ai.utils.safety_policy import MANUAL_APPROVAL_REQUIRED_MSG
-from ai.utils.cost_monitor import record_cost, BudgetExceededError
+from ai.utils.cost_monitor import (
+    BudgetExceededError,
+    reserve_budget,
+    commit_reservation,
+    release_reservation,
+)
+from ai.runners.sharding import run_sharded_review, estimate_sharded_cost, DEFAULT_CONCURRENCY
+from ai.utils.review_findings import with_findings_instructions, post_findings_review
 
 
+def _release(reservation_id):
+    """Release a budget reservation for a call that did not complete."""
+    if reservation_id is None:
+        return
+    try:
+        release_reservation(reservation_id)
+    except Exception as e:
+        print(f"   ⚠️ Failed to release budget reservation: {e}")
+
+
+@traced("review.gemini")
 def main():
     """Main entry point for Gemini review runner."""
     parser = argparse.ArgumentParser(description='Run Gemini UI/UX review on a PR')
@@ -46,10 +69,38 @@ def main():
         default=4000,
         help='Maximum tokens for Gemini response (default: 4000)'
     )
+    parser.add_argument(
+        '--shard',
+        action='store_true',
+        help='Review large PRs shard by shard and merge the results'
+    )
+    parser.add_argument(
+        '--shard-concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'Maximum shards reviewed in parallel (default: {DEFAULT_CONCURRENCY})'
+    )
+    parser.add_argument(
+        '--inline-comments',
+        action='store_true',
+        help='Ask for structured findings and post them as one review with inline comments'
+    )
+    parser.add_argument(
+        '--hedge',
+        action='store_true',
+        help='Send a second request when the response is slower than the usual p90 latency'
+    )
 
     args = parser.parse_args()
+    # Stage durations land in every audit event's metadata
+    timer = start_stage_timer()
+    export_textfile_at_exit()  # $AI_METRICS_FILE, if set
     decision_reason = os.getenv("ROUTER_REASON", "runner_local_or_unknown")
 
+    build_prompt = build_gemini_uiux_prompt
+    if args.inline_comments:
+        build_prompt = with_findings_instructions(build_gemini_uiux_prompt)
+
     print(f"🎨 Gemini UI/UX Review - PR #{args.pr_number}")
     print("=" * 60)
 
@@ -90,7 +141,7 @@ def main():
     # Step 2: Build review prompt
     print("📝 Step 2: Building review prompt...")
     try:
-        prompt = build_gemini_uiux_prompt(pr_info)
+        prompt = build_prompt(pr_info)
         prompt_tokens = len(prompt) // 4  # Rough estimate
         print(f"   ✅ Prompt built (~{prompt_tokens} tokens)")
         print()
@@ -147,18 +198,52 @@ def main():
 
     # Step 4: Send to Gemini API
     print("🧠 Step 4: Sending to Gemini API...")
+    reservation_id = None
     try:
-        client = GeminiClient()
+        client = with_failover(GeminiClient(), "gemini")
+        if args.hedge:
+            client = with_hedging(client, dry_run=args.dry_run)
         print(f"   📡 Using model: {client.model}")
+
+        # Hold the estimated cost so concurrent runs cannot overshoot the budget
+        if not args.dry_run:
+            if args.shard:
+                estimate = estimate_sharded_cost(client, pr_info, build_prompt, args.max_tokens)
+            else:
+                estimate = client.get_cost_estimate(prompt, args.max_tokens)
+            reservation_id = reserve_budget("gemini", estimate)
+            print(f"   🔒 Reserved ${estimate:.6f} of budget")
         print(f"   ⏳ Waiting for response...")
 
-        response = client.send_prompt(prompt, max_tokens=args.max_tokens)
+        if args.shard:
+            response = run_sharded_review(
+                client,
+                pr_info,
+                build_prompt,
+                max_tokens=args.max_tokens,
+                concurrency=args.shard_concurrency,
+            )
+            print(f"   🧩 Shards reviewed: {response.metadata.get('shards', 1)}")
+        else:
+            response = client.send_prompt(prompt, max_tokens=args.max_tokens)
 
         print(f"   ✅ Response received")
         print(f"   📊 Tokens: {response.input_tokens} in + {response.output_tokens} out = {response.total_tokens} total")
         print(f"   💰 Cost: ${response.cost_usd:.6f}")
         print()
 
+    except BudgetExceededError as e:
+        print(f"   ❌ Budget exhausted: {e}")
+        log_ai_event(
+            agent="gemini",
+            pr_number=args.pr_number,
+            status="failed",
+            decision_reason=decision_reason,
+            error_type="budget_exceeded",
+            error_message=str(e),
+            tags=["runner", "gemini", "failure", "budget"],
+        )
+        sys.exit(1)
     except APIKeyMissingError:
         print(f"   ❌ GEMINI_API_KEY not found in environment")
         print(f"   💡 Set GEMINI_API_KEY environment variable")
@@ -174,6 +259,7 @@ def main():
         sys.exit(1)
     except AIClientError as e:
         print(f"   ❌ Gemini API error: {e}")
+        _release(reservation_id)
         log_ai_event(
             agent="gemini",
             pr_number=args.pr_number,
@@ -186,6 +272,7 @@ def main():
         sys.exit(1)
     except Exception as e:
         print(f"   ❌ Unexpected error: {e}")
+        _release(reservation_id)
         log_ai_event(
             agent="gemini",
             pr_number=args.pr_number,
@@ -208,16 +295,32 @@ def main():
                 manual_notice = (
                     f"> ⚠️ **{MANUAL_APPROVAL_REQUIRED_MSG}**\n\n"
                 )
-            review_comment = f"""## 🎨 Gemini UI/UX Review
+            footer = (
+                f"<sub>Review by {responder_label(response)} | Tokens: {response.total_tokens} "
+                f"| Cost: ${response.cost_usd:.6f}</sub>"
+            )
+            if args.inline_comments:
+                review_id, placed = post_findings_review(
+                    collector, pr_info, "gemini", response.content,
+                    title="## 🎨 Gemini UI/UX Review", footer=footer, notice=manual_notice,
+                )
+                print(f"   ✅ Review posted (ID: {review_id}, {placed} inline comments)")
+            else:
+                review_comment = f"""## 🎨 Gemini UI/UX Review
 
 {manual_notice}{response.content}
 
 ---
-<sub>Review by Gemini ({client.model}) | Tokens: {response.total_tokens} | Cost: ${response.cost_usd:.6f}</sub>
+{footer}
 """
 
-            comment_id = collector.post_comment(args.pr_number, review_comment)
-            print(f"   ✅ Comment posted (ID: {comment_id})")
+                comment_id = collector.upsert_comment(
+                    args.pr_number,
+                    review_comment,
+                    agent="gemini",
+                    comment_id=pr_info.bot_comments.get("gemini"),
+                )
+                print(f"   ✅ Comment posted (ID: {comment_id})")
             print()
             comment_posted = True
 
@@ -237,7 +340,7 @@ def main():
     if not args.dry_run:
         print("💰 Step 6: Updating cost tracker...")
         try:
-            record_cost("gemini", response.cost_usd)
+            commit_reservation(response.agent, reservation_id, response.cost_usd)
             print(f"   ✅ Cost recorded: ${response.cost_usd:.6f}")
             print()
         except BudgetExceededError as e:
@@ -257,9 +360,10 @@ def main():
     print()
     print("📊 Summary:")
     print(f"   PR: #{pr_info.number} - {pr_info.title}")
-    print(f"   Model: {client.model}")
+    print(f"   Model: {response.model}")
     print(f"   Tokens: {response.total_tokens}")
     print(f"   Cost: ${response.cost_usd:.6f}")
+    print(f"   Stage time: {timer.format()}")
 
     tags = ["runner", "gemini", "success"]
     if pr_info.has_sensitive_changes():
@@ -277,11 +381,14 @@ def main():
         cost_usd=response.cost_usd if not args.dry_run else 0.0,
         tags=tags,
         metadata={
-            "model": client.model,
+            "model": response.model,
+            "failover_from": response.metadata.get("failover_from"),
             "prompt_tokens_estimate": prompt_tokens,
             "comment_posted": bool(args.dry_run or not args.post_comment) or locals().get("comment_posted", False),
             "sensitive_changes": pr_info.has_sensitive_changes(),
             "changed_files": pr_info.changed_files,
+            "shards": response.metadata.get("shards", 1),
+            "latency_seconds": response.metadata.get("retry", {}).get("elapsed_seconds"),
         },
     )
 
@@ -0,0 +1,747 @@
+#!/usr/bin/env python3
+"""
+Generic Review Runner.
+Reviews a single PR, or every open PR updated within a time window, with one agent.
+
+Batch mode pushes PRs through a bounded async pipeline
+(collect → prompt → model → post) that shares one client, one PR collector,
+the prompt template cache and the budget ledger across all PRs, and stops
+dispatching new model calls once the monthly budget is exhausted. Each PR
+gets a trace span with one child span per stage (see ai.utils.tracing).
+
+With --batch-api the prompts are instead queued into one provider batch job
+(Claude and GPT) at half the per-token price; results arrive within the
+provider's completion window and are mapped back to their PRs by custom id.
+
+--metrics-port serves Prometheus metrics on /metrics while the run lasts;
+$AI_METRICS_FILE receives them as a textfile when the run ends.
+
+--cassette records GitHub and provider traffic to a file (secrets
+scrubbed) or replays it without network, credentials or spend, for
+offline performance testing (see ai.utils.cassette).
+"""
+import argparse
+import asyncio
+import atexit
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from ai.utils.pr_collector import PRCollector
+from ai.utils.models import AIResponse, PRInfo
+from ai.utils.prompt_loader import (
+    build_claude_review_prompt,
+    build_gemini_uiux_prompt,
+    build_perplexity_compliance_prompt,
+    build_gpt_backend_prompt,
+)
+from ai.runners.clients.base_client import (
+    AIClient,
+    APIKeyMissingError,
+    ClientConfig,
+    DEFAULT_BATCH_POLL_SECONDS,
+    DEFAULT_BATCH_TIMEOUT_SECONDS,
+)
+from ai.runners.clients.cassette_client import CassetteClient
+from ai.runners.clients.factory import create_client
+from ai.runners.clients.failover import responder_label, with_failover
+from ai.runners.clients.hedging import with_hedging
+from ai.utils.audit_logger import log_ai_event
+from ai.utils.cassette import CASSETTE_ENV, MODES as CASSETTE_MODES, Cassette, CassetteCollector, cassette_from_env
+from ai.utils.metrics import export_textfile_at_exit, start_metrics_server
+from ai.utils.tracing import NOOP_SPAN, STATUS_ERROR, STATUS_OK, get_tracer, start_span, use_span
+from ai.utils.safety_policy import MANUAL_APPROVAL_REQUIRED_MSG
+from ai.utils.cost_monitor import (
+    DEFAULT_RESERVATION_TTL,
+    BudgetExceededError,
+    reserve_budget,
+    commit_reservation,
+    release_reservation,
+)
+
+DEFAULT_CONCURRENCY = 4
+STAGES = ("collect", "prompt", "model", "post")
+# Replayed reviews are audited under "<agent>_replay" so their latencies
+# stay out of the agent's rollups (which seed hedge delays)
+REPLAY_SUFFIX = "_replay"
+
+
+@dataclass
+class ReviewSpec:
+    """Per-agent review presentation and prompt builder."""
+    title: str
+    label: str
+    build_prompt: Callable[[PRInfo], str]
+
+
+AGENT_SPECS: Dict[str, ReviewSpec] = {
+    'claude': ReviewSpec("## 🤖 Claude PM Review", "Claude", build_claude_review_prompt),
+    'gemini': ReviewSpec("## 🎨 Gemini UI/UX Review", "Gemini", build_gemini_uiux_prompt),
+    'perplexity': ReviewSpec("## ⚖️ Perplexity Compliance Review", "Perplexity", build_perplexity_compliance_prompt),
+    'gpt': ReviewSpec("## 🛠️ GPT Backend Review", "GPT", build_gpt_backend_prompt),
+}
+
+
+@dataclass
+class ReviewJob:
+    """One PR moving through the pipeline."""
+    pr_number: int
+    pr_info: Optional[PRInfo] = None
+    prompt: str = ""
+    response: Optional[AIResponse] = None
+    comment_id: Optional[int] = None
+    status: str = "pending"  # pending | success | failed | skipped
+    error_type: str = ""
+    error_message: str = ""
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    span: Any = NOOP_SPAN  # trace span covering all stages
+
+    def fail(self, stage: str, error: Exception) -> None:
+        self.status = "failed"
+        self.error_type = f"{stage}_failed"
+        self.error_message = str(error)
+
+
+@dataclass
+class BatchReport:
+    """Aggregate throughput report for a pipeline run."""
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    total_tokens: int = 0
+    cost_usd: float = 0.0
+    wall_seconds: float = 0.0
+    budget_exhausted: bool = False
+    stage_seconds: Dict[str, List[float]] = field(default_factory=dict)
+
+    def add(self, job: ReviewJob) -> None:
+        if job.status == "success":
+            self.succeeded += 1
+        elif job.status == "skipped":
+            self.skipped += 1
+        else:
+            self.failed += 1
+        if job.response is not None:
+            self.total_tokens += job.response.total_tokens
+            self.cost_usd = round(self.cost_usd + job.response.cost_usd, 6)
+        for stage, seconds in job.stage_seconds.items():
+            self.stage_seconds.setdefault(stage, []).append(seconds)
+
+    @property
+    def throughput_per_min(self) -> float:
+        if self.wall_seconds <= 0:
+            return 0.0
+        return (self.succeeded + self.failed) / self.wall_seconds * 60
+
+    def format(self) -> str:
+        lines = [
+            "📊 Batch Review Report",
+            f"   PRs: {self.total} total | ✅ {self.succeeded} reviewed | "
+            f"❌ {self.failed} failed | ⏭️ {self.skipped} skipped",
+            f"   Wall time: {self.wall_seconds:.1f}s | Throughput: {self.throughput_per_min:.1f} PRs/min",
+            f"   Tokens: {self.total_tokens:,} | Cost: ${self.cost_usd:.6f}",
+        ]
+        stage_parts = []
+        for stage in STAGES:
+            samples = self.stage_seconds.get(stage)
+            if samples:
+                stage_parts.append(f"{stage} {sum(samples) / len(samples):.2f}s")
+        if stage_parts:
+            lines.append("   Stage time (avg): " + " | ".join(stage_parts))
+        if self.budget_exhausted:
+            lines.append("   ⚠️ Budget exhausted — remaining PRs were skipped")
+        return "\n".join(lines)
+
+
+def parse_since(value: str) -> timedelta:
+    """Parse a duration like '24h', '90m', '2d' or '3600s'."""
+    match = re.fullmatch(r"\s*(\d+)\s*([smhd])\s*", value or "")
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid duration: {value!r} (expected e.g. 24h, 90m, 2d)")
+    amount, unit = int(match.group(1)), match.group(2)
+    unit_name = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}[unit]
+    return timedelta(**{unit_name: amount})
+
+
+def format_review_comment(spec: ReviewSpec, pr_info: PRInfo, response: AIResponse) -> str:
+    """Render the PR comment for a review response."""
+    manual_notice = ""
+    if pr_info.has_sensitive_changes():
+        manual_notice = f"> ⚠️ **{MANUAL_APPROVAL_REQUIRED_MSG}**\n\n"
+    return f"""{spec.title}
+
+{manual_notice}{response.content}
+
+---
+<sub>Review by {responder_label(response)} | Tokens: {response.total_tokens} | Cost: ${response.cost_usd:.6f}</sub>
+"""
+
+
+_DONE = object()
+
+
+async def _run_stage(
+    name: str,
+    handler: Callable[[ReviewJob], Awaitable[None]],
+    inbox: asyncio.Queue,
+    outbox: asyncio.Queue,
+    workers: int,
+) -> None:
+    """Run one pipeline stage with ``workers`` concurrent workers."""
+
+    async def worker():
+        while True:
+            job = await inbox.get()
+            if job is _DONE:
+                inbox.put_nowait(_DONE)  # Let sibling workers see the sentinel
+                return
+            if job.status == "pending":
+                started = time.perf_counter()
+                try:
+                    with start_span(f"review.{name}", parent=job.span):
+                        await handler(job)
+                except Exception as e:
+                    job.fail(name, e)
+                job.stage_seconds[name] = time.perf_counter() - started
+            await outbox.put(job)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+    await outbox.put(_DONE)
+
+
+async def run_pipeline(
+    pr_numbers: List[int],
+    agent: str,
+    collector: PRCollector,
+    client: AIClient,
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_tokens: Optional[int] = None,
+    dry_run: bool = False,
+    post_comment: bool = True,
+    decision_reason: str = "batch_review",
+    on_job_done: Optional[Callable[[ReviewJob], Any]] = None,
+    replay: bool = False,
+) -> BatchReport:
+    """
+    Review PRs through a bounded collect → prompt → model → post pipeline.
+
+    Args:
+        pr_numbers: PRs to review
+        agent: Agent name (key of AGENT_SPECS)
+        collector: Shared PR collector
+        client: Shared AI client
+        concurrency: Workers per I/O stage and queue bound between stages
+        max_tokens: Maximum tokens per response
+        dry_run: Skip posting and cost recording
+        post_comment: Post (upsert) the review comment
+        decision_reason: Reason recorded in audit events
+        on_job_done: Optional callback for each finished job
+        replay: The client replays a cassette: nothing is reserved or
+            recorded in the budget ledger, and audit events are tagged
+            "replay" with zero cost
+
+    Returns:
+        BatchReport with aggregate counts, tokens, cost and timings
+    """
+    spec = AGENT_SPECS[agent]
+    report = BatchReport(total=len(pr_numbers))
+    budget_exhausted = asyncio.Event()
+
+    async def collect(job: ReviewJob) -> None:
+        if budget_exhausted.is_set():
+            job.status = "skipped"
+            job.error_type = "budget_exceeded"
+            return
+        job.pr_info = await asyncio.to_thread(collector.get_pr_info, job.pr_number)
+
+    async def prompt(job: ReviewJob) -> None:
+        job.prompt = spec.build_prompt(job.pr_info)
+
+    async def model(job: ReviewJob) -> None:
+        if dry_run or replay:
+            job.response = await asyncio.to_thread(client.send_prompt, job.prompt, max_tokens=max_tokens)
+            return
+
+        # Reserve the estimate first so concurrent model workers cannot
+        # jointly overshoot the budget
+        reservation_id = None
+        if not budget_exhausted.is_set():
+            estimate = client.get_cost_estimate(job.prompt, max_tokens or client.config.max_tokens)
+            try:
+                reservation_id = await asyncio.to_thread(reserve_budget, agent, estimate)
+            except BudgetExceededError:
+                budget_exhausted.set()
+        if reservation_id is None:
+            job.status = "skipped"
+            job.error_type = "budget_exceeded"
+            return
+
+        try:
+            job.response = await asyncio.to_thread(client.send_prompt, job.prompt, max_tokens=max_tokens)
+        except BaseException:
+            await asyncio.to_thread(_settle, job, release_reservation, reservation_id)
+            raise
+        # The call was paid for: a ledger failure must not stop the review being posted
+        await asyncio.to_thread(
+            _settle, job, commit_reservation, job.response.agent, reservation_id, job.response.cost_usd,
+        )
+
+    async def post(job: ReviewJob) -> None:
+        if post_comment and not dry_run:
+            body = format_review_comment(spec, job.pr_info, job.response)
+            job.comment_id = await asyncio.to_thread(
+                collector.upsert_comment,
+                job.pr_number,
+                body,
+                agent=agent,
+                comment_id=job.pr_info.bot_comments.get(agent),
+            )
+        job.status = "success"
+
+    queues = [asyncio.Queue(maxsize=concurrency) for _ in range(len(STAGES) + 1)]
+    handlers = {"collect": collect, "prompt": prompt, "model": model, "post": post}
+    workers = {"collect": concurrency, "prompt": 1, "model": concurrency, "post": concurrency}
+
+    async def feed():
+        tracer = get_tracer()
+        for number in pr_numbers:
+            span = tracer.start_span("review.pr", attributes={"ai.agent": agent, "pr.number": number})
+            await queues[0].put(ReviewJob(pr_number=number, span=span))
+        await queues[0].put(_DONE)
+
+    async def drain():
+        while True:
+            job = await queues[-1].get()
+            if job is _DONE:
+                return
+            report.add(job)
+            with use_span(job.span):
+                _log_job(job, agent, client, dry_run, decision_reason, replay=replay)
+            job.span.set_attribute("review.status", job.status)
+            if job.status == "failed":
+                job.span.set_status(STATUS_ERROR, job.error_type)
+            else:
+                job.span.set_status(STATUS_OK)
+            job.span.end()
+            if on_job_done is not None:
+                on_job_done(job)
+
+    started = time.perf_counter()
+    with start_span("review.batch", attributes={"ai.agent": agent, "review.prs": len(pr_numbers)}):
+        await asyncio.gather(
+            feed(),
+            *(
+                _run_stage(stage, handlers[stage], queues[i], queues[i + 1], workers[stage])
+                for i, stage in enumerate(STAGES)
+            ),
+            drain(),
+        )
+    report.wall_seconds = time.perf_counter() - started
+    report.budget_exhausted = budget_exhausted.is_set()
+    return report
+
+
+def batch_custom_id(pr_number: int) -> str:
+    """Batch request id for a PR."""
+    return f"pr-{pr_number}"
+
+
+def run_provider_batch(
+    pr_numbers: List[int],
+    agent: str,
+    collector: PRCollector,
+    client: AIClient,
+    *,
+    max_tokens: Optional[int] = None,
+    dry_run: bool = False,
+    post_comment: bool = True,
+    decision_reason: str = "batch_review",
+    on_job_done: Optional[Callable[[ReviewJob], Any]] = None,
+    poll_interval: float = DEFAULT_BATCH_POLL_SECONDS,
+    timeout: float = DEFAULT_BATCH_TIMEOUT_SECONDS,
+) -> BatchReport:
+    """
+    Review PRs through one provider batch job (discounted, non-interactive).
+
+    Collects every PR and builds its prompt, reserves the batch-priced cost
+    estimate per PR, submits all prompts as one batch, waits for it, then
+    commits each PR's actual cost and posts its comment. PRs that do not fit
+    in the remaining budget are skipped before submission.
+
+    Args:
+        pr_numbers: PRs to review
+        agent: Agent name (key of AGENT_SPECS)
+        collector: Shared PR collector
+        client: Client with batch support (see AIClient.supports_batch)
+        max_tokens: Maximum tokens per response
+        dry_run: Skip posting and cost recording
+        post_comment: Post (upsert) the review comment
+        decision_reason: Reason recorded in audit events
+        on_job_done: Optional callback for each finished job
+        poll_interval: Initial seconds between batch status checks
+        timeout: Seconds to wait for the batch; reservations are held
+            this long (plus the usual TTL for collecting and posting)
+
+    Returns:
+        BatchReport with aggregate counts, tokens, cost and timings
+    """
+    spec = AGENT_SPECS[agent]
+    report = BatchReport(total=len(pr_numbers))
+    jobs = [ReviewJob(pr_number=number) for number in pr_numbers]
+    reservations: Dict[int, str] = {}
+    # Holds must outlive the wait for the batch, or concurrent runs could overshoot
+    reservation_ttl = timeout + DEFAULT_RESERVATION_TTL
+    started = time.perf_counter()
+
+    def finish(job: ReviewJob) -> None:
+        report.add(job)
+        _log_job(job, agent, client, dry_run, decision_reason)
+        if on_job_done is not None:
+            on_job_done(job)
+
+    queued: List[ReviewJob] = []
+    for job in jobs:
+        stage_started = time.perf_counter()
+        try:
+            job.pr_info = collector.get_pr_info(job.pr_number)
+            job.prompt = spec.build_prompt(job.pr_info)
+        except Exception as e:
+            job.fail("collect", e)
+            finish(job)
+            continue
+        job.stage_seconds["collect"] = time.perf_counter() - stage_started
+
+        if not dry_run:
+            if report.budget_exhausted:
+                reservation_id = None
+            else:
+                estimate = client.get_cost_estimate(job.prompt, max_tokens or client.config.max_tokens, batch=True)
+                try:
+                    reservation_id = reserve_budget(agent, estimate, ttl_seconds=reservation_ttl)
+                except BudgetExceededError:
+                    report.budget_exhausted = True
+                    reservation_id = None
+            if reservation_id is None:
+                job.status = "skipped"
+                job.error_type = "budget_exceeded"
+                finish(job)
+                continue
+            reservations[job.pr_number] = reservation_id
+        queued.append(job)
+
+    if queued:
+        stage_started = time.perf_counter()
+        try:
+            batch_id = client.submit_batch(
+                {batch_custom_id(job.pr_number): job.prompt for job in queued},
+                max_tokens=max_tokens,
+            )
+            print(f"📦 Submitted batch {batch_id} with {len(queued)} PRs, waiting for results...")
+            responses = client.wait_for_batch(batch_id, poll_interval=poll_interval, timeout=timeout)
+        except Exception as e:
+            for job in queued:
+                if job.pr_number in reservations:
+                    _settle(job, release_reservation, reservations[job.pr_number])
+                job.fail("model", e)
+                finish(job)
+            queued = []
+        model_seconds = time.perf_counter() - stage_started
+
+    for job in queued:
+        job.stage_seconds["model"] = model_seconds
+        response = responses[batch_custom_id(job.pr_number)]
+        reservation_id = reservations.get(job.pr_number)
+        if not response.success:
+            if reservation_id is not None:
+                _settle(job, release_reservation, reservation_id)
+            job.fail("model", RuntimeError(response.error_message))
+            finish(job)
+            continue
+        job.response = response
+        if reservation_id is not None:
+            # The review is paid for either way: still post it if the ledger fails
+            _settle(job, commit_reservation, response.agent, reservation_id, response.cost_usd)
+
+        stage_started = time.perf_counter()
+        try:
+            if post_comment and not dry_run:
+                body = format_review_comment(spec, job.pr_info, response)
+                job.comment_id = collector.upsert_comment(
+                    job.pr_number,
+                    body,
+                    agent=agent,
+                    comment_id=job.pr_info.bot_comments.get(agent),
+                )
+            job.status = "success"
+        except Exception as e:
+            job.fail("post", e)
+        job.stage_seconds["post"] = time.perf_counter() - stage_started
+        finish(job)
+
+    report.wall_seconds = time.perf_counter() - started
+    return report
+
+
+def _settle(job: ReviewJob, ledger_call: Callable[..., Any], *args: Any) -> None:
+    """Commit or release one job's reservation without aborting the other jobs."""
+    try:
+        ledger_call(*args)
+    except Exception as e:
+        print(f"   ⚠️ PR #{job.pr_number}: failed to update cost tracker: {e}")
+
+
+def _log_job(
+    job: ReviewJob,
+    agent: str,
+    client: AIClient,
+    dry_run: bool,
+    decision_reason: str,
+    replay: bool = False,
+) -> None:
+    """Write one audit event for a finished job."""
+    tags = ["runner", agent, "batch", job.status]
+    if dry_run:
+        tags.append("dry_run")
+    if replay:
+        tags.append("replay")
+    metadata: Dict[str, Any] = {
+        "model": job.response.model if job.response is not None else client.model,
+        "stage_seconds": {k: round(v, 4) for k, v in job.stage_seconds.items()},
+    }
+    if "model" in job.stage_seconds:
+        metadata["latency_seconds"] = round(job.stage_seconds["model"], 4)
+    if job.response is not None and "failover_from" in job.response.metadata:
+        metadata["failover_from"] = job.response.metadata["failover_from"]
+    if job.response is not None and "batch_id" in job.response.metadata:
+        metadata["batch_id"] = job.response.metadata["batch_id"]
+        tags.append("batch_api")
+    if job.pr_info is not None:
+        metadata["changed_files"] = job.pr_info.changed_files
+        metadata["sensitive_changes"] = job.pr_info.has_sensitive_changes()
+    response = job.response
+    log_ai_event(
+        agent=f"{agent}{REPLAY_SUFFIX}" if replay else agent,
+        pr_number=job.pr_number,
+        status="success" if job.status == "success" else "failed",
+        decision_reason=decision_reason,
+        input_tokens=response.input_tokens if response else 0,
+        output_tokens=response.output_tokens if response else 0,
+        total_tokens=response.total_tokens if response else 0,
+        cost_usd=response.cost_usd if response and not (dry_run or replay) else 0.0,
+        error_type=job.error_type,
+        error_message=job.error_message,
+        tags=tags,
+        metadata=metadata,
+    )
+
+
+def _print_job(job: ReviewJob) -> None:
+    icon = {"success": "✅", "failed": "❌", "skipped": "⏭️"}.get(job.status, "❓")
+    detail = job.error_message or job.error_type
+    if job.response is not None:
+        detail = f"{job.response.total_tokens} tokens, ${job.response.cost_usd:.6f}"
+    print(f"   {icon} PR #{job.pr_number}: {job.status} ({detail})")
+
+
+def main() -> int:
+    """Main entry point for the generic review runner."""
+    parser = argparse.ArgumentParser(description='Run an AI review on one PR or on all recently updated open PRs')
+    parser.add_argument(
+        '--agent',
+        choices=sorted(AGENT_SPECS),
+        default='claude',
+        help='Agent to run (default: claude)'
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument(
+        '--pr-number',
+        type=int,
+        help='Pull request number to review'
+    )
+    target.add_argument(
+        '--all-open',
+        action='store_true',
+        help='Review every open PR (see --since)'
+    )
+    parser.add_argument(
+        '--since',
+        type=parse_since,
+        default=None,
+        help='With --all-open, only PRs updated within this window (e.g. 24h, 2d)'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'Concurrent PRs per pipeline stage (default: {DEFAULT_CONCURRENCY})'
+    )
+    parser.add_argument(
+        '--no-post-comment',
+        dest='post_comment',
+        action='store_false',
+        help='Do not post review comments'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Run without posting comments or updating costs'
+    )
+    parser.add_argument(
+        '--max-tokens',
+        type=int,
+        default=4000,
+        help='Maximum tokens per response (default: 4000)'
+    )
+    parser.add_argument(
+        '--rpm',
+        type=int,
+        default=None,
+        help='Provider request quota per minute, shared by all workers (default: unlimited)'
+    )
+    parser.add_argument(
+        '--tpm',
+        type=int,
+        default=None,
+        help='Provider token quota per minute, shared by all workers (default: unlimited)'
+    )
+    parser.add_argument(
+        '--hedge',
+        action='store_true',
+        help='Send a second request when the response is slower than the usual p90 latency'
+    )
+    parser.add_argument(
+        '--batch-api',
+        action='store_true',
+        help='Submit all PRs as one provider batch job (half price, results within 24h; claude/gpt)'
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        default=None,
+        help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics during the run'
+    )
+    parser.add_argument(
+        '--cassette',
+        type=Path,
+        default=None,
+        help=f'Record GitHub and provider traffic to, or replay it from, this file (default: ${CASSETTE_ENV})'
+    )
+    parser.add_argument(
+        '--cassette-mode',
+        choices=CASSETTE_MODES,
+        default='replay',
+        help='With --cassette: record real calls or replay them offline (default: replay)'
+    )
+    parser.add_argument(
+        '--replay-pace',
+        type=float,
+        default=0.0,
+        help='With --cassette replay: 1 replays at recorded speed, 0 (default) instantly'
+    )
+
+    args = parser.parse_args()
+    export_textfile_at_exit()
+    if args.metrics_port is not None:
+        server = start_metrics_server(args.metrics_port)
+        print(f"📈 Metrics: http://127.0.0.1:{server.server_address[1]}/metrics")
+    decision_reason = os.getenv("ROUTER_REASON", "batch_review" if args.all_open else "runner_local_or_unknown")
+
+    print(f"🤖 {AGENT_SPECS[args.agent].label} Review Pipeline")
+    print("=" * 60)
+    if args.dry_run:
+        print("🏃 DRY RUN MODE - No comments will be posted, no costs recorded")
+        print()
+
+    cassette = None
+    try:
+        if args.cassette:
+            cassette = Cassette(args.cassette, mode=args.cassette_mode, pace=args.replay_pace)
+        else:
+            cassette = cassette_from_env()
+        config = ClientConfig(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+        if cassette is None:
+            collector = PRCollector()
+            client = with_failover(create_client(args.agent, config=config), args.agent, config=config)
+        elif cassette.recording:
+            # No failover: replay must see the same provider the recording did
+            collector = CassetteCollector(cassette, PRCollector())
+            client = CassetteClient(cassette, create_client(args.agent, config=config))
+            print(f"📼 Recording to {cassette.path}")
+        else:
+            collector = CassetteCollector(cassette)
+            client = CassetteClient.replay(cassette, args.agent, config=config)
+            print(f"📼 Replaying {cassette.path} (pace {cassette.pace:g}, no spend recorded)")
+        if args.batch_api and not client.supports_batch():
+            print(f"❌ {AGENT_SPECS[args.agent].label} does not support the batch API")
+            return 1
+        if args.hedge and cassette is not None:
+            # A hedge would record, or consume on replay, an extra interaction
+            print("⚠️ --hedge is ignored with --cassette")
+        elif args.hedge and not args.batch_api:
+            client = with_hedging(client, dry_run=args.dry_run)
+    except APIKeyMissingError as e:
+        print(f"❌ {e}")
+        return 1
+    except Exception as e:
+        print(f"❌ Failed to initialize: {e}")
+        return 1
+
+    if cassette is not None and cassette.recording:
+        atexit.register(cassette.save)
+
+    if args.all_open:
+        since = datetime.now(timezone.utc) - args.since if args.since else None
+        pr_numbers = collector.list_open_prs(since=since)
+        window = f" updated in the last {args.since}" if args.since else ""
+        print(f"📥 Found {len(pr_numbers)} open PRs{window}")
+    else:
+        pr_numbers = [args.pr_number]
+
+    print(f"📡 Using model: {client.model} | concurrency: {args.concurrency}")
+    print()
+
+    if args.batch_api:
+        report = run_provider_batch(
+            pr_numbers,
+            args.agent,
+            collector,
+            client,
+            max_tokens=args.max_tokens,
+            dry_run=args.dry_run,
+            post_comment=args.post_comment,
+            decision_reason=decision_reason,
+            on_job_done=_print_job,
+        )
+    else:
+        report = asyncio.run(run_pipeline(
+            pr_numbers,
+            args.agent,
+            collector,
+            client,
+            concurrency=args.concurrency,
+            max_tokens=args.max_tokens,
+            dry_run=args.dry_run,
+            post_comment=args.post_comment,
+            decision_reason=decision_reason,
+            on_job_done=_print_job,
+            replay=cassette is not None and not cassette.recording,
+        ))
+
+    print()
+    print("=" * 60)
+    print(report.format())
+    return 1 if report.failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,229 @@
+# ai/runners/sharding.py
+"""
+Map-reduce review for very large PRs.
+
+Partitions PRInfo.files into token-bounded shards (keeping files of the same
+directory/module together), reviews the shards concurrently under a
+concurrency cap, and merges the partial reviews with a final synthesis pass.
+"""
+from __future__ import annotations
+
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import Callable, Dict, List, Optional
+
+from ai.runners.clients.base_client import AIClient, AIClientError
+from ai.utils.models import AIResponse, FileChange, PRInfo
+from ai.utils.prompt_loader import build_synthesis_prompt
+from ai.utils.timing import timed
+from ai.utils.tracing import current_span, propagate_context, traced
+
+DEFAULT_SHARD_TOKENS = 24_000
+DEFAULT_MAX_FILES_PER_SHARD = 20  # Smallest max_files used by the prompt builders
+DEFAULT_CONCURRENCY = 4
+
+# Prompt builders truncate each diff to this many lines
+DIFF_LINES_PER_FILE = 50
+FILE_OVERHEAD_TOKENS = 20
+
+
+def module_key(filename: str, depth: int = 2) -> str:
+    """Affinity key for a path: its first ``depth`` directory components."""
+    parent = PurePosixPath(filename).parent.parts
+    return "/".join(parent[:depth]) or "."
+
+
+def estimate_file_tokens(file: FileChange) -> int:
+    """Rough token cost of one file inside a review prompt (~4 chars per token)."""
+    tokens = FILE_OVERHEAD_TOKENS + len(file.filename) // 4
+    if file.patch and not file.is_binary:
+        line_count = file.patch_line_count or 1
+        shown = min(1.0, DIFF_LINES_PER_FILE / line_count)
+        tokens += int(len(file.patch) * shown) // 4
+    return tokens
+
+
+def shard_files(
+    files: List[FileChange],
+    max_tokens: int = DEFAULT_SHARD_TOKENS,
+    max_files: int = DEFAULT_MAX_FILES_PER_SHARD,
+) -> List[List[FileChange]]:
+    """
+    Partition files into shards bounded by estimated tokens and file count.
+
+    Files are grouped by module key, groups are packed in path order, and a
+    group is only split across shards when it does not fit in one by itself.
+
+    Args:
+        files: Changed files
+        max_tokens: Token budget per shard
+        max_files: Maximum number of files per shard
+
+    Returns:
+        List of shards (each a list of FileChange)
+    """
+    groups: Dict[str, List[FileChange]] = {}
+    for file in files:
+        groups.setdefault(module_key(file.filename), []).append(file)
+
+    shards: List[List[FileChange]] = []
+    current: List[FileChange] = []
+    current_tokens = 0
+
+    def _flush():
+        nonlocal current, current_tokens
+        if current:
+            shards.append(current)
+        current = []
+        current_tokens = 0
+
+    for key in sorted(groups):
+        group = sorted(groups[key], key=lambda f: f.filename)
+        group_tokens = sum(estimate_file_tokens(f) for f in group)
+
+        # Start a fresh shard rather than splitting a group that would fit in one
+        fits_alone = group_tokens <= max_tokens and len(group) <= max_files
+        fits_here = (
+            current_tokens + group_tokens <= max_tokens
+            and len(current) + len(group) <= max_files
+        )
+        if fits_alone and not fits_here:
+            _flush()
+
+        for file in group:
+            file_tokens = estimate_file_tokens(file)
+            if current and (
+                current_tokens + file_tokens > max_tokens or len(current) >= max_files
+            ):
+                _flush()
+            current.append(file)
+            current_tokens += file_tokens
+
+    _flush()
+    return shards
+
+
+def _shard_pr_info(pr_info: PRInfo, files: List[FileChange]) -> PRInfo:
+    """PRInfo view restricted to one shard's files."""
+    return dataclasses.replace(
+        pr_info,
+        files=files,
+        changed_files=len(files),
+        additions=sum(f.additions for f in files),
+        deletions=sum(f.deletions for f in files),
+        comments=[],  # Existing comments are only fed to the synthesis pass
+    )
+
+
+def estimate_sharded_cost(
+    client: AIClient,
+    pr_info: PRInfo,
+    build_prompt: Callable[[PRInfo], str],
+    max_tokens: Optional[int] = None,
+    shard_tokens: int = DEFAULT_SHARD_TOKENS,
+) -> float:
+    """
+    Upper-bound cost of ``run_sharded_review``: every shard call plus the
+    synthesis call, whose input includes up to ``max_tokens`` per shard review.
+
+    Returns:
+        Estimated cost in USD
+    """
+    max_tokens = max_tokens or client.config.max_tokens
+    shards = shard_files(pr_info.files, max_tokens=shard_tokens)
+    if len(shards) <= 1:
+        return client.get_cost_estimate(build_prompt(pr_info), max_tokens)
+
+    cost = sum(
+        client.get_cost_estimate(build_prompt(_shard_pr_info(pr_info, files)), max_tokens)
+        for files in shards
+    )
+    synthesis_input = (
+        client.estimate_tokens(build_synthesis_prompt(pr_info, [""] * len(shards)))
+        + len(shards) * max_tokens
+    )
+    return cost + client.calculate_cost(synthesis_input, max_tokens)
+
+
+@timed("model")
+@traced("review.shards")
+def run_sharded_review(
+    client: AIClient,
+    pr_info: PRInfo,
+    build_prompt: Callable[[PRInfo], str],
+    max_tokens: Optional[int] = None,
+    shard_tokens: int = DEFAULT_SHARD_TOKENS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> AIResponse:
+    """
+    Review a PR shard by shard, then merge the partial reviews.
+
+    Args:
+        client: AI client used for both the map and the reduce step
+        pr_info: Full PR information
+        build_prompt: Agent prompt builder (e.g. build_claude_review_prompt)
+        max_tokens: Maximum tokens per response
+        shard_tokens: Token budget per shard
+        concurrency: Maximum number of shards reviewed at once
+
+    Returns:
+        Merged AIResponse; token counts and cost cover every call
+
+    Raises:
+        AIClientError: If every shard fails
+    """
+    shards = shard_files(pr_info.files, max_tokens=shard_tokens)
+    current_span().set_attribute("ai.shards", len(shards))
+    if len(shards) <= 1:
+        return client.send_prompt(build_prompt(pr_info), max_tokens=max_tokens)
+
+    def _review(files: List[FileChange]) -> AIResponse:
+        return client.send_prompt(build_prompt(_shard_pr_info(pr_info, files)), max_tokens=max_tokens)
+
+    results: List[Optional[AIResponse]] = []
+    errors: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(propagate_context(_review), shard) for shard in shards]
+        for index, future in enumerate(futures, start=1):
+            try:
+                results.append(future.result())
+            except AIClientError as e:
+                print(f"   ⚠️ Shard {index}/{len(shards)} failed: {e}")
+                results.append(None)
+                errors.append(str(e))
+
+    succeeded = [r for r in results if r is not None]
+    if not succeeded:
+        raise AIClientError(f"All {len(shards)} shards failed: {errors[0]}")
+
+    shard_reviews = []
+    for shard, response in zip(shards, results):
+        names = ", ".join(f"`{f.filename}`" for f in shard)
+        if response is None:
+            shard_reviews.append(f"Files: {names}\n\n(review failed for this shard)")
+        else:
+            shard_reviews.append(f"Files: {names}\n\n{response.content}")
+
+    synthesis = client.send_prompt(build_synthesis_prompt(pr_info, shard_reviews), max_tokens=max_tokens)
+    calls = succeeded + [synthesis]
+
+    return AIResponse(
+        agent=synthesis.agent,
+        content=synthesis.content,
+        model=synthesis.model,
+        input_tokens=sum(r.input_tokens for r in calls),
+        output_tokens=sum(r.output_tokens for r in calls),
+        total_tokens=sum(r.total_tokens for r in calls),
+        cache_read_tokens=sum(r.cache_read_tokens for r in calls),
+        cache_write_tokens=sum(r.cache_write_tokens for r in calls),
+        cost_usd=round(sum(r.cost_usd for r in calls), 6),
+        timestamp=datetime.now(),
+        success=True,
+        error_message=None,
+        metadata={
+            'shards': len(shards),
+            'shard_failures': len(shards) - len(succeeded),
+        },
+    )
@@ -0,0 +1,254 @@
+# ai/utils/audit_columns.py
+"""
+Columnar storage for compacted audit log days.
+
+A compacted day lives next to its JSONL file:
+
+  ai/logs/YYYY-MM-DD/columns/
+    meta.json            row count, source size, per-column min/max stats,
+                         dictionaries for string columns
+    <column>.<typecode>  one binary ``array`` per column
+
+Numeric columns are stored as-is (int64 / float64); string columns are
+dictionary-encoded to uint32 codes. Queries read only the columns they
+need, and skip a whole day when its dictionaries or min/max stats show
+no row can match. The JSONL file stays the source of truth; a day whose
+JSONL grew after compaction is treated as uncompacted.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import shutil
+import sys
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterable, List, Optional, Sequence, Union
+
+COLUMN_DIR = "columns"
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+
+# Column name -> array typecode
+NUMERIC_COLUMNS: Dict[str, str] = {
+    "timestamp": "d",  # epoch seconds (UTC)
+    "pr_number": "q",
+    "input_tokens": "q",
+    "output_tokens": "q",
+    "total_tokens": "q",
+    "cost_usd": "d",
+    "latency_seconds": "d",  # NaN when not recorded
+}
+STRING_COLUMNS = ("agent", "status", "error_type", "decision_reason")
+CODE_TYPECODE = "I"
+QUERY_COLUMNS = tuple(NUMERIC_COLUMNS) + STRING_COLUMNS
+STAT_COLUMNS = ("timestamp", "pr_number", "cost_usd", "total_tokens")
+
+Filter = Union[None, str, int, Collection[Any]]
+
+
+def _epoch(iso_ts: str) -> float:
+    try:
+        return datetime.fromisoformat(iso_ts).timestamp()
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def event_latency(event: Dict[str, Any]) -> Optional[float]:
+    """Model latency recorded with an event, in seconds (None if absent)."""
+    metadata = event.get("metadata") or {}
+    latency = metadata.get("latency_seconds")
+    if latency is None:
+        latency = (metadata.get("stage_seconds") or {}).get("model")
+    return float(latency) if latency is not None else None
+
+
+def event_row(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one JSONL event into the queryable columns."""
+    tokens = event.get("tokens", {}) or {}
+    latency = event_latency(event)
+    return {
+        "timestamp": _epoch(event.get("timestamp", "")),
+        "pr_number": int(event.get("pr_number", 0) or 0),
+        "input_tokens": int(tokens.get("input", 0) or 0),
+        "output_tokens": int(tokens.get("output", 0) or 0),
+        "total_tokens": int(tokens.get("total", 0) or 0),
+        "cost_usd": float(event.get("cost_usd", 0.0) or 0.0),
+        "latency_seconds": latency,
+        "agent": str(event.get("agent", "") or ""),
+        "status": str(event.get("status", "") or ""),
+        "error_type": str(event.get("error_type", "") or ""),
+        "decision_reason": str(event.get("decision_reason", "") or ""),
+    }
+
+
+def _as_set(value: Filter) -> Optional[set]:
+    if value is None:
+        return None
+    if isinstance(value, (str, int)):
+        return {value}
+    return set(value)
+
+
+def row_matches(row: Dict[str, Any], agent: Filter = None, status: Filter = None, pr_number: Filter = None) -> bool:
+    """Apply query filters to a flattened row."""
+    for name, wanted in (("agent", _as_set(agent)), ("status", _as_set(status)), ("pr_number", _as_set(pr_number))):
+        if wanted is not None and row[name] not in wanted:
+            return False
+    return True
+
+
+def write_columns(events: Iterable[Dict[str, Any]], day_dir: Path, source_size: int) -> Dict[str, Any]:
+    """
+    Compact ``events`` into ``day_dir/columns``, replacing any previous
+    compaction. Returns the new metadata.
+    """
+    numeric = {name: array(code) for name, code in NUMERIC_COLUMNS.items()}
+    codes = {name: array(CODE_TYPECODE) for name in STRING_COLUMNS}
+    dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in STRING_COLUMNS}
+    rows = 0
+
+    for event in events:
+        row = event_row(event)
+        rows += 1
+        for name, column in numeric.items():
+            value = row[name]
+            column.append(float("nan") if value is None else value)
+        for name in STRING_COLUMNS:
+            values = dictionaries[name]
+            codes[name].append(values.setdefault(row[name], len(values)))
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    for name in STAT_COLUMNS:
+        values = [v for v in numeric[name] if not (isinstance(v, float) and math.isnan(v))]
+        if values:
+            stats[name] = {"min": min(values), "max": max(values)}
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "rows": rows,
+        "source_size": source_size,
+        "byteorder": sys.byteorder,
+        "stats": stats,
+        "dictionaries": {name: list(values) for name, values in dictionaries.items()},
+    }
+
+    target = day_dir / COLUMN_DIR
+    staging = day_dir / f"{COLUMN_DIR}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    for name, column in numeric.items():
+        with (staging / f"{name}.{column.typecode}").open("wb") as fh:
+            column.tofile(fh)
+    for name, column in codes.items():
+        with (staging / f"{name}.{CODE_TYPECODE}").open("wb") as fh:
+            column.tofile(fh)
+    (staging / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+    # Swap directories; readers that miss meta.json fall back to the JSONL
+    retired = day_dir / f"{COLUMN_DIR}.old-{os.getpid()}"
+    if target.exists():
+        os.replace(target, retired)
+    os.replace(staging, target)
+    shutil.rmtree(retired, ignore_errors=True)
+    return meta
+
+
+class ColumnarDay:
+    """Read-only view of one compacted day."""
+
+    def __init__(self, column_dir: Path, meta: Dict[str, Any]):
+        self.column_dir = column_dir
+        self.meta = meta
+        self.rows: int = meta["rows"]
+        self._swap = meta.get("byteorder", sys.byteorder) != sys.byteorder
+        self._cache: Dict[str, array] = {}
+
+    @classmethod
+    def open(cls, day_dir: Path, source_size: Optional[int] = None) -> Optional["ColumnarDay"]:
+        """
+        Open a compacted day, or None if it is not compacted, uses another
+        format version, or is stale (the JSONL size differs).
+        """
+        column_dir = day_dir / COLUMN_DIR
+        try:
+            meta = json.loads((column_dir / META_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != FORMAT_VERSION:
+            return None
+        if source_size is not None and meta.get("source_size") != source_size:
+            return None
+        return cls(column_dir, meta)
+
+    def _column(self, name: str) -> array:
+        column = self._cache.get(name)
+        if column is None:
+            code = NUMERIC_COLUMNS.get(name, CODE_TYPECODE)
+            column = array(code)
+            with (self.column_dir / f"{name}.{code}").open("rb") as fh:
+                column.fromfile(fh, self.rows)
+            if self._swap:
+                column.byteswap()
+            self._cache[name] = column
+        return column
+
+    def _codes_for(self, name: str, wanted: Optional[set]) -> Optional[set]:
+        if wanted is None:
+            return None
+        dictionary = self.meta["dictionaries"][name]
+        return {code for code, value in enumerate(dictionary) if value in wanted}
+
+    def may_match(self, agent: Filter = None, status: Filter = None, pr_number: Filter = None) -> bool:
+        """Whether any row could match, from dictionaries and min/max stats only."""
+        for name, value in (("agent", agent), ("status", status)):
+            codes = self._codes_for(name, _as_set(value))
+            if codes is not None and not codes:
+                return False
+        numbers = _as_set(pr_number)
+        stats = self.meta["stats"].get("pr_number")
+        if numbers is not None and stats is not None:
+            if not any(stats["min"] <= n <= stats["max"] for n in numbers):
+                return False
+        return self.rows > 0
+
+    def select(
+        self,
+        agent: Filter = None,
+        status: Filter = None,
+        pr_number: Filter = None,
+        columns: Sequence[str] = QUERY_COLUMNS,
+    ) -> List[Dict[str, Any]]:
+        """Rows matching the filters, projected to ``columns``."""
+        if not self.may_match(agent, status, pr_number):
+            return []
+
+        indices: Iterable[int] = range(self.rows)
+        for name, value in (("agent", agent), ("status", status)):
+            codes = self._codes_for(name, _as_set(value))
+            if codes is not None:
+                column = self._column(name)
+                indices = [i for i in indices if column[i] in codes]
+        numbers = _as_set(pr_number)
+        if numbers is not None:
+            column = self._column("pr_number")
+            indices = [i for i in indices if column[i] in numbers]
+
+        indices = list(indices)
+        projected: Dict[str, List[Any]] = {}
+        for name in columns:
+            column = self._column(name)
+            if name in NUMERIC_COLUMNS:
+                values = [column[i] for i in indices]
+                if column.typecode == "d" and name == "latency_seconds":
+                    values = [None if math.isnan(v) else v for v in values]
+            else:
+                dictionary = self.meta["dictionaries"][name]
+                values = [dictionary[column[i]] for i in indices]
+            projected[name] = values
+        return [
+            {name: projected[name][n] for name in columns}
+            for n in range(len(indices))
+        ]
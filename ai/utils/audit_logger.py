@@ -3,17 +3,73 @@ Lightweight audit logging for AI runner events.
 
 Writes append-only JSONL events under:
   ai/logs/YYYY-MM-DD/events.jsonl
+
+Events are buffered in memory by a process-wide ``AuditSink`` and written
+in batches (every FLUSH_BATCH_SIZE events or FLUSH_INTERVAL_SECONDS) by a
+background thread over long-lived append-only file descriptors. Each
+batch is one locked write followed by fsync, so lines from concurrent
+writers never interleave. The buffer is drained at interpreter exit and
+before events are read back.
+
+Each flushed batch is also folded into incremental rollups (per day, per
+agent and per month; see ``ai.utils.audit_rollups``) while the batch's
+file lock is held, so summaries read a few small files instead of
+rescanning JSONL. Rollups that fell behind their JSONL are rebuilt by
+streaming it line by line (``iter_events``). Closed days can be compacted
+into column files (``compact_day``) that ``query_events`` reads with
+filter pushdown.
 """
 from __future__ import annotations
 
+import atexit
 import json
+import os
+import threading
 import uuid
-from datetime import datetime, timezone
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ai.utils.audit_columns import (
+    QUERY_COLUMNS,
+    ColumnarDay,
+    Filter,
+    event_row,
+    row_matches,
+    write_columns,
+)
+from ai.utils.audit_rollups import (
+    MONTH_DIR,
+    ROLLUP_FILE,
+    Rollup,
+    locked,
+    read_rollup,
+    write_rollup,
+)
+from ai.utils.timing import current_stage_timer
+from ai.utils.tracing import current_span
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, O_APPEND only
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # Optional: faster JSON decoding for summaries
+    orjson = None
 
 
 LOG_ROOT = Path("ai/logs")
+FLUSH_BATCH_SIZE = 100
+FLUSH_INTERVAL_SECONDS = 1.0
+# Daily files rarely change within a run; keep a few descriptors open
+MAX_OPEN_FILES = 4
+# Paths whose file was already created (submit skips mkdir/touch for these)
+MAX_KNOWN_PATHS = 64
+# Events kept for retry while writes fail; the oldest are dropped beyond this
+MAX_BUFFERED_EVENTS = 10_000
 
 
 def _utc_now_iso() -> str:
@@ -31,6 +87,211 @@ def _safe_text(value: Any) -> str:
     return str(value)
 
 
+def _same_file(fd: int, path: Path) -> bool:
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(path))
+    except OSError:
+        return False
+
+
+# on_batch(path, events, size_after, appended_bytes)
+BatchHook = Callable[[Path, List[Dict[str, Any]], int, int], None]
+
+
+class AuditSink:
+    """
+    Buffered JSONL writer with a background flush thread.
+
+    ``on_batch`` is called after each batch is written and synced, while
+    the file lock is still held, with the events submitted alongside the
+    lines, the file size after the write and the number of bytes written.
+
+    A failed write puts its events back in the buffer (up to
+    ``max_buffered``) for the next flush. Until a flush succeeds again,
+    ``submit`` flushes synchronously so callers see the error.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = FLUSH_BATCH_SIZE,
+        interval: float = FLUSH_INTERVAL_SECONDS,
+        fsync: bool = True,
+        on_batch: Optional[BatchHook] = None,
+        max_buffered: int = MAX_BUFFERED_EVENTS,
+    ):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.fsync = fsync
+        self.on_batch = on_batch
+        self.max_buffered = max_buffered
+        self._lock = threading.Lock()  # buffer, known paths, thread start
+        self._write_lock = threading.Lock()  # file descriptors, one flush at a time
+        self._buffer: List[Tuple[Path, str, Optional[Dict[str, Any]]]] = []
+        self._known: "OrderedDict[Path, None]" = OrderedDict()
+        self._fds: "OrderedDict[Path, int]" = OrderedDict()
+        self._wake = threading.Event()
+        self._closed = False
+        self._failing = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, path: Path, line: str, event: Optional[Dict[str, Any]] = None) -> None:
+        """Queue one JSONL line (without newline) for ``path``, with its decoded event for ``on_batch``."""
+        with self._lock:
+            if path not in self._known:
+                # Create the file up front so callers can rely on the returned path
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.touch(exist_ok=True)
+                self._known[path] = None
+                if len(self._known) > MAX_KNOWN_PATHS:
+                    self._known.popitem(last=False)
+            self._buffer.append((path, line + "\n", event))
+            full = len(self._buffer) >= self.batch_size
+            synchronous = self._closed or self._failing
+            if not self._closed and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+                self._thread.start()
+        if synchronous:
+            # Late events after shutdown, and events while writes are failing,
+            # are written synchronously (errors reach the caller)
+            self.flush()
+        elif full:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """
+        Write all buffered events now.
+
+        Raises:
+            OSError: If a write fails; the unwritten events stay buffered
+        """
+        with self._write_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+            grouped: Dict[Path, List[Tuple[Path, str, Optional[Dict[str, Any]]]]] = {}
+            for entry in batch:
+                grouped.setdefault(entry[0], []).append(entry)
+            pending = list(grouped.values())
+            while pending:
+                entries = pending[0]
+                data = "".join(line for _, line, _ in entries).encode("utf-8")
+                events = [event for _, _, event in entries if event is not None]
+                try:
+                    self._append(entries[0][0], data, events)
+                except Exception:
+                    self._requeue([entry for group in pending for entry in group])
+                    raise
+                pending.pop(0)
+            self._failing = False
+
+    def _requeue(self, entries: List[Tuple[Path, str, Optional[Dict[str, Any]]]]) -> None:
+        with self._lock:
+            self._failing = True
+            self._buffer[:0] = entries
+            dropped = len(self._buffer) - self.max_buffered
+            if dropped > 0:
+                del self._buffer[:dropped]
+        if dropped > 0:
+            print(f"⚠️ Audit log buffer full, dropped {dropped} oldest event(s)")
+
+    def _fd(self, path: Path) -> int:
+        fd = self._fds.get(path)
+        if fd is not None and not _same_file(fd, path):
+            # Rotated or deleted underneath us: reopen by name
+            del self._fds[path]
+            os.close(fd)
+            fd = None
+        if fd is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._fds[path] = fd
+            while len(self._fds) > MAX_OPEN_FILES:
+                _, old = self._fds.popitem(last=False)
+                os.close(old)
+        else:
+            self._fds.move_to_end(path)
+        return fd
+
+    def _append(self, path: Path, data: bytes, events: List[Dict[str, Any]]) -> None:
+        fd = self._fd(path)
+        try:
+            self._write(fd, path, data, events)
+        except OSError:
+            # Reopen by name on the next attempt
+            self._fds.pop(path, None)
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+            raise
+
+    def _write(self, fd: int, path: Path, data: bytes, events: List[Dict[str, Any]]) -> None:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            if self.fsync:
+                os.fsync(fd)
+            if self.on_batch is not None and events:
+                try:
+                    self.on_batch(path, events, os.fstat(fd).st_size, len(data))
+                except Exception as e:
+                    # The events are on disk; a stale rollup is rebuilt on read
+                    print(f"⚠️ Audit rollup update failed: {e}")
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Audit log flush failed: {e}")
+
+    def close(self) -> None:
+        """Stop the flush thread, drain the buffer and close the files."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._wake.set()
+        if thread is not None:
+            thread.join()
+        try:
+            self.flush()
+        finally:
+            with self._write_lock:
+                while self._fds:
+                    _, fd = self._fds.popitem()
+                    os.close(fd)
+
+
+_SINK: Optional[AuditSink] = None
+_SINK_LOCK = threading.Lock()
+
+
+def get_audit_sink() -> AuditSink:
+    """Process-wide audit sink, drained at interpreter exit."""
+    global _SINK
+    with _SINK_LOCK:
+        if _SINK is None:
+            _SINK = AuditSink(on_batch=_apply_rollups)
+            atexit.register(_SINK.close)
+        return _SINK
+
+
+def flush_events() -> None:
+    """Write buffered audit events to disk."""
+    if _SINK is not None:
+        _SINK.flush()
+
+
 def log_ai_event(
     *,
     agent: str,
@@ -48,12 +309,24 @@ def log_ai_event(
 ) -> Path:
     """
     Append one event record to the daily JSONL log file.
+
+    The event is buffered and written by the audit sink's flush thread;
+    the returned path exists on return. When a stage timer is active its
+    durations are added to ``metadata["stage_seconds"]`` (unless set), and
+    the current trace id (if tracing) to ``metadata["trace_id"]``.
     """
     ts = _utc_now_iso()
+    metadata = dict(metadata or {})
+    timer = current_stage_timer()
+    if timer is not None and "stage_seconds" not in metadata:
+        stage_seconds = timer.as_metadata()
+        if stage_seconds:
+            metadata["stage_seconds"] = stage_seconds
+    span = current_span()
+    if span.recording:
+        metadata.setdefault("trace_id", span.context.trace_id)
     day = _day_from_iso(ts)
-    target_dir = LOG_ROOT / day
-    target_dir.mkdir(parents=True, exist_ok=True)
-    event_path = target_dir / "events.jsonl"
+    event_path = LOG_ROOT / day / "events.jsonl"
 
     payload = {
         "event_id": str(uuid.uuid4()),
@@ -71,81 +344,301 @@ def log_ai_event(
         "error_type": _safe_text(error_type),
         "error_message": _safe_text(error_message),
         "tags": tags or [],
-        "metadata": metadata or {},
+        "metadata": metadata,
     }
 
-    with event_path.open("a", encoding="utf-8") as handle:
-        handle.write(json.dumps(payload, ensure_ascii=False) + "\n")
-
+    get_audit_sink().submit(event_path, json.dumps(payload, ensure_ascii=False), payload)
     return event_path
 
 
+def _loads(line: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def day_range(start_day: str, end_day: Optional[str] = None) -> Iterator[str]:
+    """UTC days from ``start_day`` through ``end_day`` (inclusive), YYYY-MM-DD."""
+    first = date.fromisoformat(start_day)
+    last = date.fromisoformat(end_day) if end_day else first
+    for offset in range((last - first).days + 1):
+        yield (first + timedelta(days=offset)).isoformat()
+
+
+def _read_events_file(path: Path, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    # Raw reader: no flush, so it is safe to call from the sink's batch hook.
+    # ``limit`` stops at that byte offset (a size observed under the lock).
+    try:
+        handle = path.open("rb")
+    except FileNotFoundError:
+        return
+    with handle:
+        offset = 0
+        for line in handle:
+            offset += len(line)
+            if limit is not None and offset > limit:
+                break
+            if line.strip():
+                yield _loads(line)
+
+
+def iter_events(day: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream events for a UTC day (YYYY-MM-DD) one at a time. Defaults to
+    today (UTC). Blank lines are skipped.
+    """
+    flush_events()
+    day = day or _day_from_iso(_utc_now_iso())
+    yield from _read_events_file(LOG_ROOT / day / "events.jsonl")
+
+
 def load_events(day: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Load all events for a UTC day (YYYY-MM-DD). Defaults to today (UTC).
     """
-    day = day or _day_from_iso(_utc_now_iso())
-    event_path = LOG_ROOT / day / "events.jsonl"
-    if not event_path.exists():
-        return []
+    return list(iter_events(day))
 
-    rows: List[Dict[str, Any]] = []
-    with event_path.open("r", encoding="utf-8") as handle:
-        for line in handle:
-            line = line.strip()
-            if not line:
-                continue
-            rows.append(json.loads(line))
-    return rows
+
+def _file_size(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return None
+
+
+def _rebuild_day(source: Path, day: str, size: int) -> Rollup:
+    rollup = Rollup.from_events(_read_events_file(source, limit=size))
+    rollup.sources = {day: size}
+    return rollup
+
+
+def _rebuild_month(root: Path, month: str) -> Rollup:
+    rollup = Rollup()
+    for day_dir in sorted(root.glob(f"{month}-??")):
+        if (day_dir / "events.jsonl").exists():
+            rollup.merge(_fresh_day_rollup(root, day_dir.name))
+    return rollup
+
+
+def _fresh_day_rollup(root: Path, day: str) -> Rollup:
+    # Day rollup matching the current JSONL size, rebuilt (and saved) if behind
+    source = root / day / "events.jsonl"
+    if _file_size(source) is None:
+        return Rollup()
+    path = source.parent / ROLLUP_FILE
+    rollup = read_rollup(path)
+    if rollup is not None and rollup.sources.get(day) == _file_size(source):
+        return rollup
+    with locked(path):
+        rollup = read_rollup(path)
+        size = _file_size(source) or 0
+        if rollup is None or rollup.sources.get(day) != size:
+            rollup = _rebuild_day(source, day, size)
+            write_rollup(path, rollup)
+    return rollup
+
+
+def _month_sources(root: Path, month: str) -> Dict[str, int]:
+    sources = {}
+    for day_dir in root.glob(f"{month}-??"):
+        size = _file_size(day_dir / "events.jsonl")
+        if size is not None:
+            sources[day_dir.name] = size
+    return sources
+
+
+def _apply_rollups(events_path: Path, events: List[Dict[str, Any]], size: int, appended: int) -> None:
+    """
+    AuditSink batch hook: fold a written batch into its day and month rollups.
+
+    A rollup is incremented only if it covered exactly the bytes before
+    this batch; otherwise it is rebuilt from the JSONL. Runs under the
+    events file lock, so batches for one day are applied in write order.
+    """
+    root = events_path.parent.parent
+    day = events_path.parent.name
+    day_path = events_path.parent / ROLLUP_FILE
+    with locked(day_path):
+        rollup = read_rollup(day_path)
+        covered = rollup.sources.get(day) if rollup is not None else None
+        if covered != size:
+            if rollup is not None and covered == size - appended:
+                rollup.add_all(events)
+                rollup.sources = {day: size}
+            else:
+                rollup = _rebuild_day(events_path, day, size)
+            write_rollup(day_path, rollup)
+
+    # Day lock released first: a month rebuild takes day locks itself
+    month = day[:7]
+    month_path = root / MONTH_DIR / f"{month}.json"
+    with locked(month_path):
+        rollup = read_rollup(month_path)
+        covered = rollup.sources.get(day, 0) if rollup is not None else None
+        if covered != size:
+            if rollup is not None and covered == size - appended:
+                rollup.add_all(events)
+                rollup.sources[day] = size
+            else:
+                rollup = _rebuild_month(root, month)
+            write_rollup(month_path, rollup)
+
+
+def day_rollup(day: Optional[str] = None) -> Rollup:
+    """Rollup for a UTC day (default today), up to date with its JSONL."""
+    flush_events()
+    return _fresh_day_rollup(LOG_ROOT, day or _today())
+
+
+def month_rollup(month: Optional[str] = None) -> Rollup:
+    """Rollup for a UTC month (YYYY-MM, default this month), up to date with its JSONL files."""
+    flush_events()
+    month = month or _today()[:7]
+    path = LOG_ROOT / MONTH_DIR / f"{month}.json"
+    rollup = read_rollup(path)
+    if rollup is not None and rollup.sources == _month_sources(LOG_ROOT, month):
+        return rollup
+    with locked(path):
+        rollup = read_rollup(path)
+        if rollup is None or rollup.sources != _month_sources(LOG_ROOT, month):
+            rollup = _rebuild_month(LOG_ROOT, month)
+            write_rollup(path, rollup)
+    return rollup
+
+
+def build_summary(start_day: Optional[str] = None, end_day: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Summarize events for a range of UTC days from their day rollups.
+
+    Each day costs one small file read; only days whose rollup is behind
+    their JSONL are streamed (in constant memory). Latency/cost
+    percentiles come from merged quantile sketches. ``start_day`` defaults
+    to today (UTC) and ``end_day`` to ``start_day``.
+    """
+    start_day = start_day or _today()
+    end_day = end_day or start_day
+    flush_events()
+    rollup = Rollup()
+    days = 0
+    for day in day_range(start_day, end_day):
+        days += 1
+        rollup.merge(_fresh_day_rollup(LOG_ROOT, day))
+    return {"start_day": start_day, "end_day": end_day, "days": days, **rollup.summary()}
+
+
+def build_monthly_summary(month: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Summarize a UTC month (YYYY-MM, default this month) from its rollup.
+    """
+    month = month or _today()[:7]
+    first = date.fromisoformat(f"{month}-01")
+    last = (first + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    return {
+        "month": month,
+        "start_day": first.isoformat(),
+        "end_day": last.isoformat(),
+        "days": last.day,
+        **month_rollup(month).summary(),
+    }
 
 
 def build_daily_summary(day: Optional[str] = None) -> Dict[str, Any]:
     """
     Build a compact daily summary from JSONL events.
     """
-    events = load_events(day=day)
-    summary: Dict[str, Any] = {
-        "day": day or _day_from_iso(_utc_now_iso()),
-        "event_count": len(events),
-        "success_count": 0,
-        "failed_count": 0,
-        "partial_count": 0,
-        "total_cost_usd": 0.0,
-        "agents": {},
-    }
+    day = day or _day_from_iso(_utc_now_iso())
+    summary = build_summary(day, day)
+    return {"day": day, **summary}
 
-    for event in events:
-        status = event.get("status", "")
-        agent = event.get("agent", "unknown")
-        cost = float(event.get("cost_usd", 0.0) or 0.0)
-        tokens = event.get("tokens", {}) or {}
-        total_tokens = int(tokens.get("total", 0) or 0)
-
-        if status == "success":
-            summary["success_count"] += 1
-        elif status == "failed":
-            summary["failed_count"] += 1
-        else:
-            summary["partial_count"] += 1
-
-        summary["total_cost_usd"] = round(summary["total_cost_usd"] + cost, 6)
-
-        agent_row = summary["agents"].setdefault(
-            agent,
-            {
-                "event_count": 0,
-                "success_count": 0,
-                "failed_count": 0,
-                "total_tokens": 0,
-                "total_cost_usd": 0.0,
-            },
-        )
-        agent_row["event_count"] += 1
-        agent_row["total_tokens"] += total_tokens
-        agent_row["total_cost_usd"] = round(agent_row["total_cost_usd"] + cost, 6)
-        if status == "success":
-            agent_row["success_count"] += 1
-        elif status == "failed":
-            agent_row["failed_count"] += 1
-
-    return summary
+
+def _today() -> str:
+    return _day_from_iso(_utc_now_iso())
+
+
+def _event_file(day: str) -> Path:
+    return LOG_ROOT / day / "events.jsonl"
+
+
+def compact_day(day: str, force: bool = False) -> bool:
+    """
+    Compact one day's events into column files.
+
+    Returns True if the day was (re)compacted, False if it has no events
+    file or its compaction is already up to date.
+    """
+    flush_events()
+    source = _event_file(day)
+    try:
+        size = source.stat().st_size
+    except FileNotFoundError:
+        return False
+    if not force and ColumnarDay.open(source.parent, size) is not None:
+        return False
+    write_columns(iter_events(day), source.parent, size)
+    return True
+
+
+def compact_closed_days(force: bool = False) -> List[str]:
+    """Compact every day before today (UTC); returns the days compacted."""
+    if not LOG_ROOT.exists():
+        return []
+    today = _today()
+    compacted = []
+    for day_dir in sorted(LOG_ROOT.iterdir()):
+        day = day_dir.name
+        if len(day) == 10 and day[4] == "-" and day < today and compact_day(day, force=force):
+            compacted.append(day)
+    return compacted
+
+
+def query_events(
+    start_day: str,
+    end_day: Optional[str] = None,
+    *,
+    agent: Filter = None,
+    status: Filter = None,
+    pr_number: Filter = None,
+    columns: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Query flattened event rows over a range of UTC days.
+
+    Filters accept a single value or a collection. Compacted days are read
+    from their column files (skipping days whose stats rule out a match and
+    reading only the needed columns); other days, including today, are
+    scanned from JSONL with the same filters.
+
+    Args:
+        start_day: First day (YYYY-MM-DD)
+        end_day: Last day (default: start_day)
+        agent: Agent name(s) to keep
+        status: Status(es) to keep
+        pr_number: PR number(s) to keep
+        columns: Columns to return (default: all of QUERY_COLUMNS);
+            "timestamp" is epoch seconds
+
+    Returns:
+        One dict per matching event, in file order
+    """
+    columns = list(columns or QUERY_COLUMNS)
+    unknown = set(columns) - set(QUERY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown audit columns: {sorted(unknown)}")
+
+    flush_events()
+    rows: List[Dict[str, Any]] = []
+    for day in day_range(start_day, end_day):
+        source = _event_file(day)
+        try:
+            size = source.stat().st_size
+        except FileNotFoundError:
+            continue
+        store = ColumnarDay.open(source.parent, size)
+        if store is not None:
+            rows.extend(store.select(agent, status, pr_number, columns))
+            continue
+        for event in iter_events(day):
+            row = event_row(event)
+            if row_matches(row, agent, status, pr_number):
+                rows.append({name: row[name] for name in columns})
+    return rows
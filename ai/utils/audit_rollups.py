@@ -0,0 +1,235 @@
+# ai/utils/audit_rollups.py
+"""
+Incremental audit rollups.
+
+A rollup holds running counts, token and cost totals, and latency/cost
+and per-stage duration quantile sketches for a set of events, overall and
+per agent. The audit
+sink folds every flushed batch into:
+
+  ai/logs/YYYY-MM-DD/rollup.json   one day
+  ai/logs/months/YYYY-MM.json      one month
+
+so summaries read one small file instead of rescanning JSONL. Each
+rollup records the size of the JSONL it covers; a rollup that no longer
+matches its source (events written by another tool, a crash between
+append and rollup) is rebuilt instead of incremented.
+"""
+from __future__ import annotations
+
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from ai.utils.audit_columns import event_latency
+from ai.utils.quantile_sketch import QuantileSketch
+
+try:
+    import fcntl
+except ImportError:  # Windows: rollup updates are not serialized across processes
+    fcntl = None
+
+ROLLUP_FILE = "rollup.json"
+MONTH_DIR = "months"
+ROLLUP_VERSION = 2
+STAGE_QUANTILES = (0.5, 0.95)
+_COUNTERS = (
+    "event_count",
+    "success_count",
+    "failed_count",
+    "partial_count",
+    "input_tokens",
+    "output_tokens",
+    "total_tokens",
+)
+
+
+class RollupAccumulator:
+    """Running totals and sketches for one group of events."""
+
+    __slots__ = _COUNTERS + ("total_cost_usd", "latency", "cost", "stages")
+
+    def __init__(self) -> None:
+        self.event_count = 0
+        self.success_count = 0
+        self.failed_count = 0
+        self.partial_count = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.total_tokens = 0
+        self.total_cost_usd = 0.0
+        self.latency = QuantileSketch()
+        self.cost = QuantileSketch()
+        # Stage name -> sketch of metadata["stage_seconds"][stage]
+        self.stages: Dict[str, QuantileSketch] = {}
+
+    def add(self, event: Dict[str, Any]) -> None:
+        status = event.get("status", "")
+        tokens = event.get("tokens", {}) or {}
+        cost = float(event.get("cost_usd", 0.0) or 0.0)
+        latency = event_latency(event)
+
+        self.event_count += 1
+        if status == "success":
+            self.success_count += 1
+        elif status == "failed":
+            self.failed_count += 1
+        else:
+            self.partial_count += 1
+        self.input_tokens += int(tokens.get("input", 0) or 0)
+        self.output_tokens += int(tokens.get("output", 0) or 0)
+        self.total_tokens += int(tokens.get("total", 0) or 0)
+        self.total_cost_usd = round(self.total_cost_usd + cost, 6)
+        self.cost.add(cost)
+        if latency is not None:
+            self.latency.add(latency)
+        stage_seconds = (event.get("metadata") or {}).get("stage_seconds") or {}
+        for stage, seconds in stage_seconds.items():
+            if stage not in self.stages:
+                self.stages[stage] = QuantileSketch()
+            self.stages[stage].add(seconds)
+
+    def merge(self, other: "RollupAccumulator") -> None:
+        for name in _COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.total_cost_usd = round(self.total_cost_usd + other.total_cost_usd, 6)
+        self.latency.merge(other.latency)
+        self.cost.merge(other.cost)
+        for stage, sketch in other.stages.items():
+            if stage not in self.stages:
+                self.stages[stage] = QuantileSketch()
+            self.stages[stage].merge(sketch)
+
+    def to_state(self) -> Dict[str, Any]:
+        state: Dict[str, Any] = {name: getattr(self, name) for name in _COUNTERS}
+        state["total_cost_usd"] = self.total_cost_usd
+        state["latency"] = self.latency.to_dict()
+        state["cost"] = self.cost.to_dict()
+        state["stages"] = {stage: sketch.to_dict() for stage, sketch in self.stages.items()}
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "RollupAccumulator":
+        acc = cls()
+        for name in _COUNTERS + ("total_cost_usd",):
+            setattr(acc, name, state[name])
+        acc.latency = QuantileSketch.from_dict(state["latency"])
+        acc.cost = QuantileSketch.from_dict(state["cost"])
+        acc.stages = {stage: QuantileSketch.from_dict(s) for stage, s in state["stages"].items()}
+        return acc
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "event_count": self.event_count,
+            "success_count": self.success_count,
+            "failed_count": self.failed_count,
+            "partial_count": self.partial_count,
+            "total_tokens": self.total_tokens,
+            "total_cost_usd": self.total_cost_usd,
+            "latency_seconds": self.latency.summary(digits=4),
+            "cost_per_event_usd": self.cost.summary(),
+            "stage_seconds": {
+                stage: sketch.summary(STAGE_QUANTILES, digits=4)
+                for stage, sketch in sorted(self.stages.items())
+            },
+        }
+
+
+class Rollup:
+    """Overall and per-agent accumulators, plus the JSONL sizes they cover."""
+
+    def __init__(self) -> None:
+        self.totals = RollupAccumulator()
+        self.agents: Dict[str, RollupAccumulator] = {}
+        # events.jsonl size per day covered by this rollup
+        self.sources: Dict[str, int] = {}
+
+    @classmethod
+    def from_events(cls, events: Iterable[Dict[str, Any]]) -> "Rollup":
+        rollup = cls()
+        rollup.add_all(events)
+        return rollup
+
+    def add(self, event: Dict[str, Any]) -> None:
+        self.totals.add(event)
+        agent = event.get("agent", "unknown")
+        if agent not in self.agents:
+            self.agents[agent] = RollupAccumulator()
+        self.agents[agent].add(event)
+
+    def add_all(self, events: Iterable[Dict[str, Any]]) -> None:
+        for event in events:
+            self.add(event)
+
+    def merge(self, other: "Rollup") -> None:
+        self.totals.merge(other.totals)
+        for agent, acc in other.agents.items():
+            if agent not in self.agents:
+                self.agents[agent] = RollupAccumulator()
+            self.agents[agent].merge(acc)
+        self.sources.update(other.sources)
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "version": ROLLUP_VERSION,
+            "sources": self.sources,
+            "totals": self.totals.to_state(),
+            "agents": {agent: acc.to_state() for agent, acc in self.agents.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "Rollup":
+        rollup = cls()
+        rollup.sources = dict(state.get("sources", {}))
+        rollup.totals = RollupAccumulator.from_state(state["totals"])
+        rollup.agents = {agent: RollupAccumulator.from_state(s) for agent, s in state["agents"].items()}
+        return rollup
+
+    def summary(self) -> Dict[str, Any]:
+        """Summary fields (as in audit_logger.build_summary) without the date keys."""
+        summary = self.totals.summary()
+        del summary["total_tokens"]
+        summary["agents"] = {
+            agent: {key: value for key, value in acc.summary().items() if key != "partial_count"}
+            for agent, acc in self.agents.items()
+        }
+        return summary
+
+
+def read_rollup(path: Path) -> Optional[Rollup]:
+    """Load a rollup file, or None if missing, unreadable or another version."""
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if state.get("version") != ROLLUP_VERSION:
+        return None
+    try:
+        return Rollup.from_state(state)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def write_rollup(path: Path, rollup: Rollup) -> None:
+    """Replace a rollup file atomically (tmp file + rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(rollup.to_state(), separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@contextmanager
+def locked(path: Path) -> Iterator[None]:
+    """Exclusive cross-process lock on ``<path>.lock`` (no-op without fcntl)."""
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path.with_name(f".{path.name}.lock"), os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
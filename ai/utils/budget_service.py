@@ -0,0 +1,197 @@
+# ai/utils/budget_service.py
+"""
+Budget service: the single read path for budget state.
+
+The router (via plugins/cost_checker.py) and the runners (via
+cost_monitor.get_budget_status) both read budget state through here, so
+they share one set of defaults, thresholds and monthly auto-reset rules.
+
+Each budget.json path has one in-process cached view. It is rebuilt only
+when budget.json changes (mtime/size) or the cost ledger is written
+(ledger version), so repeated checks within a run do not touch the disk
+beyond a stat and one indexed SQLite read.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ai.utils.cost_ledger import get_ledger
+
+BUDGET_FILE = Path(".ai/budget.json")
+DEFAULT_MONTHLY_BUDGET_USD = 50.0
+WARN_THRESHOLD = 0.80
+LOW_BUDGET_THRESHOLD_USD = 5.0
+
+
+def _current_month() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def _default_budget() -> Dict[str, Any]:
+    return {
+        "monthly_budget_usd": DEFAULT_MONTHLY_BUDGET_USD,
+        "monthly_spent_usd": 0.0,
+        "last_reset": _current_month(),
+        "agents": {"claude": 0.0, "gemini": 0.0, "perplexity": 0.0, "gpt": 0.0},
+    }
+
+
+def load_budget(path: Path = BUDGET_FILE) -> Dict[str, Any]:
+    """budget.json contents, or the defaults if it is missing or unreadable."""
+    path = Path(path)
+    if not path.exists():
+        return _default_budget()
+    try:
+        with path.open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read {path}, using default budget: {e}")
+        return _default_budget()
+    if not isinstance(data, dict):
+        print(f"⚠️ {path} is not a JSON object, using default budget")
+        return _default_budget()
+    return data
+
+
+def auto_reset_if_new_month(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Reset monthly spend if it's a new month."""
+    current = _current_month()
+    if data.get("last_reset", "") != current:
+        data["monthly_spent_usd"] = 0.0
+        data["agents"] = {k: 0.0 for k in data.get("agents", {})}
+        data["last_reset"] = current
+    return data
+
+
+@dataclass(frozen=True)
+class BudgetView:
+    """Immutable snapshot of the current month's budget."""
+    month: str
+    monthly_budget_usd: float
+    monthly_spent_usd: float
+    reserved_usd: float = 0.0
+    agents: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def remaining_usd(self) -> float:
+        return max(0.0, self.monthly_budget_usd - self.monthly_spent_usd)
+
+    @property
+    def usage_pct(self) -> float:
+        if self.monthly_budget_usd <= 0:
+            return 0.0
+        return round(self.monthly_spent_usd / self.monthly_budget_usd * 100, 1)
+
+    @property
+    def is_over_budget(self) -> bool:
+        return self.monthly_spent_usd >= self.monthly_budget_usd
+
+    @property
+    def is_near_limit(self) -> bool:
+        return self.usage_pct >= WARN_THRESHOLD * 100
+
+    @property
+    def is_low(self) -> bool:
+        return self.remaining_usd < LOW_BUDGET_THRESHOLD_USD
+
+    def as_status(self) -> Dict[str, Any]:
+        """Dict returned by cost_monitor.get_budget_status."""
+        return {
+            "monthly_budget_usd": self.monthly_budget_usd,
+            "monthly_spent_usd": round(self.monthly_spent_usd, 4),
+            "remaining_usd": round(self.remaining_usd, 4),
+            "reserved_usd": round(self.reserved_usd, 4),
+            "usage_pct": self.usage_pct,
+            "is_over_budget": self.is_over_budget,
+            "is_near_limit": self.is_near_limit,
+            "agents": dict(self.agents),
+        }
+
+    def as_check(self) -> Dict[str, Any]:
+        """Dict returned by plugins.cost_checker.check_budget."""
+        return {
+            "monthly_budget_usd": self.monthly_budget_usd,
+            "monthly_spent_usd": round(self.monthly_spent_usd, 4),
+            "remaining_usd": round(self.remaining_usd, 4),
+            "low_budget": self.is_low,
+            "budget_warning": self.is_near_limit,
+            "budget_exceeded": self.is_over_budget,
+        }
+
+
+class BudgetService:
+    """Cached budget view for one budget.json path."""
+
+    def __init__(self, path: Path = BUDGET_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[Any, ...]] = None
+        self._view: Optional[BudgetView] = None
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _build(self) -> BudgetView:
+        data = auto_reset_if_new_month(load_budget(self.path))
+        month = data["last_reset"]
+        view = BudgetView(
+            month=month,
+            monthly_budget_usd=float(data.get("monthly_budget_usd", DEFAULT_MONTHLY_BUDGET_USD)),
+            monthly_spent_usd=float(data.get("monthly_spent_usd", 0.0)),
+            agents=dict(data.get("agents", {})),
+        )
+        summary = get_ledger(self.path).summary(month)
+        if summary is None:
+            return view
+        return BudgetView(
+            month=month,
+            monthly_budget_usd=view.monthly_budget_usd,
+            monthly_spent_usd=summary["spent_usd"],
+            reserved_usd=summary["reserved_usd"],
+            agents=summary["agents"],
+        )
+
+    def view(self) -> BudgetView:
+        """
+        Current budget view, rebuilt only if budget.json or the ledger changed.
+
+        Note: reservations that expire without a ledger write are dropped from
+        ``reserved_usd`` on the next rebuild, not at their exact expiry time.
+        """
+        key = (self._stamp(), get_ledger(self.path).version(), _current_month())
+        with self._lock:
+            if self._view is None or key != self._key:
+                self._view = self._build()
+                self._key = key
+            return self._view
+
+    def invalidate(self) -> None:
+        """Drop the cached view (next call re-reads budget.json and the ledger)."""
+        with self._lock:
+            self._key = None
+            self._view = None
+
+
+_SERVICES: Dict[str, BudgetService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def get_budget_service(path: Path = BUDGET_FILE) -> BudgetService:
+    """Shared budget service for a budget.json path."""
+    key = str(Path(path).resolve())
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(key)
+        if service is None:
+            service = BudgetService(path)
+            _SERVICES[key] = service
+        return service
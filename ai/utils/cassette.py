@@ -0,0 +1,424 @@
+# ai/utils/cassette.py
+"""
+Record/replay cassettes for provider and GitHub traffic.
+
+In record mode, wrapped clients (``CassetteClient`` for AI providers,
+``CassetteCollector`` for GitHub) make their real calls and append each
+request, response or error, and duration to the cassette. Secrets are
+scrubbed before anything is kept. In replay mode, no network or
+credentials are needed: calls are answered from the cassette in
+recorded order, optionally paced at (a multiple of) the recorded
+durations, so whole review pipelines can be performance-tested offline.
+
+Requests are matched by a key over (kind, target, method, request);
+prompts are stored only as hashes. Identical requests replay their
+recordings in order (so a recorded retry sequence replays as retries),
+and the last one repeats once exhausted unless the cassette is strict.
+
+Environment (read by ``cassette_from_env``):
+    AI_CASSETTE        cassette file path (enables record/replay)
+    AI_CASSETTE_MODE   record | replay (default: replay)
+    AI_CASSETTE_PACE   replay speed: 0 = instant, 1 = recorded durations
+"""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from ai.utils.models import Comment, FileChange, PRInfo
+from ai.utils.timing import span
+from ai.utils.tracing import SPAN_KIND_CLIENT, start_span
+
+CASSETTE_ENV = "AI_CASSETTE"
+CASSETTE_MODE_ENV = "AI_CASSETTE_MODE"
+CASSETTE_PACE_ENV = "AI_CASSETTE_PACE"
+CASSETTE_VERSION = 1
+MODES = ("record", "replay")
+
+REDACTED = "[REDACTED]"
+# Values of these variables never reach a cassette
+SECRET_ENV_VARS = (
+    "CLAUDE_API_KEY", "ANTHROPIC_API_KEY", "GEMINI_API_KEY", "GOOGLE_API_KEY",
+    "PERPLEXITY_API_KEY", "OPENAI_API_KEY", "GPT_API_KEY", "GITHUB_TOKEN", "GH_TOKEN",
+)
+SECRET_PATTERNS = tuple(re.compile(p) for p in (
+    r"sk-ant-[A-Za-z0-9_\-]{16,}",
+    r"sk-[A-Za-z0-9_\-]{20,}",
+    r"pplx-[A-Za-z0-9]{20,}",
+    r"AIza[0-9A-Za-z_\-]{30,}",
+    r"gh[pousr]_[A-Za-z0-9]{20,}",
+    r"github_pat_[A-Za-z0-9_]{20,}",
+    r"(?i)bearer\s+[A-Za-z0-9._\-]{16,}",
+))
+# Dict keys whose values are dropped wholesale
+SECRET_KEYS = frozenset({
+    "authorization", "api_key", "apikey", "x-api-key", "token", "access_token", "password", "secret",
+})
+# Shorter env values are too likely to match ordinary text
+MIN_SECRET_LENGTH = 8
+
+
+class CassetteError(Exception):
+    """Cassette file is missing, unreadable or of an unknown version."""
+    pass
+
+
+class CassetteMissError(CassetteError):
+    """Replay found no recording for a request."""
+    pass
+
+
+class Scrubber:
+    """Redacts credentials from strings and nested JSON-like values."""
+
+    def __init__(self, secrets: Iterable[str] = (), env_vars: Iterable[str] = SECRET_ENV_VARS):
+        self._secrets: List[str] = []
+        for name in env_vars:
+            self.add(os.getenv(name))
+        for secret in secrets:
+            self.add(secret)
+
+    def add(self, secret: Optional[str]) -> None:
+        """Also redact this literal value (ignored if empty or short)."""
+        if secret and len(secret) >= MIN_SECRET_LENGTH and secret not in self._secrets:
+            self._secrets.append(secret)
+            # Longest first, so a secret containing another is fully redacted
+            self._secrets.sort(key=len, reverse=True)
+
+    def scrub_text(self, text: str) -> str:
+        for secret in self._secrets:
+            if secret in text:
+                text = text.replace(secret, REDACTED)
+        for pattern in SECRET_PATTERNS:
+            text = pattern.sub(REDACTED, text)
+        return text
+
+    def scrub(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self.scrub_text(value)
+        if isinstance(value, dict):
+            return {
+                k: REDACTED if str(k).lower() in SECRET_KEYS else self.scrub(v)
+                for k, v in value.items()
+            }
+        if isinstance(value, (list, tuple)):
+            return [self.scrub(v) for v in value]
+        return value
+
+
+def prompt_digest(prompt: str) -> str:
+    """SHA-256 of a prompt; cassettes store prompts only as digests."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _request_key(kind: str, target: str, method: str, request: Dict[str, Any]) -> str:
+    canonical = json.dumps([kind, target, method, request], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """
+    A file of recorded interactions, in record or replay mode.
+
+    Args:
+        path: Cassette file (JSON)
+        mode: 'record' (calls go out and are appended) or 'replay'
+        pace: Replay speed: 0 = instant, 1 = recorded durations, 0.5 = twice as fast
+        strict: Raise CassetteMissError instead of repeating exhausted recordings
+        scrubber: Secret scrubber (default: env credentials and known key formats)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        mode: str = "replay",
+        pace: float = 0.0,
+        strict: bool = False,
+        scrubber: Optional[Scrubber] = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r} (expected one of {', '.join(MODES)})")
+        if pace < 0:
+            raise ValueError("pace must be >= 0")
+        self.path = Path(path)
+        self.mode = mode
+        self.pace = pace
+        self.strict = strict
+        self.scrubber = scrubber or Scrubber()
+        self.clients: Dict[str, Dict[str, Any]] = {}  # agent -> model and pricing
+        self.interactions: List[Dict[str, Any]] = []
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        if mode == "replay":
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def _load(self) -> None:
+        try:
+            doc = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise CassetteError(f"Cassette not found: {self.path}") from None
+        except ValueError as e:
+            raise CassetteError(f"Cassette {self.path} is not valid JSON: {e}") from None
+        if doc.get("version") != CASSETTE_VERSION:
+            raise CassetteError(f"Cassette {self.path} has unsupported version {doc.get('version')!r}")
+        self.clients = doc.get("clients", {})
+        self.interactions = doc.get("interactions", [])
+        self.rewind()
+
+    def rewind(self) -> None:
+        """Start replaying from the first recording again."""
+        with self._lock:
+            self._queues = {}
+            self._last = {}
+            for interaction in self.interactions:
+                self._queues.setdefault(interaction["key"], deque()).append(interaction)
+
+    def record(
+        self,
+        kind: str,
+        target: str,
+        method: str,
+        request: Dict[str, Any],
+        duration: float,
+        response: Any = None,
+        error: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Append one scrubbed interaction (record mode)."""
+        request = self.scrubber.scrub(request)
+        interaction = {
+            "key": _request_key(kind, target, method, request),
+            "kind": kind,
+            "target": target,
+            "method": method,
+            "request": request,
+            "offset_seconds": round(time.monotonic() - self._started - duration, 4),
+            "duration_seconds": round(duration, 4),
+        }
+        if error is not None:
+            interaction["error"] = self.scrubber.scrub(error)
+        else:
+            interaction["response"] = self.scrubber.scrub(response)
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def play(self, kind: str, target: str, method: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Next recorded interaction for a request (replay mode), after
+        sleeping its recorded duration times ``pace``.
+
+        Raises:
+            CassetteMissError: Nothing was recorded for the request
+        """
+        key = _request_key(kind, target, method, self.scrubber.scrub(request))
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                interaction = self._last[key] = queue.popleft()
+            elif key in self._last and not self.strict:
+                interaction = self._last[key]
+            else:
+                interaction = None
+        if interaction is None:
+            raise CassetteMissError(f"No recorded {kind} {method} for {target} {request} in {self.path}")
+        if self.pace:
+            time.sleep(interaction["duration_seconds"] * self.pace)
+        return interaction
+
+    def save(self) -> Path:
+        """Write the cassette atomically (record mode)."""
+        doc = {
+            "version": CASSETTE_VERSION,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "clients": self.clients,
+            "interactions": self.interactions,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(doc, handle, indent=1, ensure_ascii=False, default=str)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return self.path
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.recording:
+            self.save()
+
+
+def cassette_from_env() -> Optional[Cassette]:
+    """Cassette configured by AI_CASSETTE / AI_CASSETTE_MODE / AI_CASSETTE_PACE, or None."""
+    path = os.getenv(CASSETTE_ENV)
+    if not path:
+        return None
+    return Cassette(
+        Path(path),
+        mode=os.getenv(CASSETTE_MODE_ENV, "replay"),
+        pace=float(os.getenv(CASSETTE_PACE_ENV, "0") or 0),
+    )
+
+
+# ---------------------------------------------------------------------------
+# GitHub (PRCollector)
+# ---------------------------------------------------------------------------
+
+def _encode(value: Any) -> Any:
+    if dataclasses.is_dataclass(value):
+        return {f.name: _encode(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    return value
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def encode_pr_info(pr_info: PRInfo) -> Dict[str, Any]:
+    """PRInfo with its files and comments as JSON-compatible data."""
+    return _encode(pr_info)
+
+
+def decode_pr_info(data: Dict[str, Any]) -> PRInfo:
+    """Rebuild a PRInfo from ``encode_pr_info`` output."""
+    data = dict(data)
+    data["created_at"] = _parse_datetime(data["created_at"])
+    data["updated_at"] = _parse_datetime(data["updated_at"])
+    data["files"] = [FileChange(**f) for f in data.get("files", [])]
+    data["comments"] = [
+        Comment(**{**c, "created_at": _parse_datetime(c["created_at"]), "updated_at": _parse_datetime(c["updated_at"])})
+        for c in data.get("comments", [])
+    ]
+    return PRInfo(**data)
+
+
+class CassetteCollector:
+    """
+    PRCollector stand-in that records a real collector's GitHub calls, or
+    replays them with no token or network.
+
+    Writes (comments, reviews) are matched by PR, not by body, since the
+    body embeds model output; in replay they return the recorded IDs and
+    post nothing.
+    """
+
+    def __init__(self, cassette: Cassette, collector: Any = None):
+        if cassette.recording and collector is None:
+            raise ValueError("Recording needs the real PRCollector to wrap")
+        self.cassette = cassette
+        self.collector = collector
+        if collector is not None:
+            cassette.scrubber.add(getattr(collector, "token", None))
+        self.repo_name = getattr(collector, "repo_name", None) or next(
+            (i["target"] for i in cassette.interactions if i["kind"] == "github"), None
+        )
+
+    def _call(
+        self,
+        method: str,
+        request: Dict[str, Any],
+        call: Callable[[], Any],
+        stage: str,
+        span_name: str,
+        encode: Callable[[Any], Any] = lambda v: v,
+        decode: Callable[[Any], Any] = lambda v: v,
+    ) -> Any:
+        if self.cassette.recording:
+            started = time.monotonic()
+            try:
+                result = call()
+            except Exception as e:
+                error = {"type": type(e).__name__, "message": str(e)}
+                self.cassette.record("github", self.repo_name, method, request, time.monotonic() - started, error=error)
+                raise
+            self.cassette.record("github", self.repo_name, method, request, time.monotonic() - started, encode(result))
+            return result
+
+        # The real collector's methods are timed and traced; mirror that here
+        with span(stage), start_span(span_name, kind=SPAN_KIND_CLIENT, attributes={"cassette.replay": True}):
+            interaction = self.cassette.play("github", self.repo_name, method, request)
+            if "error" in interaction:
+                error = interaction["error"]
+                raise (ValueError if error["type"] == "ValueError" else RuntimeError)(error["message"])
+            return decode(interaction["response"])
+
+    def get_pr_info(self, pr_number: int) -> PRInfo:
+        return self._call(
+            "get_pr_info", {"pr_number": pr_number},
+            lambda: self.collector.get_pr_info(pr_number),
+            "collect", "pr.collect", encode_pr_info, decode_pr_info,
+        )
+
+    def list_open_prs(self, since: Optional[datetime] = None) -> List[int]:
+        # ``since`` is relative to the run's clock, so it is not matched on
+        return self._call(
+            "list_open_prs", {},
+            lambda: self.collector.list_open_prs(since=since),
+            "collect", "pr.list_open",
+        )
+
+    def post_comment(self, pr_number: int, body: str) -> int:
+        return self._call(
+            "post_comment", {"pr_number": pr_number},
+            lambda: self.collector.post_comment(pr_number, body),
+            "post", "pr.post_comment",
+        )
+
+    def upsert_comment(self, pr_number: int, body: str, agent: str, comment_id: Optional[int] = None) -> int:
+        return self._call(
+            "upsert_comment", {"pr_number": pr_number, "agent": agent},
+            lambda: self.collector.upsert_comment(pr_number, body, agent=agent, comment_id=comment_id),
+            "post", "pr.upsert_comment",
+        )
+
+    def post_review(
+        self,
+        pr_number: int,
+        body: str,
+        event: str = "COMMENT",
+        comments: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        return self._call(
+            "post_review", {"pr_number": pr_number, "event": event},
+            lambda: self.collector.post_review(pr_number, body, event=event, comments=comments),
+            "post", "pr.post_review",
+        )
+
+    def upsert_review(
+        self,
+        pr_number: int,
+        body: str,
+        agent: str,
+        event: str = "COMMENT",
+        comments: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        return self._call(
+            "upsert_review", {"pr_number": pr_number, "agent": agent, "event": event},
+            lambda: self.collector.upsert_review(pr_number, body, agent=agent, event=event, comments=comments),
+            "post", "pr.upsert_review",
+        )
@@ -0,0 +1,346 @@
+# ai/utils/cost_ledger.py
+"""
+Concurrency-safe cost ledger.
+
+SQLite (WAL mode) store next to .ai/budget.json. Every cost is an atomic
+insert, and per-month/per-agent totals are maintained incrementally in the
+same transaction, so parallel runners never lose updates and budget status
+is read from a materialized summary instead of re-adding history.
+
+Tables:
+  entries(id, ts, month, agent, cost_usd)     -- append-only history
+  totals(month, agent, cost_usd, calls)       -- materialized summary
+  reservations(id, month, agent, amount_usd, expires_at)
+                                              -- budget held by in-flight calls
+  meta(key, value)                            -- version counter, seeded months
+
+Reservations let callers hold their estimated cost before dispatching a
+request, so N concurrent calls cannot each see the same remaining budget and
+overshoot the cap together. Expired reservations (crashed workers) are
+purged lazily by the next write.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    month TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    cost_usd REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS totals (
+    month TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    calls INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, agent)
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    id TEXT PRIMARY KEY,
+    month TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    amount_usd REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class BudgetExceededError(Exception):
+    """Raised when monthly budget is exhausted."""
+    pass
+
+
+def ledger_path_for(budget_path: Path) -> Path:
+    """Ledger file that belongs to a budget.json (e.g. .ai/budget.ledger.db)."""
+    return budget_path.with_name(f"{budget_path.stem}.ledger.db")
+
+
+class CostLedger:
+    """SQLite-backed ledger with one connection per thread."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # isolation_level=None: transactions are managed explicitly below
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+        return conn
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -- internal helpers (caller holds a transaction) -------------------
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "INSERT INTO meta(key, value) VALUES ('version', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    @staticmethod
+    def _is_seeded(conn: sqlite3.Connection, month: str) -> bool:
+        row = conn.execute("SELECT 1 FROM meta WHERE key = ?", (f"seeded:{month}",)).fetchone()
+        return row is not None
+
+    @staticmethod
+    def _seed(conn: sqlite3.Connection, month: str, agents: Dict[str, float]) -> None:
+        conn.execute("INSERT INTO meta(key, value) VALUES (?, '1')", (f"seeded:{month}",))
+        for agent, cost in agents.items():
+            conn.execute(
+                "INSERT INTO totals(month, agent, cost_usd, calls) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(month, agent) DO NOTHING",
+                (month, agent, float(cost or 0.0)),
+            )
+
+    @staticmethod
+    def _spent(conn: sqlite3.Connection, month: str) -> float:
+        (spent,) = conn.execute(
+            "SELECT COALESCE(SUM(cost_usd), 0) FROM totals WHERE month = ?", (month,)
+        ).fetchone()
+        return spent
+
+    @staticmethod
+    def _reserved(conn: sqlite3.Connection, month: str, now: float) -> float:
+        (reserved,) = conn.execute(
+            "SELECT COALESCE(SUM(amount_usd), 0) FROM reservations "
+            "WHERE month = ? AND expires_at > ?",
+            (month, now),
+        ).fetchone()
+        return reserved
+
+    @staticmethod
+    def _purge_expired(conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM reservations WHERE expires_at <= ?", (now,))
+
+    @classmethod
+    def _summary(cls, conn: sqlite3.Connection, month: str) -> Dict[str, Any]:
+        agents = {
+            agent: round(cost, 6)
+            for agent, cost in conn.execute(
+                "SELECT agent, cost_usd FROM totals WHERE month = ? ORDER BY agent", (month,)
+            )
+        }
+        return {
+            "month": month,
+            "spent_usd": round(sum(agents.values()), 6),
+            "reserved_usd": round(cls._reserved(conn, month, time.time()), 6),
+            "agents": agents,
+        }
+
+    @staticmethod
+    def _exhausted_error(spent: float, limit_usd: float, reserved: float = 0.0) -> BudgetExceededError:
+        held = f" (${reserved:.2f} reserved by in-flight calls)" if reserved else ""
+        return BudgetExceededError(
+            f"Monthly budget exhausted: ${spent:.2f} / ${limit_usd:.2f}{held}. "
+            "Set a higher monthly_budget_usd in .ai/budget.json or wait for next month."
+        )
+
+    # -- public API -------------------------------------------------------
+
+    def record(
+        self,
+        agent: str,
+        cost_usd: float,
+        month: str,
+        opening_agents: Optional[Dict[str, float]] = None,
+        limit_usd: Optional[float] = None,
+        on_commit: Optional[Callable[[Dict[str, Any]], None]] = None,
+        reservation_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Atomically record one cost and return the month's updated summary.
+
+        Args:
+            agent: Agent name
+            cost_usd: Cost to add
+            month: Month key (YYYY-MM)
+            opening_agents: Opening per-agent balances used the first time a
+                month is seen (migrates spend tracked before the ledger existed)
+            limit_usd: If set, refuse the insert when spend already reached it
+            on_commit: Called with the new summary while the write lock is
+                still held (used to refresh the budget.json snapshot in order)
+            reservation_id: Reservation this cost settles. The reservation is
+                released in the same transaction and the limit is not checked
+                again (the call was already admitted when it was reserved).
+
+        Raises:
+            BudgetExceededError: If spend already reached ``limit_usd``
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._is_seeded(conn, month):
+                self._seed(conn, month, opening_agents or {})
+
+            if reservation_id is not None:
+                conn.execute("DELETE FROM reservations WHERE id = ?", (reservation_id,))
+            elif limit_usd is not None:
+                spent = self._spent(conn, month)
+                if spent >= limit_usd:
+                    raise self._exhausted_error(spent, limit_usd)
+
+            conn.execute(
+                "INSERT INTO entries(ts, month, agent, cost_usd) VALUES (?, ?, ?, ?)",
+                (datetime.now(timezone.utc).isoformat(), month, agent, float(cost_usd)),
+            )
+            conn.execute(
+                "INSERT INTO totals(month, agent, cost_usd, calls) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(month, agent) DO UPDATE SET "
+                "cost_usd = cost_usd + excluded.cost_usd, calls = calls + 1",
+                (month, agent, float(cost_usd)),
+            )
+            self._bump_version(conn)
+            summary = self._summary(conn, month)
+            if on_commit is not None:
+                on_commit(summary)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return summary
+
+    def reserve(
+        self,
+        agent: str,
+        amount_usd: float,
+        month: str,
+        ttl_seconds: float,
+        opening_agents: Optional[Dict[str, float]] = None,
+        limit_usd: Optional[float] = None,
+    ) -> str:
+        """
+        Hold ``amount_usd`` of the month's budget for an in-flight call.
+
+        Admission counts recorded spend plus all live reservations, so the
+        cap holds however many callers reserve concurrently.
+
+        Args:
+            agent: Agent name
+            amount_usd: Estimated cost to hold
+            month: Month key (YYYY-MM)
+            ttl_seconds: Seconds until the reservation expires on its own
+            opening_agents: See ``record``
+            limit_usd: If set, refuse when spent + reserved + amount exceeds it
+
+        Returns:
+            Reservation ID (pass to ``record(reservation_id=...)`` or ``release``)
+
+        Raises:
+            BudgetExceededError: If the reservation does not fit the limit
+        """
+        reservation_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._is_seeded(conn, month):
+                self._seed(conn, month, opening_agents or {})
+            self._purge_expired(conn, now)
+
+            if limit_usd is not None:
+                spent = self._spent(conn, month)
+                reserved = self._reserved(conn, month, now)
+                # Rounded so float noise in the sums does not reject a call that fits exactly
+                if spent >= limit_usd or round(spent + reserved + amount_usd, 6) > limit_usd:
+                    raise self._exhausted_error(spent, limit_usd, reserved)
+
+            conn.execute(
+                "INSERT INTO reservations(id, month, agent, amount_usd, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (reservation_id, month, agent, float(amount_usd), now + ttl_seconds),
+            )
+            self._bump_version(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return reservation_id
+
+    def release(self, reservation_id: str) -> bool:
+        """
+        Drop a reservation without recording a cost.
+
+        Returns:
+            True if the reservation was still held
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = conn.execute(
+                "DELETE FROM reservations WHERE id = ?", (reservation_id,)
+            ).rowcount
+            if deleted:
+                self._bump_version(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return bool(deleted)
+
+    def summary(self, month: str) -> Optional[Dict[str, Any]]:
+        """
+        Materialized totals for a month, or None if the month was never recorded.
+        """
+        if not self.exists():
+            return None
+        conn = self._conn()
+        if not self._is_seeded(conn, month):
+            return None
+        return self._summary(conn, month)
+
+    def version(self) -> int:
+        """Monotonic counter bumped on every write."""
+        if not self.exists():
+            return 0
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+
+_LEDGERS: Dict[str, CostLedger] = {}
+_LEDGERS_LOCK = threading.Lock()
+
+
+def get_ledger(budget_path: Path) -> CostLedger:
+    """Shared ledger instance for a budget.json path."""
+    ledger_path = ledger_path_for(Path(budget_path))
+    key = str(ledger_path.resolve())
+    with _LEDGERS_LOCK:
+        ledger = _LEDGERS.get(key)
+        if ledger is None:
+            ledger = CostLedger(ledger_path)
+            _LEDGERS[key] = ledger
+        return ledger
@@ -6,6 +6,20 @@ Reads .ai/budget.json, tracks spend, and enforces limits:
 - WARN at 80% of monthly budget
 - BLOCK at 100% (raises BudgetExceededError)
 
+Spend is recorded in a SQLite ledger next to budget.json (see cost_ledger.py)
+so concurrent runners cannot lose updates. budget.json keeps the limit and a
+snapshot of the current month's spend, refreshed on every recorded cost.
+
+Concurrent callers should reserve before dispatching:
+
+    reservation = reserve_budget("claude", client.get_cost_estimate(prompt, 4000))
+    try:
+        response = client.send_prompt(prompt)
+    except Exception:
+        release_reservation(reservation)
+        raise
+    commit_reservation("claude", reservation, response.cost_usd)
+
 budget.json schema:
 {
   "monthly_budget_usd": 50.0,
@@ -23,77 +37,120 @@ from __future__ import annotations
 
 import json
 import os
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Any
-
-BUDGET_FILE = Path(".ai/budget.json")
-WARN_THRESHOLD = 0.80
-
-
-class BudgetExceededError(Exception):
-    """Raised when monthly budget is exhausted."""
-    pass
-
-
-def _current_month() -> str:
-    return datetime.now(timezone.utc).strftime("%Y-%m")
+from typing import Dict, Any, Optional
 
+from ai.utils.cost_ledger import BudgetExceededError, get_ledger
+from ai.utils.metrics import BUDGET_REMAINING
+from ai.utils.timing import timed
+from ai.utils.budget_service import (
+    BUDGET_FILE,
+    WARN_THRESHOLD,
+    auto_reset_if_new_month,
+    get_budget_service,
+    load_budget,
+)
 
-def _load_budget(path: Path = BUDGET_FILE) -> Dict[str, Any]:
-    if not path.exists():
-        return {
-            "monthly_budget_usd": 50.0,
-            "monthly_spent_usd": 0.0,
-            "last_reset": _current_month(),
-            "agents": {"claude": 0.0, "gemini": 0.0, "perplexity": 0.0, "gpt": 0.0},
-        }
-    with path.open("r", encoding="utf-8") as fh:
-        return json.load(fh)
+# Reservations from crashed workers stop holding budget after this long
+DEFAULT_RESERVATION_TTL = 600.0
 
 
 def _save_budget(data: Dict[str, Any], path: Path = BUDGET_FILE) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as fh:
+    # Write-then-rename so readers never see a half-written file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as fh:
         json.dump(data, fh, indent=2, ensure_ascii=False)
-
-
-def _auto_reset_if_new_month(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Reset monthly spend if it's a new month."""
-    current = _current_month()
-    if data.get("last_reset", "") != current:
-        data["monthly_spent_usd"] = 0.0
-        data["agents"] = {k: 0.0 for k in data.get("agents", {})}
-        data["last_reset"] = current
-    return data
+    os.replace(tmp_path, path)
 
 
 def record_cost(agent: str, cost_usd: float, path: Path = BUDGET_FILE) -> Dict[str, Any]:
     """
     Record cost for an agent call and enforce budget limits.
 
+    The cost is inserted into the ledger atomically; the budget check and the
+    insert happen in one transaction, so concurrent callers cannot lose updates.
+
     Raises BudgetExceededError if budget is already exhausted before this call.
     Returns the updated budget state.
     """
-    data = _load_budget(path)
-    data = _auto_reset_if_new_month(data)
+    return _record(agent, cost_usd, path)
 
-    budget = float(data.get("monthly_budget_usd", 50.0))
-    spent = float(data.get("monthly_spent_usd", 0.0))
 
-    # Check before adding (pre-flight guard)
-    if spent >= budget:
-        raise BudgetExceededError(
-            f"Monthly budget exhausted: ${spent:.2f} / ${budget:.2f}. "
-            "Set a higher monthly_budget_usd in .ai/budget.json or wait for next month."
-        )
+@timed("budget")
+def reserve_budget(
+    agent: str,
+    estimated_cost: float,
+    ttl_seconds: float = DEFAULT_RESERVATION_TTL,
+    path: Path = BUDGET_FILE,
+) -> str:
+    """
+    Reserve the estimated cost of a call before dispatching it.
+
+    Raises BudgetExceededError if recorded spend plus live reservations plus
+    this estimate would exceed the monthly budget.
+    Returns the reservation ID.
+    """
+    data = load_budget(path)
+    data = auto_reset_if_new_month(data)
+    return get_ledger(path).reserve(
+        agent,
+        estimated_cost,
+        data["last_reset"],
+        ttl_seconds,
+        opening_agents=_opening_balances(data),
+        limit_usd=float(data.get("monthly_budget_usd", 50.0)),
+    )
+
+
+@timed("budget")
+def commit_reservation(
+    agent: str,
+    reservation_id: str,
+    actual_cost: float,
+    path: Path = BUDGET_FILE,
+) -> Dict[str, Any]:
+    """
+    Record the actual cost of a reserved call and release its reservation.
+
+    The cost is recorded even if the reservation already expired: the money
+    was spent either way. Returns the updated budget state.
+    """
+    return _record(agent, actual_cost, path, reservation_id=reservation_id)
+
+
+def release_reservation(reservation_id: str, path: Path = BUDGET_FILE) -> bool:
+    """Release a reservation whose call failed or was never sent."""
+    return get_ledger(path).release(reservation_id)
+
+
+def _record(
+    agent: str,
+    cost_usd: float,
+    path: Path,
+    reservation_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    data = load_budget(path)
+    data = auto_reset_if_new_month(data)
+    month = data["last_reset"]
 
-    # Update spend
-    data["monthly_spent_usd"] = round(spent + cost_usd, 6)
-    agents = data.setdefault("agents", {})
-    agents[agent] = round(float(agents.get(agent, 0.0)) + cost_usd, 6)
+    budget = float(data.get("monthly_budget_usd", 50.0))
 
-    _save_budget(data, path)
+    def _snapshot(summary: Dict[str, Any]) -> None:
+        data["monthly_spent_usd"] = summary["spent_usd"]
+        data["agents"] = summary["agents"]
+        _save_budget(data, path)
+
+    # Pre-flight guard + insert in one ledger transaction
+    get_ledger(path).record(
+        agent,
+        cost_usd,
+        month,
+        opening_agents=_opening_balances(data),
+        limit_usd=budget,
+        on_commit=_snapshot,
+        reservation_id=reservation_id,
+    )
 
     # Emit warnings
     new_spent = data["monthly_spent_usd"]
@@ -114,28 +171,30 @@ def record_cost(agent: str, cost_usd: float, path: Path = BUDGET_FILE) -> Dict[s
     return data
 
 
+def _opening_balances(data: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Per-agent spend carried over from budget.json the first time the ledger
+    sees a month. Spend not attributed to an agent is kept under "untracked".
+    """
+    agents = {k: float(v or 0.0) for k, v in (data.get("agents") or {}).items()}
+    unattributed = round(float(data.get("monthly_spent_usd", 0.0)) - sum(agents.values()), 6)
+    if unattributed > 0:
+        agents["untracked"] = unattributed
+    return agents
+
+
+@timed("budget")
 def get_budget_status(path: Path = BUDGET_FILE) -> Dict[str, Any]:
     """
     Return current budget status without modifying anything.
 
+    Served from the shared budget service's cached view.
+
     Returns:
         dict with keys: monthly_budget_usd, monthly_spent_usd,
-        remaining_usd, usage_pct, is_over_budget, is_near_limit, agents
+        remaining_usd, reserved_usd, usage_pct, is_over_budget,
+        is_near_limit, agents
     """
-    data = _load_budget(path)
-    data = _auto_reset_if_new_month(data)
-
-    budget = float(data.get("monthly_budget_usd", 50.0))
-    spent = float(data.get("monthly_spent_usd", 0.0))
-    remaining = max(0.0, budget - spent)
-    usage_pct = round((spent / budget * 100) if budget > 0 else 0.0, 1)
-
-    return {
-        "monthly_budget_usd": budget,
-        "monthly_spent_usd": round(spent, 4),
-        "remaining_usd": round(remaining, 4),
-        "usage_pct": usage_pct,
-        "is_over_budget": spent >= budget,
-        "is_near_limit": usage_pct >= WARN_THRESHOLD * 100,
-        "agents": data.get("agents", {}),
-    }
+    status = get_budget_service(path).view().as_status()
+    BUDGET_REMAINING.set(status["remaining_usd"])
+    return status
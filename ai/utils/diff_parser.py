@@ -0,0 +1,224 @@
+# ai/utils/diff_parser.py
+"""
+Streaming unified-diff parser.
+
+Turns the per-file patch text returned by GitHub (``FileChange.patch``)
+into ``Hunk`` objects with old/new line ranges and added/removed line views.
+
+Positions follow GitHub's review-comment convention: the first ``@@`` header
+is position 0, every following line (including later hunk headers) adds 1.
+"""
+from __future__ import annotations
+
+import re
+from typing import Iterator, List, Optional, Tuple
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+
+# Line kinds (first character of a diff body line)
+ADDED = "+"
+REMOVED = "-"
+CONTEXT = " "
+NO_NEWLINE = "\\"  # "\ No newline at end of file"
+
+
+class DiffLine:
+    """A single body line of a hunk."""
+
+    __slots__ = ("kind", "text", "old_lineno", "new_lineno", "position")
+
+    def __init__(
+        self,
+        kind: str,
+        text: str,
+        old_lineno: Optional[int],
+        new_lineno: Optional[int],
+        position: int,
+    ):
+        self.kind = kind
+        self.text = text
+        self.old_lineno = old_lineno
+        self.new_lineno = new_lineno
+        self.position = position
+
+    @property
+    def raw(self) -> str:
+        """Line as it appears in the patch (kind prefix + text)."""
+        return f"{self.kind}{self.text}"
+
+    def __repr__(self) -> str:
+        return (
+            f"DiffLine({self.kind!r}, old={self.old_lineno}, "
+            f"new={self.new_lineno}, pos={self.position})"
+        )
+
+
+class Hunk:
+    """One ``@@ -a,b +c,d @@`` section of a patch."""
+
+    __slots__ = (
+        "old_start",
+        "old_count",
+        "new_start",
+        "new_count",
+        "header",
+        "section",
+        "position",
+        "lines",
+    )
+
+    def __init__(
+        self,
+        old_start: int,
+        old_count: int,
+        new_start: int,
+        new_count: int,
+        header: str = "",
+        section: str = "",
+        position: int = 0,
+    ):
+        self.old_start = old_start
+        self.old_count = old_count
+        self.new_start = new_start
+        self.new_count = new_count
+        self.header = header or (
+            f"@@ -{old_start},{old_count} +{new_start},{new_count} @@{section}"
+        )
+        self.section = section  # Trailing function/section name after the header
+        self.position = position  # Diff position of the header line
+        self.lines: List[DiffLine] = []
+
+    @property
+    def old_range(self) -> range:
+        """Old-file line numbers covered by this hunk."""
+        return range(self.old_start, self.old_start + self.old_count)
+
+    @property
+    def new_range(self) -> range:
+        """New-file line numbers covered by this hunk."""
+        return range(self.new_start, self.new_start + self.new_count)
+
+    @property
+    def added_lines(self) -> List[DiffLine]:
+        return [line for line in self.lines if line.kind == ADDED]
+
+    @property
+    def removed_lines(self) -> List[DiffLine]:
+        return [line for line in self.lines if line.kind == REMOVED]
+
+    @property
+    def line_count(self) -> int:
+        """Number of patch lines this hunk occupies (header included)."""
+        return 1 + len(self.lines)
+
+    def iter_raw_lines(self) -> Iterator[str]:
+        """Yield the hunk back as patch text lines."""
+        yield self.header
+        for line in self.lines:
+            yield line.raw
+
+    def __repr__(self) -> str:
+        return f"Hunk({self.header!r}, lines={len(self.lines)})"
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Yield lines of ``text`` without materializing a split list."""
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def iter_hunks(patch: Optional[str]) -> Iterator[Hunk]:
+    """
+    Parse a unified diff incrementally, yielding each hunk once complete.
+
+    Lines before the first hunk header (``diff --git``, ``---``/``+++``)
+    are skipped and do not count towards positions.
+
+    Args:
+        patch: Patch text (may be None or empty for binary files)
+
+    Yields:
+        Hunk objects in patch order
+    """
+    if not patch:
+        return
+
+    current: Optional[Hunk] = None
+    position = -1
+    old_lineno = new_lineno = 0
+
+    for raw in iter_lines(patch):
+        if raw.startswith("@@"):
+            match = HUNK_HEADER_RE.match(raw)
+            if match:
+                if current is not None:
+                    yield current
+                position += 1
+                old_start, old_count, new_start, new_count, section = match.groups()
+                current = Hunk(
+                    old_start=int(old_start),
+                    old_count=int(old_count) if old_count is not None else 1,
+                    new_start=int(new_start),
+                    new_count=int(new_count) if new_count is not None else 1,
+                    header=raw,
+                    section=section,
+                    position=position,
+                )
+                old_lineno = current.old_start
+                new_lineno = current.new_start
+                continue
+
+        if current is None:
+            continue  # Preamble before the first hunk
+
+        position += 1
+        kind = raw[:1] or CONTEXT  # Some tools strip the space on blank context lines
+        text = raw[1:]
+
+        if kind == ADDED:
+            current.lines.append(DiffLine(ADDED, text, None, new_lineno, position))
+            new_lineno += 1
+        elif kind == REMOVED:
+            current.lines.append(DiffLine(REMOVED, text, old_lineno, None, position))
+            old_lineno += 1
+        elif kind == NO_NEWLINE:
+            current.lines.append(DiffLine(NO_NEWLINE, text, None, None, position))
+        else:
+            current.lines.append(DiffLine(CONTEXT, text, old_lineno, new_lineno, position))
+            old_lineno += 1
+            new_lineno += 1
+
+    if current is not None:
+        yield current
+
+
+def parse_patch(patch: Optional[str]) -> List[Hunk]:
+    """Parse a whole patch into a list of hunks."""
+    return list(iter_hunks(patch))
+
+
+def excerpt(hunks: List[Hunk], max_lines: int) -> Tuple[str, bool]:
+    """
+    Render at most ``max_lines`` patch lines from parsed hunks.
+
+    Args:
+        hunks: Parsed hunks
+        max_lines: Maximum number of patch lines to emit
+
+    Returns:
+        (text, truncated) where truncated is True if lines were dropped
+    """
+    out: List[str] = []
+    for hunk in hunks:
+        for raw in hunk.iter_raw_lines():
+            if len(out) >= max_lines:
+                return "\n".join(out), True
+            out.append(raw)
+    return "\n".join(out), False
@@ -0,0 +1,372 @@
+# ai/utils/metrics.py
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A ``MetricsRegistry`` holds counters, gauges and histograms with labels.
+The AI request metrics below are labelled by agent, model and mode (the
+router's mode, from ROUTER_MODE):
+
+  ai_requests_total                  send_prompt calls
+  ai_request_errors_total            calls that raised (label: error)
+  ai_prompt_cache_hits_total         responses that read the prompt cache
+  ai_request_duration_seconds        call latency, retries included
+  ai_request_tokens                  tokens per call (label: direction)
+  ai_requests_in_flight              calls currently running
+  ai_budget_remaining_usd            monthly budget left (no labels)
+
+Long-running processes serve ``/metrics`` with ``start_metrics_server``;
+one-shot runners write a textfile for node_exporter's textfile collector
+(``AI_METRICS_FILE``, see ``export_textfile_at_exit``).
+
+Recording is a dict lookup for the labelled child plus an uncontended
+lock, so the hot path stays well under a microsecond per update.
+"""
+from __future__ import annotations
+
+import atexit
+import functools
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+METRICS_FILE_ENV = "AI_METRICS_FILE"
+MODE_ENV = "ROUTER_MODE"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot: above every bound
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric:
+    """A named metric family; ``labels()`` returns the child for one label set."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any, **kwargs: Any) -> Any:
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled series."""
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_label_text(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in sorted(self._children.items())
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """Set the unlabelled series."""
+        self.labels().set(value)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_label_text(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in sorted(self._children.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observe into the unlabelled series."""
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in sorted(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def write_textfile(self, path: Union[str, Path]) -> Path:
+        """Write ``render()`` atomically (tmp file + rename) for a textfile collector."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+
+REGISTRY = MetricsRegistry()
+
+_REQUEST_LABELS = ("agent", "model", "mode")
+REQUESTS = REGISTRY.counter("ai_requests_total", "AI requests sent.", _REQUEST_LABELS)
+REQUEST_ERRORS = REGISTRY.counter(
+    "ai_request_errors_total", "AI requests that failed after retries.", _REQUEST_LABELS + ("error",)
+)
+CACHE_HITS = REGISTRY.counter(
+    "ai_prompt_cache_hits_total", "AI responses that read cached prompt tokens.", _REQUEST_LABELS
+)
+REQUEST_DURATION = REGISTRY.histogram(
+    "ai_request_duration_seconds", "AI request latency including retries.", _REQUEST_LABELS, LATENCY_BUCKETS
+)
+REQUEST_TOKENS = REGISTRY.histogram(
+    "ai_request_tokens", "Tokens per AI request.", _REQUEST_LABELS + ("direction",), TOKEN_BUCKETS
+)
+IN_FLIGHT = REGISTRY.gauge("ai_requests_in_flight", "AI requests currently running.", _REQUEST_LABELS)
+BUDGET_REMAINING = REGISTRY.gauge("ai_budget_remaining_usd", "Monthly AI budget remaining in USD.")
+
+
+def current_mode() -> str:
+    """Router mode label for this process."""
+    return os.getenv(MODE_ENV) or "unknown"
+
+
+def instrument_request(func: F) -> F:
+    """Decorator for ``AIClient.send_prompt``: request, error, cache, latency and token metrics."""
+
+    @functools.wraps(func)
+    def wrapper(client: Any, *args: Any, **kwargs: Any) -> Any:
+        labels = (client.get_agent_name(), client.model, current_mode())
+        in_flight = IN_FLIGHT.labels(*labels)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            response = func(client, *args, **kwargs)
+        except Exception as e:
+            REQUEST_ERRORS.labels(*labels, type(e).__name__).inc()
+            raise
+        finally:
+            in_flight.dec()
+            REQUESTS.labels(*labels).inc()
+        REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - started)
+        REQUEST_TOKENS.labels(*labels, "input").observe(response.input_tokens)
+        REQUEST_TOKENS.labels(*labels, "output").observe(response.output_tokens)
+        if response.cache_read_tokens:
+            CACHE_HITS.labels(*labels).inc()
+        return response
+
+    return wrapper  # type: ignore[return-value]
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # Scrapes are not worth a line each
+
+
+def start_metrics_server(
+    port: int,
+    addr: str = "127.0.0.1",
+    registry: MetricsRegistry = REGISTRY,
+) -> ThreadingHTTPServer:
+    """
+    Serve ``/metrics`` from a daemon thread. Port 0 picks a free port
+    (see ``server.server_address``); call ``shutdown()`` to stop.
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((addr, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def export_textfile_at_exit(
+    path: Optional[Union[str, Path]] = None,
+    registry: MetricsRegistry = REGISTRY,
+) -> Optional[Path]:
+    """
+    Write the registry to ``path`` (default: $AI_METRICS_FILE) at
+    interpreter exit. Returns the path, or None when not configured.
+    """
+    path = path or os.getenv(METRICS_FILE_ENV)
+    if not path:
+        return None
+    path = Path(path)
+    atexit.register(registry.write_textfile, path)
+    return path
@@ -3,9 +3,17 @@
 Data models for AI-Collab-Starter.
 Defines common data structures used across the system.
 """
+import json
 from dataclasses import dataclass, field
+from functools import cached_property
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+
+try:
+    import orjson
+except ImportError:  # Optional: faster JSON for logs and caches
+    orjson = None
+from ai.utils.diff_parser import Hunk, DiffLine, parse_patch
 from ai.utils.safety_policy import detect_sensitive_paths
 
 
@@ -25,6 +33,47 @@ class FileChange:
         """Check if this is a binary file (no patch available)."""
         return self.patch is None or self.patch == ""
 
+    @cached_property
+    def hunks(self) -> List[Hunk]:
+        """Parsed hunks of the patch (parsed once on first access)."""
+        return parse_patch(self.patch)
+
+    @cached_property
+    def patch_line_count(self) -> int:
+        """Number of lines in the patch, counted from the first hunk header."""
+        return sum(hunk.line_count for hunk in self.hunks)
+
+    @property
+    def added_lines(self) -> List[DiffLine]:
+        """All added lines across hunks."""
+        return [line for hunk in self.hunks for line in hunk.added_lines]
+
+    @property
+    def removed_lines(self) -> List[DiffLine]:
+        """All removed lines across hunks."""
+        return [line for hunk in self.hunks for line in hunk.removed_lines]
+
+    def find_position(self, line: int, side: str = "RIGHT") -> Optional[int]:
+        """
+        Map a file line number to a GitHub diff position.
+
+        Args:
+            line: Line number in the new file (RIGHT) or old file (LEFT)
+            side: 'RIGHT' for new-file lines, 'LEFT' for old-file lines
+
+        Returns:
+            Diff position, or None if the line is not part of the patch
+        """
+        for hunk in self.hunks:
+            target = hunk.new_range if side == "RIGHT" else hunk.old_range
+            if line not in target:
+                continue
+            for diff_line in hunk.lines:
+                lineno = diff_line.new_lineno if side == "RIGHT" else diff_line.old_lineno
+                if lineno == line:
+                    return diff_line.position
+        return None
+
 
 @dataclass
 class Comment:
@@ -63,6 +112,7 @@ class PRInfo:
     files: List[FileChange] = field(default_factory=list)
     comments: List[Comment] = field(default_factory=list)
     labels: List[str] = field(default_factory=list)
+    bot_comments: Dict[str, int] = field(default_factory=dict)  # agent -> comment ID
 
     # Statistics
     additions: int = 0
@@ -108,9 +158,41 @@ class PRInfo:
         }
 
 
-@dataclass
+class CacheablePrompt(str):
+    """
+    Prompt text split into a static, cacheable prefix and a per-request suffix.
+
+    Behaves as the full prompt string everywhere; clients that support prompt
+    caching use ``prefix`` / ``suffix`` to mark the cache breakpoint.
+    Appending text keeps the prefix intact.
+    """
+
+    def __new__(cls, prefix: str, suffix: str = "") -> "CacheablePrompt":
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix_length = len(prefix)
+        return prompt
+
+    @property
+    def prefix(self) -> str:
+        return str.__str__(self)[:self.prefix_length]
+
+    @property
+    def suffix(self) -> str:
+        return str.__str__(self)[self.prefix_length:]
+
+    def __add__(self, other: str) -> "CacheablePrompt":
+        return CacheablePrompt(self.prefix, self.suffix + other)
+
+
+@dataclass(slots=True)
 class AIResponse:
-    """Represents an AI agent's response to a review request."""
+    """
+    Represents an AI agent's response to a review request.
+
+    Kept compact (slots, no SDK objects): only the fields below are
+    retained. Clients add the raw provider payload to metadata only when
+    ClientConfig.capture_raw_response is set, as a size-capped string.
+    """
     agent: str  # 'claude', 'gemini', 'perplexity', 'gpt'
     content: str
     model: str
@@ -128,6 +210,10 @@ class AIResponse:
     success: bool = True
     error_message: Optional[str] = None
 
+    # Prompt caching (subsets of input_tokens)
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
     # Additional data
     metadata: Dict[str, Any] = field(default_factory=dict)
 
@@ -141,6 +227,8 @@ class AIResponse:
                 'input': self.input_tokens,
                 'output': self.output_tokens,
                 'total': self.total_tokens,
+                'cache_read': self.cache_read_tokens,
+                'cache_write': self.cache_write_tokens,
             },
             'cost_usd': self.cost_usd,
             'timestamp': self.timestamp.isoformat(),
@@ -148,3 +236,29 @@ class AIResponse:
             'error_message': self.error_message,
             'metadata': self.metadata,
         }
+
+    def to_json(self) -> str:
+        """Serialize ``to_dict()`` to a compact JSON string."""
+        if orjson is not None:
+            return orjson.dumps(self.to_dict(), default=str).decode("utf-8")
+        return json.dumps(self.to_dict(), separators=(",", ":"), default=str, ensure_ascii=False)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AIResponse":
+        """Rebuild a response from ``to_dict()`` output."""
+        tokens = data.get('tokens', {})
+        return cls(
+            agent=data['agent'],
+            content=data['content'],
+            model=data['model'],
+            input_tokens=tokens.get('input', 0),
+            output_tokens=tokens.get('output', 0),
+            total_tokens=tokens.get('total', 0),
+            cost_usd=data.get('cost_usd', 0.0),
+            timestamp=datetime.fromisoformat(data['timestamp']) if data.get('timestamp') else datetime.now(),
+            success=data.get('success', True),
+            error_message=data.get('error_message'),
+            cache_read_tokens=tokens.get('cache_read', 0),
+            cache_write_tokens=tokens.get('cache_write', 0),
+            metadata=dict(data.get('metadata') or {}),
+        )
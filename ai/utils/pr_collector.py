@@ -5,7 +5,7 @@ Gathers PR metadata, file changes, diffs, and comments.
 """
 import os
 import sys
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 IMPORT_ERROR = None
@@ -21,6 +21,29 @@ except ImportError:
     Repository = object
 
 from ai.utils.models import PRInfo, FileChange, Comment
+from ai.utils.timing import timed
+from ai.utils.tracing import SPAN_KIND_CLIENT, traced
+
+# Hidden marker appended to bot comments so later runs can find and edit them
+BOT_MARKER_PREFIX = "<!-- ai-collab:"
+
+
+def bot_marker(agent: str) -> str:
+    """Hidden HTML marker identifying comments posted by an agent."""
+    return f"{BOT_MARKER_PREFIX}{agent} -->"
+
+
+def _marker_agent(body: Optional[str]) -> Optional[str]:
+    """Return the agent name of a marked bot comment, or None."""
+    if not body:
+        return None
+    start = body.find(BOT_MARKER_PREFIX)
+    if start == -1:
+        return None
+    end = body.find(" -->", start)
+    if end == -1:
+        return None
+    return body[start + len(BOT_MARKER_PREFIX):end]
 
 
 class PRCollector:
@@ -67,6 +90,8 @@ class PRCollector:
         except Exception as e:
             raise ValueError(f"Could not auto-detect repository. Please provide repo_name parameter. Error: {e}")
 
+    @timed("collect")
+    @traced("pr.collect", kind=SPAN_KIND_CLIENT)
     def get_pr_info(self, pr_number: int) -> PRInfo:
         """
         Collect complete PR information.
@@ -107,11 +132,35 @@ class PRCollector:
         # Collect file changes
         pr_info.files = self.get_changed_files(pr)
 
-        # Collect comments
-        pr_info.comments = self.get_comments(pr)
+        # Collect comments (bot comments are tracked by ID, not fed back as context)
+        pr_info.comments = self.get_comments(pr, bot_comments=pr_info.bot_comments)
 
         return pr_info
 
+    def list_open_prs(self, since: Optional[datetime] = None) -> List[int]:
+        """
+        List open PR numbers, most recently updated first.
+
+        Pages through one sorted listing and stops at the first PR last
+        updated before ``since``.
+
+        Args:
+            since: Only include PRs updated at or after this time
+
+        Returns:
+            List of PR numbers
+        """
+        numbers = []
+        for pr in self.repo.get_pulls(state='open', sort='updated', direction='desc'):
+            if since is not None and pr.updated_at is not None:
+                updated_at = pr.updated_at
+                if updated_at.tzinfo is None and since.tzinfo is not None:
+                    updated_at = updated_at.replace(tzinfo=since.tzinfo)
+                if updated_at < since:
+                    break
+            numbers.append(pr.number)
+        return numbers
+
     def get_changed_files(self, pr: PullRequest) -> List[FileChange]:
         """
         Get list of changed files with diffs.
@@ -136,12 +185,21 @@ class PRCollector:
             files.append(file_change)
         return files
 
-    def get_comments(self, pr: PullRequest) -> List[Comment]:
+    def get_comments(
+        self,
+        pr: PullRequest,
+        bot_comments: Optional[Dict[str, int]] = None,
+    ) -> List[Comment]:
         """
         Get all comments on the PR (both general and review comments).
 
+        Comments carrying a bot marker are excluded so earlier AI output is
+        not fed back into the next review prompt.
+
         Args:
             pr: PullRequest object from PyGithub
+            bot_comments: If given, filled with {agent: issue comment ID}
+                for marked bot comments
 
         Returns:
             List of Comment objects
@@ -151,6 +209,11 @@ class PRCollector:
         # General PR comments (issue comments)
         try:
             for comment in pr.get_issue_comments():
+                agent = _marker_agent(comment.body)
+                if agent is not None:
+                    if bot_comments is not None:
+                        bot_comments[agent] = comment.id
+                    continue
                 comments.append(Comment(
                     id=comment.id,
                     author=comment.user.login,
@@ -164,6 +227,8 @@ class PRCollector:
         # File review comments (inline comments)
         try:
             for comment in pr.get_review_comments():
+                if _marker_agent(comment.body) is not None:
+                    continue
                 comments.append(Comment(
                     id=comment.id,
                     author=comment.user.login,
@@ -192,6 +257,8 @@ class PRCollector:
         pr = self.repo.get_pull(pr_number)
         return pr.diff_url
 
+    @timed("post")
+    @traced("pr.post_comment", kind=SPAN_KIND_CLIENT)
     def post_comment(self, pr_number: int, body: str) -> int:
         """
         Post a comment on the PR.
@@ -207,22 +274,148 @@ class PRCollector:
         comment = pr.create_issue_comment(body)
         return comment.id
 
-    def post_review(self, pr_number: int, body: str, event: str = "COMMENT") -> int:
+    @timed("post")
+    @traced("pr.upsert_comment", kind=SPAN_KIND_CLIENT)
+    def upsert_comment(
+        self,
+        pr_number: int,
+        body: str,
+        agent: str,
+        comment_id: Optional[int] = None,
+    ) -> int:
+        """
+        Edit the agent's previous comment in place, or post a new one.
+
+        The body is tagged with a hidden marker. When ``comment_id`` is known
+        (from ``PRInfo.bot_comments``) the comment is edited directly without
+        paging through the PR's comments again.
+
+        Args:
+            pr_number: Pull request number
+            body: Comment body (markdown supported)
+            agent: Agent name used for the marker
+            comment_id: Known ID of the agent's previous comment
+
+        Returns:
+            Comment ID
+        """
+        marker = bot_marker(agent)
+        tagged_body = body if marker in body else f"{body}\n{marker}"
+        pr = self.repo.get_pull(pr_number)
+
+        if comment_id is None:
+            for comment in pr.get_issue_comments():
+                if _marker_agent(comment.body) == agent:
+                    comment_id = comment.id
+                    break
+
+        if comment_id is not None:
+            try:
+                existing = pr.get_issue_comment(comment_id)
+                existing.edit(tagged_body)
+                return existing.id
+            except GithubException as e:
+                print(f"⚠️ Failed to edit comment {comment_id}, posting a new one: {e}")
+
+        comment = pr.create_issue_comment(tagged_body)
+        return comment.id
+
+    @timed("post")
+    @traced("pr.post_review", kind=SPAN_KIND_CLIENT)
+    def post_review(
+        self,
+        pr_number: int,
+        body: str,
+        event: str = "COMMENT",
+        comments: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
         """
         Post a review on the PR.
 
+        All inline comments are submitted with the review in a single
+        API call instead of one call per comment.
+
         Args:
             pr_number: Pull request number
             body: Review body
             event: Review event type ('APPROVE', 'REQUEST_CHANGES', 'COMMENT')
+            comments: Inline comments as {'path', 'position', 'body'} dicts
 
         Returns:
             Review ID
         """
         pr = self.repo.get_pull(pr_number)
-        review = pr.create_review(body=body, event=event)
+        if comments:
+            review = pr.create_review(body=body, event=event, comments=comments)
+        else:
+            review = pr.create_review(body=body, event=event)
         return review.id
 
+    @timed("post")
+    @traced("pr.upsert_review", kind=SPAN_KIND_CLIENT)
+    def upsert_review(
+        self,
+        pr_number: int,
+        body: str,
+        agent: str,
+        event: str = "COMMENT",
+        comments: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Replace the agent's previous review instead of adding another one.
+
+        The body is tagged with a hidden marker. The agent's inline comments
+        from earlier runs are deleted. Without new inline comments the latest
+        marked review is edited in place; otherwise a new review is posted.
+        Older marked reviews are cut down to a one-line (unmarked) stub and
+        dismissed if they approved or requested changes.
+
+        Args:
+            pr_number: Pull request number
+            body: Review body
+            agent: Agent name used for the marker
+            event: Review event type ('APPROVE', 'REQUEST_CHANGES', 'COMMENT')
+            comments: Inline comments as {'path', 'position', 'body'} dicts
+
+        Returns:
+            Review ID
+        """
+        marker = bot_marker(agent)
+        tagged_body = body if marker in body else f"{body}\n{marker}"
+        pr = self.repo.get_pull(pr_number)
+
+        previous = [
+            review for review in pr.get_reviews()
+            if review.state != "DISMISSED" and _marker_agent(review.body) == agent
+        ]
+        for comment in pr.get_review_comments():
+            if _marker_agent(comment.body) == agent:
+                try:
+                    comment.delete()
+                except GithubException as e:
+                    print(f"⚠️ Failed to delete review comment {comment.id}: {e}")
+
+        review_id = None
+        if previous and not comments and event == "COMMENT":
+            latest = previous.pop()
+            try:
+                latest.edit(tagged_body)
+                review_id = latest.id
+            except GithubException as e:
+                print(f"⚠️ Failed to edit review {latest.id}, posting a new one: {e}")
+                previous.append(latest)
+        if review_id is None:
+            review_id = self.post_review(pr_number, tagged_body, event=event, comments=comments)
+
+        for review in previous:
+            try:
+                review.edit(f"_Superseded by a newer {agent} review._")
+                if review.state in ("APPROVED", "CHANGES_REQUESTED"):
+                    review.dismiss(f"Superseded by a newer {agent} review")
+            except GithubException as e:
+                print(f"⚠️ Failed to retire review {review.id}: {e}")
+        return review_id
+
 
 def main():
     """Test PR Collector with a sample PR."""
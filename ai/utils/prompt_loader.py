@@ -4,10 +4,14 @@ Prompt loading and formatting utilities.
 Loads prompt templates from .github/AI_PROMPTS/ and injects PR context.
 """
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 
-from ai.utils.models import PRInfo
+from ai.utils.diff_parser import excerpt
+from ai.utils.models import CacheablePrompt, PRInfo
+from ai.utils.timing import timed
+from ai.utils.tracing import traced
 
 
 def load_prompt_template(name: str, version: str = "v1") -> str:
@@ -30,10 +34,38 @@ def load_prompt_template(name: str, version: str = "v1") -> str:
     if not path.exists():
         raise FileNotFoundError(f"Prompt template not found: {path}")
 
+    return _read_template(str(path.resolve()))
+
+
+@lru_cache(maxsize=32)
+def _read_template(path: str) -> str:
+    """Read a template once per process (shared across PRs in batch runs)."""
     with open(path, 'r', encoding='utf-8') as f:
         return f.read()
 
 
+def fill_template(template: str, pr_context: str) -> CacheablePrompt:
+    """
+    Insert PR context into a template at its {pr_context} placeholder.
+
+    Everything before the placeholder is identical across PRs and becomes
+    the cacheable prefix; the PR context and anything after it form the
+    per-PR suffix. Templates without a placeholder get the context appended.
+
+    Args:
+        template: Prompt template
+        pr_context: Formatted PR context
+
+    Returns:
+        The complete prompt (a str) with its cache breakpoint recorded
+    """
+    if "{pr_context}" in template:
+        head, tail = template.split("{pr_context}", 1)
+        return CacheablePrompt(head, pr_context + tail.replace("{pr_context}", pr_context))
+    # If no placeholder, just append context
+    return CacheablePrompt(f"{template}\n\n", pr_context)
+
+
 def build_pr_context(pr_info: PRInfo, include_diffs: bool = False, max_files: int = 50) -> str:
     """
     Build PR context string from PRInfo.
@@ -80,9 +112,9 @@ def build_pr_context(pr_info: PRInfo, include_diffs: bool = False, max_files: in
         if include_diffs and file.patch and not file.is_binary:
             context_parts.append("```diff")
             # Limit diff size (max 50 lines per file)
-            diff_lines = file.patch.split('\n')[:50]
-            context_parts.append('\n'.join(diff_lines))
-            if len(file.patch.split('\n')) > 50:
+            diff_text, truncated = excerpt(file.hunks, 50)
+            context_parts.append(diff_text)
+            if truncated:
                 context_parts.append("... (diff truncated)")
             context_parts.append("```")
             context_parts.append("")
@@ -105,6 +137,8 @@ def build_pr_context(pr_info: PRInfo, include_diffs: bool = False, max_files: in
     return "\n".join(context_parts)
 
 
+@timed("prompt")
+@traced("prompt.build")
 def build_claude_review_prompt(pr_info: PRInfo) -> str:
     """
     Build complete prompt for Claude PM review.
@@ -122,14 +156,11 @@ def build_claude_review_prompt(pr_info: PRInfo) -> str:
     pr_context = build_pr_context(pr_info, include_diffs=True, max_files=30)
 
     # Combine template + context
-    # Template should have {pr_context} placeholder
-    if "{pr_context}" in template:
-        return template.replace("{pr_context}", pr_context)
-    else:
-        # If no placeholder, just append context
-        return f"{template}\n\n{pr_context}"
+    return fill_template(template, pr_context)
 
 
+@timed("prompt")
+@traced("prompt.build")
 def build_gemini_uiux_prompt(pr_info: PRInfo) -> str:
     """
     Build complete prompt for Gemini UI/UX review.
@@ -155,12 +186,11 @@ def build_gemini_uiux_prompt(pr_info: PRInfo) -> str:
             ui_context += f"- `{file.filename}`\n"
         pr_context = pr_context + ui_context
 
-    if "{pr_context}" in template:
-        return template.replace("{pr_context}", pr_context)
-    else:
-        return f"{template}\n\n{pr_context}"
+    return fill_template(template, pr_context)
 
 
+@timed("prompt")
+@traced("prompt.build")
 def build_perplexity_compliance_prompt(pr_info: PRInfo) -> str:
     """
     Build complete prompt for Perplexity compliance review.
@@ -181,12 +211,11 @@ def build_perplexity_compliance_prompt(pr_info: PRInfo) -> str:
     if has_sensitive:
         pr_context = "⚠️ **SENSITIVE CHANGES DETECTED**\n\n" + pr_context
 
-    if "{pr_context}" in template:
-        return template.replace("{pr_context}", pr_context)
-    else:
-        return f"{template}\n\n{pr_context}"
+    return fill_template(template, pr_context)
 
 
+@timed("prompt")
+@traced("prompt.build")
 def build_gpt_backend_prompt(pr_info: PRInfo) -> str:
     """
     Build complete prompt for GPT backend review.
@@ -212,7 +241,31 @@ def build_gpt_backend_prompt(pr_info: PRInfo) -> str:
             backend_context += f"- `{file.filename}`\n"
         pr_context = pr_context + backend_context
 
-    if "{pr_context}" in template:
-        return template.replace("{pr_context}", pr_context)
-    else:
-        return f"{template}\n\n{pr_context}"
+    return fill_template(template, pr_context)
+
+
+@timed("prompt")
+@traced("prompt.build")
+def build_synthesis_prompt(pr_info: PRInfo, shard_reviews: List[str]) -> str:
+    """
+    Build the reduce-step prompt that merges per-shard reviews.
+
+    Args:
+        pr_info: Full PR information (all files)
+        shard_reviews: Review text per shard, in shard order
+
+    Returns:
+        Complete prompt ready to send to the synthesizing agent
+    """
+    template = load_prompt_template("review_synthesis")
+
+    pr_context = build_pr_context(pr_info, include_diffs=False, max_files=len(pr_info.files))
+
+    review_parts = [pr_context, "## Shard Reviews"]
+    for index, review in enumerate(shard_reviews, start=1):
+        review_parts.append(f"### Shard {index}/{len(shard_reviews)}")
+        review_parts.append(review)
+        review_parts.append("")
+    pr_context = "\n".join(review_parts)
+
+    return fill_template(template, pr_context)
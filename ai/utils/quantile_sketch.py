@@ -0,0 +1,135 @@
+# ai/utils/quantile_sketch.py
+"""
+Constant-memory quantile sketch.
+
+Values are counted in logarithmic buckets (bucket i covers
+(gamma^(i-1), gamma^i]), so any quantile is answered within
+``relative_accuracy`` of the true value while memory depends only on the
+range of values seen, never on how many were added. When more than
+``max_buckets`` buckets are in use the lowest ones are merged, which keeps
+upper quantiles (p90/p99) accurate.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BUCKETS = 2048
+SUMMARY_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch for non-negative values (latency, cost)."""
+
+    __slots__ = ("relative_accuracy", "max_buckets", "_gamma", "_log_gamma", "_buckets", "_zeros", "count", "total", "min", "max")
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self._zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        """Count one value (negative values are clamped to 0)."""
+        value = max(0.0, float(value))
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value == 0.0:
+            self._zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+
+    def update(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def _collapse(self) -> None:
+        keys = sorted(self._buckets)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        for key in keys[:excess]:
+            self._buckets[target] += self._buckets.pop(key)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add another sketch's counts (same relative accuracy)."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, n in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + n
+        self._zeros += other._zeros
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable state (see ``from_dict``)."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "buckets": {str(index): n for index, n in self._buckets.items()},
+            "zeros": self._zeros,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], data.get("max_buckets", DEFAULT_MAX_BUCKETS))
+        sketch._buckets = {int(index): n for index, n in data["buckets"].items()}
+        sketch._zeros = data["zeros"]
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (0 <= q <= 1), or None when empty."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                # Bucket midpoint (in relative terms), clamped to observed range
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self, quantiles: Iterable[float] = SUMMARY_QUANTILES, digits: int = 6) -> Dict[str, Optional[float]]:
+        """Count, mean, min/max and the given quantiles as ``p50``-style keys."""
+        result: Dict[str, Optional[float]] = {
+            "count": self.count,
+            "mean": round(self.total / self.count, digits) if self.count else None,
+            "min": round(self.min, digits) if self.min is not None else None,
+            "max": round(self.max, digits) if self.max is not None else None,
+        }
+        for q in quantiles:
+            value = self.quantile(q)
+            result[f"p{q * 100:g}"] = round(value, digits) if value is not None else None
+        return result
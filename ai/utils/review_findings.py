@@ -0,0 +1,263 @@
+# ai/utils/review_findings.py
+"""
+Structured review findings.
+
+Parses file/line/severity findings out of a model response, maps them onto
+GitHub diff positions via the hunk model, and formats them for a single
+``create_review`` submission (one API call per review, however many findings).
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ai.utils.models import PRInfo
+from ai.utils.pr_collector import bot_marker
+
+SEVERITY_ORDER = ("CRITICAL", "MAJOR", "MINOR", "INFO")
+SEVERITY_ICONS = {
+    "CRITICAL": "🔴",
+    "MAJOR": "🟠",
+    "MINOR": "🟡",
+    "INFO": "🔵",
+}
+
+FINDINGS_INSTRUCTIONS = """
+
+Inline Findings (required):
+- In addition to the output above, include one fenced ```json block with a
+  "findings" list: [{"file": path, "line": new-file line number, "severity":
+  CRITICAL|MAJOR|MINOR|INFO, "message": short actionable text}].
+- Only reference lines that appear in the diff; use null for file-level findings.
+"""
+
+_FENCED_JSON_RE = re.compile(r"```(?:json)?\s*\n(.*?)```", re.DOTALL)
+
+
+@dataclass
+class Finding:
+    """A single review finding anchored to a file (and optionally a line)."""
+    file: str
+    message: str
+    severity: str = "MINOR"
+    line: Optional[int] = None
+    side: str = "RIGHT"  # 'RIGHT' = new file, 'LEFT' = old file
+
+    @property
+    def icon(self) -> str:
+        return SEVERITY_ICONS.get(self.severity, "⚪")
+
+    def render(self) -> str:
+        """Markdown body for an inline comment."""
+        return f"{self.icon} **{self.severity}**: {self.message}"
+
+
+def with_findings_instructions(build_prompt: Callable[[PRInfo], str]) -> Callable[[PRInfo], str]:
+    """Wrap a prompt builder so the model also returns structured findings."""
+    def _build(pr_info: PRInfo) -> str:
+        return build_prompt(pr_info) + FINDINGS_INSTRUCTIONS
+    return _build
+
+
+def _normalize_severity(value: Any) -> str:
+    severity = str(value or "MINOR").strip().upper()
+    if severity in ("HIGH", "ERROR"):
+        return "MAJOR"
+    if severity in ("LOW", "WARNING", "NIT"):
+        return "MINOR"
+    return severity if severity in SEVERITY_ORDER else "MINOR"
+
+
+def _to_finding(item: Any) -> Optional[Finding]:
+    if not isinstance(item, dict):
+        return None
+    file = item.get("file") or item.get("path")
+    message = item.get("message") or item.get("desc") or item.get("body") or item.get("suggestion")
+    if not file or not message:
+        return None
+    line = item.get("line")
+    try:
+        line = int(line) if line is not None else None
+    except (TypeError, ValueError):
+        line = None
+    side = str(item.get("side") or "RIGHT").upper()
+    return Finding(
+        file=str(file),
+        message=str(message),
+        severity=_normalize_severity(item.get("severity")),
+        line=line,
+        side=side if side in ("LEFT", "RIGHT") else "RIGHT",
+    )
+
+
+def _candidate_payloads(content: str) -> List[Any]:
+    payloads = []
+    for block in _FENCED_JSON_RE.findall(content):
+        try:
+            payloads.append(json.loads(block))
+        except json.JSONDecodeError:
+            continue
+    if not payloads:
+        try:
+            payloads.append(json.loads(content))
+        except json.JSONDecodeError:
+            pass
+    return payloads
+
+
+def parse_findings(content: str) -> List[Finding]:
+    """
+    Extract findings from a model response.
+
+    Accepts a bare JSON document or fenced ```json blocks containing either a
+    list of findings or an object with a "findings" or "issues" list.
+
+    Args:
+        content: Model response text
+
+    Returns:
+        List of findings (empty if nothing parseable was found)
+    """
+    findings: List[Finding] = []
+    for payload in _candidate_payloads(content or ""):
+        if isinstance(payload, dict):
+            items = payload.get("findings") or payload.get("issues") or []
+        elif isinstance(payload, list):
+            items = payload
+        else:
+            continue
+        for item in items:
+            finding = _to_finding(item)
+            if finding is not None:
+                findings.append(finding)
+    return findings
+
+
+def strip_findings(content: str) -> str:
+    """
+    Model response with its fenced findings blocks removed.
+
+    The prose review is posted as the review body; the findings themselves
+    go into inline comments and the summary, so they are not repeated.
+    """
+    def _drop(match: "re.Match[str]") -> str:
+        try:
+            payload = json.loads(match.group(1))
+        except json.JSONDecodeError:
+            return match.group(0)
+        if isinstance(payload, dict) and ("findings" in payload or "issues" in payload):
+            return ""
+        if isinstance(payload, list) and all(isinstance(item, dict) for item in payload):
+            return ""
+        return match.group(0)
+
+    stripped = _FENCED_JSON_RE.sub(_drop, content or "")
+    return re.sub(r"\n{3,}", "\n\n", stripped).strip()
+
+
+def build_review_comments(
+    pr_info: PRInfo,
+    findings: List[Finding],
+    marker: str = "",
+) -> Tuple[List[Dict[str, Any]], List[Finding]]:
+    """
+    Map findings onto diff positions.
+
+    Args:
+        pr_info: PR information (files with patches)
+        findings: Parsed findings
+        marker: Hidden bot marker appended to each comment body
+
+    Returns:
+        (comments, unplaced): comments in the shape expected by
+        ``PullRequest.create_review(comments=...)`` and the findings that
+        could not be anchored to a diff line
+    """
+    comments: List[Dict[str, Any]] = []
+    unplaced: List[Finding] = []
+    for finding in findings:
+        file = pr_info.get_file_by_path(finding.file)
+        position = None
+        if file is not None and finding.line is not None:
+            position = file.find_position(finding.line, side=finding.side)
+        if position is None:
+            unplaced.append(finding)
+            continue
+        comments.append({
+            "path": finding.file,
+            "position": position,
+            "body": f"{finding.render()}\n{marker}" if marker else finding.render(),
+        })
+    return comments, unplaced
+
+
+def format_review_body(findings: List[Finding], unplaced: List[Finding], prose: str = "") -> str:
+    """
+    Summary body for the review: severity counts plus findings without a diff line.
+
+    ``prose`` (the model's review text, see ``strip_findings``) goes first.
+    """
+    counts = {severity: 0 for severity in SEVERITY_ORDER}
+    for finding in findings:
+        counts[finding.severity] = counts.get(finding.severity, 0) + 1
+
+    if findings:
+        summary = " · ".join(
+            f"{SEVERITY_ICONS[s]} {s.title()} {counts[s]}" for s in SEVERITY_ORDER if counts[s]
+        )
+    else:
+        summary = "none"
+    parts = [prose, ""] if prose else []
+    parts.append(f"**Findings:** {summary}")
+
+    if unplaced:
+        parts.append("")
+        parts.append("### General findings")
+        for finding in unplaced:
+            location = f"`{finding.file}`" + (f" L{finding.line}" if finding.line else "")
+            parts.append(f"- {finding.icon} **{finding.severity}** {location}: {finding.message}")
+
+    return "\n".join(parts)
+
+
+def post_findings_review(
+    collector: Any,
+    pr_info: PRInfo,
+    agent: str,
+    content: str,
+    title: str,
+    footer: str,
+    notice: str = "",
+) -> Tuple[int, int]:
+    """
+    Post a model response as the agent's review, with findings inline.
+
+    Always goes through ``collector.upsert_review`` (with no inline comments
+    when no findings parse), so the agent's earlier review is replaced
+    rather than left on the PR next to a newer comment.
+
+    Args:
+        collector: PRCollector (or a stand-in with ``upsert_review``)
+        pr_info: PR information
+        agent: Agent name used for the markers
+        content: Model response text
+        title: Review heading
+        footer: Line shown below the review
+        notice: Text shown above the review body (e.g. a manual approval notice)
+
+    Returns:
+        (review ID, number of inline comments)
+    """
+    findings = parse_findings(content)
+    comments, unplaced = build_review_comments(pr_info, findings, marker=bot_marker(agent))
+    body = f"""{title}
+
+{notice}{format_review_body(findings, unplaced, prose=strip_findings(content))}
+
+---
+{footer}
+"""
+    review_id = collector.upsert_review(pr_info.number, body, agent=agent, comments=comments)
+    return review_id, len(comments)
@@ -0,0 +1,53 @@
+# ai/utils/team_config.py
+"""
+Reader for .github/ai_team.yml.
+
+Parsed once per file modification, so runners and clients can look up team
+settings (e.g. provider failover) on every call without re-reading YAML.
+"""
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - pyyaml is in requirements.txt
+    yaml = None
+
+TEAM_CONFIG_FILE = Path(".github/ai_team.yml")
+
+
+@lru_cache(maxsize=8)
+def _parse(path: str, stamp: Tuple[int, int]) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as fh:
+        return yaml.safe_load(fh) or {}
+
+
+def load_team_config(path: Path = TEAM_CONFIG_FILE) -> Dict[str, Any]:
+    """
+    Parsed ai_team.yml, or {} if the file or pyyaml is missing.
+    """
+    if yaml is None:
+        return {}
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    return _parse(str(path), (stat.st_mtime_ns, stat.st_size))
+
+
+def fallback_agents(agent: str, path: Path = TEAM_CONFIG_FILE) -> List[str]:
+    """
+    Agents to fail over to when ``agent`` is unavailable, in order.
+
+    Declared per team role as ``fallback_agents``; the role is the one whose
+    primary ``agent`` matches.
+    """
+    team = load_team_config(path).get("team") or {}
+    for role in team.values():
+        if isinstance(role, dict) and role.get("agent") == agent:
+            return [a for a in role.get("fallback_agents") or [] if a != agent]
+    return []
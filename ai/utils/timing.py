@@ -0,0 +1,105 @@
+# ai/utils/timing.py
+"""
+Per-stage latency instrumentation.
+
+A ``StageTimer`` collects how long a run spends in each stage (collect,
+prompt, budget, model, post). Library code marks its stages with
+``span(name)`` or ``@timed(name)``; those are no-ops unless a timer is
+active in the current context, so the collector, prompt builders and
+clients can be instrumented unconditionally:
+
+    timer = start_stage_timer()
+    pr_info = collector.get_pr_info(42)   # recorded as "collect"
+    timer.stage_seconds                   # {"collect": 0.83}
+
+Repeated spans of one stage add up. Time is attributed to the outermost
+open span only, so nested spans (a failover wrapper around a client,
+``upsert_comment`` calling ``post_comment``, a budget lookup inside a
+hedged request) are never counted twice. ``log_ai_event`` adds the active
+timer's totals to event metadata as ``stage_seconds``.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_ACTIVE: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+_OPEN_STAGE: ContextVar[Optional[str]] = ContextVar("open_stage", default=None)
+
+
+class StageTimer:
+    """Accumulated seconds per stage for one run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.stage_seconds: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def activate(self) -> Iterator["StageTimer"]:
+        """Make this the active timer for the enclosed block."""
+        token = _ACTIVE.set(self)
+        try:
+            yield self
+        finally:
+            _ACTIVE.reset(token)
+
+    def as_metadata(self) -> Dict[str, float]:
+        """Stage durations rounded for audit event metadata."""
+        with self._lock:
+            return {stage: round(seconds, 4) for stage, seconds in self.stage_seconds.items()}
+
+    def format(self) -> str:
+        """One-line ``stage 0.12s | ...`` summary for runner output."""
+        return " | ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.as_metadata().items())
+
+
+def start_stage_timer() -> StageTimer:
+    """Activate a new timer for the rest of the current context (script entry points)."""
+    timer = StageTimer()
+    _ACTIVE.set(timer)
+    return timer
+
+
+def current_stage_timer() -> Optional[StageTimer]:
+    """The active timer, or None when timing is off."""
+    return _ACTIVE.get()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the enclosed block as ``stage`` on the active timer (if any)."""
+    timer = _ACTIVE.get()
+    if timer is None or _OPEN_STAGE.get() is not None:
+        yield
+        return
+    token = _OPEN_STAGE.set(stage)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.record(stage, time.perf_counter() - started)
+        _OPEN_STAGE.reset(token)
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """Decorator form of ``span``."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
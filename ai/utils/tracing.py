@@ -0,0 +1,467 @@
+# ai/utils/tracing.py
+"""
+Distributed tracing with OpenTelemetry-compatible export.
+
+Spans cover the router decision, PR collection, context retrieval,
+prompt building, each agent call and comment posting. The current span
+lives in a context variable, so children attach to their parent across
+asyncio tasks and ``asyncio.to_thread`` automatically; thread pools use
+``propagate_context`` to carry the caller's context into workers.
+
+Tracing is off (spans are shared no-op objects) unless an exporter is
+configured:
+
+  AI_TRACE_FILE=ai/logs/traces.jsonl
+      append one OTLP/JSON ExportTraceServiceRequest per line (the format
+      of the OpenTelemetry Collector's file exporter)
+  OTEL_EXPORTER_OTLP_TRACES_ENDPOINT / OTEL_EXPORTER_OTLP_ENDPOINT
+      POST the same payload to an OTLP/HTTP collector (``/v1/traces``)
+
+``OTEL_SERVICE_NAME`` names the service, and a W3C ``TRACEPARENT`` in
+the environment makes root spans children of a span in another process
+(e.g. the workflow step that ran the router).
+"""
+from __future__ import annotations
+
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar, Union
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TRACE_FILE_ENV = "AI_TRACE_FILE"
+OTLP_ENDPOINT_ENVS = ("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT", "OTEL_EXPORTER_OTLP_ENDPOINT")
+TRACEPARENT_ENV = "TRACEPARENT"
+DEFAULT_SERVICE_NAME = "ai-collab-starter"
+SCOPE_NAME = "ai.utils.tracing"
+EXPORT_BATCH_SIZE = 512
+OTLP_TIMEOUT_SECONDS = 5.0
+
+# OTLP enums
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Trace and span id (lowercase hex) identifying one span."""
+    trace_id: str
+    span_id: str
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value (sampled)."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def from_traceparent(cls, value: Optional[str]) -> Optional["SpanContext"]:
+        """Parse a W3C traceparent, or None if absent or malformed."""
+        parts = (value or "").strip().split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            int(parts[1], 16), int(parts[2], 16)
+        except ValueError:
+            return None
+        if set(parts[1]) == {"0"} or set(parts[2]) == {"0"}:
+            return None
+        return cls(parts[1], parts[2])
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # int64 is a JSON string in OTLP/JSON
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Span:
+    """One timed operation; ended spans are handed to the tracer for export."""
+
+    __slots__ = (
+        "name", "context", "parent_id", "kind", "start_ns", "end_ns",
+        "attributes", "events", "status_code", "status_message", "_tracer",
+    )
+    recording = True
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        kind: int,
+        attributes: Optional[Dict[str, Any]],
+    ):
+        self._tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": dict(attributes or {})})
+
+    def set_status(self, code: int, message: str = "") -> None:
+        self.status_code = code
+        self.status_message = message
+
+    def record_exception(self, error: BaseException) -> None:
+        """Add an ``exception`` event and mark the span as failed."""
+        self.add_event("exception", {
+            "exception.type": type(error).__name__,
+            "exception.message": str(error),
+        })
+        self.set_status(STATUS_ERROR, str(error))
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self._tracer._on_end(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON representation of an ended span."""
+        span: Dict[str, Any] = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status_code},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        if self.events:
+            span["events"] = [
+                {"name": e["name"], "timeUnixNano": str(e["time_ns"]), "attributes": _otlp_attributes(e["attributes"])}
+                for e in self.events
+            ]
+        return span
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is off."""
+
+    __slots__ = ()
+    recording = False
+    context = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def set_status(self, code: int, message: str = "") -> None:
+        pass
+
+    def record_exception(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+AnySpan = Union[Span, _NoopSpan]
+
+
+def otlp_request(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """ExportTraceServiceRequest (OTLP/JSON) for ended spans."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": service_name})},
+            "scopeSpans": [{
+                "scope": {"name": SCOPE_NAME},
+                "spans": [span.to_otlp() for span in spans],
+            }],
+        }],
+    }
+
+
+class FileSpanExporter:
+    """Append OTLP/JSON export requests to a JSON Lines file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        line = json.dumps(payload, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write(line)
+
+
+class OTLPHttpSpanExporter:
+    """POST OTLP/JSON export requests to a collector's /v1/traces."""
+
+    def __init__(self, endpoint: str, timeout: float = OTLP_TIMEOUT_SECONDS):
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else f"{endpoint}/v1/traces"
+        self.timeout = timeout
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    """Creates spans and exports them in batches."""
+
+    def __init__(self, exporter: Any = None, service_name: str = DEFAULT_SERVICE_NAME):
+        self.exporter = exporter
+        self.service_name = service_name
+        self.remote_parent = SpanContext.from_traceparent(os.getenv(TRACEPARENT_ENV))
+        self._lock = threading.Lock()
+        self._ended: List[Span] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(
+        self,
+        name: str,
+        *,
+        parent: Union[AnySpan, SpanContext, None] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> AnySpan:
+        """
+        Start a span (not made current). The parent defaults to the current
+        span, then to the TRACEPARENT of the process.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        if parent is None:
+            parent = _CURRENT.get()
+        if isinstance(parent, Span):
+            parent = parent.context
+        if not isinstance(parent, SpanContext):
+            parent = self.remote_parent
+        trace_id = parent.trace_id if parent is not None else _new_id(16)
+        context = SpanContext(trace_id, _new_id(8))
+        return Span(self, name, context, parent.span_id if parent else None, kind, attributes)
+
+    def _on_end(self, span: Span) -> None:
+        with self._lock:
+            self._ended.append(span)
+            full = len(self._ended) >= EXPORT_BATCH_SIZE
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Export all ended spans."""
+        with self._lock:
+            spans, self._ended = self._ended, []
+        if not spans or self.exporter is None:
+            return
+        try:
+            self.exporter.export(otlp_request(spans, self.service_name))
+        except Exception as e:
+            print(f"⚠️ Trace export failed: {e}")
+
+
+def tracer_from_env() -> Tracer:
+    """Tracer configured from AI_TRACE_FILE / OTEL_* environment variables."""
+    exporter = None
+    endpoint = next((os.getenv(name) for name in OTLP_ENDPOINT_ENVS if os.getenv(name)), None)
+    if os.getenv(TRACE_FILE_ENV):
+        exporter = FileSpanExporter(os.environ[TRACE_FILE_ENV])
+    elif endpoint:
+        exporter = OTLPHttpSpanExporter(endpoint)
+    return Tracer(exporter, os.getenv("OTEL_SERVICE_NAME") or DEFAULT_SERVICE_NAME)
+
+
+_CURRENT: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_TRACER: Optional[Tracer] = None
+_TRACER_LOCK = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer, flushed at interpreter exit."""
+    global _TRACER
+    with _TRACER_LOCK:
+        if _TRACER is None:
+            _TRACER = tracer_from_env()
+            atexit.register(_TRACER.flush)
+        return _TRACER
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Replace the process-wide tracer (None: re-read the environment)."""
+    global _TRACER
+    with _TRACER_LOCK:
+        if _TRACER is not None:
+            _TRACER.flush()
+        _TRACER = tracer
+        if tracer is not None:
+            atexit.register(tracer.flush)
+
+
+def current_span() -> AnySpan:
+    """The span active in this context (a no-op span if none)."""
+    return _CURRENT.get() or NOOP_SPAN
+
+
+@contextmanager
+def use_span(span: AnySpan, end_on_exit: bool = False) -> Iterator[AnySpan]:
+    """Make ``span`` current for the enclosed block; exceptions are recorded on it."""
+    if not span.recording:
+        yield span
+        return
+    token = _CURRENT.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        _CURRENT.reset(token)
+        if end_on_exit:
+            span.end()
+
+
+def start_span(
+    name: str,
+    *,
+    parent: Union[AnySpan, SpanContext, None] = None,
+    kind: int = SPAN_KIND_INTERNAL,
+    attributes: Optional[Dict[str, Any]] = None,
+):
+    """Context manager: start a span, make it current, end it on exit."""
+    span = get_tracer().start_span(name, parent=parent, kind=kind, attributes=attributes)
+    return use_span(span, end_on_exit=True)
+
+
+def traced(name: str, kind: int = SPAN_KIND_INTERNAL) -> Callable[[F], F]:
+    """Decorator: run the function (sync or async) inside a span."""
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with start_span(name, kind=kind):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with start_span(name, kind=kind):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def propagate_context(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Bind ``func`` to a copy of the caller's context (current span, stage timer) for a thread pool."""
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+def current_traceparent() -> Optional[str]:
+    """W3C traceparent of the current span, for child processes."""
+    span = _CURRENT.get()
+    return span.context.traceparent if span is not None else None
+
+
+def read_trace_file(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """
+    Spans from an OTLP/JSON Lines file as flat dicts (trace_id, span_id,
+    parent_id, name, start_ns, end_ns, status, attributes).
+    """
+    spans = []
+    with Path(path).open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            for resource in json.loads(line).get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    for span in scope.get("spans", []):
+                        spans.append({
+                            "trace_id": span["traceId"],
+                            "span_id": span["spanId"],
+                            "parent_id": span.get("parentSpanId") or None,
+                            "name": span["name"],
+                            "start_ns": int(span["startTimeUnixNano"]),
+                            "end_ns": int(span["endTimeUnixNano"]),
+                            "status": span.get("status", {}).get("code", STATUS_UNSET),
+                            "attributes": {
+                                a["key"]: next(iter(a["value"].values()), None)
+                                for a in span.get("attributes", [])
+                            },
+                        })
+    return spans
+
+
+def critical_path(spans: List[Dict[str, Any]], root_id: str) -> List[Dict[str, Any]]:
+    """
+    Chain of spans from ``root_id`` that bounded its end time: at each
+    level, the child that finished last.
+    """
+    by_id = {span["span_id"]: span for span in spans}
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        if span["parent_id"]:
+            children.setdefault(span["parent_id"], []).append(span)
+    path = [by_id[root_id]]
+    while children.get(path[-1]["span_id"]):
+        path.append(max(children[path[-1]["span_id"]], key=lambda s: s["end_ns"]))
+    return path
@@ -0,0 +1,5 @@
+"""
+Latency and cost regression benchmarks.
+
+Run with ``python -m benchmarks.run``; see benchmarks/README.md.
+"""
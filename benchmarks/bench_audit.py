@@ -0,0 +1,76 @@
+"""
+Audit log: daily summaries over a large synthetic day (cold rollup rebuild
+and warm rollup read) and event logging throughput through the sink.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from ai.utils import audit_logger
+from ai.utils.audit_rollups import ROLLUP_FILE
+from benchmarks.harness import register
+from benchmarks.synthetic import restore_log_root, use_scratch_log_root, write_audit_day
+
+EVENTS = {"quick": 20_000, "full": 1_000_000}
+DAY = "2026-01-15"
+LOGGED_EVENTS = 1_000
+
+
+def _setup_day(scale: str) -> Dict[str, Any]:
+    state = use_scratch_log_root()
+    write_audit_day(state["tmp"], DAY, EVENTS[scale])
+    return state
+
+
+def _setup_empty(scale: str) -> Dict[str, Any]:
+    return use_scratch_log_root()
+
+
+def _summary_cold(state: Dict[str, Any]) -> None:
+    # No rollup: the whole JSONL day is streamed and the rollup rebuilt
+    (state["tmp"] / DAY / ROLLUP_FILE).unlink(missing_ok=True)
+    audit_logger.build_daily_summary(DAY)
+
+
+def _summary_warm(state: Dict[str, Any]) -> None:
+    audit_logger.build_daily_summary(DAY)
+
+
+def _log_events(state: Dict[str, Any]) -> None:
+    # Includes the sink's batch hook keeping today's rollups current
+    for i in range(LOGGED_EVENTS):
+        audit_logger.log_ai_event(
+            agent="claude",
+            pr_number=i,
+            status="success",
+            decision_reason="benchmark",
+            input_tokens=1_000,
+            output_tokens=200,
+            total_tokens=1_200,
+            cost_usd=0.006,
+            metadata={"stage_seconds": {"model": 1.5}},
+        )
+    audit_logger.flush_events()
+
+
+register(
+    "audit.build_daily_summary[cold]",
+    _summary_cold,
+    setup=_setup_day,
+    teardown=restore_log_root,
+    rounds=3,
+    warmup=0,
+)
+register(
+    "audit.build_daily_summary[warm]",
+    _summary_warm,
+    setup=_setup_day,
+    teardown=restore_log_root,
+    rounds=20,
+)
+register(
+    f"audit.log_ai_event[events={LOGGED_EVENTS}]",
+    _log_events,
+    setup=_setup_empty,
+    teardown=restore_log_root,
+)
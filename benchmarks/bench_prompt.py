@@ -0,0 +1,38 @@
+"""
+Prompt construction: build_pr_context and a full review prompt on
+synthetic PRs of 10, 100 and 1000 files.
+"""
+from __future__ import annotations
+
+from typing import Dict, List
+
+from ai.utils.prompt_loader import build_claude_review_prompt, build_pr_context
+from benchmarks.harness import register
+from benchmarks.synthetic import make_patches, make_pr_info
+
+FILE_COUNTS = (10, 100, 1000)
+
+
+def _build_context(patches: List[str]) -> Dict[str, float]:
+    # A fresh PRInfo each round, so patch parsing (cached per FileChange) is timed
+    context = build_pr_context(make_pr_info(1, patches), include_diffs=True, max_files=len(patches))
+    return {"prompt_chars": len(context)}
+
+
+def _build_review_prompt(patches: List[str]) -> Dict[str, float]:
+    return {"prompt_chars": len(build_claude_review_prompt(make_pr_info(1, patches)))}
+
+
+for _files in FILE_COUNTS:
+    register(
+        f"prompt.build_pr_context[files={_files}]",
+        _build_context,
+        setup=lambda scale, n=_files: make_patches(n),
+        rounds=5 if _files >= 1000 else 20,
+    )
+    register(
+        f"prompt.build_claude_review_prompt[files={_files}]",
+        _build_review_prompt,
+        setup=lambda scale, n=_files: make_patches(n),
+        rounds=20,
+    )
@@ -0,0 +1,60 @@
+"""
+Context retrieval: keyword search over the JSON index and Chroma vector
+search (skipped when chromadb is not installed) on synthetic corpora.
+"""
+from __future__ import annotations
+
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+from ai.context7 import chroma_pipeline, rag_pipeline
+from benchmarks.harness import register
+from benchmarks.synthetic import make_corpus, write_corpus_index
+
+CORPUS_DOCS = {"quick": 1_000, "full": 10_000}
+QUERY = "circuit"
+TOP_K = 5
+
+
+def _setup_index(scale: str) -> Dict[str, Any]:
+    tmp = Path(tempfile.mkdtemp(prefix="bench-rag-"))
+    index = write_corpus_index(tmp / "index.json", make_corpus(CORPUS_DOCS[scale]))
+    return {"tmp": tmp, "index": str(index)}
+
+
+def _setup_chroma(scale: str) -> Dict[str, Any]:
+    tmp = Path(tempfile.mkdtemp(prefix="bench-chroma-"))
+    chroma_pipeline.build_chroma_index(make_corpus(CORPUS_DOCS[scale]), persist_dir=tmp / "chroma")
+    return {"tmp": tmp, "persist_dir": tmp / "chroma"}
+
+
+def _cleanup(state: Dict[str, Any]) -> None:
+    shutil.rmtree(state["tmp"], ignore_errors=True)
+
+
+def _keyword_search(state: Dict[str, Any]) -> None:
+    # Includes loading the JSON index, as every call in the runners does
+    assert rag_pipeline.fetch_top_k(QUERY, k=TOP_K, index_path=state["index"])
+
+
+def _chroma_search(state: Dict[str, Any]) -> None:
+    assert chroma_pipeline.fetch_top_k(QUERY, k=TOP_K, persist_dir=state["persist_dir"])
+
+
+register(
+    "retrieval.keyword_search",
+    _keyword_search,
+    setup=_setup_index,
+    teardown=_cleanup,
+    rounds=10,
+)
+register(
+    "retrieval.chroma",
+    _chroma_search,
+    setup=_setup_chroma,
+    teardown=_cleanup,
+    rounds=10,
+    available=chroma_pipeline._CHROMA_AVAILABLE,
+)
@@ -0,0 +1,79 @@
+"""
+End-to-end review runs: the batch pipeline (collect → prompt → model →
+post) against a mock client with injected latency, plus the per-call
+overhead of AIClient.send_prompt (retries, metrics, tracing).
+
+The mock is priced like a mid-tier model so prompt growth shows up as a
+cost regression, not only as latency.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict
+
+from ai.runners import run_review
+from ai.runners.clients.base_client import MockAIClient
+from ai.runners.clients.fault_injection import Distribution, FaultConfig
+from benchmarks.harness import register
+from benchmarks.synthetic import (
+    PricedMockClient,
+    SyntheticCollector,
+    make_patches,
+    restore_log_root,
+    use_scratch_log_root,
+)
+
+PIPELINE = {
+    # scale: (PRs, files per PR, collect latency, model latency)
+    "quick": (8, 20, 0.01, 0.05),
+    "full": (40, 50, 0.05, 0.25),
+}
+CONCURRENCY = 4
+SEND_PROMPT_CALLS = 200
+
+
+def _setup_pipeline(scale: str) -> Dict[str, Any]:
+    prs, files, collect_latency, model_latency = PIPELINE[scale]
+    state = use_scratch_log_root()
+    state.update(
+        prs=list(range(1, prs + 1)),
+        collector=SyntheticCollector(make_patches(files), collect_latency),
+        client=PricedMockClient(
+            response_text="Looks good. " * 100,
+            faults=FaultConfig(latency=Distribution.fixed(model_latency)),
+        ),
+    )
+    return state
+
+
+def _pipeline(state: Dict[str, Any]) -> Dict[str, float]:
+    # dry_run skips the budget ledger and comment posting
+    report = asyncio.run(
+        run_review.run_pipeline(
+            state["prs"], "claude", state["collector"], state["client"],
+            concurrency=CONCURRENCY, dry_run=True,
+        )
+    )
+    if report.succeeded != report.total:
+        raise RuntimeError(f"pipeline benchmark failed: {report.format()}")
+    return {"cost_usd": report.cost_usd, "total_tokens": report.total_tokens}
+
+
+def _send_prompt(client: MockAIClient) -> None:
+    for _ in range(SEND_PROMPT_CALLS):
+        client.send_prompt("Review this change")
+
+
+register(
+    "review.pipeline[dry_run]",
+    _pipeline,
+    setup=_setup_pipeline,
+    teardown=restore_log_root,
+    rounds=3,
+)
+register(
+    f"review.send_prompt_overhead[calls={SEND_PROMPT_CALLS}]",
+    _send_prompt,
+    setup=lambda scale: MockAIClient(),
+    rounds=10,
+)
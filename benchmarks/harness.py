@@ -0,0 +1,249 @@
+"""
+Minimal benchmark harness: registry, timing, JSON baselines and comparison.
+
+A benchmark is a ``setup(scale) -> state`` function run once and a
+``run(state)`` function timed over several rounds. ``run`` may return a
+dict of extra metrics (e.g. ``{"cost_usd": 0.12}``) that are stored next
+to the timings and compared against the baseline like them — higher is
+worse for every metric.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+SCALES = ("quick", "full")
+DEFAULT_ROUNDS = 5
+DEFAULT_THRESHOLD = 0.25  # relative slowdown that counts as a regression
+# Timing stat compared against the baseline: noise on shared CI runners
+# only ever adds time, so the fastest round is the most repeatable
+COMPARE_STAT = "min"
+FORMAT_VERSION = 1
+
+
+@dataclass
+class Benchmark:
+    """A registered benchmark."""
+    name: str
+    run: Callable[[Any], Optional[Dict[str, float]]]
+    setup: Optional[Callable[[str], Any]] = None
+    teardown: Optional[Callable[[Any], None]] = None
+    rounds: int = DEFAULT_ROUNDS
+    warmup: int = 1
+    available: bool = True  # False when an optional dependency is missing
+
+
+REGISTRY: Dict[str, Benchmark] = {}
+
+
+def register(
+    name: str,
+    run: Callable[[Any], Optional[Dict[str, float]]],
+    *,
+    setup: Optional[Callable[[str], Any]] = None,
+    teardown: Optional[Callable[[Any], None]] = None,
+    rounds: int = DEFAULT_ROUNDS,
+    warmup: int = 1,
+    available: bool = True,
+) -> Benchmark:
+    """Add a benchmark to the registry (names must be unique)."""
+    if name in REGISTRY:
+        raise ValueError(f"benchmark {name!r} already registered")
+    bench = Benchmark(name, run, setup, teardown, rounds, warmup, available)
+    REGISTRY[name] = bench
+    return bench
+
+
+@dataclass
+class Result:
+    """Timings (seconds) and extra metrics of one benchmark."""
+    name: str
+    rounds: int
+    timings: Dict[str, float] = field(default_factory=dict)
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"rounds": self.rounds, "timings": self.timings, "metrics": self.metrics}
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "Result":
+        return cls(name, data["rounds"], dict(data["timings"]), dict(data.get("metrics", {})))
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summary statistics of per-round durations."""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[p95_index],
+        "max": ordered[-1],
+        "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+    }
+
+
+def measure(bench: Benchmark, scale: str = "full", rounds: Optional[int] = None) -> Result:
+    """Run one benchmark: setup once, warm up, then time each round."""
+    rounds = rounds or bench.rounds
+    state = bench.setup(scale) if bench.setup else None
+    try:
+        for _ in range(bench.warmup):
+            bench.run(state)
+        samples: List[float] = []
+        metrics: Dict[str, float] = {}
+        for _ in range(rounds):
+            # Collect garbage from the previous round outside the timed region
+            gc.collect()
+            started = time.perf_counter()
+            extra = bench.run(state)
+            samples.append(time.perf_counter() - started)
+            if extra:
+                metrics = dict(extra)
+    finally:
+        if bench.teardown:
+            bench.teardown(state)
+    return Result(bench.name, rounds, summarize(samples), metrics)
+
+
+def select(patterns: Iterable[str] = ()) -> List[Benchmark]:
+    """Registered benchmarks whose name contains any of ``patterns`` (all if none)."""
+    patterns = list(patterns)
+    return [
+        bench for name, bench in sorted(REGISTRY.items())
+        if not patterns or any(p in name for p in patterns)
+    ]
+
+
+def environment() -> Dict[str, str]:
+    """Machine description stored with results; timings only compare on like hardware."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def write_results(path: Path, results: List[Result], scale: str) -> Path:
+    """Write results as a JSON document (the baseline format)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = {
+        "version": FORMAT_VERSION,
+        "scale": scale,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "benchmarks": {r.name: r.to_dict() for r in results},
+    }
+    path.write_text(json.dumps(doc, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return path
+
+
+def read_results(path: Path) -> Dict[str, Any]:
+    """Load a results/baseline document; ``benchmarks`` maps names to Results."""
+    doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    if doc.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported results version {doc.get('version')!r}")
+    doc["benchmarks"] = {
+        name: Result.from_dict(name, data) for name, data in doc["benchmarks"].items()
+    }
+    return doc
+
+
+@dataclass
+class Comparison:
+    """One metric of one benchmark compared with its baseline."""
+    name: str
+    metric: str
+    baseline: Optional[float]
+    current: Optional[float]
+    status: str  # ok | regression | improved | new | missing
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if not self.baseline or self.current is None:
+            return None
+        return self.current / self.baseline
+
+
+def _classify(baseline: float, current: float, threshold: float) -> str:
+    if baseline <= 0:
+        return "regression" if current > 0 else "ok"
+    ratio = current / baseline
+    if ratio > 1 + threshold:
+        return "regression"
+    if ratio < 1 - threshold:
+        return "improved"
+    return "ok"
+
+
+def compare(
+    current: Dict[str, Result],
+    baseline: Dict[str, Result],
+    threshold: float = DEFAULT_THRESHOLD,
+    cost_threshold: float = 0.0,
+) -> List[Comparison]:
+    """
+    Compare current results against a baseline.
+
+    Timings use ``threshold`` (relative, to absorb machine noise); extra
+    metrics such as cost are deterministic, so any increase above
+    ``cost_threshold`` is a regression.
+    """
+    comparisons: List[Comparison] = []
+    for name in sorted(set(current) | set(baseline)):
+        cur, base = current.get(name), baseline.get(name)
+        if base is None:
+            comparisons.append(Comparison(name, COMPARE_STAT, None, cur.timings[COMPARE_STAT], "new"))
+            continue
+        if cur is None:
+            comparisons.append(Comparison(name, COMPARE_STAT, base.timings[COMPARE_STAT], None, "missing"))
+            continue
+        b, c = base.timings[COMPARE_STAT], cur.timings[COMPARE_STAT]
+        comparisons.append(Comparison(name, COMPARE_STAT, b, c, _classify(b, c, threshold)))
+        for metric in sorted(set(cur.metrics) | set(base.metrics)):
+            b, c = base.metrics.get(metric), cur.metrics.get(metric)
+            if b is None or c is None:
+                status = "new" if b is None else "missing"
+            else:
+                status = _classify(b, c, cost_threshold)
+            comparisons.append(Comparison(name, metric, b, c, status))
+    return comparisons
+
+
+def _fmt(metric: str, value: Optional[float]) -> str:
+    if value is None:
+        return "—"
+    if metric == COMPARE_STAT:
+        return f"{value * 1000:.2f}ms" if value < 1 else f"{value:.3f}s"
+    return f"{value:.6g}"
+
+
+def format_report(comparisons: List[Comparison]) -> str:
+    """Markdown table of comparisons, regressions first."""
+    icons = {"regression": "❌", "improved": "✅", "ok": "·", "new": "🆕", "missing": "⚠️"}
+    order = {"regression": 0, "missing": 1, "improved": 2, "new": 3, "ok": 4}
+    lines = [
+        "| | Benchmark | Metric | Baseline | Current | Change |",
+        "|---|---|---|---|---|---|",
+    ]
+    for c in sorted(comparisons, key=lambda c: (order[c.status], c.name, c.metric)):
+        change = f"{(c.ratio - 1) * 100:+.1f}%" if c.ratio is not None else c.status
+        lines.append(
+            f"| {icons[c.status]} | {c.name} | {c.metric} | "
+            f"{_fmt(c.metric, c.baseline)} | {_fmt(c.metric, c.current)} | {change} |"
+        )
+    regressions = sum(c.status == "regression" for c in comparisons)
+    lines.append("")
+    lines.append(f"{regressions} regression(s) in {len({c.name for c in comparisons})} benchmark(s)")
+    return "\n".join(lines)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Offline load test of the batch review pipeline.
+
+Pushes synthetic PRs through run_review.run_pipeline against a
+MockAIClient with simulated latency, generation speed and injected
+faults, and reports throughput, tail latency, retries and failures:
+
+    python -m benchmarks.load_test --prs 200 --concurrency 8 \\
+        --latency lognormal:median=1,sigma=0.6 --tokens-per-second 80 \\
+        --rate-limit-rate 0.05 --connection-error-rate 0.02 --rpm 120
+
+Runs are dry runs (no budget ledger, nothing posted); audit events go to a
+scratch directory.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ai.runners import run_review
+from ai.runners.clients.base_client import ClientConfig
+from ai.runners.clients.circuit_breaker import reset_circuit_breakers
+from ai.runners.clients.fault_injection import Distribution, FaultConfig
+from ai.runners.clients.rate_limiter import reset_rate_limiters
+from benchmarks.synthetic import (
+    PricedMockClient,
+    SyntheticCollector,
+    make_patches,
+    restore_log_root,
+    use_scratch_log_root,
+)
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    summary = {
+        f"p{round(q * 100)}": ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+        for q in PERCENTILES
+    }
+    summary["max"] = ordered[-1]
+    return {k: round(v, 4) for k, v in summary.items()}
+
+
+def run_load_test(
+    prs: int,
+    faults: FaultConfig,
+    *,
+    concurrency: int = run_review.DEFAULT_CONCURRENCY,
+    config: Optional[ClientConfig] = None,
+    files_per_pr: int = 20,
+    collect_latency: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Review ``prs`` synthetic PRs through the pipeline and summarize the run.
+
+    Returns:
+        Dict with counts, wall time, throughput, model/job latency
+        percentiles (seconds), retries, injected faults and cost
+    """
+    # Shared per-provider state must not leak between runs
+    reset_circuit_breakers()
+    reset_rate_limiters()
+    client = PricedMockClient(response_text="Looks good. " * 50, faults=faults, config=config)
+    collector = SyntheticCollector(make_patches(files_per_pr), collect_latency)
+    jobs: List[run_review.ReviewJob] = []
+
+    state = use_scratch_log_root()
+    try:
+        report = asyncio.run(
+            run_review.run_pipeline(
+                list(range(1, prs + 1)), "claude", collector, client,
+                concurrency=concurrency, dry_run=True, on_job_done=jobs.append,
+            )
+        )
+    finally:
+        restore_log_root(state)
+
+    retries = [job.response.metadata["retry"] for job in jobs if job.response is not None]
+    errors: Dict[str, int] = {}
+    for job in jobs:
+        if job.status == "failed":
+            errors[job.error_message] = errors.get(job.error_message, 0) + 1
+    return {
+        "prs": report.total,
+        "succeeded": report.succeeded,
+        "failed": report.failed,
+        "wall_seconds": round(report.wall_seconds, 3),
+        "throughput_per_min": round(report.throughput_per_min, 1),
+        "model_latency_seconds": _percentiles([j.stage_seconds["model"] for j in jobs if "model" in j.stage_seconds]),
+        "job_latency_seconds": _percentiles([sum(j.stage_seconds.values()) for j in jobs]),
+        "attempts": sum(r["attempts"] for r in retries),
+        "retries": sum(r["retries"] for r in retries),
+        "retry_wait_seconds": round(sum(r["retry_wait_seconds"] for r in retries), 3),
+        "injected_faults": dict(faults.injected),
+        "errors": errors,
+        "total_tokens": report.total_tokens,
+        "cost_usd": report.cost_usd,
+    }
+
+
+def _format(result: Dict[str, Any]) -> str:
+    def latency(name: str) -> str:
+        values = result[name]
+        return " | ".join(f"{k} {v:.2f}s" for k, v in values.items()) or "—"
+
+    lines = [
+        "🔥 Load Test Report",
+        f"   PRs: {result['prs']} | ✅ {result['succeeded']} | ❌ {result['failed']}",
+        f"   Wall time: {result['wall_seconds']:.1f}s | Throughput: {result['throughput_per_min']:.1f} PRs/min",
+        f"   Model latency: {latency('model_latency_seconds')}",
+        f"   Job latency:   {latency('job_latency_seconds')}",
+        f"   Attempts: {result['attempts']} | Retries: {result['retries']} "
+        f"({result['retry_wait_seconds']:.1f}s waiting)",
+        f"   Injected faults: {result['injected_faults'] or 'none'}",
+        f"   Tokens: {result['total_tokens']:,} | Cost: ${result['cost_usd']:.4f}",
+    ]
+    for message, count in sorted(result["errors"].items(), key=lambda item: -item[1]):
+        lines.append(f"   ❌ {count}× {message}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the review pipeline against a fault-injecting mock client")
+    parser.add_argument("--prs", type=int, default=100, help="Synthetic PRs to review")
+    parser.add_argument("--concurrency", type=int, default=run_review.DEFAULT_CONCURRENCY, help="Pipeline workers per stage")
+    parser.add_argument("--files", type=int, default=20, help="Files per synthetic PR")
+    parser.add_argument("--collect-latency", type=float, default=0.05, help="Seconds to fetch each PR")
+    parser.add_argument(
+        "--latency",
+        type=Distribution.parse,
+        default=Distribution.lognormal(0.5, 0.5),
+        help="Time to first token, e.g. 1.5, uniform:0.5,2 or lognormal:median=1,sigma=0.6",
+    )
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="Output generation speed")
+    parser.add_argument(
+        "--output-tokens",
+        type=Distribution.parse,
+        default=None,
+        help="Completion length distribution (default: fixed by the mock response)",
+    )
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of attempts that get a 429")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-after seconds on injected 429s")
+    parser.add_argument("--connection-error-rate", type=float, default=0.0, help="Fraction of attempts that drop")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout seconds")
+    parser.add_argument("--max-retries", type=int, default=3, help="Retries per request")
+    parser.add_argument("--retry-delay", type=float, default=0.2, help="Base retry backoff seconds")
+    parser.add_argument("--rpm", type=int, default=None, help="Client requests-per-minute limit")
+    parser.add_argument("--tpm", type=int, default=None, help="Client tokens-per-minute limit")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible runs")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the result as JSON")
+    args = parser.parse_args()
+
+    faults = FaultConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        rate_limit_rate=args.rate_limit_rate,
+        connection_error_rate=args.connection_error_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    config = ClientConfig(
+        timeout=args.timeout,
+        max_retries=args.max_retries,
+        retry_delay=args.retry_delay,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+    )
+    print(f"🚀 {args.prs} PRs, concurrency {args.concurrency}, latency {args.latency}")
+    result = run_load_test(
+        args.prs,
+        faults,
+        concurrency=args.concurrency,
+        config=config,
+        files_per_pr=args.files,
+        collect_latency=args.collect_latency,
+    )
+    print(_format(result))
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+    return 0 if result["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
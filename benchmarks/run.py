@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Run the benchmark suite and compare against a JSON baseline.
+
+    python -m benchmarks.run --quick                    # run and compare
+    python -m benchmarks.run --quick --save-baseline    # record a baseline
+    python -m benchmarks.run --only prompt --rounds 3   # a subset
+
+Results are written to --output; when a baseline exists for the scale, a
+Markdown comparison report is printed (and written to --report), and the
+exit status is 1 if any benchmark regressed beyond --threshold.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+from benchmarks import bench_audit, bench_prompt, bench_retrieval, bench_review  # noqa: F401 (register)
+from benchmarks.harness import (
+    DEFAULT_THRESHOLD,
+    Result,
+    compare,
+    environment,
+    format_report,
+    measure,
+    read_results,
+    select,
+    write_results,
+)
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINE_DIR = BENCH_DIR / "baselines"
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run latency/cost benchmarks and report regressions")
+    parser.add_argument("--quick", action="store_true", help="Small inputs (CI smoke run)")
+    parser.add_argument("--only", action="append", default=[], help="Run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--rounds", type=int, default=None, help="Override timed rounds per benchmark")
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    parser.add_argument("--baseline", type=Path, default=None, help="Baseline JSON (default: baselines/<scale>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON (default: results/<scale>.json)")
+    parser.add_argument("--report", type=Path, default=None, help="Also write the Markdown report here")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Relative slowdown counted as a regression (default: {DEFAULT_THRESHOLD})",
+    )
+    args = parser.parse_args()
+
+    scale = "quick" if args.quick else "full"
+    benches = select(args.only)
+    if args.list:
+        for bench in benches:
+            print(f"{bench.name}{'' if bench.available else '  (unavailable)'}")
+        return 0
+
+    results: List[Result] = []
+    for bench in benches:
+        if not bench.available:
+            print(f"⏭️  {bench.name}: skipped (optional dependency missing)")
+            continue
+        result = measure(bench, scale, rounds=args.rounds)
+        timings = result.timings
+        extra = "  ".join(f"{k}={v:g}" for k, v in result.metrics.items())
+        print(
+            f"⏱️  {bench.name}: min {timings['min'] * 1000:.2f}ms "
+            f"(median {timings['median'] * 1000:.2f}ms, {result.rounds} rounds)  {extra}".rstrip()
+        )
+        results.append(result)
+
+    output = write_results(args.output or RESULTS_DIR / f"{scale}.json", results, scale)
+    print(f"\n💾 Results: {output}")
+
+    baseline_path = args.baseline or BASELINE_DIR / f"{scale}.json"
+    if args.save_baseline:
+        write_results(baseline_path, results, scale)
+        print(f"📌 Baseline saved: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"ℹ️  No baseline at {baseline_path}; run with --save-baseline to record one")
+        return 0
+
+    baseline = read_results(baseline_path)
+    if baseline["scale"] != scale:
+        print(f"⚠️  Baseline scale is {baseline['scale']!r}, this run is {scale!r}")
+    if baseline["environment"] != environment():
+        print("⚠️  Baseline was recorded on a different machine/Python; timings may not be comparable")
+    current = {r.name: r for r in results}
+    recorded = baseline["benchmarks"]
+    if args.only:
+        recorded = {name: r for name, r in recorded.items() if any(p in name for p in args.only)}
+
+    comparisons = compare(current, recorded, args.threshold)
+    report = format_report(comparisons)
+    print(f"\n## Benchmark comparison vs {baseline_path.name} ({baseline['created_at']})\n")
+    print(report)
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(report + "\n", encoding="utf-8")
+    return 1 if any(c.status == "regression" for c in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
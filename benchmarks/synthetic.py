@@ -0,0 +1,177 @@
+"""
+Deterministic synthetic inputs for the benchmarks: PRs, document corpora
+and audit logs. Everything is seeded so runs are comparable.
+"""
+from __future__ import annotations
+
+import json
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ai.runners.clients.base_client import MockAIClient
+from ai.utils import audit_logger
+from ai.utils.models import FileChange, PRInfo
+
+SEED = 1234
+WORDS = (
+    "review budget token latency cache retry circuit prompt model client "
+    "router shard hedge audit rollup sketch span metric ledger reservation "
+    "diff hunk patch context index query vector chunk document summary"
+).split()
+AGENTS = ("claude", "gemini", "perplexity", "gpt")
+STATUSES = ("success",) * 8 + ("failed", "partial")
+
+
+def make_patch(rng: random.Random, hunks: int = 2, lines_per_hunk: int = 30) -> str:
+    """A unified diff with ``hunks`` hunks of mixed context/added/removed lines."""
+    out: List[str] = []
+    start = 1
+    for _ in range(hunks):
+        out.append(f"@@ -{start},{lines_per_hunk} +{start},{lines_per_hunk} @@ def handler():")
+        for i in range(lines_per_hunk):
+            prefix = rng.choice(" +-") if i % 3 else " "
+            out.append(f"{prefix}    value_{i} = compute({rng.choice(WORDS)!r}, {i})")
+        start += lines_per_hunk * 3
+    return "\n".join(out)
+
+
+def make_patches(n_files: int, seed: int = SEED) -> List[str]:
+    rng = random.Random(seed)
+    return [make_patch(rng) for _ in range(n_files)]
+
+
+def make_pr_info(number: int, patches: List[str]) -> PRInfo:
+    """A PRInfo with one modified file per patch (fresh objects: no cached hunks)."""
+    files = [
+        FileChange(
+            filename=f"src/module_{i // 20}/file_{i}.py",
+            status=("modified", "added", "removed", "renamed")[i % 4],
+            additions=20,
+            deletions=10,
+            changes=30,
+            patch=patch,
+        )
+        for i, patch in enumerate(patches)
+    ]
+    now = datetime(2026, 1, 15, 12, 0, 0)
+    return PRInfo(
+        number=number,
+        title=f"Synthetic change #{number}",
+        description="Refactor the review pipeline.\n" * 10,
+        author="bench",
+        state="open",
+        created_at=now,
+        updated_at=now,
+        base_branch="main",
+        head_branch=f"bench/{number}",
+        base_sha="a" * 40,
+        head_sha="b" * 40,
+        files=files,
+        additions=20 * len(files),
+        deletions=10 * len(files),
+        changed_files=len(files),
+        html_url=f"https://github.com/example/repo/pull/{number}",
+    )
+
+
+class PricedMockClient(MockAIClient):
+    """MockAIClient that charges for tokens like a mid-tier model."""
+
+    COST_PER_1M_INPUT = 3.0
+    COST_PER_1M_OUTPUT = 15.0
+
+
+class SyntheticCollector:
+    """Stands in for PRCollector: returns synthetic PRs after a fixed delay."""
+
+    def __init__(self, patches: List[str], latency: float = 0.0):
+        self.patches = patches
+        self.latency = latency
+
+    def get_pr_info(self, pr_number: int) -> PRInfo:
+        time.sleep(self.latency)
+        return make_pr_info(pr_number, self.patches)
+
+
+def make_corpus(n_docs: int, words_per_doc: int = 400, seed: int = SEED) -> List[Dict[str, str]]:
+    """Documents shaped like the context7 index: ``{'path', 'content'}``."""
+    rng = random.Random(seed)
+    return [
+        {
+            "path": f"docs/section_{i // 50}/doc_{i}.md",
+            "content": " ".join(rng.choice(WORDS) for _ in range(words_per_doc)),
+        }
+        for i in range(n_docs)
+    ]
+
+
+def write_corpus_index(path: Path, docs: List[Dict[str, str]]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(docs, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def _event(rng: random.Random, i: int, day: str) -> Dict[str, Any]:
+    status = rng.choice(STATUSES)
+    input_tokens = rng.randint(500, 20_000)
+    output_tokens = rng.randint(100, 3_000)
+    model_seconds = round(rng.lognormvariate(1.0, 0.5), 3)
+    seconds = i % 86_400
+    return {
+        "event_id": f"bench-{i:08d}",
+        "timestamp": f"{day}T{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}.000000+00:00",
+        "agent": AGENTS[i % len(AGENTS)],
+        "pr_number": rng.randint(1, 5_000),
+        "status": status,
+        "decision_reason": "batch_review",
+        "tokens": {"input": input_tokens, "output": output_tokens, "total": input_tokens + output_tokens},
+        "cost_usd": round((input_tokens * 3 + output_tokens * 15) / 1e6, 6),
+        "error_type": "model_failed" if status == "failed" else "",
+        "error_message": "",
+        "tags": ["bench"],
+        "metadata": {
+            "stage_seconds": {
+                "collect": round(rng.uniform(0.1, 1.5), 3),
+                "prompt": round(rng.uniform(0.001, 0.05), 4),
+                "model": model_seconds,
+                "post": round(rng.uniform(0.1, 0.8), 3),
+            },
+        },
+    }
+
+
+def write_audit_day(root: Path, day: str, n_events: int, seed: int = SEED) -> Path:
+    """Write ``n_events`` events to ``root/day/events.jsonl`` (streamed, constant memory)."""
+    rng = random.Random(seed)
+    path = root / day / "events.jsonl"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        batch: List[str] = []
+        for i in range(n_events):
+            batch.append(json.dumps(_event(rng, i, day)))
+            if len(batch) >= 10_000:
+                handle.write("\n".join(batch) + "\n")
+                batch.clear()
+        if batch:
+            handle.write("\n".join(batch) + "\n")
+    return path
+
+
+def use_scratch_log_root() -> Dict[str, Any]:
+    """Point the audit logger at a new temporary directory; returns benchmark state."""
+    audit_logger.flush_events()
+    state = {"tmp": Path(tempfile.mkdtemp(prefix="bench-logs-")), "previous_root": audit_logger.LOG_ROOT}
+    audit_logger.LOG_ROOT = state["tmp"]
+    return state
+
+
+def restore_log_root(state: Dict[str, Any]) -> None:
+    """Undo use_scratch_log_root and delete the directory."""
+    audit_logger.flush_events()
+    audit_logger.LOG_ROOT = state["previous_root"]
+    shutil.rmtree(state["tmp"], ignore_errors=True)
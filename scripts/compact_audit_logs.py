@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Compact closed days of audit logs into column files for fast queries.
+
+By default every day before today (UTC) that has no up-to-date compaction
+is compacted. The JSONL files are left in place.
+"""
+from __future__ import annotations
+
+import argparse
+
+from ai.utils.audit_logger import compact_closed_days, compact_day
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact audit logs into columnar storage")
+    parser.add_argument(
+        "--day",
+        default=None,
+        help="Compact only this UTC day (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompact even if the existing compaction is up to date",
+    )
+    args = parser.parse_args()
+
+    if args.day:
+        days = [args.day] if compact_day(args.day, force=args.force) else []
+    else:
+        days = compact_closed_days(force=args.force)
+
+    if days:
+        print(f"Compacted {len(days)} day(s): {', '.join(days)}")
+    else:
+        print("Nothing to compact")
+
+
+if __name__ == "__main__":
+    main()
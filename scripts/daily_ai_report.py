@@ -1,14 +1,16 @@
 #!/usr/bin/env python3
 """
 Generate daily AI observability summary from audit logs.
+
+With --start/--end, summarizes a range of days; with --month, a whole
+UTC month. Both read the incremental rollups kept by the audit logger.
 """
 from __future__ import annotations
 
 import argparse
 import json
-from pathlib import Path
 
-from ai.utils.audit_logger import build_daily_summary
+from ai.utils.audit_logger import LOG_ROOT, build_daily_summary, build_monthly_summary, build_summary
 
 
 def main() -> None:
@@ -18,16 +20,39 @@ def main() -> None:
         default=None,
         help="UTC day in YYYY-MM-DD format (default: today UTC)",
     )
+    parser.add_argument(
+        "--start",
+        default=None,
+        help="First UTC day of a range (YYYY-MM-DD); overrides --day",
+    )
+    parser.add_argument(
+        "--end",
+        default=None,
+        help="Last UTC day of the range (default: --start)",
+    )
+    parser.add_argument(
+        "--month",
+        default=None,
+        help="UTC month in YYYY-MM format; overrides --day and --start",
+    )
     args = parser.parse_args()
 
-    summary = build_daily_summary(day=args.day)
-    day = summary["day"]
-    out_dir = Path("ai/logs") / day
+    if args.month:
+        summary = build_monthly_summary(args.month)
+        out_dir = LOG_ROOT / "months"
+        out_file = out_dir / f"summary_{summary['month']}.json"
+    elif args.start:
+        summary = build_summary(args.start, args.end)
+        out_dir = LOG_ROOT / summary["end_day"]
+        out_file = out_dir / f"summary_{summary['start_day']}_{summary['end_day']}.json"
+    else:
+        summary = build_daily_summary(day=args.day)
+        out_dir = LOG_ROOT / summary["day"]
+        out_file = out_dir / "daily_summary.json"
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / "daily_summary.json"
     out_file.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    print(f"Daily summary written: {out_file}")
+    print(f"Summary written: {out_file}")
     print(json.dumps(summary, ensure_ascii=False, indent=2))
 
 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Print traces from an OTLP/JSON trace file as span trees.
+
+Each span shows its duration and offset from the trace start; spans on
+the critical path (the chain that bounded the root's end time) are marked
+with '*'.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Any, Dict, List
+
+from ai.utils.tracing import STATUS_ERROR, TRACE_FILE_ENV, critical_path, read_trace_file
+
+DEFAULT_TRACE_FILE = "ai/logs/traces.jsonl"
+
+
+def _print_tree(span: Dict[str, Any], children: Dict[str, List[Dict[str, Any]]], critical: set, origin: int, depth: int) -> None:
+    duration_ms = (span["end_ns"] - span["start_ns"]) / 1e6
+    offset_ms = (span["start_ns"] - origin) / 1e6
+    mark = "*" if span["span_id"] in critical else " "
+    error = " ERROR" if span["status"] == STATUS_ERROR else ""
+    print(f"{mark} {'  ' * depth}{span['name']}  {duration_ms:.1f}ms  (+{offset_ms:.1f}ms){error}")
+    for child in sorted(children.get(span["span_id"], []), key=lambda s: s["start_ns"]):
+        _print_tree(child, children, critical, origin, depth + 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show span trees and critical paths from a trace file")
+    parser.add_argument(
+        "path",
+        nargs="?",
+        default=os.getenv(TRACE_FILE_ENV, DEFAULT_TRACE_FILE),
+        help=f"OTLP/JSON Lines trace file (default: ${TRACE_FILE_ENV} or {DEFAULT_TRACE_FILE})",
+    )
+    parser.add_argument(
+        "--trace-id",
+        default=None,
+        help="Only show this trace",
+    )
+    args = parser.parse_args()
+
+    spans = read_trace_file(args.path)
+    if args.trace_id:
+        spans = [span for span in spans if span["trace_id"] == args.trace_id]
+
+    ids = {span["span_id"] for span in spans}
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    roots = []
+    for span in spans:
+        if span["parent_id"] in ids:
+            children.setdefault(span["parent_id"], []).append(span)
+        else:
+            roots.append(span)  # includes spans whose parent is in another process
+
+    for root in sorted(roots, key=lambda s: s["start_ns"]):
+        trace_spans = [span for span in spans if span["trace_id"] == root["trace_id"]]
+        path = critical_path(trace_spans, root["span_id"])
+        print(f"Trace {root['trace_id']}")
+        _print_tree(root, children, {span["span_id"] for span in path}, root["start_ns"], 0)
+        print("  Critical path: " + " → ".join(span["name"] for span in path))
+        print()
+
+
+if __name__ == "__main__":
+    main()
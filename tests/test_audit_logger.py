@@ -2,7 +2,12 @@
 Unit tests for audit logger utilities.
 """
 from pathlib import Path
+import json
 import shutil
+import threading
+import time
+
+import pytest
 
 from ai.utils import audit_logger
 
@@ -69,3 +74,274 @@ def test_build_daily_summary(monkeypatch):
     assert summary["success_count"] == 1
     assert summary["failed_count"] == 1
     assert "claude" in summary["agents"]
+
+
+def test_sink_batches_by_size(tmp_path):
+    sink = audit_logger.AuditSink(batch_size=3, interval=60)
+    path = tmp_path / "events.jsonl"
+    try:
+        sink.submit(path, '{"n": 1}')
+        sink.submit(path, '{"n": 2}')
+        assert path.exists()
+        assert path.read_text() == ""
+
+        sink.submit(path, '{"n": 3}')
+        deadline = time.monotonic() + 2
+        while path.read_text().count("\n") < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [json.loads(line)["n"] for line in path.read_text().splitlines()] == [1, 2, 3]
+    finally:
+        sink.close()
+
+
+def test_sink_drains_on_close(tmp_path):
+    sink = audit_logger.AuditSink(batch_size=1000, interval=60)
+    path = tmp_path / "events.jsonl"
+    sink.submit(path, '{"n": 1}')
+    sink.close()
+    assert path.read_text() == '{"n": 1}\n'
+
+    # Late events after shutdown are still written
+    sink.submit(path, '{"n": 2}')
+    assert path.read_text().count("\n") == 2
+
+
+def test_failed_write_keeps_events_and_surfaces_errors(tmp_path):
+
+    class FlakySink(audit_logger.AuditSink):
+        failures = 1
+
+        def _write(self, fd, path, data, events):
+            if self.failures:
+                self.failures -= 1
+                raise OSError(28, "No space left on device")
+            super()._write(fd, path, data, events)
+
+    sink = FlakySink(batch_size=1000, interval=60, max_buffered=3)
+    path = tmp_path / "events.jsonl"
+    try:
+        sink.submit(path, '{"n": 1}')
+        sink.submit(path, '{"n": 2}')
+        with pytest.raises(OSError):
+            sink.flush()
+        assert path.read_text() == ""
+
+        # While failing, submit writes synchronously: this one succeeds and drains the buffer
+        sink.submit(path, '{"n": 3}')
+        assert [json.loads(line)["n"] for line in path.read_text().splitlines()] == [1, 2, 3]
+
+        sink.failures = 1
+        for n in range(4, 9):
+            sink.submit(path, json.dumps({"n": n}))
+        with pytest.raises(OSError):
+            sink.flush()
+        sink.flush()
+        # Only the newest max_buffered events survive a long outage
+        assert [json.loads(line)["n"] for line in path.read_text().splitlines()] == [1, 2, 3, 6, 7, 8]
+    finally:
+        sink.close()
+
+
+def test_concurrent_writers_do_not_interleave(tmp_path):
+    sink = audit_logger.AuditSink(batch_size=7, interval=0.01)
+    path = tmp_path / "events.jsonl"
+
+    def write(worker):
+        for i in range(100):
+            sink.submit(path, json.dumps({"worker": worker, "i": i, "pad": "x" * 200}))
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.close()
+
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(rows) == 800
+    for worker in range(8):
+        assert [r["i"] for r in rows if r["worker"] == worker] == list(range(100))
+
+
+def _write_day(root: Path, day: str, events) -> None:
+    day_dir = root / day
+    day_dir.mkdir(parents=True, exist_ok=True)
+    with (day_dir / "events.jsonl").open("w", encoding="utf-8") as handle:
+        for event in events:
+            handle.write(json.dumps(event) + "\n")
+        handle.write("\n")
+
+
+def test_summary_over_day_range(monkeypatch):
+    tmp_root = _workspace_tmp_dir("audit_case_range")
+    monkeypatch.setattr(audit_logger, "LOG_ROOT", tmp_root)
+    for offset, day in enumerate(("2026-03-01", "2026-03-03")):
+        _write_day(tmp_root, day, [
+            {
+                "agent": "claude" if i % 2 else "gpt",
+                "status": "success" if i % 5 else "failed",
+                "tokens": {"total": 10},
+                "cost_usd": 0.01,
+                "metadata": {"latency_seconds": (i + 1) / 10 + offset},
+            }
+            for i in range(100)
+        ])
+
+    assert list(audit_logger.day_range("2026-03-01", "2026-03-03")) == ["2026-03-01", "2026-03-02", "2026-03-03"]
+    summary = audit_logger.build_summary("2026-03-01", "2026-03-03")
+
+    assert summary["days"] == 3
+    assert summary["event_count"] == 200
+    assert summary["failed_count"] == 40
+    assert summary["total_cost_usd"] == 2.0
+    assert summary["agents"]["claude"]["event_count"] == 100
+    assert summary["agents"]["gpt"]["total_tokens"] == 1000
+    latency = summary["latency_seconds"]
+    assert latency["count"] == 200
+    assert 5.0 <= latency["p50"] <= 11.0
+    assert latency["p99"] == pytest.approx(10.9, rel=0.02)
+    assert summary["cost_per_event_usd"]["p95"] == pytest.approx(0.01, rel=0.02)
+
+
+def test_iter_events_streams(monkeypatch):
+    tmp_root = _workspace_tmp_dir("audit_case_stream")
+    monkeypatch.setattr(audit_logger, "LOG_ROOT", tmp_root)
+    _write_day(tmp_root, "2026-03-01", [{"n": i} for i in range(3)])
+
+    events = audit_logger.iter_events("2026-03-01")
+    assert next(events) == {"n": 0}
+    assert [e["n"] for e in events] == [1, 2]
+    assert list(audit_logger.iter_events("2026-03-02")) == []
+
+
+def _seed_days(root: Path, days, per_day: int = 50) -> None:
+    for d, day in enumerate(days):
+        _write_day(root, day, [
+            {
+                "timestamp": f"{day}T12:00:{i % 60:02d}+00:00",
+                "agent": ("claude", "gpt", "gemini")[i % 3],
+                "pr_number": 100 * d + i % 10,
+                "status": "failed" if i % 7 == 0 else "success",
+                "tokens": {"input": 5, "output": 5, "total": 10},
+                "cost_usd": 0.001 * (i + 1),
+                "metadata": {"latency_seconds": 1.5} if i % 2 else {},
+            }
+            for i in range(per_day)
+        ])
+
+
+def test_compacted_query_matches_jsonl_scan(monkeypatch):
+    tmp_root = _workspace_tmp_dir("audit_case_columns")
+    monkeypatch.setattr(audit_logger, "LOG_ROOT", tmp_root)
+    days = ["2026-02-01", "2026-02-02", "2026-02-03"]
+    _seed_days(tmp_root, days)
+
+    filters = [
+        {},
+        {"agent": "claude"},
+        {"agent": ["gpt", "gemini"], "status": "failed"},
+        {"pr_number": 103},
+        {"pr_number": {5, 205}, "agent": "claude"},
+    ]
+    scanned = [audit_logger.query_events(days[0], days[-1], **f) for f in filters]
+
+    assert audit_logger.compact_closed_days() == days
+    assert audit_logger.compact_closed_days() == []  # already up to date
+    assert (tmp_root / days[0] / "columns" / "meta.json").exists()
+
+    for f, expected in zip(filters, scanned):
+        assert audit_logger.query_events(days[0], days[-1], **f) == expected
+    assert len(scanned[1]) == 51
+    assert all(row["latency_seconds"] in (None, 1.5) for row in scanned[0])
+
+
+def test_query_pushdown_and_projection(monkeypatch):
+    tmp_root = _workspace_tmp_dir("audit_case_pushdown")
+    monkeypatch.setattr(audit_logger, "LOG_ROOT", tmp_root)
+    _seed_days(tmp_root, ["2026-02-01"])
+    audit_logger.compact_day("2026-02-01")
+
+    store = audit_logger.ColumnarDay.open(tmp_root / "2026-02-01")
+    assert store.meta["stats"]["pr_number"] == {"min": 0, "max": 9}
+    assert not store.may_match(agent="perplexity")
+    assert not store.may_match(pr_number=42)
+
+    rows = audit_logger.query_events("2026-02-01", agent="gpt", columns=["pr_number", "cost_usd"])
+    assert rows[0] == {"pr_number": 1, "cost_usd": 0.002}
+    with pytest.raises(ValueError):
+        audit_logger.query_events("2026-02-01", columns=["nope"])
+
+
+def test_stale_compaction_falls_back_to_jsonl(monkeypatch):
+    tmp_root = _workspace_tmp_dir("audit_case_stale")
+    monkeypatch.setattr(audit_logger, "LOG_ROOT", tmp_root)
+    _seed_days(tmp_root, ["2026-02-01"], per_day=3)
+    audit_logger.compact_day("2026-02-01")
+
+    with (tmp_root / "2026-02-01" / "events.jsonl").open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"agent": "claude", "pr_number": 7, "status": "success"}) + "\n")
+
+    assert len(audit_logger.query_events("2026-02-01")) == 4
+    assert audit_logger.compact_day("2026-02-01") is True
+    assert len(audit_logger.query_events("2026-02-01")) == 4
+
+
+def test_rollups_updated_on_flush(monkeypatch):
+    tmp_root = _workspace_tmp_dir("audit_case_rollup")
+    monkeypatch.setattr(audit_logger, "LOG_ROOT", tmp_root / "logs")
+
+    for i in range(3):
+        path = audit_logger.log_ai_event(
+            agent="claude" if i else "gpt",
+            pr_number=i,
+            status="success",
+            decision_reason="ok",
+            total_tokens=10,
+            cost_usd=0.01,
+            metadata={"latency_seconds": 1.0 + i},
+        )
+    audit_logger.flush_events()
+    day = path.parent.name
+
+    day_state = json.loads((path.parent / "rollup.json").read_text())
+    assert day_state["sources"] == {day: path.stat().st_size}
+    assert day_state["totals"]["event_count"] == 3
+    assert day_state["agents"]["claude"]["total_tokens"] == 20
+    month_state = json.loads((tmp_root / "logs" / "months" / f"{day[:7]}.json").read_text())
+    assert month_state["totals"]["event_count"] == 3
+
+    summary = audit_logger.build_daily_summary(day)
+    assert summary["event_count"] == 3
+    assert summary["total_cost_usd"] == 0.03
+    assert summary["latency_seconds"]["max"] == 3.0
+
+
+def test_stale_rollup_is_rebuilt(monkeypatch):
+    tmp_root = _workspace_tmp_dir("audit_case_rollup_stale")
+    monkeypatch.setattr(audit_logger, "LOG_ROOT", tmp_root)
+    _seed_days(tmp_root, ["2026-04-01"], per_day=10)
+    assert audit_logger.day_rollup("2026-04-01").totals.event_count == 10
+
+    # Events appended by another tool, bypassing the sink
+    with (tmp_root / "2026-04-01" / "events.jsonl").open("a") as handle:
+        handle.write(json.dumps({"agent": "gpt", "status": "failed"}) + "\n")
+    rollup = audit_logger.day_rollup("2026-04-01")
+    assert rollup.totals.event_count == 11
+    assert rollup.agents["gpt"].failed_count == 2  # seeded i=7 plus the new one
+
+
+def test_monthly_summary_matches_streaming(monkeypatch):
+    tmp_root = _workspace_tmp_dir("audit_case_rollup_month")
+    monkeypatch.setattr(audit_logger, "LOG_ROOT", tmp_root)
+    days = ["2026-02-01", "2026-02-14", "2026-02-28"]
+    _seed_days(tmp_root, days)
+
+    monthly = audit_logger.build_monthly_summary("2026-02")
+    assert (monthly["start_day"], monthly["end_day"], monthly["days"]) == ("2026-02-01", "2026-02-28", 28)
+    ranged = audit_logger.build_summary("2026-02-01", "2026-02-28")
+    for key in ("event_count", "failed_count", "total_cost_usd", "latency_seconds", "agents"):
+        assert monthly[key] == ranged[key]
+
+    streamed = [e for day in days for e in audit_logger.iter_events(day)]
+    assert monthly["event_count"] == len(streamed)
+    assert monthly["total_cost_usd"] == round(sum(e["cost_usd"] for e in streamed), 6)
@@ -2,6 +2,7 @@
 """
 Unit tests for AI Client Base.
 """
+import json
 import pytest
 from unittest.mock import Mock, patch
 import time
@@ -14,6 +15,7 @@ from ai.runners.clients.base_client import (
     APIKeyMissingError,
     RateLimitError,
     APIConnectionError,
+    BatchError,
 )
 from ai.utils.models import AIResponse
 
@@ -102,6 +104,20 @@ class TestAIClientBase:
         expected = (1000 / 1_000_000 * 3.0) + (500 / 1_000_000 * 15.0)
         assert cost == pytest.approx(expected, rel=1e-6)
 
+    def test_calculate_cost_with_cache_tokens(self):
+        """Cached input tokens are billed at the cache multipliers."""
+        client = MockAIClient()
+        client.COST_PER_1M_INPUT = 3.0
+        client.COST_PER_1M_OUTPUT = 15.0
+        client.CACHE_READ_MULTIPLIER = 0.1
+        client.CACHE_WRITE_MULTIPLIER = 1.25
+
+        # 1000 input tokens, of which 600 read from cache and 200 written to it
+        cost = client.calculate_cost(1000, 500, cache_read_tokens=600, cache_write_tokens=200)
+        expected = (200 * 3.0 + 600 * 3.0 * 0.1 + 200 * 3.0 * 1.25 + 500 * 15.0) / 1_000_000
+        assert cost == pytest.approx(expected, rel=1e-6)
+        assert cost < client.calculate_cost(1000, 500)
+
     def test_estimate_tokens(self):
         """Test token estimation."""
         client = MockAIClient()
@@ -227,6 +243,72 @@ class TestRetryLogic:
         assert client.attempt_count == 1
 
 
+class TestLeanResponse:
+    """AIResponse stays compact unless raw capture is enabled."""
+
+    def test_raw_response_not_retained_by_default(self):
+        response = MockAIClient().send_prompt("Test")
+        assert 'raw_response' not in response.metadata
+        assert not hasattr(response, '__dict__')
+
+    def test_raw_capture_is_size_capped(self):
+        config = ClientConfig(capture_raw_response=True, raw_response_max_bytes=32)
+        response = MockAIClient(response_text="x" * 500, config=config).send_prompt("Test")
+        raw = response.metadata['raw_response']
+        assert isinstance(raw, str)
+        assert raw.startswith('{"content": "xxx')
+        assert "[truncated" in raw
+
+    def test_json_round_trip(self):
+        response = MockAIClient(response_text="LGTM").send_prompt("Test")
+        restored = AIResponse.from_dict(json.loads(response.to_json()))
+        assert restored == response
+
+
+class TestBatchAPI:
+    """Test provider batch submission against the mock batch endpoint."""
+
+    def test_batch_discount(self):
+        client = MockAIClient()
+        client.COST_PER_1M_INPUT = 3.0
+        client.COST_PER_1M_OUTPUT = 15.0
+        interactive = client.calculate_cost(1000, 500)
+        assert client.calculate_cost(1000, 500, batch=True) == pytest.approx(interactive * 0.5)
+        assert client.get_cost_estimate("x" * 400, 500, batch=True) < client.get_cost_estimate("x" * 400, 500)
+
+    def test_run_batch_polls_until_finished(self):
+        client = MockAIClient(response_text="batched", batch_polls=3)
+        assert client.supports_batch()
+
+        responses = client.run_batch({"pr-1": "first", "pr-2": "second"}, poll_interval=0)
+
+        assert set(responses) == {"pr-1", "pr-2"}
+        assert all(r.success and r.content == "batched" for r in responses.values())
+        assert responses["pr-1"].metadata['batch_id'] == "mock_batch_1"
+        assert client.batches["mock_batch_1"]['polls_left'] == 0
+
+    def test_missing_results_are_failed_responses(self):
+        client = MockAIClient()
+        batch_id = client.submit_batch({"pr-1": "first", "pr-2": "second"})
+        client.batches[batch_id]['prompts'].pop("pr-2")
+
+        responses = client.wait_for_batch(batch_id, poll_interval=0)
+
+        assert responses["pr-1"].success
+        assert not responses["pr-2"].success
+        assert responses["pr-2"].cost_usd == 0.0
+
+    def test_batch_timeout(self):
+        client = MockAIClient(batch_polls=100)
+        batch_id = client.submit_batch({"pr-1": "first"})
+        with pytest.raises(BatchError):
+            client.wait_for_batch(batch_id, poll_interval=0, timeout=0)
+
+    def test_empty_batch_rejected(self):
+        with pytest.raises(BatchError):
+            MockAIClient().submit_batch({})
+
+
 class TestAPIKeyHandling:
     """Test API key handling."""
 
@@ -0,0 +1,107 @@
+# tests/test_benchmarks.py
+"""
+Unit tests for the benchmark harness (measurement, baselines and the
+regression comparison) and the load-test driver.
+"""
+import pytest
+
+from ai.runners.clients.base_client import ClientConfig
+from ai.runners.clients.fault_injection import Distribution, FaultConfig
+from ai.utils import audit_logger
+from benchmarks import bench_audit, bench_prompt, bench_review  # noqa: F401 (register)
+from benchmarks.load_test import run_load_test
+from benchmarks.harness import (
+    REGISTRY,
+    Benchmark,
+    Result,
+    compare,
+    format_report,
+    measure,
+    read_results,
+    summarize,
+    write_results,
+)
+
+
+def _result(name, seconds, **metrics):
+    return Result(name, 3, {"min": seconds, "median": seconds}, metrics)
+
+
+def test_summarize():
+    stats = summarize([0.3, 0.1, 0.2])
+    assert (stats["min"], stats["median"], stats["max"]) == (0.1, 0.2, 0.3)
+    assert stats["mean"] == pytest.approx(0.2)
+    assert summarize([0.5])["stdev"] == 0.0
+
+
+def test_measure_runs_setup_warmup_and_teardown():
+    calls = []
+    bench = Benchmark(
+        "x",
+        run=lambda state: calls.append(state) or {"cost_usd": 1.5},
+        setup=lambda scale: scale,
+        teardown=lambda state: calls.append("teardown"),
+        rounds=3,
+    )
+    result = measure(bench, "quick")
+    assert calls == ["quick"] * 4 + ["teardown"]  # 1 warmup + 3 rounds
+    assert result.rounds == 3 and result.metrics == {"cost_usd": 1.5}
+
+
+def test_compare_classifies_timings_and_cost():
+    baseline = {
+        "slower": _result("slower", 1.0),
+        "faster": _result("faster", 1.0),
+        "noise": _result("noise", 1.0, cost_usd=0.5),
+        "gone": _result("gone", 1.0),
+    }
+    current = {
+        "slower": _result("slower", 1.5),
+        "faster": _result("faster", 0.5),
+        "noise": _result("noise", 1.1, cost_usd=0.51),
+        "added": _result("added", 1.0),
+    }
+    status = {(c.name, c.metric): c.status for c in compare(current, baseline, threshold=0.25)}
+    assert status == {
+        ("added", "min"): "new",
+        ("faster", "min"): "improved",
+        ("gone", "min"): "missing",
+        ("noise", "min"): "ok",
+        ("noise", "cost_usd"): "regression",  # deterministic: any increase counts
+        ("slower", "min"): "regression",
+    }
+    report = format_report(compare(current, baseline))
+    assert report.splitlines()[2].startswith("| ❌ |")
+    assert report.endswith("2 regression(s) in 5 benchmark(s)")
+
+
+def test_results_round_trip(tmp_path):
+    path = write_results(tmp_path / "quick.json", [_result("a", 0.25, cost_usd=0.1)], "quick")
+    doc = read_results(path)
+    assert doc["scale"] == "quick" and "python" in doc["environment"]
+    assert doc["benchmarks"]["a"].timings["min"] == 0.25
+    assert doc["benchmarks"]["a"].metrics == {"cost_usd": 0.1}
+
+
+def test_quick_benchmarks_smoke():
+    root = audit_logger.LOG_ROOT
+    for name in ("prompt.build_pr_context[files=10]", "review.pipeline[dry_run]", "audit.build_daily_summary[cold]"):
+        result = measure(REGISTRY[name], "quick", rounds=1)
+        assert result.timings["min"] > 0
+    assert result.metrics == {}
+    assert audit_logger.LOG_ROOT == root  # scratch log root restored
+
+
+def test_load_test_reports_faults_and_latency():
+    faults = FaultConfig(latency=Distribution.fixed(0.01), rate_limit_rate=0.3, seed=5)
+    config = ClientConfig(max_retries=10, retry_delay=0.001)
+    result = run_load_test(12, faults, concurrency=4, config=config, files_per_pr=2)
+    assert (result["succeeded"], result["failed"]) == (12, 0)
+    assert result["retries"] == result["injected_faults"]["rate_limit"] > 0
+    assert result["attempts"] == 12 + result["retries"]
+    assert result["model_latency_seconds"]["p50"] >= 0.01
+    assert result["cost_usd"] > 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,122 @@
+# tests/test_budget_service.py
+"""
+Unit tests for budget_service.py — shared cached budget view.
+"""
+import json
+import os
+import pytest
+from pathlib import Path
+
+from ai.utils.budget_service import BudgetService, get_budget_service, _current_month
+from ai.utils.cost_monitor import record_cost, get_budget_status
+from ai.plugins import cost_checker
+from ai.plugins.cost_checker import check_budget, load_budget
+
+
+def _write_budget(tmp_path: Path, data: dict) -> Path:
+    p = tmp_path / ".ai" / "budget.json"
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(data), encoding="utf-8")
+    return p
+
+
+class TestBudgetService:
+
+    def test_view_is_cached_until_something_changes(self, tmp_path):
+        p = _write_budget(tmp_path, {
+            "monthly_budget_usd": 10.0,
+            "monthly_spent_usd": 1.0,
+            "last_reset": _current_month(),
+            "agents": {"claude": 1.0},
+        })
+        service = BudgetService(p)
+        first = service.view()
+        assert service.view() is first
+        assert first.monthly_spent_usd == pytest.approx(1.0)
+
+    def test_ledger_write_invalidates_view(self, tmp_path):
+        p = _write_budget(tmp_path, {
+            "monthly_budget_usd": 10.0,
+            "monthly_spent_usd": 0.0,
+            "last_reset": _current_month(),
+            "agents": {},
+        })
+        service = get_budget_service(p)
+        before = service.view()
+        record_cost("claude", 2.0, path=p)
+        after = service.view()
+        assert after is not before
+        assert after.monthly_spent_usd == pytest.approx(2.0)
+
+    def test_file_edit_invalidates_view(self, tmp_path):
+        p = _write_budget(tmp_path, {
+            "monthly_budget_usd": 10.0,
+            "monthly_spent_usd": 0.0,
+            "last_reset": _current_month(),
+        })
+        service = BudgetService(p)
+        assert service.view().monthly_budget_usd == 10.0
+        p.write_text(json.dumps({
+            "monthly_budget_usd": 100.0,
+            "monthly_spent_usd": 0.0,
+            "last_reset": _current_month(),
+        }), encoding="utf-8")
+        stat = p.stat()
+        os.utime(p, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert service.view().monthly_budget_usd == 100.0
+
+    def test_status_dict_is_a_copy(self, tmp_path):
+        p = _write_budget(tmp_path, {
+            "monthly_budget_usd": 10.0,
+            "monthly_spent_usd": 1.0,
+            "last_reset": _current_month(),
+            "agents": {"claude": 1.0},
+        })
+        get_budget_status(path=p)["agents"]["claude"] = 99.0
+        assert get_budget_status(path=p)["agents"]["claude"] == pytest.approx(1.0)
+
+
+class TestCheckBudget:
+
+    def test_flags_match_status(self, tmp_path):
+        p = _write_budget(tmp_path, {
+            "monthly_budget_usd": 10.0,
+            "monthly_spent_usd": 8.5,
+            "last_reset": _current_month(),
+        })
+        check = check_budget(path=p)
+        status = get_budget_status(path=p)
+        assert check["budget_warning"] is status["is_near_limit"] is True
+        assert check["budget_exceeded"] is status["is_over_budget"] is False
+        assert check["low_budget"] is True
+        assert check["remaining_usd"] == status["remaining_usd"]
+
+    def test_applies_monthly_reset(self, tmp_path):
+        p = _write_budget(tmp_path, {
+            "monthly_budget_usd": 10.0,
+            "monthly_spent_usd": 10.0,
+            "last_reset": "2000-01",
+        })
+        assert check_budget(path=p)["budget_exceeded"] is False
+
+    def test_defaults_without_file(self, tmp_path):
+        check = check_budget(path=tmp_path / "missing.json")
+        assert check["monthly_budget_usd"] == 50.0
+        assert check["budget_exceeded"] is False
+
+    def test_malformed_file_falls_back_to_defaults(self, tmp_path):
+        p = tmp_path / ".ai" / "budget.json"
+        p.parent.mkdir(parents=True)
+        p.write_text("{not json", encoding="utf-8")
+        assert load_budget(p)["monthly_budget_usd"] == 50.0
+        assert check_budget(path=p)["budget_exceeded"] is False
+
+    def test_budget_file_resolved_at_call_time(self, tmp_path, monkeypatch):
+        p = _write_budget(tmp_path, {"monthly_budget_usd": 7.0, "last_reset": _current_month()})
+        monkeypatch.setattr(cost_checker, "BUDGET_FILE", str(p))
+        assert load_budget()["monthly_budget_usd"] == 7.0
+        assert check_budget()["monthly_budget_usd"] == 7.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
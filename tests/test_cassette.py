@@ -0,0 +1,173 @@
+# tests/test_cassette.py
+"""
+Unit tests for record/replay cassettes of GitHub and provider traffic.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from ai.runners import run_review
+from ai.runners.clients.base_client import AIClientError, ClientConfig, MockAIClient, RateLimitError
+from ai.runners.clients.cassette_client import CassetteClient
+from ai.runners.clients.circuit_breaker import reset_circuit_breakers
+from ai.runners.clients.fault_injection import Distribution, FaultConfig
+from ai.utils.cassette import (
+    REDACTED,
+    Cassette,
+    CassetteCollector,
+    CassetteError,
+    Scrubber,
+    decode_pr_info,
+    encode_pr_info,
+)
+from ai.utils.models import Comment, FileChange, PRInfo
+
+GITHUB_TOKEN = "ghp_" + "a1B2" * 9
+
+
+class PricedClient(MockAIClient):
+    COST_PER_1M_INPUT = 3.0
+    COST_PER_1M_OUTPUT = 15.0
+
+
+class FlakyClient(PricedClient):
+    """Rate-limited on its first request."""
+
+    def _send_request(self, prompt, **kwargs):
+        if self.call_count == 0:
+            self.call_count += 1
+            raise RateLimitError("slow down", retry_after=0.01, headers={"retry-after": "0.01"})
+        return super()._send_request(prompt, **kwargs)
+
+
+class FakeCollector:
+    token = GITHUB_TOKEN
+    repo_name = "octo/repo"
+
+    def __init__(self):
+        self.posted = []
+
+    def get_pr_info(self, pr_number):
+        if pr_number == 404:
+            raise ValueError("Failed to fetch PR #404: Not Found")
+        return _pr(pr_number)
+
+    def upsert_comment(self, pr_number, body, agent, comment_id=None):
+        self.posted.append((pr_number, body))
+        return 1000 + pr_number
+
+
+def _pr(number):
+    created = datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc)
+    return PRInfo(
+        number=number, title=f"Change {number}", description=f"Uses token {GITHUB_TOKEN}",
+        author="dev", state="open", created_at=created, updated_at=created,
+        base_branch="main", head_branch="feature", base_sha="a", head_sha="b",
+        files=[FileChange("app.py", "modified", 2, 1, 3, patch="@@ -1,2 +1,3 @@\n a\n+b\n+c\n-d")],
+        comments=[Comment(7, "rev", "Looks odd", created, created, path="app.py", position=2)],
+        labels=["backend"], bot_comments={"claude": 99}, changed_files=1,
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
+
+
+def test_scrubber_redacts_env_values_patterns_and_keys(monkeypatch):
+    monkeypatch.setenv("CLAUDE_API_KEY", "plain-secret-value")
+    scrubber = Scrubber()
+    scrubbed = scrubber.scrub({
+        "text": f"key plain-secret-value and {GITHUB_TOKEN} and Bearer abcdefghijklmnopqrstuvwxyz",
+        "headers": {"Authorization": "anything", "x-request-id": "req_1"},
+        "list": ["sk-ant-api03-" + "x" * 30],
+    })
+    assert scrubbed["text"] == f"key {REDACTED} and {REDACTED} and {REDACTED}"
+    assert scrubbed["headers"] == {"Authorization": REDACTED, "x-request-id": "req_1"}
+    assert scrubbed["list"] == [REDACTED]
+
+
+def test_pr_info_round_trip():
+    pr = _pr(5)
+    restored = decode_pr_info(encode_pr_info(pr))
+    assert restored == pr
+    assert restored.files[0].hunks[0].line_count == pr.files[0].hunks[0].line_count
+
+
+def test_client_record_and_replay(tmp_path):
+    path = tmp_path / "ai.json"
+    config = ClientConfig(max_retries=3, retry_delay=0.001)
+    with Cassette(path, mode="record") as cassette:
+        recorded = CassetteClient(cassette, FlakyClient(response_text="LGTM"), config=config).send_prompt("Review A")
+    assert recorded.metadata["retry"]["attempts"] == 2
+
+    cassette = Cassette(path)
+    client = CassetteClient.replay(cassette, "mock", config=config)
+    replayed = client.send_prompt("Review A")
+    assert (replayed.content, replayed.total_tokens, replayed.cost_usd) == (
+        recorded.content, recorded.total_tokens, recorded.cost_usd,
+    )
+    assert replayed.cost_usd > 0
+    assert replayed.metadata["retry"]["attempts"] == 2  # the recorded 429 replays too
+    assert client.send_prompt("Review A").content == "LGTM"  # exhausted: last repeats
+
+    with pytest.raises(AIClientError, match="No recorded"):
+        client.send_prompt("Review B")
+    with pytest.raises(CassetteError):
+        CassetteClient.replay(cassette, "claude")
+    with pytest.raises(CassetteError):
+        Cassette(tmp_path / "missing.json")
+
+
+def test_replay_pacing(tmp_path):
+    path = tmp_path / "ai.json"
+    faults = FaultConfig(latency=Distribution.fixed(0.1))
+    with Cassette(path, mode="record") as cassette:
+        CassetteClient(cassette, MockAIClient(faults=faults)).send_prompt("Review")
+
+    for pace, check in ((0.0, lambda s: s < 0.05), (1.0, lambda s: s >= 0.1)):
+        client = CassetteClient.replay(Cassette(path, pace=pace), "mock")
+        started = time.perf_counter()
+        client.send_prompt("Review")
+        assert check(time.perf_counter() - started)
+
+
+def test_pipeline_replays_offline_without_secrets(tmp_path, monkeypatch):
+    logged, ledger = [], []
+    monkeypatch.setattr(run_review, "log_ai_event", lambda **kw: logged.append(kw))
+    monkeypatch.setattr(run_review, "reserve_budget", lambda agent, estimate: ledger.append(agent) or "r1")
+    monkeypatch.setattr(run_review, "commit_reservation", lambda *a: ledger.append(a))
+    path = tmp_path / "run.json"
+
+    def run(collector, client, replay=False):
+        return asyncio.run(run_review.run_pipeline([1, 2, 404], "claude", collector, client, replay=replay))
+
+    with Cassette(path, mode="record") as cassette:
+        collector = FakeCollector()
+        recorded = run(CassetteCollector(cassette, collector), CassetteClient(cassette, PricedClient(response_text="LGTM")))
+    assert len(collector.posted) == 2
+
+    text = path.read_text()
+    assert GITHUB_TOKEN not in text and "Review PR" not in text
+
+    assert len(ledger) == 4  # reserve + commit for each recorded review
+
+    ledger.clear()
+    logged.clear()
+    cassette = Cassette(path, strict=True)
+    replayed = run(CassetteCollector(cassette), CassetteClient.replay(cassette, "mock"), replay=True)
+    assert (replayed.succeeded, replayed.failed) == (recorded.succeeded, recorded.failed) == (2, 1)
+    assert (replayed.total_tokens, replayed.cost_usd) == (recorded.total_tokens, recorded.cost_usd)
+
+    # Replays book no spend: no ledger calls, zero-cost audit events tagged "replay"
+    assert ledger == []
+    assert {e["agent"] for e in logged} == {"claude_replay"}
+    assert all("replay" in e["tags"] and e["cost_usd"] == 0.0 for e in logged)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,198 @@
+# tests/test_circuit_breaker.py
+"""
+Unit tests for the circuit breaker and provider failover.
+"""
+import time
+
+import pytest
+
+from ai.runners.clients.base_client import (
+    MockAIClient,
+    ClientConfig,
+    APIConnectionError,
+    CircuitOpenError,
+)
+from ai.runners.clients.circuit_breaker import (
+    CircuitBreaker,
+    CLOSED,
+    OPEN,
+    HALF_OPEN,
+    get_circuit_breaker,
+    reset_circuit_breakers,
+)
+from ai.runners.clients.failover import FailoverClient, responder_label, with_failover
+from ai.utils.team_config import fallback_agents
+
+
+@pytest.fixture(autouse=True)
+def _fresh_breakers():
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
+
+
+class NamedClient(MockAIClient):
+    """Mock client with a configurable agent name and failure mode."""
+
+    def __init__(self, agent="mock", fail=False, **kwargs):
+        self.agent = agent
+        self.fail = fail
+        super().__init__(response_text=f"from {agent}", **kwargs)
+
+    def get_agent_name(self):
+        return self.agent
+
+    def _send_request(self, prompt, **kwargs):
+        if self.fail:
+            self.call_count += 1
+            raise APIConnectionError(f"{self.agent} overloaded")
+        return super()._send_request(prompt, **kwargs)
+
+
+FAST = ClientConfig(max_retries=2, retry_delay=0.0, circuit_failure_threshold=2, circuit_recovery_seconds=60)
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=60)
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.allow() is False
+        assert breaker.retry_in > 0
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+    def test_half_open_allows_single_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_seconds=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() is True
+        assert breaker.allow() is False
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_seconds=0.01)
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow() is True
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+    def test_release_frees_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_seconds=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow() is True
+        breaker.release()
+        assert breaker.allow() is True
+
+
+class TestSendPromptBreaker:
+
+    def test_open_circuit_fails_fast(self):
+        client = NamedClient(agent="claude", fail=True, config=FAST)
+        with pytest.raises(APIConnectionError):
+            client.send_prompt("Test")
+        assert get_circuit_breaker("claude").state == OPEN
+
+        calls = client.call_count
+        with pytest.raises(CircuitOpenError):
+            client.send_prompt("Test")
+        assert client.call_count == calls
+
+    def test_disabled_breaker(self):
+        config = ClientConfig(max_retries=2, retry_delay=0.0, circuit_failure_threshold=None)
+        client = NamedClient(agent="nobreaker", fail=True, config=config)
+        for _ in range(3):
+            with pytest.raises(APIConnectionError):
+                client.send_prompt("Test")
+        assert client.call_count == 6
+
+
+class TestFailover:
+
+    def test_fails_over_when_primary_down(self):
+        primary = NamedClient(agent="claude", fail=True, config=FAST)
+        created = []
+
+        def factory(agent, **kwargs):
+            created.append(agent)
+            return NamedClient(agent=agent, **kwargs)
+
+        client = FailoverClient(primary, ["gpt"], client_factory=factory, config=FAST)
+        response = client.send_prompt("Test")
+        assert response.content == "from gpt"
+        assert response.metadata["failover_from"] == "claude"
+        assert responder_label(response) == f"GPT ({response.model}), failover from Claude"
+
+        # Circuit is now open: the next call goes straight to the fallback
+        calls = primary.call_count
+        client.send_prompt("Test")
+        assert primary.call_count == calls
+        assert created == ["gpt"]
+
+    def test_primary_used_when_healthy(self):
+        primary = NamedClient(agent="claude", config=FAST)
+        client = FailoverClient(primary, ["gpt"], client_factory=lambda a, **kw: pytest.fail("not needed"))
+        response = client.send_prompt("Test")
+        assert response.content == "from claude"
+        assert "failover_from" not in response.metadata
+        assert responder_label(response) == f"Claude ({response.model})"
+        assert client.model == primary.model
+
+    def test_all_providers_down(self):
+        primary = NamedClient(agent="claude", fail=True, config=FAST)
+        client = FailoverClient(
+            primary, ["gpt"],
+            client_factory=lambda agent, **kw: NamedClient(agent=agent, fail=True, **kw),
+            config=FAST,
+        )
+        with pytest.raises(APIConnectionError, match="All providers unavailable"):
+            client.send_prompt("Test")
+
+    def test_unavailable_fallback_is_skipped(self):
+        primary = NamedClient(agent="claude", fail=True, config=FAST)
+
+        def factory(agent, **kwargs):
+            raise ImportError("SDK missing")
+
+        client = FailoverClient(primary, ["gpt"], client_factory=factory)
+        with pytest.raises(APIConnectionError):
+            client.send_prompt("Test")
+
+
+class TestFailoverPolicy:
+
+    def test_fallback_agents_from_team_config(self, tmp_path):
+        path = tmp_path / "ai_team.yml"
+        path.write_text(
+            "team:\n"
+            "  pm:\n"
+            "    agent: claude\n"
+            "    fallback_agents: [gpt, claude]\n"
+            "  compliance:\n"
+            "    agent: perplexity\n",
+            encoding="utf-8",
+        )
+        assert fallback_agents("claude", path) == ["gpt"]
+        assert fallback_agents("perplexity", path) == []
+        assert fallback_agents("claude", tmp_path / "missing.yml") == []
+
+    def test_with_failover_returns_client_without_policy(self):
+        client = NamedClient(agent="unlisted")
+        assert with_failover(client) is client
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -14,7 +14,7 @@ from ai.runners.clients.base_client import (
     RateLimitError,
     APIConnectionError,
 )
-from ai.utils.models import AIResponse
+from ai.utils.models import AIResponse, CacheablePrompt
 
 
 class TestClaudeClient:
@@ -92,6 +92,30 @@ class TestClaudeClient:
         assert call_kwargs['model'] == 'claude-sonnet-4-5-20250929'
         assert call_kwargs['messages'][0]['content'] == 'Test prompt'
 
+    @patch.dict('os.environ', {'CLAUDE_API_KEY': 'test_key'})
+    @patch('ai.runners.clients.claude_client.Anthropic')
+    def test_cacheable_prompt_sends_cache_breakpoint(self, mock_anthropic):
+        """The static prefix of a CacheablePrompt is marked for caching."""
+        mock_response = MagicMock()
+        mock_content_block = MagicMock()
+        mock_content_block.text = 'ok'
+        mock_response.content = [mock_content_block]
+        mock_response.usage.input_tokens = 50
+        mock_response.usage.output_tokens = 10
+        mock_response.usage.cache_read_input_tokens = 2000
+        mock_response.usage.cache_creation_input_tokens = 0
+        mock_anthropic.return_value.messages.create.return_value = mock_response
+
+        client = ClaudeClient()
+        response = client.send_prompt(CacheablePrompt("static rules", "PR diff"))
+
+        content = mock_anthropic.return_value.messages.create.call_args[1]['messages'][0]['content']
+        assert content[0] == {"type": "text", "text": "static rules", "cache_control": {"type": "ephemeral"}}
+        assert content[1] == {"type": "text", "text": "PR diff"}
+        assert response.input_tokens == 2050
+        assert response.cache_read_tokens == 2000
+        assert response.cost_usd < client.calculate_cost(2050, 10)
+
     @patch.dict('os.environ', {'CLAUDE_API_KEY': 'test_key'})
     @patch('ai.runners.clients.claude_client.Anthropic')
     def test_cost_calculation(self, mock_anthropic):
@@ -0,0 +1,187 @@
+# tests/test_cost_ledger.py
+"""
+Unit tests for cost_ledger.py — atomic cost recording under concurrency.
+"""
+import json
+import threading
+import pytest
+from pathlib import Path
+
+from ai.utils.cost_ledger import CostLedger, BudgetExceededError, ledger_path_for
+from ai.utils.budget_service import _current_month
+from ai.utils.cost_monitor import (
+    record_cost,
+    get_budget_status,
+    reserve_budget,
+    commit_reservation,
+    release_reservation,
+)
+
+
+def _write_budget(tmp_path: Path, data: dict) -> Path:
+    p = tmp_path / ".ai" / "budget.json"
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(data), encoding="utf-8")
+    return p
+
+
+class TestCostLedger:
+
+    def test_record_updates_totals(self, tmp_path):
+        ledger = CostLedger(tmp_path / "ledger.db")
+        ledger.record("claude", 1.0, "2025-01")
+        summary = ledger.record("gemini", 0.5, "2025-01")
+        assert summary["spent_usd"] == pytest.approx(1.5)
+        assert summary["agents"] == {"claude": 1.0, "gemini": 0.5}
+
+    def test_months_are_separate(self, tmp_path):
+        ledger = CostLedger(tmp_path / "ledger.db")
+        ledger.record("claude", 1.0, "2025-01")
+        ledger.record("claude", 2.0, "2025-02")
+        assert ledger.summary("2025-01")["spent_usd"] == pytest.approx(1.0)
+        assert ledger.summary("2025-02")["spent_usd"] == pytest.approx(2.0)
+        assert ledger.summary("2025-03") is None
+
+    def test_opening_balance_applied_once(self, tmp_path):
+        ledger = CostLedger(tmp_path / "ledger.db")
+        ledger.record("claude", 1.0, "2025-01", opening_agents={"claude": 3.0})
+        summary = ledger.record("claude", 1.0, "2025-01", opening_agents={"claude": 3.0})
+        assert summary["agents"]["claude"] == pytest.approx(5.0)
+
+    def test_limit_rejects_without_insert(self, tmp_path):
+        ledger = CostLedger(tmp_path / "ledger.db")
+        ledger.record("claude", 5.0, "2025-01", limit_usd=5.0)
+        with pytest.raises(BudgetExceededError):
+            ledger.record("claude", 1.0, "2025-01", limit_usd=5.0)
+        assert ledger.summary("2025-01")["spent_usd"] == pytest.approx(5.0)
+
+    def test_failed_on_commit_rolls_back(self, tmp_path):
+        ledger = CostLedger(tmp_path / "ledger.db")
+
+        def _boom(summary):
+            raise OSError("disk full")
+
+        with pytest.raises(OSError):
+            ledger.record("claude", 1.0, "2025-01", on_commit=_boom)
+        assert ledger.summary("2025-01") is None
+
+    def test_version_increments(self, tmp_path):
+        ledger = CostLedger(tmp_path / "ledger.db")
+        assert ledger.version() == 0
+        ledger.record("claude", 1.0, "2025-01")
+        ledger.record("claude", 1.0, "2025-01")
+        assert ledger.version() == 2
+
+    def test_ledger_path_for_budget(self):
+        assert ledger_path_for(Path(".ai/budget.json")) == Path(".ai/budget.ledger.db")
+
+
+class TestConcurrentRecordCost:
+
+    def test_no_lost_updates(self, tmp_path):
+        p = _write_budget(tmp_path, {
+            "monthly_budget_usd": 1000.0,
+            "monthly_spent_usd": 0.0,
+            "last_reset": _current_month(),
+            "agents": {},
+        })
+        agents = ["claude", "gemini", "perplexity", "gpt"]
+        per_thread = 25
+
+        def _worker(agent):
+            for _ in range(per_thread):
+                record_cost(agent, 0.01, path=p)
+
+        threads = [threading.Thread(target=_worker, args=(a,)) for a in agents]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        status = get_budget_status(path=p)
+        assert status["monthly_spent_usd"] == pytest.approx(len(agents) * per_thread * 0.01)
+        for agent in agents:
+            assert status["agents"][agent] == pytest.approx(per_thread * 0.01)
+
+        # budget.json snapshot matches the ledger
+        data = json.loads(p.read_text(encoding="utf-8"))
+        assert data["monthly_spent_usd"] == pytest.approx(status["monthly_spent_usd"])
+
+    def test_unattributed_spend_is_preserved(self, tmp_path):
+        p = _write_budget(tmp_path, {
+            "monthly_budget_usd": 10.0,
+            "monthly_spent_usd": 4.0,
+            "last_reset": _current_month(),
+            "agents": {"claude": 1.0},
+        })
+        state = record_cost("claude", 1.0, path=p)
+        assert state["monthly_spent_usd"] == pytest.approx(5.0)
+        assert state["agents"]["claude"] == pytest.approx(2.0)
+
+
+class TestReservations:
+
+    def _budget(self, tmp_path, budget=1.0):
+        return _write_budget(tmp_path, {
+            "monthly_budget_usd": budget,
+            "monthly_spent_usd": 0.0,
+            "last_reset": _current_month(),
+            "agents": {},
+        })
+
+    def test_reservations_count_against_budget(self, tmp_path):
+        p = self._budget(tmp_path)
+        reserve_budget("claude", 0.6, path=p)
+        with pytest.raises(BudgetExceededError):
+            reserve_budget("gemini", 0.6, path=p)
+        status = get_budget_status(path=p)
+        assert status["reserved_usd"] == pytest.approx(0.6)
+        assert status["monthly_spent_usd"] == pytest.approx(0.0)
+
+    def test_commit_records_actual_and_frees_reservation(self, tmp_path):
+        p = self._budget(tmp_path)
+        rid = reserve_budget("claude", 0.6, path=p)
+        commit_reservation("claude", rid, 0.2, path=p)
+        status = get_budget_status(path=p)
+        assert status["monthly_spent_usd"] == pytest.approx(0.2)
+        assert status["reserved_usd"] == pytest.approx(0.0)
+        reserve_budget("gemini", 0.7, path=p)
+
+    def test_release_frees_budget(self, tmp_path):
+        p = self._budget(tmp_path)
+        rid = reserve_budget("claude", 0.9, path=p)
+        assert release_reservation(rid, path=p) is True
+        assert release_reservation(rid, path=p) is False
+        reserve_budget("claude", 0.9, path=p)
+
+    def test_expired_reservations_do_not_hold_budget(self, tmp_path):
+        p = self._budget(tmp_path)
+        reserve_budget("claude", 0.9, ttl_seconds=-1, path=p)
+        reserve_budget("claude", 0.9, path=p)
+
+    def test_concurrent_reservations_respect_cap(self, tmp_path):
+        p = self._budget(tmp_path, budget=1.0)
+        admitted = []
+        lock = threading.Lock()
+
+        def _worker():
+            try:
+                rid = reserve_budget("claude", 0.1, path=p)
+            except BudgetExceededError:
+                return
+            commit_reservation("claude", rid, 0.1, path=p)
+            with lock:
+                admitted.append(rid)
+
+        threads = [threading.Thread(target=_worker) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(admitted) == 10
+        assert get_budget_status(path=p)["monthly_spent_usd"] == pytest.approx(1.0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -6,11 +6,11 @@ import json
 import pytest
 from pathlib import Path
 
+from ai.utils.budget_service import _current_month
 from ai.utils.cost_monitor import (
     record_cost,
     get_budget_status,
     BudgetExceededError,
-    _current_month,
 )
 
 
@@ -0,0 +1,144 @@
+# tests/test_diff_parser.py
+"""
+Unit tests for the streaming unified-diff parser.
+"""
+import pytest
+
+from ai.utils.diff_parser import (
+    ADDED,
+    CONTEXT,
+    REMOVED,
+    excerpt,
+    iter_hunks,
+    parse_patch,
+)
+from ai.utils.models import FileChange
+
+PATCH = (
+    "@@ -1,3 +1,4 @@ def main():\n"
+    " import os\n"
+    "-import sys\n"
+    "+import sys  # noqa\n"
+    "+import json\n"
+    " \n"
+    "@@ -10,2 +11,2 @@\n"
+    "-old = 1\n"
+    "+new = 2\n"
+    " tail\n"
+    "\\ No newline at end of file"
+)
+
+
+class TestParsePatch:
+
+    def test_hunk_ranges(self):
+        hunks = parse_patch(PATCH)
+        assert len(hunks) == 2
+
+        first, second = hunks
+        assert (first.old_start, first.old_count) == (1, 3)
+        assert (first.new_start, first.new_count) == (1, 4)
+        assert first.section == " def main():"
+        assert list(second.new_range) == [11, 12]
+        assert list(second.old_range) == [10, 11]
+
+    def test_added_and_removed_views(self):
+        first = parse_patch(PATCH)[0]
+        assert [line.text for line in first.added_lines] == ["import sys  # noqa", "import json"]
+        assert [line.text for line in first.removed_lines] == ["import sys"]
+        assert all(line.kind == ADDED for line in first.added_lines)
+        assert all(line.kind == REMOVED for line in first.removed_lines)
+
+    def test_line_numbers(self):
+        first = parse_patch(PATCH)[0]
+        kinds = [(line.kind, line.old_lineno, line.new_lineno) for line in first.lines]
+        assert kinds == [
+            (CONTEXT, 1, 1),
+            (REMOVED, 2, None),
+            (ADDED, None, 2),
+            (ADDED, None, 3),
+            (CONTEXT, 3, 4),
+        ]
+
+    def test_positions_follow_github_convention(self):
+        first, second = parse_patch(PATCH)
+        assert first.position == 0
+        assert [line.position for line in first.lines] == [1, 2, 3, 4, 5]
+        # Second hunk header counts as a line
+        assert second.position == 6
+        assert second.lines[0].position == 7
+
+    def test_header_without_counts(self):
+        hunks = parse_patch("@@ -1 +1 @@\n-a\n+b")
+        assert hunks[0].old_count == 1
+        assert hunks[0].new_count == 1
+        assert hunks[0].header == "@@ -1 +1 @@"
+
+    def test_preamble_is_skipped(self):
+        patch = "diff --git a/x b/x\n--- a/x\n+++ b/x\n@@ -1,1 +1,1 @@\n-a\n+b"
+        hunks = parse_patch(patch)
+        assert len(hunks) == 1
+        assert hunks[0].position == 0
+        assert [line.text for line in hunks[0].lines] == ["a", "b"]
+
+    def test_empty_patch(self):
+        assert parse_patch(None) == []
+        assert parse_patch("") == []
+
+    def test_iter_hunks_is_lazy(self):
+        gen = iter_hunks(PATCH)
+        first = next(gen)
+        assert first.new_start == 1
+
+
+class TestExcerpt:
+
+    def test_not_truncated(self):
+        text, truncated = excerpt(parse_patch(PATCH), 50)
+        assert truncated is False
+        assert text == PATCH
+
+    def test_truncated(self):
+        text, truncated = excerpt(parse_patch(PATCH), 3)
+        assert truncated is True
+        assert text.split("\n") == PATCH.split("\n")[:3]
+
+
+class TestFileChangeHunks:
+
+    def _file(self, patch=PATCH):
+        return FileChange(
+            filename="src/app.py",
+            status="modified",
+            additions=3,
+            deletions=2,
+            changes=5,
+            patch=patch,
+        )
+
+    def test_hunks_are_cached(self):
+        file = self._file()
+        assert file.hunks is file.hunks
+        assert file.patch_line_count == len(PATCH.split("\n"))
+
+    def test_added_removed_lines(self):
+        file = self._file()
+        assert len(file.added_lines) == 3
+        assert len(file.removed_lines) == 2
+
+    def test_find_position(self):
+        file = self._file()
+        assert file.find_position(3) == 4       # "+import json"
+        assert file.find_position(11) == 8      # "+new = 2"
+        assert file.find_position(12) == 9      # " tail"
+        assert file.find_position(10, side="LEFT") == 7
+        assert file.find_position(100) is None
+
+    def test_binary_file_has_no_hunks(self):
+        file = self._file(patch=None)
+        assert file.hunks == []
+        assert file.find_position(1) is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
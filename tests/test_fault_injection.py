@@ -0,0 +1,113 @@
+# tests/test_fault_injection.py
+"""
+Unit tests for MockAIClient latency and fault injection.
+"""
+import random
+import statistics
+import time
+
+import pytest
+
+from ai.runners.clients.base_client import (
+    APIConnectionError,
+    ClientConfig,
+    MockAIClient,
+    RateLimitError,
+)
+from ai.runners.clients.circuit_breaker import reset_circuit_breakers
+from ai.runners.clients.fault_injection import Distribution, FaultConfig
+from ai.runners.clients.retry_policy import RetryPolicy
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
+
+
+def _config(**kwargs):
+    return ClientConfig(retry_policy=RetryPolicy(max_attempts=1), circuit_failure_threshold=None, **kwargs)
+
+
+class TestDistribution:
+    """Parsing and sampling."""
+
+    def test_parse(self):
+        assert Distribution.parse("1.5") == Distribution.fixed(1.5)
+        assert Distribution.parse("uniform:0.5,2") == Distribution.uniform(0.5, 2)
+        assert Distribution.parse("lognormal:median=2,sigma=0.5") == Distribution.lognormal(2, 0.5)
+        assert str(Distribution.exponential(3)) == "exponential:mean=3"
+        for bad in ("slow", "gamma:1", "uniform:low=1", "normal:mean=x,stdev=1"):
+            with pytest.raises(ValueError):
+                Distribution.parse(bad)
+
+    def test_samples_match_parameters(self):
+        rng = random.Random(1)
+        lognormal = [Distribution.lognormal(2.0, 0.5).sample(rng) for _ in range(5000)]
+        assert statistics.median(lognormal) == pytest.approx(2.0, rel=0.05)
+        tail = Distribution.lognormal_from_percentiles(1.0, 10.0)
+        samples = sorted(tail.sample(rng) for _ in range(5000))
+        assert samples[int(0.99 * len(samples))] == pytest.approx(10.0, rel=0.25)
+        assert min(Distribution.normal(0.1, 1.0).sample(rng) for _ in range(100)) == 0.0
+
+
+class TestFaultInjection:
+    """MockAIClient requests with a FaultConfig."""
+
+    def test_latency_and_generation_speed(self):
+        faults = FaultConfig(latency=Distribution.fixed(0.05), tokens_per_second=1000)
+        client = MockAIClient(response_text="x" * 400, faults=faults)  # 100 output tokens
+        started = time.perf_counter()
+        response = client.send_prompt("Review this")
+        assert time.perf_counter() - started >= 0.15
+        assert response.output_tokens == 100
+
+    def test_sampled_usage_capped_by_max_tokens(self):
+        faults = FaultConfig(output_tokens=Distribution.uniform(500, 900), seed=4)
+        client = MockAIClient(faults=faults)
+        tokens = {client.send_prompt("Review this", max_tokens=700).output_tokens for _ in range(30)}
+        assert max(tokens) == 700 and min(tokens) >= 500 and len(tokens) > 5
+
+    def test_injected_errors_at_set_rates(self):
+        faults = FaultConfig(rate_limit_rate=0.2, connection_error_rate=0.1, retry_after=3, seed=11)
+        client = MockAIClient(faults=faults, config=_config())
+        outcomes = {"ok": 0, "rate_limit": 0, "connection": 0}
+        for _ in range(500):
+            try:
+                client.send_prompt("Review this")
+                outcomes["ok"] += 1
+            except RateLimitError as e:
+                assert e.retry_after == 3 and e.headers == {"retry-after": "3"}
+                outcomes["rate_limit"] += 1
+            except APIConnectionError:
+                outcomes["connection"] += 1
+        assert faults.injected == {k: v for k, v in outcomes.items() if k != "ok"}
+        assert outcomes["rate_limit"] == pytest.approx(100, abs=30)
+        assert outcomes["connection"] == pytest.approx(40, abs=20)
+
+    def test_slow_request_times_out(self):
+        faults = FaultConfig(latency=Distribution.fixed(5.0))
+        client = MockAIClient(faults=faults, config=_config(timeout=0.05))
+        started = time.perf_counter()
+        with pytest.raises(APIConnectionError, match="timed out"):
+            client.send_prompt("Review this")
+        assert time.perf_counter() - started < 1.0
+        assert faults.injected == {"timeout": 1}
+
+    def test_retries_recover_from_injected_faults(self):
+        faults = FaultConfig(rate_limit_rate=0.5, seed=2)
+        client = MockAIClient(faults=faults, config=ClientConfig(max_retries=10, retry_delay=0.001))
+        responses = [client.send_prompt("Review this") for _ in range(10)]
+        retries = sum(r.metadata["retry"]["retries"] for r in responses)
+        assert retries == faults.injected["rate_limit"] > 0
+
+    def test_invalid_config(self):
+        with pytest.raises(ValueError):
+            FaultConfig(rate_limit_rate=1.5)
+        with pytest.raises(ValueError):
+            FaultConfig(tokens_per_second=0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,189 @@
+# tests/test_hedging.py
+"""
+Unit tests for hedged requests and latency tracking.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from ai.runners.clients.base_client import MockAIClient, AIClientError
+from ai.runners.clients.latency import LatencyTracker, audit_latency_quantile, get_latency_tracker
+from ai.runners.clients.hedging import HedgedClient, hedge_spent
+from ai.utils import audit_logger
+from ai.utils.budget_service import _current_month
+from ai.utils.cost_monitor import get_budget_status, record_cost
+
+
+@pytest.fixture(autouse=True)
+def _isolated_latency(tmp_path, monkeypatch):
+    # The shared tracker's window fills up across tests; audit history is per test
+    get_latency_tracker().clear()
+    monkeypatch.setattr(audit_logger, "LOG_ROOT", tmp_path / "logs")
+    yield
+    audit_logger.flush_events()
+
+
+class SlowClient(MockAIClient):
+    """Mock client whose Nth call sleeps for delays[N] seconds."""
+
+    COST_PER_1M_INPUT = 1_000_000.0  # $1 per input token keeps costs visible
+
+    def __init__(self, delays, fail=False, **kwargs):
+        self.delays = list(delays)
+        self.fail = fail
+        self._lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def _send_request(self, prompt, **kwargs):
+        with self._lock:
+            delay = self.delays.pop(0) if self.delays else 0.0
+        time.sleep(delay)
+        if self.fail:
+            raise ValueError("bad request")
+        return super()._send_request(prompt, **kwargs)
+
+
+def _budget(tmp_path: Path, agents=None, limit=1000.0) -> Path:
+    p = tmp_path / ".ai" / "budget.json"
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps({
+        "monthly_budget_usd": limit,
+        "monthly_spent_usd": sum((agents or {}).values()),
+        "last_reset": _current_month(),
+        "agents": agents or {},
+    }), encoding="utf-8")
+    return p
+
+
+def _wait_for_hedge_spend(path: Path, timeout: float = 2.0) -> float:
+    deadline = time.time() + timeout
+    while not hedge_spent(path) and time.time() < deadline:
+        time.sleep(0.01)
+    return hedge_spent(path)
+
+
+class TestLatencyTracker:
+
+    def test_quantile_needs_min_samples(self):
+        tracker = LatencyTracker(min_samples=3)
+        tracker.record("claude", "m", 1.0)
+        assert tracker.quantile("claude", "m", 0.9) is None
+
+    def test_nearest_rank_quantile(self):
+        tracker = LatencyTracker(min_samples=1)
+        for i in range(1, 11):
+            tracker.record("claude", "m", float(i))
+        assert tracker.quantile("claude", "m", 0.9) == 9.0
+        assert tracker.quantile("claude", "m", 0.5) == 5.0
+
+    def test_window_drops_old_samples(self):
+        tracker = LatencyTracker(window=3, min_samples=1)
+        for value in (100.0, 1.0, 1.0, 1.0):
+            tracker.record("claude", "m", value)
+        assert tracker.quantile("claude", "m", 1.0) == 1.0
+
+    def test_send_prompt_records_latency(self):
+        client = MockAIClient()
+        before = get_latency_tracker().count("mock", "mock-model")
+        client.send_prompt("Test")
+        assert get_latency_tracker().count("mock", "mock-model") == before + 1
+
+
+class TestHedgedClient:
+
+    def test_fast_primary_is_not_hedged(self, tmp_path):
+        client = SlowClient([0.0])
+        hedged = HedgedClient(client, default_delay=0.5, budget_path=_budget(tmp_path))
+        response = hedged.send_prompt("Test")
+        assert response.metadata["hedged"] is False
+        assert client.call_count == 1
+
+    def test_slow_primary_loses_to_hedge(self, tmp_path):
+        path = _budget(tmp_path)
+        client = SlowClient([0.5, 0.0])
+        hedged = HedgedClient(client, default_delay=0.05, min_delay=0.0, budget_path=path)
+        start = time.time()
+        response = hedged.send_prompt("Test")
+        assert time.time() - start < 0.4
+        assert response.metadata["hedged"] is True
+        assert response.metadata["hedge_winner"] == "hedge"
+
+        # The abandoned primary is charged as hedge overhead once it lands
+        assert _wait_for_hedge_spend(path) == pytest.approx(response.cost_usd)
+        assert get_budget_status(path)["agents"]["mock_hedge"] == pytest.approx(response.cost_usd)
+        assert get_budget_status(path)["reserved_usd"] == 0.0
+
+    def test_abandoned_cost_recorded_past_the_limit(self, tmp_path):
+        # Room for exactly the hedge's $1 reservation
+        path = _budget(tmp_path, {"mock": 9.0}, limit=10.0)
+        client = SlowClient([0.5, 0.0])
+        hedged = HedgedClient(client, default_delay=0.05, min_delay=0.0, budget_path=path)
+        response = hedged.send_prompt("Test")
+        assert response.metadata["hedge_winner"] == "hedge"
+
+        # The winner's cost reaches the limit before the loser lands
+        record_cost("mock", response.cost_usd, path)
+        assert get_budget_status(path)["is_over_budget"]
+
+        assert _wait_for_hedge_spend(path) == pytest.approx(1.0)
+        assert get_budget_status(path)["monthly_spent_usd"] == pytest.approx(11.0)
+
+    def test_no_hedge_without_budget_for_it(self, tmp_path):
+        client = SlowClient([0.2])
+        hedged = HedgedClient(
+            client, default_delay=0.01, budget_path=_budget(tmp_path, {"mock": 9.5}, limit=10.0),
+        )
+        assert hedged.send_prompt("Test").metadata["hedged"] is False
+        assert client.call_count == 1
+
+    def test_hedge_uses_tracked_p90(self):
+        tracker = LatencyTracker(min_samples=1)
+        for _ in range(10):
+            tracker.record("mock", "mock-model", 2.5)
+        hedged = HedgedClient(MockAIClient(), tracker=tracker, min_delay=1.0)
+        assert hedged.hedge_delay() == 2.5
+
+    def test_hedge_delay_from_audit_history(self):
+        for _ in range(10):
+            audit_logger.log_ai_event(
+                agent="mock", pr_number=1, status="success", decision_reason="test",
+                metadata={"latency_seconds": 4.0},
+            )
+        assert audit_latency_quantile("mock", 0.9) == pytest.approx(4.0, rel=0.02)
+        assert audit_latency_quantile("claude", 0.9) is None
+
+        hedged = HedgedClient(MockAIClient(), tracker=LatencyTracker(), min_delay=1.0)
+        assert hedged.hedge_delay() == pytest.approx(4.0, rel=0.02)
+        no_history = HedgedClient(MockAIClient(), tracker=LatencyTracker(), default_delay=30.0, history_days=0)
+        assert no_history.hedge_delay() == 30.0
+
+    def test_cap_stops_new_hedges(self, tmp_path):
+        client = SlowClient([0.2])
+        hedged = HedgedClient(
+            client,
+            default_delay=0.01,
+            monthly_cap_usd=1.0,
+            budget_path=_budget(tmp_path, {"claude_hedge": 1.5}),
+        )
+        response = hedged.send_prompt("Test")
+        assert response.metadata["hedged"] is False
+        assert client.call_count == 1
+
+    def test_all_requests_failing_raises(self, tmp_path):
+        path = _budget(tmp_path)
+        client = SlowClient([0.1, 0.0], fail=True)
+        hedged = HedgedClient(client, default_delay=0.01, min_delay=0.0, budget_path=path)
+        with pytest.raises(AIClientError):
+            hedged.send_prompt("Test")
+        assert get_budget_status(path)["reserved_usd"] == 0.0  # Hedge reservation released
+
+    def test_hedge_spent_sums_hedge_agents(self, tmp_path):
+        path = _budget(tmp_path, {"claude": 3.0, "claude_hedge": 0.5, "gpt_hedge": 0.25})
+        assert hedge_spent(path) == pytest.approx(0.75)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,122 @@
+# tests/test_metrics.py
+"""
+Unit tests for the metrics registry, exposition format and endpoints.
+"""
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ai.runners.clients.base_client import AIClientError, ClientConfig, MockAIClient
+from ai.utils import metrics
+from ai.utils.metrics import MetricsRegistry, start_metrics_server
+
+
+class BrokenClient(MockAIClient):
+    """Fails every request with a non-retryable error."""
+
+    def _send_request(self, prompt: str, **kwargs):
+        raise ValueError("bad request")
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found in:\n{text}")
+
+
+class TestRegistry:
+    """Metric types and the text exposition format."""
+
+    def test_counter_and_gauge_render(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("jobs_total", "Jobs run.", ("agent",))
+        requests.labels("claude").inc()
+        requests.labels(agent="claude").inc(2)
+        registry.gauge("queue_depth", "Queued jobs.").set(4)
+
+        text = registry.render()
+        assert "# TYPE jobs_total counter" in text
+        assert 'jobs_total{agent="claude"} 3' in text
+        assert "queue_depth 4" in text
+        with pytest.raises(ValueError):
+            requests.labels("claude").inc(-1)
+        with pytest.raises(ValueError):
+            requests.labels("a", "b")
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.5, 1.0))
+        for value in (0.2, 0.7, 0.7, 3.0):
+            latency.observe(value)
+
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.5"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 3' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert _sample(text, "latency_seconds_sum") == pytest.approx(4.6)
+        assert "latency_seconds_count 4" in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("x_total", "X.", ("reason",)).labels('say "hi"\n').inc()
+        assert 'x_total{reason="say \\"hi\\"\\n"} 1' in registry.render()
+
+    def test_reregistering_returns_same_metric(self):
+        registry = MetricsRegistry()
+        assert registry.counter("a_total", "A.") is registry.counter("a_total", "A.")
+        with pytest.raises(ValueError):
+            registry.gauge("a_total", "A.")
+
+    def test_observe_is_cheap(self):
+        child = MetricsRegistry().histogram("h", "H.", ("agent",)).labels("claude")
+        started = time.perf_counter()
+        for _ in range(100_000):
+            child.observe(0.3)
+        assert (time.perf_counter() - started) / 100_000 < 20e-6
+
+
+class TestClientMetrics:
+    """Metrics recorded by AIClient.send_prompt."""
+
+    def test_success_and_error_recorded(self, monkeypatch):
+        monkeypatch.setenv(metrics.MODE_ENV, "pro")
+        client = MockAIClient(response_text="ok")
+        labels = (client.get_agent_name(), client.model, "pro")
+        before = metrics.REQUESTS.labels(*labels).value
+
+        client.send_prompt("Review this")
+        assert metrics.REQUESTS.labels(*labels).value == before + 1
+        assert metrics.IN_FLIGHT.labels(*labels).value == 0
+        assert metrics.REQUEST_DURATION.labels(*labels).count >= 1
+
+        with pytest.raises(AIClientError):
+            BrokenClient(config=ClientConfig(circuit_failure_threshold=None)).send_prompt("Review this")
+        text = metrics.REGISTRY.render()
+        series = f'agent="{labels[0]}",model="{labels[1]}",mode="pro"'
+        assert f'ai_request_errors_total{{{series},error="AIClientError"}}' in text
+        assert f'ai_request_tokens_bucket{{{series},direction="output"' in text
+
+
+def test_metrics_endpoint_and_textfile(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("served_total", "Served.").inc()
+    server = start_metrics_server(0, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "served_total 1" in response.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other", timeout=5)
+    finally:
+        server.shutdown()
+
+    path = registry.write_textfile(tmp_path / "ai.prom")
+    assert path.read_text() == registry.render()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -7,7 +7,7 @@ import pytest
 from unittest.mock import Mock, MagicMock, patch
 from datetime import datetime
 
-from ai.utils.pr_collector import PRCollector
+from ai.utils.pr_collector import PRCollector, bot_marker
 from ai.utils.models import PRInfo, FileChange, Comment
 
 
@@ -91,6 +91,163 @@ class TestPRCollector:
         assert len(pr_info.files) == 1
         assert pr_info.files[0].filename == "test.py"
 
+    @patch('ai.utils.pr_collector.Github')
+    def test_post_review_with_inline_comments(self, mock_github):
+        """Test that inline comments are submitted in one create_review call."""
+        mock_repo = MagicMock()
+        mock_pr = MagicMock()
+        mock_pr.create_review.return_value.id = 99
+        mock_repo.get_pull.return_value = mock_pr
+        mock_github.return_value.get_repo.return_value = mock_repo
+
+        collector = PRCollector(token='test_token', repo_name='owner/repo')
+        comments = [
+            {"path": "a.py", "position": 1, "body": "one"},
+            {"path": "b.py", "position": 4, "body": "two"},
+        ]
+        review_id = collector.post_review(6, "summary", comments=comments)
+
+        assert review_id == 99
+        mock_pr.create_review.assert_called_once_with(body="summary", event="COMMENT", comments=comments)
+        mock_pr.create_issue_comment.assert_not_called()
+
+    @patch('ai.utils.pr_collector.Github')
+    def test_upsert_review_edits_previous_review(self, mock_github):
+        """Test that a summary-only review edits the bot's last review."""
+        mock_repo = MagicMock()
+        mock_pr = MagicMock()
+        other = MagicMock(id=20, state="COMMENTED", body=f"x\n{bot_marker('gemini')}")
+        mine = MagicMock(id=21, state="COMMENTED", body=f"old\n{bot_marker('claude')}")
+        old_inline = MagicMock(id=5, body=f"🟡 **MINOR**: y\n{bot_marker('claude')}")
+        mock_pr.get_reviews.return_value = [other, mine]
+        mock_pr.get_review_comments.return_value = [old_inline]
+        mock_repo.get_pull.return_value = mock_pr
+        mock_github.return_value.get_repo.return_value = mock_repo
+
+        collector = PRCollector(token='test_token', repo_name='owner/repo')
+        review_id = collector.upsert_review(6, "summary", agent="claude")
+
+        assert review_id == 21
+        mine.edit.assert_called_once_with(f"summary\n{bot_marker('claude')}")
+        old_inline.delete.assert_called_once()
+        other.edit.assert_not_called()
+        mock_pr.create_review.assert_not_called()
+
+    @patch('ai.utils.pr_collector.Github')
+    def test_upsert_review_retires_older_reviews(self, mock_github):
+        """Test that new inline comments post one review and stub out older ones."""
+        mock_repo = MagicMock()
+        mock_pr = MagicMock()
+        older = MagicMock(id=30, state="CHANGES_REQUESTED", body=f"old\n{bot_marker('claude')}")
+        mock_pr.get_reviews.return_value = [older]
+        mock_pr.get_review_comments.return_value = []
+        mock_pr.create_review.return_value.id = 31
+        mock_repo.get_pull.return_value = mock_pr
+        mock_github.return_value.get_repo.return_value = mock_repo
+
+        collector = PRCollector(token='test_token', repo_name='owner/repo')
+        comments = [{"path": "a.py", "position": 1, "body": "one"}]
+        review_id = collector.upsert_review(6, "summary", agent="claude", comments=comments)
+
+        assert review_id == 31
+        mock_pr.create_review.assert_called_once_with(
+            body=f"summary\n{bot_marker('claude')}", event="COMMENT", comments=comments
+        )
+        older.edit.assert_called_once_with("_Superseded by a newer claude review._")
+        older.dismiss.assert_called_once()
+
+    @patch('ai.utils.pr_collector.Github')
+    def test_get_comments_excludes_bot_comments(self, mock_github):
+        """Test that marked bot comments are tracked by ID and not returned."""
+        human = MagicMock(id=1, body="Please add tests")
+        human.user.login = "reviewer"
+        bot = MagicMock(id=2, body=f"## Review\n{bot_marker('claude')}")
+        bot.user.login = "github-actions[bot]"
+        bot_inline = MagicMock(id=3, body=f"🟠 **MAJOR**: x\n{bot_marker('claude')}")
+        bot_inline.user.login = "github-actions[bot]"
+
+        mock_pr = MagicMock()
+        mock_pr.get_issue_comments.return_value = [human, bot]
+        mock_pr.get_review_comments.return_value = [bot_inline]
+
+        collector = PRCollector(token='test_token', repo_name='owner/repo')
+        bot_comments = {}
+        comments = collector.get_comments(mock_pr, bot_comments=bot_comments)
+
+        assert [c.id for c in comments] == [1]
+        assert bot_comments == {"claude": 2}
+
+    @patch('ai.utils.pr_collector.Github')
+    def test_upsert_comment_edits_known_comment(self, mock_github):
+        """Test that a known bot comment is edited without listing comments."""
+        mock_repo = MagicMock()
+        mock_pr = MagicMock()
+        existing = MagicMock(id=55)
+        mock_pr.get_issue_comment.return_value = existing
+        mock_repo.get_pull.return_value = mock_pr
+        mock_github.return_value.get_repo.return_value = mock_repo
+
+        collector = PRCollector(token='test_token', repo_name='owner/repo')
+        comment_id = collector.upsert_comment(6, "new review", agent="claude", comment_id=55)
+
+        assert comment_id == 55
+        mock_pr.get_issue_comment.assert_called_once_with(55)
+        existing.edit.assert_called_once_with(f"new review\n{bot_marker('claude')}")
+        mock_pr.get_issue_comments.assert_not_called()
+        mock_pr.create_issue_comment.assert_not_called()
+
+    @patch('ai.utils.pr_collector.Github')
+    def test_upsert_comment_finds_marker(self, mock_github):
+        """Test that the previous bot comment is found by its marker."""
+        mock_repo = MagicMock()
+        mock_pr = MagicMock()
+        other = MagicMock(id=10, body=f"old\n{bot_marker('gemini')}")
+        mine = MagicMock(id=11, body=f"old\n{bot_marker('claude')}")
+        mock_pr.get_issue_comments.return_value = [other, mine]
+        mock_pr.get_issue_comment.return_value = mine
+        mock_repo.get_pull.return_value = mock_pr
+        mock_github.return_value.get_repo.return_value = mock_repo
+
+        collector = PRCollector(token='test_token', repo_name='owner/repo')
+        comment_id = collector.upsert_comment(6, "new", agent="claude")
+
+        assert comment_id == 11
+        mock_pr.get_issue_comment.assert_called_once_with(11)
+        mock_pr.create_issue_comment.assert_not_called()
+
+    @patch('ai.utils.pr_collector.Github')
+    def test_upsert_comment_creates_when_missing(self, mock_github):
+        """Test that a new comment is created when no bot comment exists."""
+        mock_repo = MagicMock()
+        mock_pr = MagicMock()
+        mock_pr.get_issue_comments.return_value = []
+        mock_pr.create_issue_comment.return_value.id = 77
+        mock_repo.get_pull.return_value = mock_pr
+        mock_github.return_value.get_repo.return_value = mock_repo
+
+        collector = PRCollector(token='test_token', repo_name='owner/repo')
+        comment_id = collector.upsert_comment(6, "first", agent="claude")
+
+        assert comment_id == 77
+        mock_pr.create_issue_comment.assert_called_once_with(f"first\n{bot_marker('claude')}")
+
+    @patch('ai.utils.pr_collector.Github')
+    def test_list_open_prs_since(self, mock_github):
+        """Test listing open PRs stops at the first stale PR."""
+        mock_repo = MagicMock()
+        prs = [
+            MagicMock(number=3, updated_at=datetime(2026, 1, 16, 12)),
+            MagicMock(number=2, updated_at=datetime(2026, 1, 16, 1)),
+            MagicMock(number=1, updated_at=datetime(2026, 1, 10)),
+        ]
+        mock_repo.get_pulls.return_value = prs
+        mock_github.return_value.get_repo.return_value = mock_repo
+
+        collector = PRCollector(token='test_token', repo_name='owner/repo')
+        assert collector.list_open_prs(since=datetime(2026, 1, 15)) == [3, 2]
+        assert collector.list_open_prs() == [3, 2, 1]
+        mock_repo.get_pulls.assert_called_with(state='open', sort='updated', direction='desc')
+
     def test_pr_info_has_sensitive_changes(self):
         """Test sensitive path detection."""
         pr_info = PRInfo(
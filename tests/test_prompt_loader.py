@@ -10,8 +10,9 @@ from ai.utils.prompt_loader import (
     load_prompt_template,
     build_pr_context,
     build_claude_review_prompt,
+    fill_template,
 )
-from ai.utils.models import PRInfo, FileChange, Comment
+from ai.utils.models import CacheablePrompt, PRInfo, FileChange, Comment
 
 
 class TestPromptLoader:
@@ -242,5 +243,28 @@ class TestPromptLoader:
         assert pr_info.has_sensitive_changes() is True
 
 
+
+class TestCacheablePrompt:
+    """Static template prefix is kept separate for prompt caching."""
+
+    def test_fill_template_splits_at_context(self):
+        prompt = fill_template("Review rules\n\n{pr_context}\n\nRespond in JSON", "PR #1")
+        assert isinstance(prompt, CacheablePrompt)
+        assert prompt == "Review rules\n\nPR #1\n\nRespond in JSON"
+        assert prompt.prefix == "Review rules\n\n"
+        assert prompt.suffix == "PR #1\n\nRespond in JSON"
+
+    def test_fill_template_without_placeholder(self):
+        prompt = fill_template("Review rules", "PR #1")
+        assert prompt.prefix == "Review rules\n\n"
+        assert prompt.suffix == "PR #1"
+
+    def test_concatenation_keeps_prefix(self):
+        prompt = fill_template("Rules {pr_context}", "PR") + "\n\nextra"
+        assert isinstance(prompt, CacheablePrompt)
+        assert prompt.prefix == "Rules "
+        assert prompt.endswith("extra")
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,76 @@
+# tests/test_quantile_sketch.py
+"""
+Unit tests for the constant-memory quantile sketch.
+"""
+import json
+import random
+
+import pytest
+
+from ai.utils.quantile_sketch import QuantileSketch
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(42)
+    values = [rng.lognormvariate(0, 1) for _ in range(20_000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.update(values)
+
+    for q in (0.5, 0.9, 0.99):
+        assert sketch.quantile(q) == pytest.approx(_exact(values, q), rel=0.02)
+    assert sketch.count == 20_000
+    assert len(sketch._buckets) < 2048
+
+
+def test_zeros_and_empty():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+    assert sketch.summary()["p50"] is None
+
+    sketch.update([0.0, 0.0, 0.0, 5.0])
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(5.0, rel=0.01)
+
+
+def test_merge_matches_single_sketch():
+    left, right, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i in range(1, 1001):
+        (left if i % 2 else right).add(i / 100)
+        both.add(i / 100)
+    left.merge(right)
+    assert left.count == both.count
+    assert left.quantile(0.95) == both.quantile(0.95)
+
+
+def test_bucket_cap_keeps_upper_quantiles():
+    sketch = QuantileSketch(max_buckets=50)
+    sketch.update(10 ** (i / 100) for i in range(-600, 400))
+    assert len(sketch._buckets) <= 50
+    assert sketch.quantile(0.99) == pytest.approx(10 ** 3.89, rel=0.05)
+
+
+def test_summary_keys():
+    sketch = QuantileSketch()
+    sketch.update([1.0, 2.0, 3.0])
+    summary = sketch.summary()
+    assert set(summary) == {"count", "mean", "min", "max", "p50", "p90", "p95", "p99"}
+    assert summary["mean"] == 2.0
+
+
+
+def test_dict_round_trip():
+    sketch = QuantileSketch()
+    sketch.update([0.0, 0.5, 2.0, 40.0])
+    restored = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert restored.summary() == sketch.summary()
+    restored.merge(sketch)
+    assert restored.count == 8
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
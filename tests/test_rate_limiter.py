@@ -0,0 +1,146 @@
+# tests/test_rate_limiter.py
+"""
+Unit tests for the per-provider rate limiter.
+"""
+import asyncio
+import random
+import time
+
+import pytest
+from types import SimpleNamespace
+
+from ai.runners.clients.base_client import MockAIClient, ClientConfig, RateLimitError
+from ai.runners.clients.rate_limiter import (
+    TokenBucket,
+    RateLimiter,
+    backoff_delay,
+    get_rate_limiter,
+    reset_rate_limiters,
+    retry_after_from,
+    MIN_SCALE,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_limiters():
+    reset_rate_limiters()
+    yield
+    reset_rate_limiters()
+
+
+class TestTokenBucket:
+
+    def test_allows_burst_up_to_capacity(self):
+        bucket = TokenBucket(rate_per_min=60)
+        assert all(bucket.reserve(1) == 0.0 for _ in range(60))
+
+    def test_wait_grows_with_deficit(self):
+        bucket = TokenBucket(rate_per_min=60, capacity=1)
+        assert bucket.reserve(1) == 0.0
+        first = bucket.reserve(1)
+        second = bucket.reserve(1)
+        assert first == pytest.approx(1.0, abs=0.05)
+        assert second == pytest.approx(2.0, abs=0.05)
+
+    def test_scale_slows_refill(self):
+        bucket = TokenBucket(rate_per_min=60, capacity=1)
+        bucket.reserve(1)
+        assert bucket.reserve(1, scale=0.5) == pytest.approx(2.0, abs=0.05)
+
+
+class TestRateLimiter:
+
+    def test_token_quota_limits_large_requests(self):
+        limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=6000)
+        assert limiter.reserve(tokens=6000) == 0.0
+        assert limiter.reserve(tokens=600) == pytest.approx(6.0, abs=0.1)
+
+    def test_rate_limited_halves_rate_and_success_recovers(self):
+        limiter = RateLimiter(requests_per_minute=60)
+        limiter.record_rate_limited()
+        assert limiter.scale == pytest.approx(0.5)
+        for _ in range(5):
+            limiter.record_rate_limited()
+        assert limiter.scale == pytest.approx(MIN_SCALE)
+        limiter.record_success()
+        assert limiter.scale == pytest.approx(MIN_SCALE + 0.05)
+
+    def test_retry_after_pauses_all_callers(self):
+        limiter = RateLimiter(requests_per_minute=600)
+        limiter.record_rate_limited(retry_after=2.0)
+        assert limiter.reserve() == pytest.approx(2.0, abs=0.05)
+
+    def test_exhausted_quota_header_waits_for_reset(self):
+        limiter = RateLimiter(tokens_per_minute=10000)
+        limiter.record_rate_limited(headers={
+            "X-RateLimit-Remaining-Tokens": "0",
+            "X-RateLimit-Reset-Tokens": "1m30s",
+        })
+        assert limiter.reserve(tokens=10) == pytest.approx(90.0, abs=0.1)
+
+    def test_acquire_async(self):
+        limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=None)
+        limiter.reserve()
+        waited = asyncio.run(limiter.acquire_async())
+        assert waited == 0.0
+
+
+class TestHelpers:
+
+    def test_backoff_delay_is_jittered_above_base(self):
+        rng = random.Random(7)
+        delays = {round(backoff_delay(1.0, 2, rng=rng), 6) for _ in range(20)}
+        assert len(delays) > 1
+        assert all(4.0 <= d <= 6.0 for d in delays)
+
+    def test_backoff_delay_respects_retry_after(self):
+        assert backoff_delay(0.1, 0, retry_after=3.0) == 3.0
+
+    def test_retry_after_from_sdk_style_exception(self):
+        exc = Exception("429")
+        exc.response = SimpleNamespace(headers={"Retry-After": "12"})
+        assert retry_after_from(exc) == 12.0
+        exc.response = SimpleNamespace(headers={"retry-after-ms": "250"})
+        assert retry_after_from(exc) == pytest.approx(0.25)
+        assert retry_after_from(Exception("no headers")) is None
+
+    def test_registry(self):
+        assert get_rate_limiter("claude") is None
+        limiter = get_rate_limiter("claude", requests_per_minute=10)
+        assert get_rate_limiter("claude") is limiter
+
+
+class TestSendPromptIntegration:
+
+    def test_rate_limit_error_feeds_limiter(self):
+
+        class ThrottledClient(MockAIClient):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.attempts = 0
+
+            def _send_request(self, prompt, **kwargs):
+                self.attempts += 1
+                if self.attempts == 1:
+                    raise RateLimitError("slow down", retry_after=0.05)
+                return super()._send_request(prompt, **kwargs)
+
+        config = ClientConfig(max_retries=3, retry_delay=0.01, requests_per_minute=6000)
+        client = ThrottledClient(config=config)
+
+        start = time.time()
+        response = client.send_prompt("Test")
+        elapsed = time.time() - start
+
+        assert response.success is True
+        assert elapsed >= 0.05
+        limiter = get_rate_limiter("mock")
+        assert limiter.scale == pytest.approx(0.55)
+
+    def test_unlimited_by_default(self):
+        MockAIClient().send_prompt("Test")
+        assert get_rate_limiter("mock") is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,126 @@
+# tests/test_retry_policy.py
+"""
+Unit tests for the retry policy and its use in AIClient.send_prompt.
+"""
+import random
+import time
+
+import pytest
+
+from ai.runners.clients.base_client import (
+    AIClientError,
+    APIConnectionError,
+    CircuitOpenError,
+    ClientConfig,
+    MockAIClient,
+    RateLimitError,
+    TokenLimitError,
+)
+from ai.runners.clients.retry_policy import NO_RETRY, RetryPolicy, RetryStrategy
+
+
+class FlakyClient(MockAIClient):
+    """Raises the queued errors in order, then succeeds."""
+
+    def __init__(self, errors, **kwargs):
+        super().__init__(**kwargs)
+        self.errors = list(errors)
+        self.attempt_count = 0
+        self.timeouts = []
+
+    def _send_request(self, prompt: str, **kwargs):
+        self.attempt_count += 1
+        self.timeouts.append(kwargs.get('timeout'))
+        if self.errors:
+            raise self.errors.pop(0)
+        return super()._send_request(prompt, **kwargs)
+
+
+class TestRetryPolicy:
+    """Strategy lookup and delay decisions."""
+
+    def test_most_specific_strategy_wins(self):
+        policy = RetryPolicy()
+        assert policy.strategy_for(CircuitOpenError("open")) is NO_RETRY
+        assert policy.strategy_for(APIConnectionError("down")).retry is True
+        assert policy.strategy_for(TokenLimitError("too long")).retry is False
+        assert policy.strategy_for(ValueError("bad")).retry is False
+
+    def test_delay_is_jittered_and_capped(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=1.2, max_attempts=5, rng=random.Random(0))
+        state = policy.start()
+        state.attempts = 1
+        first = state.next_delay(APIConnectionError("down"))
+        assert 1.0 <= first <= 1.2
+        state.attempts = 3
+        assert state.next_delay(APIConnectionError("down")) == 1.2
+
+    def test_retry_after_is_honoured(self):
+        state = RetryPolicy(base_delay=0.01).start()
+        state.attempts = 1
+        assert state.next_delay(RateLimitError("slow down", retry_after=2.0)) == 2.0
+
+    def test_per_strategy_attempts(self):
+        policy = RetryPolicy(max_attempts=5)
+        policy.strategies[RateLimitError] = RetryStrategy(max_attempts=2)
+        state = policy.start()
+        state.attempts = 2
+        assert state.next_delay(RateLimitError("limit")) is None
+        assert state.next_delay(APIConnectionError("down")) is not None
+
+    def test_no_retry_past_deadline(self):
+        state = RetryPolicy(base_delay=1.0, deadline=0.5).start()
+        state.attempts = 1
+        assert state.next_delay(APIConnectionError("down")) is None
+        assert state.attempt_timeout(60) <= 0.5
+
+
+class TestSendPromptRetries:
+    """RetryPolicy applied by AIClient.send_prompt."""
+
+    def test_retry_metadata(self):
+        client = FlakyClient(
+            [APIConnectionError("down"), RateLimitError("limit")],
+            config=ClientConfig(max_retries=3, retry_delay=0.01),
+        )
+        response = client.send_prompt("Test")
+
+        retry = response.metadata['retry']
+        assert retry['attempts'] == 3
+        assert retry['retries'] == 2
+        assert retry['retry_wait_seconds'] > 0
+
+    def test_builtin_timeout_is_retried(self):
+        client = FlakyClient([TimeoutError("read timed out")], config=ClientConfig(retry_delay=0.01))
+        response = client.send_prompt("Test")
+        assert response.success is True
+        assert client.attempt_count == 2
+
+    def test_unknown_error_wrapped_with_cause(self):
+        client = FlakyClient([ValueError("bad parameter")], config=ClientConfig(retry_delay=0.01))
+        with pytest.raises(AIClientError) as exc_info:
+            client.send_prompt("Test")
+        assert isinstance(exc_info.value.__cause__, ValueError)
+        assert client.attempt_count == 1
+
+    def test_deadline_bounds_total_time(self):
+        client = FlakyClient(
+            [APIConnectionError("down")] * 10,
+            config=ClientConfig(max_retries=10, retry_delay=0.05, retry_deadline=0.3, circuit_failure_threshold=None),
+        )
+        started = time.monotonic()
+        with pytest.raises(APIConnectionError):
+            client.send_prompt("Test")
+        assert time.monotonic() - started < 0.3
+        assert all(timeout <= 0.3 for timeout in client.timeouts)
+
+    def test_custom_policy_from_config(self):
+        policy = RetryPolicy(max_attempts=4, base_delay=0.01)
+        policy.strategies[TokenLimitError] = RetryStrategy()
+        client = FlakyClient([TokenLimitError("shrink")], config=ClientConfig(retry_policy=policy))
+        response = client.send_prompt("Test")
+        assert response.metadata['retry']['attempts'] == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
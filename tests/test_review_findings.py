@@ -0,0 +1,170 @@
+# tests/test_review_findings.py
+"""
+Unit tests for structured review findings and inline comment mapping.
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from ai.utils.models import PRInfo, FileChange
+from ai.utils.review_findings import (
+    Finding,
+    FINDINGS_INSTRUCTIONS,
+    parse_findings,
+    build_review_comments,
+    format_review_body,
+    post_findings_review,
+    strip_findings,
+    with_findings_instructions,
+)
+
+
+def _pr() -> PRInfo:
+    pr_info = PRInfo(
+        number=7,
+        title="Add handler",
+        description="",
+        author="dev",
+        state="open",
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        base_branch="main",
+        head_branch="feature",
+        base_sha="a",
+        head_sha="b",
+    )
+    pr_info.files = [
+        FileChange(
+            filename="src/handler.py",
+            status="modified",
+            additions=2,
+            deletions=1,
+            changes=3,
+            patch="@@ -10,2 +10,3 @@\n def handle():\n-    return None\n+    data = load()\n+    return data",
+        )
+    ]
+    return pr_info
+
+
+class TestParseFindings:
+
+    def test_fenced_findings_block(self):
+        content = (
+            "Looks mostly fine.\n\n```json\n"
+            '{"findings": [{"file": "src/handler.py", "line": 11, '
+            '"severity": "major", "message": "load() can raise"}]}\n```'
+        )
+        findings = parse_findings(content)
+        assert findings == [
+            Finding(file="src/handler.py", message="load() can raise", severity="MAJOR", line=11)
+        ]
+
+    def test_claude_issues_shape(self):
+        content = '{"verdict": "REVISE_REQUIRED", "issues": [{"severity": "CRITICAL", "file": "a.py", "desc": "bad"}]}'
+        findings = parse_findings(content)
+        assert len(findings) == 1
+        assert findings[0].severity == "CRITICAL"
+        assert findings[0].line is None
+
+    def test_unparseable_content(self):
+        assert parse_findings("## Summary\nAll good") == []
+        assert parse_findings("") == []
+
+    def test_invalid_items_are_skipped(self):
+        content = '[{"file": "a.py"}, "nope", {"file": "b.py", "message": "x", "line": "abc", "severity": "weird"}]'
+        findings = parse_findings(content)
+        assert len(findings) == 1
+        assert findings[0].line is None
+        assert findings[0].severity == "MINOR"
+
+
+class TestBuildReviewComments:
+
+    def test_maps_lines_to_positions(self):
+        findings = [
+            Finding(file="src/handler.py", message="check error", severity="MAJOR", line=11),
+            Finding(file="src/handler.py", message="old code", severity="MINOR", line=11, side="LEFT"),
+        ]
+        comments, unplaced = build_review_comments(_pr(), findings)
+        assert unplaced == []
+        assert comments[0] == {
+            "path": "src/handler.py",
+            "position": 3,
+            "body": "🟠 **MAJOR**: check error",
+        }
+        assert comments[1]["position"] == 2
+
+    def test_unplaced_findings(self):
+        findings = [
+            Finding(file="src/handler.py", message="outside diff", line=100),
+            Finding(file="other.py", message="unknown file", line=1),
+            Finding(file="src/handler.py", message="file level"),
+        ]
+        comments, unplaced = build_review_comments(_pr(), findings)
+        assert comments == []
+        assert len(unplaced) == 3
+
+    def test_format_review_body(self):
+        findings = [
+            Finding(file="a.py", message="x", severity="CRITICAL", line=1),
+            Finding(file="b.py", message="y", severity="MINOR"),
+        ]
+        body = format_review_body(findings, unplaced=[findings[1]])
+        assert "Critical 1" in body
+        assert "Minor 1" in body
+        assert "General findings" in body
+        assert "`b.py`: y" in body
+
+    def test_format_review_body_empty(self):
+        assert format_review_body([], []) == "**Findings:** none"
+
+    def test_format_review_body_keeps_prose(self):
+        body = format_review_body([], [], prose="## Summary\nFine")
+        assert body == "## Summary\nFine\n\n**Findings:** none"
+
+
+def test_strip_findings_keeps_prose():
+    content = (
+        "## Summary\nLooks fine.\n\n```json\n"
+        '{"findings": [{"file": "a.py", "line": 1, "message": "x"}]}\n```\n\n'
+        "```json\n{\"config\": true}\n```\n"
+    )
+    assert strip_findings(content) == '## Summary\nLooks fine.\n\n```json\n{"config": true}\n```'
+    assert strip_findings("All good") == "All good"
+
+
+class TestPostFindingsReview:
+
+    def test_findings_posted_inline(self):
+        collector = MagicMock()
+        collector.upsert_review.return_value = 55
+        content = (
+            "Mostly fine.\n\n```json\n"
+            '{"findings": [{"file": "src/handler.py", "line": 11, "severity": "major", "message": "m"}]}\n```'
+        )
+        assert post_findings_review(collector, _pr(), "claude", content, "## Review", "footer") == (55, 1)
+        args, kwargs = collector.upsert_review.call_args
+        assert args[0] == 7 and kwargs["agent"] == "claude"
+        assert len(kwargs["comments"]) == 1
+        assert args[1].startswith("## Review\n\nMostly fine.") and "footer" in args[1]
+
+    def test_no_findings_still_replaces_review(self):
+        # Falling back to an issue comment would leave the old review on the PR
+        collector = MagicMock()
+        collector.upsert_review.return_value = 56
+        assert post_findings_review(collector, _pr(), "gemini", "All good.", "## Review", "footer") == (56, 0)
+        args, kwargs = collector.upsert_review.call_args
+        assert kwargs["comments"] == []
+        assert "All good." in args[1]
+        collector.upsert_comment.assert_not_called()
+
+
+def test_with_findings_instructions():
+    build = with_findings_instructions(lambda pr_info: f"Review PR #{pr_info.number}")
+    prompt = build(_pr())
+    assert prompt.startswith("Review PR #7")
+    assert prompt.endswith(FINDINGS_INSTRUCTIONS)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
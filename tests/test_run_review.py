@@ -0,0 +1,244 @@
+# tests/test_run_review.py
+"""
+Unit tests for the generic review runner's batch pipeline.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai.runners import run_review
+from ai.runners.clients.base_client import MockAIClient
+from ai.utils.models import PRInfo
+
+
+def _pr_info(number: int) -> PRInfo:
+    return PRInfo(
+        number=number,
+        title=f"PR {number}",
+        description="",
+        author="dev",
+        state="open",
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        base_branch="main",
+        head_branch=f"feature-{number}",
+        base_sha="a",
+        head_sha="b",
+    )
+
+
+@pytest.fixture
+def pipeline_env(monkeypatch):
+    """Stub out budget, audit log and prompt templates."""
+    state = {"spent": 0.0, "budget": 100.0, "recorded": [], "released": [], "logged": [], "ttls": []}
+
+    def fake_reserve(agent, estimate, ttl_seconds=None):
+        state["ttls"].append(ttl_seconds)
+        if state["spent"] >= state["budget"]:
+            raise run_review.BudgetExceededError("exhausted")
+        return f"res-{len(state['recorded']) + len(state['released'])}"
+
+    def fake_commit(agent, reservation_id, cost):
+        state["recorded"].append((agent, cost))
+        state["spent"] += 1.0
+
+    monkeypatch.setattr(run_review, "reserve_budget", fake_reserve)
+    monkeypatch.setattr(run_review, "commit_reservation", fake_commit)
+    monkeypatch.setattr(run_review, "release_reservation", state["released"].append)
+    monkeypatch.setattr(run_review, "log_ai_event", lambda **kw: state["logged"].append(kw))
+    monkeypatch.setitem(
+        run_review.AGENT_SPECS,
+        "mock",
+        run_review.ReviewSpec("## Mock Review", "Mock", lambda pr: f"Review PR #{pr.number}"),
+    )
+
+    collector = MagicMock()
+    collector.get_pr_info.side_effect = _pr_info
+    collector.upsert_comment.side_effect = lambda number, body, **kw: 1000 + number
+    return state, collector
+
+
+def test_pipeline_reviews_all_prs(pipeline_env):
+    state, collector = pipeline_env
+    client = MockAIClient(response_text="LGTM")
+    done = []
+
+    report = asyncio.run(run_review.run_pipeline(
+        [1, 2, 3, 4, 5], "mock", collector, client, concurrency=2, on_job_done=done.append,
+    ))
+
+    assert report.total == 5
+    assert report.succeeded == 5
+    assert report.failed == 0
+    assert client.call_count == 5
+    assert collector.upsert_comment.call_count == 5
+    assert sorted(job.pr_number for job in done) == [1, 2, 3, 4, 5]
+    assert all(job.comment_id == 1000 + job.pr_number for job in done)
+    assert len(state["recorded"]) == 5
+    assert len(state["logged"]) == 5
+    assert set(report.stage_seconds) == set(run_review.STAGES)
+    assert "5 reviewed" in report.format()
+
+
+def test_pipeline_isolates_failures(pipeline_env):
+    state, collector = pipeline_env
+
+    def flaky(number):
+        if number == 2:
+            raise ValueError("not found")
+        return _pr_info(number)
+
+    collector.get_pr_info.side_effect = flaky
+    report = asyncio.run(run_review.run_pipeline(
+        [1, 2, 3], "mock", collector, MockAIClient(), concurrency=3,
+    ))
+    assert report.succeeded == 2
+    assert report.failed == 1
+    failed = [e for e in state["logged"] if e["status"] == "failed"]
+    assert failed[0]["error_type"] == "collect_failed"
+
+
+def test_pipeline_stops_when_budget_exhausted(pipeline_env):
+    state, collector = pipeline_env
+    state["budget"] = 2.0
+    client = MockAIClient()
+
+    report = asyncio.run(run_review.run_pipeline(
+        list(range(1, 11)), "mock", collector, client, concurrency=1,
+    ))
+
+    assert report.budget_exhausted is True
+    assert report.succeeded == 2
+    assert report.skipped == 8
+    assert client.call_count == 2
+    assert "Budget exhausted" in report.format()
+
+
+def test_pipeline_releases_reservation_on_model_error(pipeline_env):
+    state, collector = pipeline_env
+    client = MockAIClient()
+    client.send_prompt = MagicMock(side_effect=RuntimeError("boom"))
+
+    report = asyncio.run(run_review.run_pipeline(
+        [1], "mock", collector, client, concurrency=1,
+    ))
+
+    assert report.failed == 1
+    assert state["recorded"] == []
+    assert len(state["released"]) == 1
+
+
+def test_pipeline_posts_review_when_ledger_commit_fails(pipeline_env, monkeypatch):
+    state, collector = pipeline_env
+
+    def locked(agent, reservation_id, cost):
+        raise OSError("database is locked")
+
+    monkeypatch.setattr(run_review, "commit_reservation", locked)
+    report = asyncio.run(run_review.run_pipeline(
+        [1, 2], "mock", collector, MockAIClient(), concurrency=2,
+    ))
+
+    assert report.succeeded == 2
+    assert report.failed == 0
+    assert collector.upsert_comment.call_count == 2
+
+
+def test_pipeline_dry_run(pipeline_env):
+    state, collector = pipeline_env
+    report = asyncio.run(run_review.run_pipeline(
+        [1, 2], "mock", collector, MockAIClient(), dry_run=True,
+    ))
+    assert report.succeeded == 2
+    assert state["recorded"] == []
+    collector.upsert_comment.assert_not_called()
+
+
+def test_provider_batch_maps_results_to_prs(pipeline_env):
+    state, collector = pipeline_env
+    client = MockAIClient(response_text="LGTM", batch_polls=2)
+
+    report = run_review.run_provider_batch(
+        [1, 2, 3], "mock", collector, client, poll_interval=0,
+    )
+
+    assert report.succeeded == 3
+    assert client.call_count == 3
+    assert len(client.batches) == 1
+    bodies = {c.args[0]: c.args[1] for c in collector.upsert_comment.call_args_list}
+    assert set(bodies) == {1, 2, 3}
+    assert len(state["recorded"]) == 3
+    assert all("batch_api" in e["tags"] for e in state["logged"])
+    assert all(e["metadata"]["batch_id"] == "mock_batch_1" for e in state["logged"])
+    # Reservations are held for the whole wait on the batch
+    assert all(ttl > run_review.DEFAULT_BATCH_TIMEOUT_SECONDS for ttl in state["ttls"])
+
+
+def test_provider_batch_ledger_error_does_not_abort_other_prs(pipeline_env, monkeypatch):
+    state, collector = pipeline_env
+
+    calls = []
+
+    def flaky_commit(agent, reservation_id, cost):
+        calls.append(reservation_id)
+        if len(calls) == 1:
+            raise OSError("database is locked")
+        state["recorded"].append((agent, cost))
+
+    monkeypatch.setattr(run_review, "commit_reservation", flaky_commit)
+    report = run_review.run_provider_batch([1, 2, 3], "mock", collector, MockAIClient(), poll_interval=0)
+
+    assert report.succeeded == 3
+    assert len(state["recorded"]) == 2
+    assert collector.upsert_comment.call_count == 3
+
+
+def test_provider_batch_releases_failed_requests(pipeline_env):
+    state, collector = pipeline_env
+    client = MockAIClient(batch_polls=0)
+    results = client._batch_results
+    client._batch_results = lambda batch_id: {
+        k: v for k, v in results(batch_id).items() if k != run_review.batch_custom_id(2)
+    }
+
+    report = run_review.run_provider_batch([1, 2], "mock", collector, client, poll_interval=0)
+
+    assert report.succeeded == 1
+    assert report.failed == 1
+    assert len(state["recorded"]) == 1
+    assert len(state["released"]) == 1
+
+
+def test_provider_batch_skips_prs_over_budget(pipeline_env, monkeypatch):
+    state, collector = pipeline_env
+    reserved = []
+
+    def reserve_two(agent, estimate, ttl_seconds=None):
+        if len(reserved) >= 2:
+            raise run_review.BudgetExceededError("exhausted")
+        reserved.append(estimate)
+        return f"res-{len(reserved)}"
+
+    monkeypatch.setattr(run_review, "reserve_budget", reserve_two)
+    client = MockAIClient()
+    report = run_review.run_provider_batch([1, 2, 3, 4], "mock", collector, client, poll_interval=0)
+
+    assert report.succeeded == 2
+    assert report.skipped == 2
+    assert report.budget_exhausted is True
+    assert list(client.batches["mock_batch_1"]["prompts"]) == ["pr-1", "pr-2"]
+
+
+def test_parse_since():
+    assert run_review.parse_since("24h") == timedelta(hours=24)
+    assert run_review.parse_since("90m") == timedelta(minutes=90)
+    assert run_review.parse_since("2d") == timedelta(days=2)
+    with pytest.raises(argparse.ArgumentTypeError):
+        run_review.parse_since("yesterday")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
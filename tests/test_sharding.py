@@ -0,0 +1,177 @@
+# tests/test_sharding.py
+"""
+Unit tests for map-reduce review sharding.
+"""
+import pytest
+from datetime import datetime
+
+from ai.runners.clients.base_client import MockAIClient, AIClientError
+from ai.runners.sharding import (
+    module_key,
+    estimate_file_tokens,
+    shard_files,
+    run_sharded_review,
+    estimate_sharded_cost,
+)
+from ai.utils.models import PRInfo, FileChange
+
+
+def _file(name: str, patch_lines: int = 10) -> FileChange:
+    patch = "@@ -1,1 +1,{n} @@\n".format(n=patch_lines) + "\n".join(
+        f"+line {i} of {name}" for i in range(patch_lines)
+    )
+    return FileChange(
+        filename=name,
+        status="modified",
+        additions=patch_lines,
+        deletions=0,
+        changes=patch_lines,
+        patch=patch,
+    )
+
+
+def _pr(files) -> PRInfo:
+    return PRInfo(
+        number=42,
+        title="Huge refactor",
+        description="Touches everything",
+        author="dev",
+        state="open",
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        base_branch="main",
+        head_branch="refactor",
+        base_sha="a",
+        head_sha="b",
+        changed_files=len(files),
+        files=files,
+    )
+
+
+class TestShardFiles:
+
+    def test_module_key(self):
+        assert module_key("src/api/routes.py") == "src/api"
+        assert module_key("src/api/v1/routes.py") == "src/api"
+        assert module_key("README.md") == "."
+
+    def test_estimate_caps_diff_lines(self):
+        small = estimate_file_tokens(_file("a.py", patch_lines=50))
+        large = estimate_file_tokens(_file("a.py", patch_lines=5000))
+        assert large < small * 2
+
+    def test_every_file_in_exactly_one_shard(self):
+        files = [_file(f"pkg{i % 7}/mod/file{i}.py") for i in range(200)]
+        shards = shard_files(files, max_tokens=2000, max_files=20)
+        flat = [f.filename for shard in shards for f in shard]
+        assert sorted(flat) == sorted(f.filename for f in files)
+        assert all(len(shard) <= 20 for shard in shards)
+
+    def test_token_bound(self):
+        files = [_file(f"pkg/file{i}.py", patch_lines=40) for i in range(30)]
+        limit = estimate_file_tokens(files[0]) * 5
+        shards = shard_files(files, max_tokens=limit, max_files=100)
+        for shard in shards:
+            assert sum(estimate_file_tokens(f) for f in shard) <= limit
+
+    def test_directory_affinity(self):
+        files = [_file("web/ui/a.tsx"), _file("api/b.py"), _file("web/ui/c.tsx"), _file("api/d.py")]
+        shards = shard_files(files, max_tokens=10_000, max_files=2)
+        as_names = [sorted(f.filename for f in shard) for shard in shards]
+        assert ["api/b.py", "api/d.py"] in as_names
+        assert ["web/ui/a.tsx", "web/ui/c.tsx"] in as_names
+
+
+class TestRunShardedReview:
+
+    def test_single_shard_skips_synthesis(self):
+        client = MockAIClient(response_text="ok")
+        pr = _pr([_file("a.py")])
+        response = run_sharded_review(client, pr, lambda p: f"review {p.number}")
+        assert client.call_count == 1
+        assert response.content == "ok"
+
+    def test_map_then_reduce(self):
+        client = MockAIClient(response_text="findings")
+        files = [_file(f"pkg{i}/file.py", patch_lines=40) for i in range(6)]
+        pr = _pr(files)
+        seen = []
+
+        def build(p):
+            seen.append([f.filename for f in p.files])
+            return "review " + ",".join(f.filename for f in p.files)
+
+        response = run_sharded_review(client, pr, build, shard_tokens=estimate_file_tokens(files[0]) * 2)
+        shards = response.metadata["shards"]
+        assert shards == 3
+        assert client.call_count == shards + 1
+        assert sorted(name for names in seen for name in names) == sorted(f.filename for f in files)
+        assert response.input_tokens > 0
+        assert response.total_tokens == response.input_tokens + response.output_tokens
+
+    def test_merged_response_sums_cache_tokens(self):
+
+        class CachingClient(MockAIClient):
+            def _send_request(self, prompt, **kwargs):
+                raw = super()._send_request(prompt, **kwargs)
+                raw['usage'].update(cache_read_tokens=3, cache_write_tokens=1)
+                return raw
+
+        client = CachingClient()
+        files = [_file(f"pkg{i}/file.py", patch_lines=40) for i in range(4)]
+        response = run_sharded_review(
+            client, _pr(files), lambda p: " ".join(f.filename for f in p.files),
+            shard_tokens=estimate_file_tokens(files[0]),
+        )
+        calls = response.metadata["shards"] + 1
+        assert response.cache_read_tokens == 3 * calls
+        assert response.cache_write_tokens == calls
+
+    def test_partial_failure_is_reported(self):
+
+        class FlakyClient(MockAIClient):
+            def _send_request(self, prompt, **kwargs):
+                if "pkg0/" in prompt and "Shard" not in prompt:
+                    raise ValueError("boom")
+                return super()._send_request(prompt, **kwargs)
+
+        client = FlakyClient()
+        files = [_file(f"pkg{i}/file.py", patch_lines=40) for i in range(4)]
+        response = run_sharded_review(
+            client, _pr(files), lambda p: " ".join(f.filename for f in p.files),
+            shard_tokens=estimate_file_tokens(files[0]),
+        )
+        assert response.metadata["shard_failures"] == 1
+
+    def test_estimate_covers_every_call(self):
+
+        class PricedClient(MockAIClient):
+            COST_PER_1M_INPUT = 3.0
+            COST_PER_1M_OUTPUT = 15.0
+
+        client = PricedClient()
+        files = [_file(f"pkg{i}/file.py", patch_lines=40) for i in range(3)]
+        build = lambda p: " ".join(f.filename for f in p.files)
+        single = client.get_cost_estimate(build(_pr(files)), 1000)
+        assert estimate_sharded_cost(client, _pr(files), build, 1000) == single
+        sharded = estimate_sharded_cost(
+            client, _pr(files), build, 1000, shard_tokens=estimate_file_tokens(files[0])
+        )
+        assert sharded > 4 * client.calculate_cost(0, 1000)  # 3 shards + synthesis
+
+    def test_all_shards_failing_raises(self):
+
+        class BrokenClient(MockAIClient):
+            def _send_request(self, prompt, **kwargs):
+                raise ValueError("boom")
+
+        files = [_file(f"pkg{i}/file.py", patch_lines=40) for i in range(3)]
+        with pytest.raises(AIClientError):
+            run_sharded_review(
+                BrokenClient(), _pr(files), lambda p: "x",
+                shard_tokens=estimate_file_tokens(files[0]),
+            )
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
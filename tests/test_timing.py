@@ -0,0 +1,83 @@
+# tests/test_timing.py
+"""
+Unit tests for per-stage latency instrumentation.
+"""
+import json
+import time
+
+import pytest
+
+from ai.runners.clients.base_client import MockAIClient
+from ai.runners.clients.failover import FailoverClient
+from ai.utils import audit_logger
+from ai.utils.timing import StageTimer, current_stage_timer, span, timed
+
+
+@timed("prompt")
+def _build(delay: float) -> str:
+    time.sleep(delay)
+    return "prompt"
+
+
+def test_spans_accumulate_per_stage():
+    with StageTimer().activate() as timer:
+        _build(0.01)
+        _build(0.01)
+        with span("post"):
+            time.sleep(0.01)
+    assert set(timer.stage_seconds) == {"prompt", "post"}
+    assert timer.stage_seconds["prompt"] >= 0.02
+    assert current_stage_timer() is None
+
+
+def test_nested_spans_count_once():
+    with StageTimer().activate() as timer:
+        with span("model"):
+            with span("model"):
+                with span("budget"):
+                    time.sleep(0.01)
+    assert list(timer.stage_seconds) == ["model"]
+    assert timer.stage_seconds["model"] < 0.5
+
+
+def test_no_timer_is_noop():
+    assert _build(0) == "prompt"
+    with span("collect"):
+        pass
+
+
+def test_client_calls_recorded_as_model():
+    client = FailoverClient(MockAIClient(), [])
+    with StageTimer().activate() as timer:
+        client.send_prompt("Review this")
+    assert list(timer.stage_seconds) == ["model"]
+
+
+def test_stage_seconds_in_events_and_summary(monkeypatch, tmp_path):
+    monkeypatch.setattr(audit_logger, "LOG_ROOT", tmp_path)
+    for i in range(20):
+        with StageTimer().activate() as timer:
+            timer.record("collect", 0.1 * (i + 1))
+            timer.record("model", 2.0)
+            path = audit_logger.log_ai_event(
+                agent="claude", pr_number=i, status="success", decision_reason="ok"
+            )
+    audit_logger.log_ai_event(
+        agent="claude", pr_number=99, status="success", decision_reason="ok",
+        metadata={"stage_seconds": {"model": 4.0}},
+    )
+    audit_logger.flush_events()
+
+    first = json.loads(path.read_text().splitlines()[0])
+    assert first["metadata"]["stage_seconds"] == {"collect": 0.1, "model": 2.0}
+
+    stages = audit_logger.build_daily_summary(path.parent.name)["stage_seconds"]
+    assert stages["collect"]["count"] == 20
+    assert stages["collect"]["p50"] == pytest.approx(1.0, rel=0.05)
+    assert stages["collect"]["p95"] == pytest.approx(1.9, rel=0.05)
+    assert stages["model"]["count"] == 21
+    assert set(stages["model"]) == {"count", "mean", "min", "max", "p50", "p95"}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
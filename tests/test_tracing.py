@@ -0,0 +1,163 @@
+# tests/test_tracing.py
+"""
+Unit tests for tracing spans, context propagation and OTLP/JSON export.
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai.runners import run_review
+from ai.runners.clients.base_client import MockAIClient
+from ai.runners.clients.hedging import HedgedClient
+from ai.utils import tracing
+from ai.utils.models import PRInfo
+from ai.utils.tracing import (
+    FileSpanExporter,
+    SpanContext,
+    Tracer,
+    critical_path,
+    current_span,
+    propagate_context,
+    read_trace_file,
+    start_span,
+    traced,
+)
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    """Install a file-exporting tracer; yields the trace file path."""
+    monkeypatch.delenv(tracing.TRACEPARENT_ENV, raising=False)
+    path = tmp_path / "traces.jsonl"
+    tracing.set_tracer(Tracer(FileSpanExporter(path)))
+    yield path
+    tracing.set_tracer(None)
+
+
+def _spans(path):
+    tracing.get_tracer().flush()
+    return {span["name"]: span for span in read_trace_file(path)}
+
+
+def test_disabled_tracer_uses_noop_spans(monkeypatch):
+    monkeypatch.delenv(tracing.TRACE_FILE_ENV, raising=False)
+    tracing.set_tracer(None)
+    with start_span("anything") as span:
+        span.set_attribute("k", "v")
+        assert span is tracing.NOOP_SPAN
+    assert current_span() is tracing.NOOP_SPAN
+
+
+def test_nested_spans_export_otlp_json(trace_file):
+    with start_span("root", attributes={"pr.number": 7}):
+        with start_span("child") as child:
+            child.add_event("retry", {"attempt": 1})
+    with pytest.raises(ValueError):
+        with start_span("broken"):
+            raise ValueError("boom")
+
+    tracing.get_tracer().flush()
+    request = json.loads(trace_file.read_text().splitlines()[0])
+    resource = request["resourceSpans"][0]
+    assert resource["resource"]["attributes"][0] == {"key": "service.name", "value": {"stringValue": "ai-collab-starter"}}
+    raw = {span["name"]: span for span in resource["scopeSpans"][0]["spans"]}
+    assert raw["root"]["attributes"] == [{"key": "pr.number", "value": {"intValue": "7"}}]
+    assert raw["child"]["parentSpanId"] == raw["root"]["spanId"]
+    assert raw["child"]["traceId"] == raw["root"]["traceId"]
+    assert raw["child"]["events"][0]["name"] == "retry"
+    assert raw["broken"]["status"] == {"code": tracing.STATUS_ERROR, "message": "boom"}
+    assert "parentSpanId" not in raw["broken"]
+
+
+def test_context_crosses_threads_and_tasks(trace_file):
+    @traced("worker")
+    def work(n):
+        return n
+
+    @traced("task")
+    async def task():
+        await asyncio.to_thread(work, 2)
+
+    async def fan_out():
+        await asyncio.gather(task(), task())
+
+    with start_span("root"):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            assert pool.submit(propagate_context(work), 1).result() == 1
+        asyncio.run(fan_out())
+
+    tracing.get_tracer().flush()
+    spans = read_trace_file(trace_file)
+    by_id = {s["span_id"]: s for s in spans}
+    root = next(s for s in spans if s["name"] == "root")
+    tasks = [s for s in spans if s["name"] == "task"]
+    workers = [s for s in spans if s["name"] == "worker"]
+    assert len(tasks) == 2 and len(workers) == 3
+    assert all(s["parent_id"] == root["span_id"] for s in tasks)
+    assert sum(by_id[w["parent_id"]]["name"] == "task" for w in workers) == 2
+    assert len({s["trace_id"] for s in spans}) == 1
+
+
+def test_remote_parent_from_traceparent(tmp_path, monkeypatch):
+    parent = SpanContext("ab" * 16, "cd" * 8)
+    monkeypatch.setenv(tracing.TRACEPARENT_ENV, parent.traceparent)
+    path = tmp_path / "traces.jsonl"
+    tracing.set_tracer(Tracer(FileSpanExporter(path)))
+    try:
+        with start_span("runner"):
+            assert tracing.current_traceparent().startswith(f"00-{parent.trace_id}-")
+        span = _spans(path)["runner"]
+    finally:
+        tracing.set_tracer(None)
+    assert (span["trace_id"], span["parent_id"]) == (parent.trace_id, parent.span_id)
+    assert SpanContext.from_traceparent("00-xyz-1-01") is None
+
+
+def test_client_call_under_hedge_span(trace_file):
+    client = HedgedClient(MockAIClient(response_text="ok"), default_delay=0.5, charge=False)
+    client.send_prompt("Review this")
+
+    spans = _spans(trace_file)
+    call, hedge = spans["ai.send_prompt"], spans["ai.hedge"]
+    assert call["parent_id"] == hedge["span_id"]  # sent from the hedge pool thread
+    assert call["attributes"]["gen_ai.system"] == "mock"
+    assert int(call["attributes"]["ai.attempts"]) == 1
+    assert hedge["attributes"]["ai.hedged"] is False
+
+
+def test_pipeline_trace_and_critical_path(trace_file, monkeypatch):
+    monkeypatch.setattr(run_review, "log_ai_event", lambda **kw: None)
+    monkeypatch.setitem(
+        run_review.AGENT_SPECS,
+        "mock",
+        run_review.ReviewSpec("## Mock Review", "Mock", lambda pr: f"Review PR #{pr.number}"),
+    )
+    collector = MagicMock()
+    collector.get_pr_info.side_effect = lambda n: PRInfo(
+        number=n, title="t", description="", author="dev", state="open",
+        created_at=datetime.now(), updated_at=datetime.now(),
+        base_branch="main", head_branch="f", base_sha="a", head_sha="b",
+    )
+    asyncio.run(run_review.run_pipeline([1, 2], "mock", collector, MockAIClient(), dry_run=True))
+
+    tracing.get_tracer().flush()
+    spans = read_trace_file(trace_file)
+    by_id = {s["span_id"]: s for s in spans}
+    batch = next(s for s in spans if s["name"] == "review.batch")
+    prs = [s for s in spans if s["name"] == "review.pr"]
+    assert len(prs) == 2 and all(s["parent_id"] == batch["span_id"] for s in prs)
+    calls = [s for s in spans if s["name"] == "ai.send_prompt"]
+    assert len(calls) == 2
+    assert all(by_id[s["parent_id"]]["name"] == "review.model" for s in calls)
+
+    pr = prs[0]
+    path = [s["name"] for s in critical_path(spans, pr["span_id"])]
+    assert path[0] == "review.pr" and path[1] == "review.post"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])